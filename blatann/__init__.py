@@ -1,5 +1,24 @@
-from pc_ble_driver_py import config
-config.__conn_ic_id__ = "NRF52"
+import importlib
 
-from blatann.device import BleDevice
-from blatann import utils
+# Everything is imported on first access (PEP 562) so that `import blatann` stays cheap.
+# Loading BleDevice pulls in the driver, the event and type definitions, GAP and GATT
+_lazy_attributes = {
+    "BleDevice": "blatann.device",
+    "BleDevicePool": "blatann.device_pool",
+}
+_lazy_submodules = {"utils"}
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        value = getattr(importlib.import_module(_lazy_attributes[name]), name)
+    elif name in _lazy_submodules:
+        value = importlib.import_module("{}.{}".format(__name__, name))
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes) | _lazy_submodules)
@@ -0,0 +1,356 @@
+"""
+asyncio facade over the blocking/callback-based blatann API.
+
+Each function starts the same operation as its synchronous counterpart and returns a coroutine which resolves
+once the operation completes. Results are handed from the driver's event thread to the event loop with
+``loop.call_soon_threadsafe``, so awaiting any number of operations does not tie up a thread per operation.
+
+.. note:: Starting an operation still issues the driver call (a UART round-trip) from the calling thread,
+   only the wait for its completion is asynchronous
+
+:Example:
+
+>>> peer = await aio.connect(ble_device, peer_address)
+>>> await aio.discover_services(peer)
+>>> char = peer.database.find_characteristic(my_uuid)
+>>> async with await aio.subscribe(char) as notifications:
+>>>     async for event_args in notifications:
+>>>         print(event_args.value)
+"""
+from __future__ import annotations
+import asyncio
+import logging
+from typing import List, Optional
+
+from blatann.event_args import (ReadCompleteEventArgs, ReadByUuidCompleteEventArgs, WriteCompleteEventArgs,
+                                SubscriptionWriteCompleteEventArgs, NotificationReceivedEventArgs,
+                                MtuSizeUpdatedEventArgs, DatabaseDiscoveryCompleteEventArgs)
+from blatann.exceptions import TimeoutError
+from blatann.gap.advertise_data import ScanReport, ScanReportCollection
+from blatann.waitables.waitable import Waitable
+
+logger = logging.getLogger(__name__)
+
+
+def _call_soon_threadsafe(loop, callback, *args):
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        # The event loop was closed while the operation was in progress, nobody is listening anymore
+        pass
+
+
+async def wait(waitable: Waitable, timeout: float = None):
+    """
+    Awaits the completion of any Waitable without blocking the event loop or a thread
+
+    :param waitable: The waitable to await
+    :param timeout: How long to wait, or ``None`` to wait indefinitely
+    :return: The result of the asynchronous operation, the same as :meth:`Waitable.wait` would return
+    :raises: blatann.exceptions.TimeoutError
+    """
+    # Awaits the waitable itself, timing out or cancelling the wait cleans up the waitable (see Waitable.to_future())
+    try:
+        return await asyncio.wait_for(waitable, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError("Timed out waiting for event to occur. "
+                           "Waitable type: {}".format(waitable.__class__.__name__))
+
+
+async def _wait_event_args(waitable, timeout):
+    _, event_args = await wait(waitable, timeout)
+    return event_args
+
+
+async def connect(ble_device, peer_address, connection_params=None, timeout: float = None):
+    """
+    Connects to a peripheral. See :meth:`blatann.device.BleDevice.connect`
+
+    :type ble_device: blatann.device.BleDevice
+    :param peer_address: The address of the peer to connect to
+    :type peer_address: blatann.peer.PeerAddress
+    :param connection_params: Optional connection parameters to use. If not specified, uses the set default
+    :type connection_params: blatann.peer.ConnectionParameters
+    :param timeout: How long to wait, or ``None`` to wait until the connection attempt times out
+    :return: The connected peripheral, or ``None`` if the connection attempt timed out
+    :rtype: blatann.peer.Peripheral
+    """
+    return await wait(ble_device.connect(peer_address, connection_params), timeout)
+
+
+async def start_scan(scanner, scan_parameters=None, clear_scan_reports=True,
+                     timeout: float = None) -> ScanReportCollection:
+    """
+    Runs a scan to completion. See :meth:`blatann.gap.scanning.Scanner.start_scan`.
+    Use :func:`scan_reports` to process the reports as they are received instead
+
+    :type scanner: blatann.gap.scanning.Scanner
+    :param scan_parameters: Optional scan parameters. Uses default if not specified
+    :param clear_scan_reports: Flag to clear out previous scan reports
+    :param timeout: How long to wait, or ``None`` to wait until the scan times out
+    :return: The advertising packets found
+    """
+    return await wait(scanner.start_scan(scan_parameters, clear_scan_reports), timeout)
+
+
+async def discover_services(peer, timeout: float = None) -> DatabaseDiscoveryCompleteEventArgs:
+    """
+    Discovers the peer's database. See :meth:`blatann.peer.Peer.discover_services`
+
+    :type peer: blatann.peer.Peer
+    :param timeout: How long to wait, or ``None`` to wait indefinitely
+    :return: The discovery event args
+    """
+    return await _wait_event_args(peer.discover_services(), timeout)
+
+
+async def read_by_uuid(peer, uuid, handle_range=(0x0001, 0xFFFF),
+                      timeout: float = None) -> ReadByUuidCompleteEventArgs:
+    """
+    Reads the peer's characteristics with the given UUID without discovering its database.
+    See :meth:`blatann.peer.Peer.read_by_uuid`
+
+    :type peer: blatann.peer.Peer
+    :type uuid: blatann.uuid.Uuid
+    :param handle_range: The (first, last) handles of the range to search
+    :param timeout: How long to wait, or ``None`` to wait indefinitely
+    :return: The read by UUID complete event args
+    """
+    return await _wait_event_args(peer.read_by_uuid(uuid, handle_range), timeout)
+
+
+async def exchange_mtu(peer, mtu_size=None, timeout: float = None) -> MtuSizeUpdatedEventArgs:
+    """
+    Runs the MTU exchange procedure. See :meth:`blatann.peer.Peer.exchange_mtu`
+
+    :type peer: blatann.peer.Peer
+    :param mtu_size: Optional MTU size to use
+    :param timeout: How long to wait, or ``None`` to wait indefinitely
+    :return: The MTU updated event args
+    """
+    return await _wait_event_args(peer.exchange_mtu(mtu_size), timeout)
+
+
+async def read(characteristic, timeout: float = None) -> ReadCompleteEventArgs:
+    """
+    Reads a characteristic. See :meth:`blatann.gatt.gattc.GattcCharacteristic.read`
+
+    :type characteristic: blatann.gatt.gattc.GattcCharacteristic
+    :param timeout: How long to wait, or ``None`` to wait indefinitely
+    :return: The read complete event args
+    """
+    return await _wait_event_args(characteristic.read(), timeout)
+
+
+async def read_multiple(database, characteristics, timeout: float = None,
+                        fixed_length=False) -> List[ReadCompleteEventArgs]:
+    """
+    Reads several characteristics, batching fixed length values into as few requests as possible.
+    See :meth:`blatann.gatt.gattc.GattcDatabase.read_multiple`
+
+    :type database: blatann.gatt.gattc.GattcDatabase
+    :param characteristics: The characteristics to read
+    :param fixed_length: True if the characteristics' values never change length, so they can be batched
+    :param timeout: How long to wait for all of the reads, or ``None`` to wait indefinitely
+    :return: The read complete event args of each characteristic, in the order given
+    :raises: blatann.exceptions.TimeoutError
+    """
+    waitables = database.read_multiple(characteristics, fixed_length)
+    # Cancelling the gather on timeout cleans up the reads which did not complete
+    reads = asyncio.gather(*(_wait_event_args(w, None) for w in waitables))
+    try:
+        return list(await asyncio.wait_for(reads, timeout))
+    except asyncio.TimeoutError:
+        raise TimeoutError("Timed out waiting for {} reads to complete".format(len(waitables)))
+
+
+async def write(characteristic, data, timeout: float = None) -> WriteCompleteEventArgs:
+    """
+    Writes a characteristic. See :meth:`blatann.gatt.gattc.GattcCharacteristic.write`
+
+    :type characteristic: blatann.gatt.gattc.GattcCharacteristic
+    :param data: The data to write
+    :param timeout: How long to wait, or ``None`` to wait indefinitely
+    :return: The write complete event args
+    """
+    return await _wait_event_args(characteristic.write(data), timeout)
+
+
+async def write_without_response(characteristic, data, timeout: float = None) -> WriteCompleteEventArgs:
+    """
+    Writes a characteristic without response. See :meth:`blatann.gatt.gattc.GattcCharacteristic.write_without_response`
+
+    :type characteristic: blatann.gatt.gattc.GattcCharacteristic
+    :param data: The data to write
+    :param timeout: How long to wait, or ``None`` to wait indefinitely
+    :return: The write complete event args, once all of the data was transmitted
+    """
+    return await _wait_event_args(characteristic.write_without_response(data), timeout)
+
+
+async def subscribe(characteristic, prefer_indications=False, max_queue_size=0,
+                    timeout: float = None) -> NotificationStream:
+    """
+    Subscribes to a characteristic's notifications or indications.
+    See :meth:`blatann.gatt.gattc.GattcCharacteristic.subscribe`
+
+    :type characteristic: blatann.gatt.gattc.GattcCharacteristic
+    :param prefer_indications: If the peripheral supports both, subscribe to indications instead of notifications
+    :param max_queue_size: The number of received notifications to buffer until the oldest ones are discarded.
+                           0 to buffer everything
+    :param timeout: How long to wait for the subscription to complete, or ``None`` to wait indefinitely
+    :return: An async iterator of the notifications received.
+             The subscription's result is available in its ``subscription_result`` attribute
+    """
+    stream = NotificationStream(characteristic, asyncio.get_running_loop(), max_queue_size)
+    try:
+        stream.subscription_result = await _wait_event_args(
+            characteristic.subscribe(stream._on_notification, prefer_indications), timeout)
+    except BaseException:
+        stream.close()
+        raise
+    return stream
+
+
+def scan_reports(scanner, scan_parameters=None, clear_scan_reports=True, max_queue_size=0) -> ScanReportStream:
+    """
+    Starts a scan and returns an async iterator of the scan reports as they are received.
+    The iterator ends when the scan times out. Closing the iterator stops the scan
+
+    :type scanner: blatann.gap.scanning.Scanner
+    :param scan_parameters: Optional scan parameters. Uses default if not specified
+    :param clear_scan_reports: Flag to clear out previous scan reports
+    :param max_queue_size: The number of received reports to buffer until the oldest ones are discarded.
+                           0 to buffer everything
+    """
+    stream = ScanReportStream(scanner, asyncio.get_running_loop(), max_queue_size)
+    try:
+        scanner.start_scan(scan_parameters, clear_scan_reports)
+    except BaseException:
+        stream.close()
+        raise
+    return stream
+
+
+class _AsyncStream(object):
+    """
+    Async iterator fed from the driver's event thread
+    """
+    _END = object()
+
+    def __init__(self, loop, max_queue_size=0):
+        self._loop = loop
+        self._queue = asyncio.Queue(max_queue_size)
+        self._closed = False
+        self.dropped = 0
+        """The number of items discarded because the queue was full"""
+
+    def _put_threadsafe(self, item):
+        _call_soon_threadsafe(self._loop, self._put, item)
+
+    def _put(self, item):
+        if self._closed and item is not self._END:
+            # Handed off by the event thread before the stream was closed
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    def _end_threadsafe(self):
+        _call_soon_threadsafe(self._loop, self._end)
+
+    def _end(self):
+        self._closed = True
+        self._put(self._END)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is self._END:
+            raise StopAsyncIteration
+        return item
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Stops receiving items. Items already received can still be iterated
+        """
+        raise NotImplementedError()
+
+
+class NotificationStream(_AsyncStream):
+    """
+    Async iterator of the notifications/indications received for a characteristic
+    """
+    def __init__(self, characteristic, loop, max_queue_size=0):
+        super(NotificationStream, self).__init__(loop, max_queue_size)
+        self.characteristic = characteristic
+        self.subscription_result: Optional[SubscriptionWriteCompleteEventArgs] = None
+
+    def _on_notification(self, characteristic, event_args):
+        self._put_threadsafe(event_args)
+
+    async def __anext__(self) -> NotificationReceivedEventArgs:
+        return await super(NotificationStream, self).__anext__()
+
+    def close(self):
+        """
+        Stops receiving notifications without unsubscribing on the peer
+        """
+        if not self._closed:
+            self.characteristic.on_notification_received.deregister(self._on_notification)
+            self._end()
+
+    async def unsubscribe(self, timeout: float = None) -> SubscriptionWriteCompleteEventArgs:
+        """
+        Stops receiving notifications and unsubscribes on the peer
+
+        :param timeout: How long to wait for the unsubscription to complete, or ``None`` to wait indefinitely
+        :return: The unsubscription's event args
+        """
+        self.close()
+        return await _wait_event_args(self.characteristic.unsubscribe(), timeout)
+
+
+class ScanReportStream(_AsyncStream):
+    """
+    Async iterator of the scan reports received during a scan
+    """
+    def __init__(self, scanner, loop, max_queue_size=0):
+        super(ScanReportStream, self).__init__(loop, max_queue_size)
+        self.scanner = scanner
+        scanner.on_scan_received.register(self._on_scan_report)
+        scanner.on_scan_timeout.register(self._on_scan_timeout)
+
+    def _on_scan_report(self, ble_device, scan_report):
+        self._put_threadsafe(scan_report)
+
+    def _on_scan_timeout(self, ble_device, scan_report_collection):
+        self._deregister()
+        self._end_threadsafe()
+
+    def _deregister(self):
+        self.scanner.on_scan_received.deregister(self._on_scan_report)
+        self.scanner.on_scan_timeout.deregister(self._on_scan_timeout)
+
+    async def __anext__(self) -> ScanReport:
+        return await super(ScanReportStream, self).__anext__()
+
+    def close(self):
+        """
+        Stops the scan
+        """
+        if not self._closed:
+            self._deregister()
+            self.scanner.stop()
+            self._end()
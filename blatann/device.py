@@ -14,9 +14,15 @@ logger = logging.getLogger(__name__)
 
 class _EventLogger(NrfDriverObserver):
     def __init__(self, ble_driver):
-        ble_driver.observer_register(self)
         self._suppressed_events = []
         self._lock = Lock()
+        self._debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        ble_driver.observer_register(self)
+
+    @property
+    def observed_event_types(self):
+        # Asking for every event makes the driver decode all of them, only do so while they are going to be logged
+        return None if self._debug_enabled else ()
 
     def suppress(self, *nrf_event_types):
         with self._lock:
@@ -25,9 +31,40 @@ class _EventLogger(NrfDriverObserver):
                     self._suppressed_events.append(e)
 
     def on_driver_event(self, nrf_driver, event):
+        # Still called for the events other observers and handlers need, pick up log level changes from those
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled != self._debug_enabled:
+            self._debug_enabled = debug_enabled
+            nrf_driver.observer_update(self)
+        if not debug_enabled:
+            return
         with self._lock:
             if type(event) not in self._suppressed_events:
-                logger.debug("Got NRF Driver event: {}".format(event))
+                logger.debug("Got NRF Driver event: %s", event)
+
+
+class BleDeviceStats(object):
+    """
+    Snapshot of the performance counters of a BLE device
+    """
+    def __init__(self, api_calls, event_queue, connection_executor):
+        self.api_calls = api_calls
+        """Call count, latency, error and API lock wait counters of each driver API.
+        None if API call stats are not enabled, see :meth:`BleDevice.configure_stats`
+
+        :type: blatann.nrf.nrf_driver_stats.DriverStats"""
+        self.event_queue = event_queue
+        """Depth and batch counters of the queue between the driver and the event thread
+
+        :type: blatann.nrf.nrf_event_queue.EventQueueStats"""
+        self.connection_executor = connection_executor
+        """Per-connection handler counters, keyed by connection handle. Empty if the connection executor is not enabled
+
+        :type: dict[int, blatann.nrf.nrf_connection_executor.ConnectionExecutorStats]"""
+
+    def __repr__(self):
+        return "{}(api_calls={!r}, event_queue={!r}, connection_executor={!r})".format(
+            self.__class__.__name__, self.api_calls, self.event_queue, self.connection_executor)
 
 
 class _UuidManager(object):
@@ -86,8 +123,23 @@ class BleDevice(NrfDriverObserver):
     Represents the Bluetooth device itself. Provides the high-level bluetooth APIs (Advertising, Scanning, Connections),
     configuration, and bond database
     """
-    def __init__(self, comport="COM1", baud=1000000, log_driver_comms=False):
-        self.ble_driver = NrfDriver(comport, baud, log_driver_comms)
+    observed_event_types = (nrf_events.GapEvtConnected, nrf_events.GapEvtTimeout, nrf_events.GapEvtDisconnected)
+
+    def __init__(self, comport="COM1", baud=1000000, log_driver_comms=False, fine_grained_locking=False,
+                 process_isolated=False):
+        """
+        :param comport: The serial port the connectivity device is on
+        :param baud: The baud rate to communicate with the device at
+        :param log_driver_comms: Flag to log the driver's internal communication messages
+        :param fine_grained_locking: Flag to give GAP, GATTS and GATTC calls their own locks, see NrfDriver
+        :param process_isolated: Flag to run the driver in its own process, so that several devices
+                                 do not compete for this process's GIL. See nrf_process_driver.ProcessDriver
+        """
+        if process_isolated:
+            from blatann.nrf.nrf_process_driver import ProcessDriver
+            self.ble_driver = ProcessDriver(comport, baud, log_driver_comms, fine_grained_locking)
+        else:
+            self.ble_driver = NrfDriver(comport, baud, log_driver_comms, fine_grained_locking)
         self.event_logger = _EventLogger(self.ble_driver)
         self.ble_driver.observer_register(self)
         self.ble_driver.event_subscribe(self._on_user_mem_request, nrf_events.EvtUserMemoryRequest)
@@ -111,7 +163,8 @@ class BleDevice(NrfDriverObserver):
     def configure(self, vendor_specific_uuid_count=10, service_changed=False, max_connected_peripherals=1,
                   max_connected_clients=1, max_secured_peripherals=1,
                   attribute_table_size=nrf_types.driver.BLE_GATTS_ATTR_TAB_SIZE_DEFAULT,
-                  att_mtu_max_size=MTU_SIZE_FOR_MAX_DLE, device_name=""):
+                  att_mtu_max_size=MTU_SIZE_FOR_MAX_DLE, device_name="",
+                  write_cmd_tx_queue_size=nrf_types.driver.BLE_GATTC_WRITE_CMD_TX_QUEUE_SIZE_DEFAULT):
         """
         Configures the BLE Device with the given settings.
 
@@ -129,6 +182,10 @@ class BleDevice(NrfDriverObserver):
         :param att_mtu_max_size: The maximum ATT MTU size supported. The default supports an MTU which will fit into
                                  a single transmission if Data Length Extensions is set to its max (251)
         :param device_name: The name of the device reported in the Generic Access service
+        :param write_cmd_tx_queue_size: The number of Write Commands (write without response) that can be queued
+                                        for transmission per connection. Higher values increase the throughput of
+                                        :meth:`GattcCharacteristic.write_without_response()
+                                        <blatann.gatt.gattc.GattcCharacteristic.write_without_response>`
         """
         if self.ble_driver.is_open:
             raise exceptions.InvalidStateException("Cannot configure the BLE device after it has been opened")
@@ -139,6 +196,7 @@ class BleDevice(NrfDriverObserver):
                                                             max_connected_peripherals, max_secured_peripherals,
                                                             service_changed, attribute_table_size, device_name)
         self._default_conn_config.max_att_mtu = att_mtu_max_size
+        self._default_conn_config.write_cmd_tx_queue_size = write_cmd_tx_queue_size
 
     def open(self, clear_bonding_data=False):
         """
@@ -175,6 +233,32 @@ class BleDevice(NrfDriverObserver):
         self.bond_db.delete_all()
         self.bond_db_loader.save(self.bond_db)
 
+    def configure_stats(self, api_call_stats=True):
+        """
+        Configures which performance counters are collected. Event queue and connection executor counters
+        are always collected, API call stats are off by default since they time every call to the device
+
+        :param api_call_stats: True to collect the call count, latency, error codes and API lock wait time
+                               of every driver API call
+        """
+        self.ble_driver.configure_api_call_stats(api_call_stats)
+
+    @property
+    def stats(self) -> BleDeviceStats:
+        """
+        Gets a snapshot of the device's performance counters
+        """
+        return BleDeviceStats(self.ble_driver.api_call_stats, self.ble_driver.event_queue_stats,
+                              self.ble_driver.connection_executor_stats)
+
+    def reset_stats(self):
+        """
+        Resets all of the device's performance counters, e.g. to measure a specific phase of a test
+        """
+        self.ble_driver.reset_api_call_stats()
+        self.ble_driver.reset_event_queue_stats()
+        self.ble_driver.reset_connection_executor_stats()
+
     @property
     def address(self):
         """
@@ -212,6 +296,20 @@ class BleDevice(NrfDriverObserver):
         """
         return self._default_conn_config.max_att_mtu
 
+    @property
+    def write_cmd_tx_queue_size(self) -> int:
+        """
+        The number of Write Commands that can be queued for transmission per connection that was configured for the device
+        """
+        return self._default_conn_config.write_cmd_tx_queue_size
+
+    @property
+    def max_connected_peripherals(self) -> int:
+        """
+        The maximum number of concurrent connections with peripheral devices that was configured for the device
+        """
+        return self._ble_configuration.central_role_count
+
     def connect(self, peer_address, connection_params=None) -> PeripheralConnectionWaitable:
         """
         Initiates a connection to a peripheral peer with the specified connection parameters, or uses the default
@@ -270,8 +368,8 @@ class BleDevice(NrfDriverObserver):
                 self.client.peer_connected(event.conn_handle, event.peer_addr, conn_params)
             else:
                 if self.connecting_peripheral.peer_address != event.peer_addr:
-                    logger.warning("Mismatching address between connecting peripheral and peer event: "
-                                   "{} vs {}".format(self.connecting_peripheral.address, event.peer_addr))
+                    logger.warning("Mismatching address between connecting peripheral and peer event: %s vs %s",
+                                   self.connecting_peripheral.address, event.peer_addr)
                 else:
                     self.connected_peripherals[self.connecting_peripheral.peer_address] = self.connecting_peripheral
                     self.connecting_peripheral.peer_connected(event.conn_handle, event.peer_addr, conn_params)
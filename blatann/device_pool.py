@@ -0,0 +1,405 @@
+import logging
+from threading import Lock
+from typing import List, Optional
+
+from blatann import exceptions
+from blatann.event_type import Event, EventSource
+from blatann.waitables.waitable import Waitable
+
+logger = logging.getLogger(__name__)
+
+
+class BleDevicePoolAdapterStats(object):
+    """
+    Snapshot of the load and counters of a single adapter in a device pool
+    """
+    def __init__(self, device, links, capacity, connections_initiated, scan_reports_received):
+        self.device = device
+        """The BLE device
+
+        :type: blatann.device.BleDevice"""
+        self.links = links
+        """Number of peripheral connections, including one which is being established"""
+        self.capacity = capacity
+        """Maximum number of peripheral connections the pool will place on the adapter"""
+        self.connections_initiated = connections_initiated
+        """Number of connections the pool initiated on the adapter"""
+        self.scan_reports_received = scan_reports_received
+        """Number of scan reports the adapter received, including duplicates"""
+
+    def __repr__(self):
+        return "{}(links={}/{}, connections_initiated={}, scan_reports_received={})".format(
+            self.__class__.__name__, self.links, self.capacity, self.connections_initiated, self.scan_reports_received)
+
+
+class BleDevicePoolStats(object):
+    """
+    Snapshot of the aggregate load and counters of a device pool
+    """
+    def __init__(self, adapters, connections_rejected, scan_reports_forwarded):
+        self.adapters = adapters
+        """The stats of each adapter, in the order they were added to the pool
+
+        :type: list[BleDevicePoolAdapterStats]"""
+        self.connections_rejected = connections_rejected
+        """Number of connect() calls rejected because no adapter was available"""
+        self.scan_reports_forwarded = scan_reports_forwarded
+        """Number of scan reports emitted through :attr:`BleDevicePool.on_scan_received`, i.e. after deduplication"""
+
+    @property
+    def links(self) -> int:
+        """
+        Total number of peripheral connections across all adapters
+        """
+        return sum(a.links for a in self.adapters)
+
+    @property
+    def capacity(self) -> int:
+        """
+        Total number of peripheral connections the pool can hold
+        """
+        return sum(a.capacity for a in self.adapters)
+
+    @property
+    def utilization(self) -> float:
+        """
+        Fraction of the pool's capacity in use, between 0.0 and 1.0
+        """
+        capacity = self.capacity
+        return float(self.links) / capacity if capacity else 0.0
+
+    @property
+    def connections_initiated(self) -> int:
+        """
+        Total number of connections initiated across all adapters
+        """
+        return sum(a.connections_initiated for a in self.adapters)
+
+    @property
+    def scan_reports_received(self) -> int:
+        """
+        Total number of scan reports received across all adapters, including duplicates
+        """
+        return sum(a.scan_reports_received for a in self.adapters)
+
+    def __repr__(self):
+        return "{}(links={}/{}, connections_initiated={}, connections_rejected={}, " \
+               "scan_reports_received={}, scan_reports_forwarded={})".format(
+                self.__class__.__name__, self.links, self.capacity, self.connections_initiated,
+                self.connections_rejected, self.scan_reports_received, self.scan_reports_forwarded)
+
+
+class _PoolAdapter(object):
+    def __init__(self, device, capacity):
+        self.device = device
+        self.capacity = capacity
+        self.connections_initiated = 0
+        self.scan_reports_received = 0
+
+    @property
+    def links(self):
+        links = len(self.device.connected_peripherals)
+        if self.device.connecting_peripheral is not None:
+            links += 1
+        return links
+
+
+class PoolScanFinishedWaitable(Waitable):
+    """
+    Waitable which completes once every adapter in the pool finished scanning.
+    Returns the list of unique peers found, see :attr:`BleDevicePool.advertising_peers_found`
+    """
+    def __init__(self, pool):
+        """
+        :type pool: BleDevicePool
+        """
+        super(PoolScanFinishedWaitable, self).__init__()
+        self._pool = pool
+        pool.on_scan_timeout.register(self._on_scan_timeout)
+
+    def _on_scan_timeout(self, pool, scan_reports):
+        self._pool.on_scan_timeout.deregister(self._on_scan_timeout)
+        self._notify(scan_reports)
+
+    def _on_timeout(self):
+        self._pool.on_scan_timeout.deregister(self._on_scan_timeout)
+
+    def wait(self, timeout=None, exception_on_timeout=True):
+        """
+        :rtype: list[blatann.gap.advertise_data.ScanReport]
+        """
+        return super(PoolScanFinishedWaitable, self).wait(timeout, exception_on_timeout)
+
+
+class BleDevicePool(object):
+    """
+    Drives several BLE devices (adapters) as one, to hold more peripheral connections than a single
+    connectivity device supports.
+
+    Connections are placed on the adapter with the lowest load relative to its capacity. Scanning runs on every
+    adapter and the reports are merged into a single stream, where a packet heard by several adapters
+    (or repeated by the peer with the same data) is only reported once per scan.
+
+    The devices must be configured and opened by the caller (or with :meth:`open`). The pool only uses
+    the devices' public API, so it can be used with any driver backend
+    """
+    def __init__(self, devices=None):
+        """
+        :param devices: The devices to add to the pool, using their configured capacity
+        :type devices: list[blatann.device.BleDevice]
+        """
+        self._adapters: List[_PoolAdapter] = []
+        self._lock = Lock()
+        self._connections_rejected = 0
+        self._scan_reports_forwarded = 0
+        self._scan_packets_seen = set()
+        self._scanning_devices = set()
+        self._on_scan_received = EventSource("Pool Scan Received", logger)
+        self._on_scan_timeout = EventSource("Pool Scan Timeout", logger)
+        for device in devices or []:
+            self.add_device(device)
+
+    @property
+    def devices(self):
+        """
+        The devices in the pool, in the order they were added
+
+        :rtype: list[blatann.device.BleDevice]
+        """
+        return [a.device for a in self._adapters]
+
+    @property
+    def on_scan_received(self) -> Event:
+        """
+        Event that is triggered whenever an adapter receives an advertising packet which was not already reported
+        during the current scan
+
+        Event args: the ScanReport
+
+        :return: An event which emits the pool and a ScanReport
+        """
+        return self._on_scan_received
+
+    @property
+    def on_scan_timeout(self) -> Event:
+        """
+        Event that is triggered once every adapter finished scanning
+
+        Event args: the list of unique peers found, see :attr:`advertising_peers_found`
+        """
+        return self._on_scan_timeout
+
+    @property
+    def is_scanning(self) -> bool:
+        return bool(self._scanning_devices)
+
+    def add_device(self, device, capacity=None):
+        """
+        Adds a device to the pool
+
+        :param device: The device to add
+        :type device: blatann.device.BleDevice
+        :param capacity: The maximum number of peripheral connections to place on the device.
+                         Defaults to the maximum the device was configured with, see :meth:`BleDevice.configure`
+        """
+        if capacity is None:
+            capacity = device.max_connected_peripherals
+        if capacity < 0:
+            raise ValueError("Capacity cannot be negative (got {})".format(capacity))
+        with self._lock:
+            if any(a.device is device for a in self._adapters):
+                raise exceptions.InvalidOperationException("Device is already in the pool")
+            self._adapters.append(_PoolAdapter(device, capacity))
+        device.scanner.on_scan_received.register(self._on_device_scan_received)
+        device.scanner.on_scan_timeout.register(self._on_device_scan_timeout)
+
+    def remove_device(self, device):
+        """
+        Removes a device from the pool. Its connections are left open
+
+        :param device: The device to remove
+        :type device: blatann.device.BleDevice
+        """
+        with self._lock:
+            adapter = self._find_adapter(device)
+            self._adapters.remove(adapter)
+            self._scanning_devices.discard(device)
+        device.scanner.on_scan_received.deregister(self._on_device_scan_received)
+        device.scanner.on_scan_timeout.deregister(self._on_device_scan_timeout)
+
+    def open(self, clear_bonding_data=False):
+        """
+        Opens all of the devices in the pool which are not open yet
+
+        :param clear_bonding_data: Flag that the bonding data should be cleared prior to opening the devices
+        """
+        for device in self.devices:
+            if not device.ble_driver.is_open:
+                device.open(clear_bonding_data)
+
+    def close(self):
+        """
+        Closes all of the devices in the pool
+        """
+        for device in self.devices:
+            device.close()
+
+    def connect(self, peer_address, connection_params=None):
+        """
+        Initiates a connection to a peripheral on the least loaded adapter which has capacity left and
+        is not already establishing another connection.
+
+        :param peer_address: The address of the peer to connect to
+        :type peer_address: blatann.peer.PeerAddress
+        :param connection_params: Optional connection parameters to use. If not specified, uses the adapter's default
+        :type connection_params: blatann.peer.ConnectionParameters
+        :return: A Waitable which returns the connected peer.Peripheral, see :meth:`BleDevice.connect`
+        :rtype: blatann.waitables.connection_waitable.PeripheralConnectionWaitable
+        :raises: InvalidStateException if the peer is already connected or no adapter is available
+        """
+        with self._lock:
+            if self._find_peer_adapter(peer_address) is not None:
+                raise exceptions.InvalidStateException("Already connected to {}".format(peer_address))
+            adapter = self._select_adapter()
+            if adapter is None:
+                self._connections_rejected += 1
+                if any(a.links < a.capacity for a in self._adapters):
+                    raise exceptions.InvalidStateException("All adapters with capacity left are already connecting")
+                raise exceptions.InvalidStateException("All adapters are at their connection capacity")
+            logger.debug("Connecting to %s on adapter %s (%d/%d links)",
+                         peer_address, adapter.device.ble_driver.serial_port, adapter.links, adapter.capacity)
+            # Connect while holding the lock so the adapter is marked as connecting before the next selection
+            waitable = adapter.device.connect(peer_address, connection_params)
+            adapter.connections_initiated += 1
+        return waitable
+
+    def device_for_peer(self, peer_address):
+        """
+        Gets the device which is connected (or connecting) to a peer
+
+        :param peer_address: The address of the peer
+        :type peer_address: blatann.peer.PeerAddress
+        :return: The device, or None if the peer is not connected through the pool's devices
+        :rtype: blatann.device.BleDevice
+        """
+        with self._lock:
+            adapter = self._find_peer_adapter(peer_address)
+        return adapter.device if adapter else None
+
+    @property
+    def connected_peripherals(self):
+        """
+        All of the peripherals connected through the pool's devices
+
+        :rtype: list[blatann.peer.Peripheral]
+        """
+        return [p for a in self._adapters for p in list(a.device.connected_peripherals.values())]
+
+    def start_scan(self, scan_parameters=None, clear_scan_reports=True):
+        """
+        Starts scanning on every adapter
+
+        :param scan_parameters: Optional scan parameters, used by every adapter. Uses each adapter's default if not specified
+        :type scan_parameters: blatann.gap.scanning.ScanParameters
+        :param clear_scan_reports: Flag to clear out previous scan reports, which also resets the deduplication
+        :return: A Waitable which completes once every adapter finished scanning
+        :rtype: PoolScanFinishedWaitable
+        """
+        waitable = PoolScanFinishedWaitable(self)
+        with self._lock:
+            devices = [a.device for a in self._adapters]
+            if clear_scan_reports:
+                self._scan_packets_seen = set()
+            self._scanning_devices = set(devices)
+        for device in devices:
+            device.scanner.start_scan(scan_parameters, clear_scan_reports)
+        return waitable
+
+    def stop_scan(self):
+        """
+        Stops scanning on every adapter
+        """
+        with self._lock:
+            devices = [a.device for a in self._adapters]
+            self._scanning_devices = set()
+        for device in devices:
+            device.scanner.stop()
+
+    @property
+    def advertising_peers_found(self):
+        """
+        Gets the unique peers found by all adapters. Each peer's scan report is the one of the adapter which
+        received it with the strongest signal
+
+        :rtype: list[blatann.gap.advertise_data.ScanReport]
+        """
+        peers = {}
+        for device in self.devices:
+            for report in list(device.scanner.scan_report.advertising_peers_found):
+                best = peers.get(report.peer_address)
+                if best is None or report.rssi > best.rssi:
+                    peers[report.peer_address] = report
+        return list(peers.values())
+
+    @property
+    def stats(self) -> BleDevicePoolStats:
+        """
+        Gets a snapshot of the pool's load and counters
+        """
+        with self._lock:
+            adapters = [BleDevicePoolAdapterStats(a.device, a.links, a.capacity, a.connections_initiated,
+                                                  a.scan_reports_received)
+                        for a in self._adapters]
+            return BleDevicePoolStats(adapters, self._connections_rejected, self._scan_reports_forwarded)
+
+    def _select_adapter(self) -> Optional[_PoolAdapter]:
+        best = None
+        best_key = None
+        for adapter in self._adapters:
+            if adapter.device.connecting_peripheral is not None:
+                continue
+            links = adapter.links
+            if links >= adapter.capacity:
+                continue
+            # Lowest relative load first, then the fewest links, then the order the adapters were added
+            key = (float(links) / adapter.capacity, links)
+            if best_key is None or key < best_key:
+                best, best_key = adapter, key
+        return best
+
+    def _find_adapter(self, device):
+        for adapter in self._adapters:
+            if adapter.device is device:
+                return adapter
+        raise exceptions.InvalidOperationException("Device is not in the pool")
+
+    def _find_peer_adapter(self, peer_address):
+        for adapter in self._adapters:
+            device = adapter.device
+            connecting = device.connecting_peripheral
+            if peer_address in device.connected_peripherals or \
+                    (connecting is not None and connecting.peer_address == peer_address):
+                return adapter
+        return None
+
+    def _on_device_scan_received(self, device, scan_report):
+        key = (scan_report.peer_address, scan_report.packet_type, scan_report.raw_bytes)
+        with self._lock:
+            for adapter in self._adapters:
+                if adapter.device is device:
+                    adapter.scan_reports_received += 1
+                    break
+            if key in self._scan_packets_seen:
+                return
+            self._scan_packets_seen.add(key)
+            self._scan_reports_forwarded += 1
+        self._on_scan_received.notify(self, scan_report)
+
+    def _on_device_scan_timeout(self, device, scan_reports):
+        with self._lock:
+            if device not in self._scanning_devices:
+                return
+            self._scanning_devices.discard(device)
+            finished = not self._scanning_devices
+        if finished:
+            self._on_scan_timeout.notify(self, self.advertising_peers_found)
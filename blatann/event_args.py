@@ -199,6 +199,29 @@ class ReadCompleteEventArgs(EventArgs):
         self.reason = reason
 
 
+class ReadByUuidCompleteEventArgs(EventArgs):
+    """
+    Event arguments for when a read of a peripheral's characteristics by UUID has completed
+    """
+    def __init__(self, read_id: int, uuid, characteristics: list, status: GattStatusCode,
+                 reason: GattOperationCompleteReason):
+        """
+        :param read_id: The ID of the read that completed. This will match an id of an initiated read
+        :param uuid: The UUID of the characteristics which were read
+        :type uuid: blatann.uuid.Uuid
+        :param characteristics: The characteristics found with the UUID, in handle order.
+                                Their values and value handles are the ones read
+        :type characteristics: list of blatann.gatt.gattc.GattcCharacteristic
+        :param status: The read status. ``attribute_not_found`` if the peer has no characteristic with the UUID
+        :param reason: The reason the read completed
+        """
+        self.id = read_id
+        self.uuid = uuid
+        self.characteristics = characteristics
+        self.status = status
+        self.reason = reason
+
+
 class WriteCompleteEventArgs(EventArgs):
     """
     Event arguments for when a write has completed on a peripheral's characteristic
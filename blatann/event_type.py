@@ -15,7 +15,12 @@ class Event(Generic[TSender, TEvent]):
     def __init__(self, name):
         self.name = name
         self._handler_lock = Lock()
-        self._handlers = []
+        # The registered handlers in registration order, a dict used as an ordered set
+        self._handler_set = {}
+        # Immutable snapshot of the handlers, replaced whenever they change so notify() can iterate it without locking
+        self._handlers = ()
+        # One-shot handlers keyed by the ID of the event arguments they wait for: {event_id: [handlers]}
+        self._id_handlers = {}
 
     def register(self, handler: Callable[[TSender, TEvent], None]):
         """
@@ -35,8 +40,9 @@ class Event(Generic[TSender, TEvent]):
         :return: a context block that can be used to automatically unsubscribe the handler
         """
         with self._handler_lock:
-            if handler not in self._handlers:
-                self._handlers.append(handler)
+            if handler not in self._handler_set:
+                self._handler_set[handler] = None
+                self._handlers = tuple(self._handler_set)
         return EventSubscriptionContext(self, handler)
 
     def deregister(self, handler):
@@ -47,8 +53,50 @@ class Event(Generic[TSender, TEvent]):
         :param handler: The handler to deregister
         """
         with self._handler_lock:
-            if handler in self._handlers:
-                self._handlers.remove(handler)
+            if handler in self._handler_set:
+                del self._handler_set[handler]
+                self._handlers = tuple(self._handler_set)
+
+    def register_id_handler(self, event_id, handler: Callable[[TSender, TEvent], None]):
+        """
+        Registers a handler which is called for the next event whose arguments have the given ``id``,
+        then removed. Emitting the event only looks up the handlers of that ID, so any number of them
+        can be outstanding at once, e.g. one per queued read, write or notification.
+
+        :param event_id: The ID of the event arguments to call the handler for
+        :param handler: The handler to register
+        """
+        with self._handler_lock:
+            handlers = self._id_handlers.get(event_id)
+            if handlers is None:
+                self._id_handlers[event_id] = [handler]
+            elif handler not in handlers:
+                handlers.append(handler)
+            if self._on_id_event not in self._handler_set:
+                self._handler_set[self._on_id_event] = None
+                self._handlers = tuple(self._handler_set)
+
+    def deregister_id_handler(self, event_id, handler):
+        """
+        Deregisters a handler registered with register_id_handler() which has not been called yet.
+        If the given handler is not registered for the ID, function does nothing
+
+        :param event_id: The ID the handler was registered for
+        :param handler: The handler to deregister
+        """
+        with self._handler_lock:
+            handlers = self._id_handlers.get(event_id)
+            if handlers and handler in handlers:
+                handlers.remove(handler)
+                if not handlers:
+                    del self._id_handlers[event_id]
+
+    def _on_id_event(self, sender, event_args):
+        with self._handler_lock:
+            handlers = self._id_handlers.pop(getattr(event_args, "id", None), None)
+        if handlers:
+            for handler in handlers:
+                handler(sender, event_args)
 
 
 class EventSource(Event):
@@ -62,16 +110,15 @@ class EventSource(Event):
 
     def clear_handlers(self):
         with self._handler_lock:
-            self._handlers = []
+            self._handler_set = {}
+            self._handlers = ()
+            self._id_handlers = {}
 
     def notify(self, sender: TSender, event_args: TEvent = None):
         """
         Notifies all clients with the given arguments and keyword-arguments
         """
-        with self._handler_lock:
-            handlers = self._handlers[:]
-
-        for h in handlers:
+        for h in self._handlers:
             try:
                 h(sender, event_args)
             except Exception as e:
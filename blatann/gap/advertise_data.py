@@ -205,7 +205,7 @@ class AdvertisingData(object):
         service_uuid128s = []
         if uuid128_data:
             for i in range(0, len(uuid128_data), 16):
-                uuid128 = uuid128_data[i:i+16][::-1]
+                uuid128 = list(uuid128_data[i:i+16][::-1])
                 service_uuid128s.append(uuid.Uuid128(uuid128))
 
         record_string_keys = {k.name: bytes(v) for k, v in advertise_records.items()}
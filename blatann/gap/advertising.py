@@ -37,6 +37,9 @@ class Advertiser(object):
         self._timeout = self.ADVERTISE_FOREVER
         self._advertise_mode = AdvertisingMode.connectable_undirected
         self._conn_tag = conn_tag
+        # Kept across starts so its C struct is only rebuilt when the parameters change
+        self._advertise_params = nrf_types.BLEGapAdvParams(self._advertise_interval, self._timeout,
+                                                           self._advertise_mode)
 
     @property
     def on_advertising_timeout(self):
@@ -150,8 +153,11 @@ class Advertiser(object):
         return ClientConnectionWaitable(self.ble_device, self.client)
 
     def _start(self):
-        params = nrf_types.BLEGapAdvParams(self._advertise_interval, self._timeout, self._advertise_mode)
-        logger.info("Starting advertising, params: {}, auto-restart: {}".format(params, self._auto_restart))
+        params = self._advertise_params
+        params.interval_ms = self._advertise_interval
+        params.timeout_s = self._timeout
+        params.advertising_type = self._advertise_mode
+        logger.info("Starting advertising, params: %s, auto-restart: %s", params, self._auto_restart)
         self.ble_device.ble_driver.ble_gap_adv_start(params, self._conn_tag)
         self._is_advertising = True
 
@@ -22,10 +22,10 @@ class DefaultBondDatabaseLoader(BondDatabaseLoader):
         try:
             with open(self.filename, "rb") as f:
                 db = pickle.load(f)
-                logger.info("Loaded Bond DB '{}'".format(self.filename))
+                logger.info("Loaded Bond DB '%s'", self.filename)
                 return db
         except Exception as e:
-            logger.info("Failed to load Bond DB '{}' -  {}:{}".format(self.filename, type(e).__name__, e.message))
+            logger.info("Failed to load Bond DB '%s' -  %s:%s", self.filename, type(e).__name__, e)
             return DefaultBondDatabase()
 
     def save(self, db):
@@ -2,7 +2,6 @@ import logging
 import threading
 import enum
 
-from blatann.gap import smp_crypto
 from blatann.gap.bond_db import BondingData
 from blatann.nrf import nrf_types, nrf_events
 from blatann.exceptions import InvalidStateException, InvalidOperationException
@@ -73,9 +72,9 @@ class SecurityManager(object):
         self.keyset = nrf_types.BLEGapSecKeyset()
         self.bond_db_entry = None
         self._security_level = SecurityLevel.NO_ACCESS
-        self._private_key = smp_crypto.lesc_generate_private_key()
-        self._public_key = self._private_key.public_key()
-        self.keyset.own_keys.public_key.key = smp_crypto.lesc_pubkey_to_raw(self._public_key)
+        # The LESC key pair is generated when it is first needed, most connections never pair
+        self._private_key = None
+        self._public_key = None
 
     """
     Events
@@ -207,14 +206,24 @@ class SecurityManager(object):
 
         .. warning:: Using this key allows Bluetooth sniffers to be able to decode the encrypted traffic over the air
         """
-        self._private_key = smp_crypto.LESC_DEBUG_PRIVATE_KEY
-        self._public_key = smp_crypto.LESC_DEBUG_PUBLIC_KEY
-        self.keyset.own_keys.public_key.key = smp_crypto.lesc_pubkey_to_raw(self._public_key)
+        from blatann.gap import smp_crypto
+        self._set_lesc_private_key(smp_crypto.LESC_DEBUG_PRIVATE_KEY)
 
     """
     Private Methods
     """
 
+    def _set_lesc_private_key(self, private_key):
+        from blatann.gap import smp_crypto
+        self._private_key = private_key
+        self._public_key = private_key.public_key()
+        self.keyset.own_keys.public_key.key = smp_crypto.lesc_pubkey_to_raw(self._public_key)
+
+    def _ensure_lesc_key_pair(self):
+        if self._private_key is None:
+            from blatann.gap import smp_crypto
+            self._set_lesc_private_key(smp_crypto.lesc_generate_private_key())
+
     def _on_peer_connected(self, peer, event_args):
         # Reset the
         self._pairing_in_process = False
@@ -230,7 +239,7 @@ class SecurityManager(object):
         # Search the bonding DB for this peer's info
         self.bond_db_entry = self._find_db_entry(self.peer.peer_address)
         if self.bond_db_entry:
-            logger.info("Connected to previously bonded device {}".format(self.bond_db_entry.peer_addr))
+            logger.info("Connected to previously bonded device %s", self.bond_db_entry.peer_addr)
             self._is_previously_bonded_device = True
 
     def _find_db_entry(self, peer_address):
@@ -245,8 +254,11 @@ class SecurityManager(object):
             if peer_address.addr_type in [nrf_types.BLEGapAddrTypes.random_static, nrf_types.BLEGapAddrTypes.public]:
                 if r.peer_addr == peer_address:
                     return r
-            elif smp_crypto.private_address_resolves(peer_address, r.bonding_data.peer_id.irk):
-                logger.info("Resolved Peer ID to {}".format(r.peer_addr))
+                continue
+
+            from blatann.gap import smp_crypto
+            if smp_crypto.private_address_resolves(peer_address, r.bonding_data.peer_id.irk):
+                logger.info("Resolved Peer ID to %s", r.peer_addr)
                 return r
 
         return None
@@ -272,6 +284,7 @@ class SecurityManager(object):
         else:
             status = nrf_types.BLEGapSecStatus.success
 
+        self._ensure_lesc_key_pair()
         self.ble_device.ble_driver.ble_gap_sec_params_reply(event.conn_handle, status, sec_params, self.keyset)
 
         if not self.security_params.reject_pairing_requests:
@@ -299,7 +312,7 @@ class SecurityManager(object):
                 break
 
         if not found_record:
-            logger.info("Unable to find Bonding record for peer master id {}".format(event.master_id))
+            logger.info("Unable to find Bonding record for peer master id %s", event.master_id)
             self.ble_device.ble_driver.ble_gap_sec_info_reply(event.conn_handle)
         else:
             self.bond_db_entry = found_record
@@ -311,6 +324,8 @@ class SecurityManager(object):
         """
         :type event: nrf_events.GapEvtLescDhKeyRequest
         """
+        from blatann.gap import smp_crypto
+        self._ensure_lesc_key_pair()
         peer_public_key = smp_crypto.lesc_pubkey_from_raw(event.remote_public_key.key)
         dh_key = smp_crypto.lesc_compute_dh_key(self._private_key, peer_public_key, little_endian=True)
         self.ble_device.ble_driver.ble_gap_lesc_dhkey_reply(event.conn_handle, nrf_types.BLEGapDhKey(dh_key))
@@ -355,7 +370,7 @@ class SecurityManager(object):
                 self.bond_db_entry.bonding_data = BondingData(self.keyset)
                 self.ble_device.bond_db.add(self.bond_db_entry)
             else:  # update the bonding info
-                logger.info("Updating bond key for peer {}".format(self.keyset.peer_keys.id_key.peer_addr))
+                logger.info("Updating bond key for peer %s", self.keyset.peer_keys.id_key.peer_addr)
                 self.bond_db_entry.bonding_data = BondingData(self.keyset)
 
             # TODO: This doesn't belong here..
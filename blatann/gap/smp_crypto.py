@@ -77,7 +77,7 @@ def lesc_generate_private_key():
 
     :return: The generated private key
     """
-    return ec.generate_private_key(_lesc_curve, _backend)
+    return ec.generate_private_key(_lesc_curve(), _backend)
 
 
 def lesc_compute_dh_key(private_key, peer_public_key, little_endian=False):
@@ -150,5 +150,14 @@ _LESC_DEBUG_PUBLIC_KEY_X_RAW = binascii.unhexlify("20b003d2f297be2c5e2c83a7e9f9a
 _LESC_DEBUG_PUBLIC_KEY_Y_RAW = binascii.unhexlify("dc809c49652aeb6d63329abf5a52155c766345c28fed3024741c8ed01589d28b")
 _LESC_DEBUG_PUBLIC_KEY_RAW = _LESC_DEBUG_PUBLIC_KEY_X_RAW + _LESC_DEBUG_PUBLIC_KEY_Y_RAW
 
-LESC_DEBUG_PRIVATE_KEY = lesc_privkey_from_raw(_LESC_DEBUG_PRIVATE_KEY_RAW, _LESC_DEBUG_PUBLIC_KEY_RAW, little_endian=False)
-LESC_DEBUG_PUBLIC_KEY = LESC_DEBUG_PRIVATE_KEY.public_key()
+
+def __getattr__(name):
+    """
+    Derives the LESC debug key pair (LESC_DEBUG_PRIVATE_KEY, LESC_DEBUG_PUBLIC_KEY) on first access
+    instead of on import
+    """
+    if name in ("LESC_DEBUG_PRIVATE_KEY", "LESC_DEBUG_PUBLIC_KEY"):
+        private_key = lesc_privkey_from_raw(_LESC_DEBUG_PRIVATE_KEY_RAW, _LESC_DEBUG_PUBLIC_KEY_RAW, little_endian=False)
+        globals().update(LESC_DEBUG_PRIVATE_KEY=private_key, LESC_DEBUG_PUBLIC_KEY=private_key.public_key())
+        return globals()[name]
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
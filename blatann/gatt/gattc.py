@@ -1,4 +1,5 @@
 from __future__ import annotations
+import collections
 import logging
 import threading
 from typing import Callable, List, Optional, Iterable
@@ -9,6 +10,7 @@ from blatann.event_type import EventSource, Event
 from blatann.gatt.reader import GattcReader
 from blatann.gatt.writer import GattcWriter
 from blatann.nrf import nrf_types, nrf_events
+from blatann.nrf.nrf_dll_load import NordicSemiException
 from blatann.waitables.event_waitable import EventWaitable, IdBasedEventWaitable
 from blatann.exceptions import InvalidOperationException, InvalidStateException
 from blatann.event_args import *
@@ -73,6 +75,13 @@ class GattcCharacteristic(gatt.Characteristic):
         """
         return self._properties.write
 
+    @property
+    def writable_without_response(self) -> bool:
+        """
+        Gets if the characteristic can be written to with Write Commands (write without response)
+        """
+        return self._properties.write_no_response
+
     @property
     def subscribable(self) -> bool:
         """
@@ -99,6 +108,14 @@ class GattcCharacteristic(gatt.Characteristic):
     def on_write_complete(self) -> Event[GattcCharacteristic, WriteCompleteEventArgs]:
         return self._on_write_complete_event
 
+    @property
+    def on_notification_received(self) -> Event[GattcCharacteristic, NotificationReceivedEventArgs]:
+        """
+        Event that is triggered when a notification or indication is received.
+        The handler passed to subscribe() is registered to this event, and unsubscribe() clears all of its handlers
+        """
+        return self._on_notification_event
+
     """
     Public Methods
     """
@@ -183,6 +200,40 @@ class GattcCharacteristic(gatt.Characteristic):
         write_id = self._manager.write(self.value_handle, bytes(data))
         return IdBasedEventWaitable(self._on_write_complete_event, write_id)
 
+    def write_without_response(self, data) -> EventWaitable[GattcCharacteristic, WriteCompleteEventArgs]:
+        """
+        Writes the data provided to the characteristic with Write Commands (write without response) and returns
+        a Waitable that executes once all of it was transmitted. The peripheral does not acknowledge Write Commands,
+        so any number of packets can be in flight. Data longer than the MTU allows is split into several writes.
+
+        Writes without response are queued separately from the other reads and writes and do not wait for them.
+        Up to :attr:`BleDevice.write_cmd_tx_queue_size <blatann.device.BleDevice.write_cmd_tx_queue_size>` packets
+        are queued for transmission at a time, the rest are sent as the previous ones are transmitted.
+
+        The Waitable returns two parameters: (GattcCharacteristic this, WriteCompleteEventArgs event args)
+
+        :param data: The data to write. Can be a string, bytes, or anything that can be converted to bytes
+        :type data: str or bytes or bytearray
+        :return: A waitable that returns when the data was transmitted
+        :raises: InvalidOperationException if characteristic cannot be written to without response
+        """
+        if isinstance(data, str):
+            data = data.encode(self.string_encoding)
+
+        if not self.writable_without_response:
+            raise InvalidOperationException("Characteristic {} is not writable without response".format(self.uuid))
+        write_id = self._manager.write_without_response(self.value_handle, bytes(data))
+        return IdBasedEventWaitable(self._on_write_complete_event, write_id)
+
+    def _detach(self):
+        """
+        Unsubscribes the characteristic from the driver and read/write manager events.
+        Used when the characteristic is replaced in the database and should no longer track the peer's value
+        """
+        self.peer.driver_event_unsubscribe(self._on_indication_notification, nrf_events.GattcEvtHvx)
+        self._manager.on_write_complete.deregister(self._write_complete)
+        self._manager.on_read_complete.deregister(self._read_complete)
+
     """
     Event Handlers
     """
@@ -232,7 +283,7 @@ class GattcCharacteristic(gatt.Characteristic):
 
         :type event: nrf_events.GattcEvtHvx
         """
-        if event.conn_handle != self.peer.conn_handle or event.attr_handle != self.value_handle:
+        if event.attr_handle != self.value_handle:
             return
 
         is_indication = False
@@ -312,7 +363,12 @@ class GattcDatabase(gatt.GattDatabase):
         super(GattcDatabase, self).__init__(ble_device, peer)
         self._writer = GattcWriter(ble_device, peer)
         self._reader = GattcReader(ble_device, peer)
-        self._read_write_manager = _ReadWriteManager(self._reader, self._writer)
+        self._command_writer = _WriteCommandManager(ble_device, peer)
+        self._read_write_manager = _ReadWriteManager(self._reader, self._writer, self._command_writer)
+        # Characteristics found by read_by_uuid() before (or without) discovering the database, by value handle
+        self._partial_characteristics = {}
+        self._on_read_by_uuid_complete_event = EventSource("Read By UUID Complete", logger)
+        self._read_write_manager.on_read_by_uuid_complete.register(self._read_by_uuid_complete)
 
     @property
     def services(self) -> List[GattcService]:
@@ -357,6 +413,74 @@ class GattcDatabase(gatt.GattDatabase):
         for s in self.services:
             for c in s.characteristics:
                 yield c
+        yield from self._partial_characteristics.values()
+
+    def read_by_uuid(self, uuid: Uuid, start_handle=0x0001, end_handle=0xFFFF) -> EventWaitable:
+        """
+        Reads the values of all characteristics with the given UUID without discovering the database first.
+        The peer finds the characteristics itself, so this takes a round trip per response
+        (usually one) instead of the dozens a full database discovery needs.
+
+        Characteristics which were not discovered yet are added to the database, without a service.
+        Only their UUID, value handle and value are known, so they are treated as readable only.
+        They are replaced by the full characteristics once the database is discovered.
+
+        .. note:: Values longer than the MTU allows (MTU - 4 bytes, at most 253 bytes) are truncated by the peer,
+           read the returned characteristic to get the whole value.
+           A truncated value does not replace the value already cached for the characteristic
+
+        The Waitable returns two parameters: (Peer peer, ReadByUuidCompleteEventArgs event args)
+
+        :param uuid: The UUID of the characteristics to read
+        :param start_handle: The first handle of the range to search
+        :param end_handle: The last handle of the range to search
+        :return: A waitable that returns when the read finishes
+        """
+        self.ble_device.uuid_manager.register_uuid(uuid)
+        read_id = self._read_write_manager.read_by_uuid(uuid, start_handle, end_handle)
+        return IdBasedEventWaitable(self._on_read_by_uuid_complete_event, read_id)
+
+    def read_multiple(self, characteristics: Iterable[GattcCharacteristic], fixed_length=False
+                      ) -> List[EventWaitable[GattcCharacteristic, ReadCompleteEventArgs]]:
+        """
+        Reads the values of several characteristics. Characteristics whose values have a fixed length are batched
+        into as few Read Multiple requests as the MTU allows instead of a full request-response round trip for each one.
+
+        A Read Multiple response is only the values concatenated, so the values can only be split apart when
+        their lengths are known. Batching is therefore opt-in with ``fixed_length``, for characteristics whose values
+        never change length (e.g. sensor readings). The length of a characteristic's last known
+        :attr:`~GattcCharacteristic.value` (from a previous read, write or notification) is used to split the response.
+        Characteristics which do not have a value yet, or whose value does not fit in a single response,
+        are read individually. Batches are kept shorter than the longest response the MTU allows, so a response that
+        was cut off does not go unnoticed. If the response of a batch does not match the expected lengths
+        or the peer rejects the batch, its characteristics are read individually instead.
+
+        Each characteristic's value is updated and its :attr:`~GattcCharacteristic.on_read_complete` event dispatched
+        the same way as by :meth:`GattcCharacteristic.read`.
+
+        :Example:
+
+        >>> waitables = peer.database.read_multiple(sensor_characteristics, fixed_length=True)  # Learns the lengths
+        >>> wait_all(waitables, timeout=10)
+        >>> waitables = peer.database.read_multiple(sensor_characteristics, fixed_length=True)  # Batched
+        >>> for characteristic, event_args in wait_all(waitables, timeout=10):
+        >>>     print(characteristic.uuid, event_args.value)
+
+        :param characteristics: The characteristics to read
+        :param fixed_length: True if the characteristics' values never change length, so they can be batched.
+                             False (default) reads each characteristic individually
+        :return: A waitable for each characteristic, in the order given.
+                 Each returns two parameters: (GattcCharacteristic characteristic, ReadCompleteEventArgs event args)
+        :raises: InvalidOperationException if a characteristic is not readable
+        """
+        characteristics = list(characteristics)
+        for c in characteristics:
+            if not c.readable:
+                raise InvalidOperationException("Characteristic {} is not readable".format(c.uuid))
+        # A length of 0 (unknown) makes the manager read the characteristic individually
+        reads = [(c.value_handle, len(c.value) if fixed_length else 0) for c in characteristics]
+        read_ids = self._read_write_manager.read_multiple(reads)
+        return [IdBasedEventWaitable(c.on_read_complete, read_id) for c, read_id in zip(characteristics, read_ids)]
 
     def add_discovered_services(self, nrf_services):
         """
@@ -369,6 +493,40 @@ class GattcDatabase(gatt.GattDatabase):
         for service in nrf_services:
             self.services.append(GattcService.from_discovered_service(self.ble_device, self.peer,
                                                                       self._read_write_manager, service))
+        for char in self._partial_characteristics.values():
+            char._detach()
+        self._partial_characteristics.clear()
+
+    def _read_by_uuid_complete(self, sender, event_args):
+        """
+        Handler for _ReadWriteManager.on_read_by_uuid_complete.
+        Updates the values of the characteristics read, adding the ones not in the database yet
+
+        :param sender: The manager that the read completed on
+        :type sender: _ReadWriteManager
+        :param event_args: The event arguments
+        :type event_args: _ReadByUuidTask
+        """
+        known = {c.value_handle: c for c in self.iter_characteristics()}
+        # Each handle-value pair has a 1 byte length (which includes the 2 byte handle) in the response
+        truncated_length = min(self.peer.mtu_size - 4, 253)
+        characteristics = []
+        for handle, value in event_args.handle_values:
+            char = known.get(handle)
+            if char is None:
+                # The value declaration always follows the characteristic declaration
+                char = GattcCharacteristic(self.ble_device, self.peer, self._read_write_manager, event_args.uuid,
+                                           gatt.CharacteristicProperties(read=True), handle - 1, handle)
+                self._partial_characteristics[handle] = char
+            elif len(value) >= truncated_length and char._value:
+                # The value may be truncated, keep the (possibly whole) value already known
+                characteristics.append(char)
+                continue
+            char._value = value
+            characteristics.append(char)
+        args = ReadByUuidCompleteEventArgs(event_args.id, event_args.uuid, characteristics,
+                                           event_args.status, event_args.reason)
+        self._on_read_by_uuid_complete_event.notify(self.peer, args)
 
 
 class _ReadTask(object):
@@ -385,6 +543,37 @@ class _ReadTask(object):
         self.reason = GattOperationCompleteReason.FAILED
 
 
+class _ReadMultipleTask(object):
+    def __init__(self, read_tasks, lengths):
+        """
+        :type read_tasks: list of _ReadTask
+        :param lengths: The expected length of each value
+        :type lengths: list of int
+        """
+        self.read_tasks = read_tasks
+        self.lengths = lengths
+
+    @property
+    def handles(self):
+        return [t.handle for t in self.read_tasks]
+
+
+class _ReadByUuidTask(object):
+    _id_counter = 1
+    _lock = threading.Lock()
+
+    def __init__(self, uuid, start_handle, end_handle):
+        with _ReadByUuidTask._lock:
+            self.id = _ReadByUuidTask._id_counter
+            _ReadByUuidTask._id_counter += 1
+        self.uuid = uuid
+        self.start_handle = start_handle
+        self.end_handle = end_handle
+        self.handle_values = []
+        self.status = gatt.GattStatusCode.unknown
+        self.reason = GattOperationCompleteReason.FAILED
+
+
 class _WriteTask(object):
     _id_counter = 1
     _lock = threading.Lock()
@@ -400,21 +589,28 @@ class _WriteTask(object):
 
 
 class _ReadWriteManager(QueuedTasksManagerBase):
-    def __init__(self, reader, writer):
+    def __init__(self, reader, writer, command_writer):
         """
         :type reader: GattcReader
         :type writer: GattcWriter
+        :type command_writer: _WriteCommandManager
         """
         super(_ReadWriteManager, self).__init__()
         self._reader = reader
         self._writer = writer
+        self._command_writer = command_writer
         self._reader.peer.on_disconnect.register(self._on_disconnect)
         self._cur_read_task = None
         self._cur_write_task = None
         self.on_read_complete = EventSource("Gattc Read Complete", logger)
         self.on_write_complete = EventSource("Gattc Write Complete", logger)
+        self.on_read_by_uuid_complete = EventSource("Gattc Read By UUID Complete", logger)
         self._reader.on_read_complete.register(self._read_complete)
+        self._reader.on_read_multiple_complete.register(self._read_multiple_complete)
+        self._reader.on_read_by_uuid_complete.register(self._read_by_uuid_complete)
         self._writer.on_write_complete.register(self._write_complete)
+        # Write commands are not queued with the other operations, their completions are only forwarded
+        self._command_writer.on_write_complete.register(self.on_write_complete.notify)
         self._reader.peer.driver_event_subscribe(self._on_timeout, nrf_events.GattcEvtTimeout)
 
     def read(self, handle):
@@ -422,11 +618,56 @@ class _ReadWriteManager(QueuedTasksManagerBase):
         self._add_task(read_task)
         return read_task.id
 
+    def read_multiple(self, reads):
+        """
+        Queues reads of multiple handles, batched into Read Multiple requests by the current MTU
+
+        :param reads: The handle to read and its expected value length, 0 if unknown
+        :type reads: list of tuple
+        :return: The read ID of each handle, in order
+        """
+        read_tasks = [_ReadTask(handle) for handle, _ in reads]
+        # The response holds the concatenated values, the request a 2-byte handle for each.
+        # A response of max_length may have been cut off, so batches are kept shorter to detect values that grew
+        max_length = self._reader.peer.mtu_size - 1
+        max_handles = max_length // 2
+        batch = []
+        batch_lengths = []
+        with self._lock:
+            for task, (_, length) in zip(read_tasks, reads):
+                if not 0 < length < max_length:
+                    self._add_task(task)
+                    continue
+                if batch and (sum(batch_lengths) + length >= max_length or len(batch) == max_handles):
+                    self._add_read_batch(batch, batch_lengths)
+                    batch, batch_lengths = [], []
+                batch.append(task)
+                batch_lengths.append(length)
+            if batch:
+                self._add_read_batch(batch, batch_lengths)
+        return [t.id for t in read_tasks]
+
+    def read_by_uuid(self, uuid, start_handle, end_handle):
+        read_task = _ReadByUuidTask(uuid, start_handle, end_handle)
+        self._add_task(read_task)
+        return read_task.id
+
+    def _add_read_batch(self, read_tasks, lengths):
+        if len(read_tasks) == 1:
+            self._add_task(read_tasks[0])
+        else:
+            self._add_task(_ReadMultipleTask(read_tasks, lengths))
+
     def write(self, handle, value):
         write_task = _WriteTask(handle, value)
         self._add_task(write_task)
         return write_task.id
 
+    def write_without_response(self, handle, value):
+        write_task = _WriteTask(handle, value)
+        self._command_writer.write(write_task)
+        return write_task.id
+
     def clear_all(self):
         self._clear_all(GattOperationCompleteReason.QUEUE_CLEARED)
 
@@ -434,6 +675,12 @@ class _ReadWriteManager(QueuedTasksManagerBase):
         if isinstance(task, _ReadTask):
             self._reader.read(task.handle)
             self._cur_read_task = task
+        elif isinstance(task, _ReadMultipleTask):
+            self._reader.read_multiple(task.handles)
+            self._cur_read_task = task
+        elif isinstance(task, _ReadByUuidTask):
+            self._reader.read_by_uuid(task.uuid.nrf_uuid, task.start_handle, task.end_handle)
+            self._cur_read_task = task
         elif isinstance(task, _WriteTask):
             self._writer.write(task.handle, task.data)
             self._cur_write_task = task
@@ -443,6 +690,12 @@ class _ReadWriteManager(QueuedTasksManagerBase):
     def _handle_task_failure(self, task, e):
         if isinstance(task, _ReadTask):
             self.on_read_complete.notify(self, task)
+        elif isinstance(task, _ReadMultipleTask):
+            logger.debug("Failed to read handles %s, reading them individually: %s", task.handles, e)
+            for read_task in task.read_tasks:
+                self._add_task(read_task)
+        elif isinstance(task, _ReadByUuidTask):
+            self.on_read_by_uuid_complete.notify(self, task)
         elif isinstance(task, _WriteTask):
             self.on_write_complete.notify(self, task)
 
@@ -450,6 +703,13 @@ class _ReadWriteManager(QueuedTasksManagerBase):
         if isinstance(task, _ReadTask):
             task.reason = reason
             self.on_read_complete.notify(self, task)
+        elif isinstance(task, _ReadMultipleTask):
+            for read_task in task.read_tasks:
+                read_task.reason = reason
+                self.on_read_complete.notify(self, read_task)
+        elif isinstance(task, _ReadByUuidTask):
+            task.reason = reason
+            self.on_read_by_uuid_complete.notify(self, task)
         elif isinstance(task, _WriteTask):
             task.reason = reason
             self.on_write_complete.notify(self, task)
@@ -477,6 +737,53 @@ class _ReadWriteManager(QueuedTasksManagerBase):
         task.status = event_args.status
         self.on_read_complete.notify(sender, task)
 
+    def _read_multiple_complete(self, sender, event_args):
+        """
+        Handler for GattcReader.on_read_multiple_complete.
+        Splits the values apart and dispatches on_read_complete for each of them. If the values cannot be split
+        by the expected lengths or the peer rejected the request, the handles are queued to be read individually
+
+        :param sender: The reader that the read completed on
+        :type sender: blatann.gatt.reader.GattcReader
+        :param event_args: The event arguments
+        :type event_args: blatann.gatt.reader.GattcReadMultipleCompleteEventArgs
+        """
+        task = self._cur_read_task
+        self._task_completed(self._cur_read_task)
+
+        if event_args.status != gatt.GattStatusCode.success or len(event_args.data) != sum(task.lengths):
+            logger.debug("Read of handles %s did not return the expected values (status: %s, %d/%d bytes), "
+                         "reading them individually", event_args.handles, event_args.status,
+                         len(event_args.data), sum(task.lengths))
+            for read_task in task.read_tasks:
+                self._add_task(read_task)
+            return
+
+        offset = 0
+        for read_task, length in zip(task.read_tasks, task.lengths):
+            read_task.data = event_args.data[offset:offset + length]
+            read_task.status = event_args.status
+            offset += length
+            self.on_read_complete.notify(sender, read_task)
+
+    def _read_by_uuid_complete(self, sender, event_args):
+        """
+        Handler for GattcReader.on_read_by_uuid_complete
+
+        :param sender: The reader that the read completed on
+        :type sender: blatann.gatt.reader.GattcReader
+        :param event_args: The event arguments
+        :type event_args: blatann.gatt.reader.GattcReadByUuidCompleteEventArgs
+        """
+        task = self._cur_read_task
+        self._task_completed(self._cur_read_task)
+
+        task.handle_values = event_args.handle_values
+        task.status = event_args.status
+        if task.status == gatt.GattStatusCode.success:
+            task.reason = GattOperationCompleteReason.SUCCESS
+        self.on_read_by_uuid_complete.notify(sender, task)
+
     def _write_complete(self, sender, event_args):
         """
         Handler for GattcWriter.on_write_complete. Dispatches on_write_complete or on_cccd_write_complete
@@ -492,3 +799,126 @@ class _ReadWriteManager(QueuedTasksManagerBase):
 
         task.status = event_args.status
         self.on_write_complete.notify(sender, task)
+
+
+class _WriteCommandManager(object):
+    """
+    Sends Write Commands (write without response) to the peer. Writes are sent in the order they were queued,
+    each split into packets of the largest size the current MTU allows. Up to the connection's Write Command
+    TX queue size of packets are handed to the SoftDevice at a time and the queue is refilled as the
+    SoftDevice reports them transmitted. A write completes once its last packet was transmitted
+    """
+    _WRITE_OVERHEAD = 3  # Number of bytes per MTU that are overhead for the write command
+
+    def __init__(self, ble_device, peer):
+        """
+        :type ble_device: blatann.device.BleDevice
+        :type peer: blatann.peer.Peer
+        """
+        self.ble_device = ble_device
+        self.peer = peer
+        self.on_write_complete = EventSource("Gattc Write Command Complete", logger)
+        self._lock = threading.RLock()
+        # The writes which still have packets to send. The first one is sent from _offset on
+        self._pending = collections.deque()
+        self._offset = 0
+        # One entry per packet handed to the SoftDevice: the write if it is the write's last packet, otherwise None
+        self._in_flight = collections.deque()
+        self.peer.driver_event_subscribe(self._on_tx_complete, nrf_events.GattcEvtWriteCmdTxComplete)
+        self.peer.driver_event_subscribe(self._on_timeout, nrf_events.GattcEvtTimeout)
+        self.peer.on_disconnect.register(self._on_disconnect)
+
+    def write(self, task):
+        """
+        Queues the write and sends as many of its packets as the TX queue allows
+
+        :type task: _WriteTask
+        :raises: ValueError if there is no data to write
+        :raises: NordicSemiException if the SoftDevice rejected a packet of the write
+        """
+        if len(task.data) == 0:
+            raise ValueError("Data must be at least one byte")
+        with self._lock:
+            self._pending.append(task)
+            failed = self._send()
+        error = None
+        for failed_task, e in failed:
+            # The caller never gets the ID of a write which fails right away, raise the error to it instead
+            if failed_task is task:
+                error = e
+            else:
+                self.on_write_complete.notify(self, failed_task)
+        if error is not None:
+            raise error
+
+    def _send(self):
+        """
+        Hands packets to the SoftDevice until its TX queue is full or there's nothing left to send.
+        Must be called with the lock held
+
+        :return: The writes which failed and the exception they failed with
+        """
+        failed = []
+        queue_size = self.ble_device.write_cmd_tx_queue_size
+        while self._pending and len(self._in_flight) < queue_size:
+            task = self._pending[0]
+            chunk = task.data[self._offset:self._offset + self.peer.mtu_size - self._WRITE_OVERHEAD]
+            write_params = nrf_types.BLEGattcWriteParams(nrf_types.BLEGattWriteOperation.write_cmd,
+                                                         nrf_types.BLEGattExecWriteFlag.unused,
+                                                         task.handle, chunk, 0)
+            try:
+                self.ble_device.ble_driver.ble_gattc_write(self.peer.conn_handle, write_params)
+            except NordicSemiException as e:
+                if e.error_code == nrf_types.NrfError.resources.value and self._in_flight:
+                    # The SoftDevice's queue is full after all, continue once a packet is transmitted
+                    break
+                logger.error("Failed to send write command to handle %s: %s", task.handle, e)
+                self._pending.popleft()
+                self._offset = 0
+                task.status = gatt.GattStatusCode.unknown
+                failed.append((task, e))
+                continue
+            self._offset += len(chunk)
+            last_chunk = self._offset >= len(task.data)
+            if last_chunk:
+                self._pending.popleft()
+                self._offset = 0
+            self._in_flight.append(task if last_chunk else None)
+        return failed
+
+    def _on_tx_complete(self, driver, event):
+        """
+        Handler for GattcEvtWriteCmdTxComplete
+
+        :type event: nrf_events.GattcEvtWriteCmdTxComplete
+        """
+        completed = []
+        with self._lock:
+            for _ in range(min(event.tx_count, len(self._in_flight))):
+                task = self._in_flight.popleft()
+                if task is not None:
+                    task.status = gatt.GattStatusCode.success
+                    task.reason = GattOperationCompleteReason.SUCCESS
+                    completed.append(task)
+            failed = self._send()
+        for task in completed:
+            self.on_write_complete.notify(self, task)
+        for task, _ in failed:
+            self.on_write_complete.notify(self, task)
+
+    def _clear_all(self, reason):
+        with self._lock:
+            tasks = [t for t in self._in_flight if t is not None]
+            tasks.extend(self._pending)
+            self._in_flight.clear()
+            self._pending.clear()
+            self._offset = 0
+        for task in tasks:
+            task.reason = reason
+            self.on_write_complete.notify(self, task)
+
+    def _on_disconnect(self, sender, event_args):
+        self._clear_all(GattOperationCompleteReason.SERVER_DISCONNECTED)
+
+    def _on_timeout(self, driver, event):
+        self._clear_all(GattOperationCompleteReason.TIMED_OUT)
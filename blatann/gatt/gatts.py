@@ -231,14 +231,15 @@ class GattsCharacteristic(gatt.Characteristic):
 
         self._write_queued = False
         if write_op == nrf_events.BLEGattsWriteOperation.exec_write_req_cancel:
-            logger.info("Cancelling write request, char: {}".format(self.uuid))
+            logger.info("Cancelling write request, char: %s", self.uuid)
         else:
-            logger.info("Executing write request, char: {}".format(self.uuid))
+            logger.info("Executing write request, char: %s", self.uuid)
             # TODO Assume that it was assembled properly. Error handling should go here
             new_value = bytearray()
             for chunk in self._queued_write_chunks:
-                new_value += bytearray(chunk.data)
-            logger.debug("New value: 0x{}".format(binascii.hexlify(new_value)))
+                new_value += chunk.data
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("New value: 0x%s", binascii.hexlify(new_value).decode("ascii"))
             self.ble_device.ble_driver.ble_gatts_value_set(self.peer.conn_handle, self.value_handle,
                                                            nrf_types.BLEGattsValue(new_value))
             self._value = bytes(new_value)
@@ -261,7 +262,7 @@ class GattsCharacteristic(gatt.Characteristic):
             return
         elif event.attribute_handle != self.value_handle:
             return
-        self._value = bytes(bytearray(event.data))
+        self._value = bytes(event.data)
         self._on_write.notify(self, WriteEventArgs(self.value))
 
     def _on_write_auth_request(self, write_event):
@@ -325,7 +326,7 @@ class GattsCharacteristic(gatt.Characteristic):
 
     def _on_rw_auth_request(self, driver, event):
         if not self.peer:
-            logger.warning("Got RW request when peer not connected: {}".format(event.conn_handle))
+            logger.warning("Got RW request when peer not connected: %s", event.conn_handle)
             return
         if event.read:
             self._on_read_auth_request(event.read)
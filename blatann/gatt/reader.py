@@ -15,6 +15,20 @@ class GattcReadCompleteEventArgs(EventArgs):
         self.data = data
 
 
+class GattcReadMultipleCompleteEventArgs(EventArgs):
+    def __init__(self, handles, status, data):
+        self.handles = handles
+        self.status = status
+        self.data = data
+
+
+class GattcReadByUuidCompleteEventArgs(EventArgs):
+    def __init__(self, uuid, status, handle_values):
+        self.uuid = uuid
+        self.status = status
+        self.handle_values = handle_values
+
+
 class GattcReader(object):
     """
     Class which implements the state machine for completely reading a peripheral's attribute
@@ -33,7 +47,16 @@ class GattcReader(object):
         self._data = bytearray()
         self._handle = 0x0000
         self._offset = 0
+        self._on_read_multiple_complete_event = EventSource("On Read Multiple Complete", logger)
+        self._multiple_handles = None
+        self._on_read_by_uuid_complete_event = EventSource("On Read By UUID Complete", logger)
+        self._by_uuid = None
+        self._by_uuid_end_handle = 0x0000
+        self._handle_values = []
         self.peer.driver_event_subscribe(self._on_read_response, nrf_events.GattcEvtReadResponse)
+        self.peer.driver_event_subscribe(self._on_char_values_read_response, nrf_events.GattcEvtCharValuesReadResponse)
+        self.peer.driver_event_subscribe(self._on_char_value_by_uuid_read_response,
+                                         nrf_events.GattcEvtCharValueByUuidReadResponse)
 
     @property
     def on_read_complete(self):
@@ -47,6 +70,30 @@ class GattcReader(object):
         """
         return self._on_read_complete_event
 
+    @property
+    def on_read_multiple_complete(self):
+        """
+        Event that is emitted when a read of multiple attributes completes.
+
+        Handler args: (GattcReader reader, GattcReadMultipleCompleteEventArgs event_args)
+
+        :return: an Event which can have handlers registered to and deregistered from
+        :rtype: Event
+        """
+        return self._on_read_multiple_complete_event
+
+    @property
+    def on_read_by_uuid_complete(self):
+        """
+        Event that is emitted when a read of the attributes with a UUID completes.
+
+        Handler args: (GattcReader reader, GattcReadByUuidCompleteEventArgs event_args)
+
+        :return: an Event which can have handlers registered to and deregistered from
+        :rtype: Event
+        """
+        return self._on_read_by_uuid_complete_event
+
     def read(self, handle):
         """
         Reads the attribute value from the handle provided. Can only read from a single attribute at a time. If a
@@ -62,11 +109,57 @@ class GattcReader(object):
         self._handle = handle
         self._offset = 0
         self._data = bytearray()
-        logger.debug("Starting read from handle {}".format(handle))
+        logger.debug("Starting read from handle %s", handle)
         self._read_next_chunk()
         self._busy = True
         return EventWaitable(self.on_read_complete)
 
+    def read_multiple(self, handles):
+        """
+        Reads the values of the handles provided with a single Read Multiple request.
+        The peer returns the values concatenated, truncated to the MTU, so the lengths of the values
+        must be known to split them apart. If a read is in progress, raises an InvalidStateException
+
+        :param handles: the attribute handles to read, at least two
+        :type handles: list of int
+        :return: A waitable that will fire when the read finishes.
+                 See on_read_multiple_complete for the values returned from the waitable
+        :rtype: EventWaitable
+        """
+        if self._busy:
+            raise InvalidStateException("Gattc Reader is busy")
+        logger.debug("Starting read of handles %s", handles)
+        self.ble_device.ble_driver.ble_gattc_char_values_read(self.peer.conn_handle, handles)
+        self._multiple_handles = list(handles)
+        self._busy = True
+        return EventWaitable(self.on_read_multiple_complete)
+
+    def read_by_uuid(self, uuid, start_handle=0x0001, end_handle=0xFFFF):
+        """
+        Reads the values of all the attributes with the UUID provided within the handle range.
+        The peer returns as many values as fit into a response, so requests are repeated from the handle after
+        the last one returned until the end of the range. Values which do not fit into a response are truncated.
+        If a read is in progress, raises an InvalidStateException
+
+        :param uuid: the UUID of the attributes to read
+        :type uuid: nrf_types.BLEUUID
+        :param start_handle: the first handle of the range to search
+        :param end_handle: the last handle of the range to search
+        :return: A waitable that will fire when the read finishes.
+                 See on_read_by_uuid_complete for the values returned from the waitable
+        :rtype: EventWaitable
+        """
+        if self._busy:
+            raise InvalidStateException("Gattc Reader is busy")
+        logger.debug("Starting read of UUID %s in handles %s-%s", uuid, start_handle, end_handle)
+        self.ble_device.ble_driver.ble_gattc_char_value_by_uuid_read(self.peer.conn_handle, uuid,
+                                                                     start_handle, end_handle)
+        self._by_uuid = uuid
+        self._by_uuid_end_handle = end_handle
+        self._handle_values = []
+        self._busy = True
+        return EventWaitable(self.on_read_by_uuid_complete)
+
     def _read_next_chunk(self):
         self.ble_device.ble_driver.ble_gattc_read(self.peer.conn_handle, self._handle, self._offset)
 
@@ -76,14 +169,14 @@ class GattcReader(object):
 
         :type event: nrf_events.GattcEvtReadResponse
         """
-        if event.conn_handle != self.peer.conn_handle or event.attr_handle != self._handle:
+        if event.attr_handle != self._handle:
             return
         if event.status != nrf_events.BLEGattStatusCode.success:
             self._complete(event.status)
             return
 
         bytes_read = len(event.data)
-        self._data += bytearray(event.data)
+        self._data += event.data
         self._offset += bytes_read
 
         if bytes_read == (self.peer.mtu_size - self._READ_OVERHEAD):
@@ -91,6 +184,44 @@ class GattcReader(object):
         else:
             self._complete()
 
+    def _on_char_values_read_response(self, driver, event):
+        """
+        Handler for GattcEvtCharValuesReadResponse
+
+        :type event: nrf_events.GattcEvtCharValuesReadResponse
+        """
+        if self._multiple_handles is None:
+            return
+        handles, self._multiple_handles = self._multiple_handles, None
+        self._busy = False
+        event_args = GattcReadMultipleCompleteEventArgs(handles, event.status, bytes(event.data))
+        self._on_read_multiple_complete_event.notify(self, event_args)
+
+    def _on_char_value_by_uuid_read_response(self, driver, event):
+        """
+        Handler for GattcEvtCharValueByUuidReadResponse
+
+        :type event: nrf_events.GattcEvtCharValueByUuidReadResponse
+        """
+        if self._by_uuid is None:
+            return
+        status = event.status
+        if status == nrf_events.BLEGattStatusCode.success:
+            self._handle_values.extend(event.handle_values)
+            next_handle = event.handle_values[-1][0] + 1
+            if next_handle <= self._by_uuid_end_handle:
+                self.ble_device.ble_driver.ble_gattc_char_value_by_uuid_read(self.peer.conn_handle, self._by_uuid,
+                                                                             next_handle, self._by_uuid_end_handle)
+                return
+        elif status == nrf_events.BLEGattStatusCode.attribute_not_found and self._handle_values:
+            # No more attributes with the UUID after the ones already read
+            status = nrf_events.BLEGattStatusCode.success
+
+        uuid, self._by_uuid = self._by_uuid, None
+        self._busy = False
+        event_args = GattcReadByUuidCompleteEventArgs(uuid, status, self._handle_values)
+        self._on_read_by_uuid_complete_event.notify(self, event_args)
+
     def _complete(self, status=nrf_events.BLEGattStatusCode.success):
         self._busy = False
         event_args = GattcReadCompleteEventArgs(self._handle, status, bytes(self._data))
@@ -110,8 +110,6 @@ class _ServiceDiscoverer(_Discoverer):
         """
         if not self.peer.connected:
             logger.warning("Primary service discovery for a disconnected peer")
-        if event.conn_handle != self.peer.conn_handle:
-            return
 
         if event.status != nrf_events.BLEGattStatusCode.success:
             self._on_complete(event.status)  # Not found, done
@@ -141,10 +139,7 @@ class _ServiceDiscoverer(_Discoverer):
         """
         :type event: nrf_events.GattcEvtReadResponse
         """
-        if self.peer.conn_handle != event.conn_handle:
-            return
-
-        logger.info(("Got gattc read: {}".format(event)))
+        logger.info("Got gattc read: %s", event)
         service = self._state.current_service
 
         if event.attr_handle != service.start_handle:
@@ -152,11 +147,11 @@ class _ServiceDiscoverer(_Discoverer):
 
         # Length should be 16 for 128-bit uuids
         if len(event.data) != 16:
-            logger.error("Service UUID not 16 bytes: {}".format(event.data))
+            logger.error("Service UUID not 16 bytes: %s", event.data)
         else:
             nrf_uuid = nrf_events.BLEUUID.from_array(event.data)
             self.ble_device.uuid_manager.register_uuid(nrf_uuid)
-            logger.info("Discovered UUID: {}".format(nrf_uuid))
+            logger.info("Discovered UUID: %s", nrf_uuid)
             self._state.current_service.uuid = nrf_uuid
 
         self._state.service_index += 1
@@ -196,8 +191,6 @@ class _CharacteristicDiscoverer(_Discoverer):
         """
         if not self.peer.connected:
             logger.warning("Primary service discovery for a disconnected peer")
-        if event.conn_handle != self.peer.conn_handle:
-            return
 
         if event.status == nrf_events.BLEGattStatusCode.attribute_not_found:
             # Done discovering characteristics in this service, discover next service or unknown UUIDs
@@ -246,10 +239,7 @@ class _CharacteristicDiscoverer(_Discoverer):
         """
         :type event: nrf_events.GattcEvtReadResponse
         """
-        if self.peer.conn_handle != event.conn_handle:
-            return
-
-        logger.info(("Got gattc read: {}".format(event)))
+        logger.info("Got gattc read: %s", event)
         char = self._state.current_characteristic
 
         if event.attr_handle != char.handle_decl:
@@ -259,11 +249,11 @@ class _CharacteristicDiscoverer(_Discoverer):
         uuid_bytes = event.data[3:]
         # Length should be 16 for 128-bit uuids
         if len(uuid_bytes) != 16:
-            logger.error("Characteristic UUID not 16 bytes: {}".format(uuid_bytes))
+            logger.error("Characteristic UUID not 16 bytes: %s", uuid_bytes)
         else:
             nrf_uuid = nrf_events.BLEUUID.from_array(uuid_bytes)
             self.ble_device.uuid_manager.register_uuid(nrf_uuid)
-            logger.info("Discovered UUID: {}".format(nrf_uuid))
+            logger.info("Discovered UUID: %s", nrf_uuid)
             char.uuid = nrf_uuid
 
         self._state.char_index += 1
@@ -313,8 +303,6 @@ class _DescriptorDiscoverer(_Discoverer):
         """
         if not self.peer.connected:
             logger.warning("Primary service discovery for a disconnected peer")
-        if event.conn_handle != self.peer.conn_handle:
-            return
 
         if event.status == nrf_events.BLEGattStatusCode.attribute_not_found:
             self._state.char_index += 1
@@ -366,7 +354,7 @@ class DatabaseDiscoverer(object):
         """
         logger.info("Service Discovery complete")
         if event_args.status != nrf_events.BLEGattStatusCode.success:
-            logger.error("Error discovering services: {}".format(event_args.status))
+            logger.error("Error discovering services: %s", event_args.status)
             self._on_complete([], event_args.status)
         else:
             self._characteristic_discoverer.start(event_args.services).then(self._on_characteristic_discovery_complete)
@@ -378,7 +366,7 @@ class DatabaseDiscoverer(object):
         """
         logger.info("Characteristic Discovery complete")
         if event_args.status != nrf_events.BLEGattStatusCode.success:
-            logger.error("Error discovering characteristics: {}".format(event_args.status))
+            logger.error("Error discovering characteristics: %s", event_args.status)
             self._on_complete([], event_args.status)
         else:
             self._descriptor_discoverer.start(event_args.services).then(self._on_descriptor_discovery_complete)
@@ -66,7 +66,7 @@ class GattcWriter(object):
         self._offset = 0
         self._handle = handle
         self._data = data
-        logger.debug("Starting write to handle {}, len: {}".format(self._handle, len(self._data)))
+        logger.debug("Starting write to handle %s, len: %s", self._handle, len(self._data))
         self._write_next_chunk()
         self._busy = True
         return EventWaitable(self.on_write_complete)
@@ -88,8 +88,8 @@ class GattcWriter(object):
         data_to_write = self._data[self._offset:self._offset+self._len_bytes_written]
         write_params = nrf_types.BLEGattcWriteParams(write_operation, flags,
                                                      self._handle, data_to_write, self._offset)
-        logger.debug("Writing chunk: handle: {}, offset: {}, len: {}, op: {}".format(self._handle, self._offset,
-                                                                                     len(data_to_write), write_operation))
+        logger.debug("Writing chunk: handle: %s, offset: %s, len: %s, op: %s",
+                     self._handle, self._offset, len(data_to_write), write_operation)
         self.ble_device.ble_driver.ble_gattc_write(self.peer.conn_handle, write_params)
 
     def _on_write_response(self, driver, event):
@@ -98,8 +98,6 @@ class GattcWriter(object):
 
         :type event: nrf_events.GattcEvtWriteResponse
         """
-        if event.conn_handle != self.peer.conn_handle:
-            return
         if event.attr_handle != self._handle and event.write_op != nrf_types.BLEGattWriteOperation.execute_write_req:
             return
         if event.status != nrf_events.BLEGattStatusCode.success:
@@ -116,7 +114,7 @@ class GattcWriter(object):
             # Write next chunk (or execute if complete)
             self._write_next_chunk()
         else:
-            logger.error("Got unknown write operation: {}".format(event))
+            logger.error("Got unknown write operation: %s", event)
             self._complete(nrf_types.BLEGattStatusCode.unknown)
 
     def _complete(self, status=nrf_events.BLEGattStatusCode.success):
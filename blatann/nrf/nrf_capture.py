@@ -0,0 +1,226 @@
+import enum
+import json
+import logging
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+import blatann.nrf.nrf_driver_types as util
+
+logger = logging.getLogger(__name__)
+
+
+CAPTURE_MAGIC = b"BLTNCAP2"
+# Record header: record type, timestamp (seconds since the capture started), payload length
+_RECORD_HEADER = struct.Struct("<BdI")
+# Consecutive events are nearly identical, the record stream compresses by over an order of magnitude
+_COMPRESSION_LEVEL = 1
+# The compressed stream is flushed every so often so that a capture which is never closed
+# (e.g. the process crashed) can still be read up to the last flush
+_FLUSH_INTERVAL = 256
+_READ_SIZE = 65536
+
+
+class CaptureRecordType(enum.IntEnum):
+    event = 1
+    api_call = 2
+    decoded_event = 3
+
+
+class ApiCallRecord(object):
+    """
+    A driver API call stored in a capture file
+    """
+    def __init__(self, name, args, kwargs, err_code):
+        self.name = name
+        """The name of the driver API (e.g. ble_gattc_write)"""
+        self.args = args
+        """The positional arguments the API was called with. Arguments other than numbers, strings, None
+        and lists of them are stored as their repr()"""
+        self.kwargs = kwargs
+        """The keyword arguments the API was called with"""
+        self.err_code = err_code
+        """The error code returned by the device, None if the call raised an exception"""
+
+    def __repr__(self):
+        return "{}(name={!r}, args={!r}, kwargs={!r}, err_code={!r})".format(
+            self.__class__.__name__, self.name, self.args, self.kwargs, self.err_code)
+
+
+class CaptureRecord(object):
+    """
+    A single entry of a capture file
+    """
+    def __init__(self, record_type, timestamp, data):
+        self.record_type = record_type
+        """The kind of record
+
+        :type: CaptureRecordType"""
+        self.timestamp = timestamp
+        """The time the record was captured, in seconds since the capture started"""
+        self.data = data
+        """The event as copied from the driver (see blatann.nrf.nrf_driver_types.ble_evt_to_bytes()) for event
+        records, the pickled event for decoded event records, an ApiCallRecord for API call records"""
+
+    def decode_event(self):
+        """
+        Decodes the event of an event or decoded event record
+
+        :return: The decoded event, or None if the event is not supported
+        :rtype: blatann.nrf.nrf_events.BLEEvent
+        """
+        if self.record_type == CaptureRecordType.decoded_event:
+            return pickle.loads(self.data)
+        from blatann.nrf.nrf_events import event_decode
+        return event_decode(util.ble_evt_from_bytes(self.data))
+
+    def __repr__(self):
+        return "{}(record_type={!r}, timestamp={:.6f}, data={!r})".format(
+            self.__class__.__name__, self.record_type, self.timestamp, self.data)
+
+
+def _storable(value):
+    """
+    Gets a version of an API call argument which can be stored as JSON
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_storable(v) for v in value]
+    return repr(value)
+
+
+class CaptureWriter(object):
+    """
+    Writes the events received from the device and the API calls made to it to a capture file.
+
+    The file starts with CAPTURE_MAGIC followed by a zlib stream of length-prefixed records, each with a timestamp.
+    Events are stored as copied from the driver, header and payload, so they are played back through the same
+    decoding as the events of a device. If the driver backend cannot rebuild events from the copy
+    (see blatann.nrf.nrf_driver_types.ble_evt_from_bytes()), the events are decoded and stored pickled instead.
+    API calls are stored as JSON
+    """
+    def __init__(self, file):
+        """
+        :param file: The path of the capture file to create, or a binary file object to write to.
+                     A file object is not closed when the capture is closed
+        """
+        if isinstance(file, (str, bytes)) or hasattr(file, "__fspath__"):
+            self._file = open(file, "wb")
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+        self._lock = threading.Lock()
+        self._compressor = zlib.compressobj(_COMPRESSION_LEVEL)
+        self._unflushed_records = 0
+        self._start = time.perf_counter()
+        self._store_decoded_events = not util.ble_evt_from_bytes_supported()
+        self._file.write(CAPTURE_MAGIC)
+
+    def record_event(self, ble_event):
+        """
+        Writes an event received from the device
+
+        :param ble_event: The raw ble_evt_t
+        """
+        if not self._store_decoded_events:
+            self._write(CaptureRecordType.event, util.ble_evt_to_bytes(ble_event))
+            return
+        from blatann.nrf.nrf_events import event_decode
+        event = event_decode(ble_event)
+        if event is not None:
+            self._write(CaptureRecordType.decoded_event, pickle.dumps(event, pickle.HIGHEST_PROTOCOL))
+
+    def record_api_call(self, name, args, kwargs, err_code):
+        """
+        Writes an API call made to the device
+
+        :param name: The API name
+        :param args: The positional arguments of the call
+        :param kwargs: The keyword arguments of the call
+        :param err_code: The error code the device returned, None if the call raised an exception
+        """
+        record = [name, [_storable(a) for a in args], {k: _storable(v) for k, v in kwargs.items()},
+                  _storable(err_code)]
+        self._write(CaptureRecordType.api_call, json.dumps(record).encode("utf-8"))
+
+    def _write(self, record_type, payload):
+        with self._lock:
+            if self._file is None:
+                return
+            timestamp = time.perf_counter() - self._start
+            compressor = self._compressor
+            self._file.write(compressor.compress(_RECORD_HEADER.pack(record_type, timestamp, len(payload))))
+            self._file.write(compressor.compress(payload))
+            self._unflushed_records += 1
+            if self._unflushed_records >= _FLUSH_INTERVAL:
+                self._file.write(compressor.flush(zlib.Z_SYNC_FLUSH))
+                self._unflushed_records = 0
+
+    def close(self):
+        """
+        Flushes the capture, and closes the file if it was opened by the writer
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(self._compressor.flush())
+            self._file.flush()
+            if self._owns_file:
+                self._file.close()
+            self._file = None
+
+
+def read_capture(file):
+    """
+    Reads the records from a capture file.
+
+    :param file: The path of the capture file, or a binary file object to read from
+    :return: Generator of the records, in the order they were captured
+    :rtype: collections.abc.Iterator[CaptureRecord]
+    """
+    if isinstance(file, (str, bytes)) or hasattr(file, "__fspath__"):
+        with open(file, "rb") as f:
+            yield from _read_records(f)
+    else:
+        yield from _read_records(file)
+
+
+def _read_records(f):
+    magic = f.read(len(CAPTURE_MAGIC))
+    if magic != CAPTURE_MAGIC:
+        raise ValueError("Not a capture file")
+    decompressor = zlib.decompressobj()
+    buffer = bytearray()
+    offset = 0
+    while True:
+        chunk = f.read(_READ_SIZE)
+        if chunk:
+            try:
+                buffer += decompressor.decompress(chunk)
+            except zlib.error:
+                logger.warning("Capture file is corrupt, stopping at the last complete record")
+                buffer += decompressor.flush()
+                chunk = None
+        while len(buffer) - offset >= _RECORD_HEADER.size:
+            record_type, timestamp, length = _RECORD_HEADER.unpack_from(buffer, offset)
+            start = offset + _RECORD_HEADER.size
+            if len(buffer) - start < length:
+                break
+            data = bytes(buffer[start:start + length])
+            offset = start + length
+            if record_type == CaptureRecordType.api_call:
+                name, args, kwargs, err_code = json.loads(data.decode("utf-8"))
+                data = ApiCallRecord(name, tuple(args), kwargs, err_code)
+            yield CaptureRecord(CaptureRecordType(record_type), timestamp, data)
+        del buffer[:offset]
+        offset = 0
+        if chunk is None:
+            return
+        if not chunk:
+            if buffer or not decompressor.eof:
+                logger.warning("Capture file ends with a truncated record")
+            return
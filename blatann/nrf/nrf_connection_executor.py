@@ -0,0 +1,208 @@
+import collections
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ConnectionExecutorStats(object):
+    """
+    Snapshot of the counters for a single connection's lane in the connection executor
+    """
+    def __init__(self, conn_handle, events=0, depth=0, max_depth=0, total_wait=0.0, max_wait=0.0,
+                 total_latency=0.0, max_latency=0.0):
+        self.conn_handle = conn_handle
+        """The connection handle the counters are for"""
+        self.events = events
+        """The number of events handled for the connection"""
+        self.depth = depth
+        """The number of events currently waiting to be handled"""
+        self.max_depth = max_depth
+        """The largest number of events that were waiting to be handled at once"""
+        self.max_wait = max_wait
+        """The longest time an event waited in the queue before its handlers ran, in seconds"""
+        self.max_latency = max_latency
+        """The longest time it took the handlers to process a single event, in seconds"""
+        self._total_wait = total_wait
+        self._total_latency = total_latency
+
+    @property
+    def average_wait(self):
+        """
+        The average time an event waited in the queue before its handlers ran, in seconds
+
+        :rtype: float
+        """
+        if not self.events:
+            return 0.0
+        return self._total_wait / self.events
+
+    @property
+    def average_latency(self):
+        """
+        The average time it took the handlers to process a single event, in seconds
+
+        :rtype: float
+        """
+        if not self.events:
+            return 0.0
+        return self._total_latency / self.events
+
+    def __repr__(self):
+        return "{}(conn_handle={!r}, events={!r}, depth={!r}, max_depth={!r}, average_wait={:.6f}, " \
+               "max_wait={:.6f}, average_latency={:.6f}, max_latency={:.6f})".format(
+                    self.__class__.__name__, self.conn_handle, self.events, self.depth, self.max_depth,
+                    self.average_wait, self.max_wait, self.average_latency, self.max_latency)
+
+
+class _ConnectionLane(object):
+    def __init__(self, conn_handle):
+        self.conn_handle = conn_handle
+        self.tasks = collections.deque()
+        self.scheduled = False
+        self.events = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def stats(self):
+        return ConnectionExecutorStats(self.conn_handle, self.events, len(self.tasks), self.max_depth,
+                                       self.total_wait, self.max_wait, self.total_latency, self.max_latency)
+
+    def reset_stats(self):
+        self.events = 0
+        self.max_depth = len(self.tasks)
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+
+class ConnectionExecutor(object):
+    """
+    Runs tasks on a bounded thread pool with one serial lane per connection.
+
+    Tasks submitted for the same connection handle run one at a time in the order they were submitted,
+    while tasks for different connections run in parallel on up to max_workers threads.
+    A lane with a long backlog gives up its worker every few tasks so it cannot starve other connections
+    when there are more busy connections than workers
+    """
+    TASKS_PER_TURN = 16
+
+    def __init__(self, max_workers, thread_name_prefix=""):
+        """
+        :param max_workers: The maximum number of threads to run handlers on
+        :param thread_name_prefix: Prefix for the names of the worker threads
+        """
+        if max_workers < 1:
+            raise ValueError("Max workers must be at least 1. Got {}".format(max_workers))
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._lock = threading.Lock()
+        self._lanes = {}
+        self._pool = None
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    def submit(self, conn_handle, func, *args):
+        """
+        Queues a function call on the connection's lane
+
+        :param conn_handle: The connection handle the call is for
+        :param func: The function to call
+        :param args: The arguments to pass to the function
+        """
+        with self._lock:
+            lane = self._lanes.get(conn_handle)
+            if lane is None:
+                lane = self._lanes[conn_handle] = _ConnectionLane(conn_handle)
+            lane.tasks.append((time.perf_counter(), func, args))
+            if len(lane.tasks) > lane.max_depth:
+                lane.max_depth = len(lane.tasks)
+            if lane.scheduled:
+                return
+            lane.scheduled = True
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self._max_workers, self._thread_name_prefix)
+            # Submitted under the lock so that shutdown() cannot close the pool in between
+            self._pool.submit(self._run_lane, lane)
+
+    def _run_lane(self, lane):
+        while not self._run_lane_turn(lane):
+            pass
+
+    def _run_lane_turn(self, lane):
+        """
+        Runs up to TASKS_PER_TURN tasks from the lane
+
+        :return: True if the lane is done or was handed back to the pool, False if it should keep running
+        """
+        for _ in range(self.TASKS_PER_TURN):
+            with self._lock:
+                if not lane.tasks:
+                    lane.scheduled = False
+                    return True
+                queued_at, func, args = lane.tasks.popleft()
+            start = time.perf_counter()
+            try:
+                func(*args)
+            except:
+                traceback.print_exc()
+            end = time.perf_counter()
+            with self._lock:
+                wait = start - queued_at
+                latency = end - start
+                lane.events += 1
+                lane.total_wait += wait
+                lane.total_latency += latency
+                if wait > lane.max_wait:
+                    lane.max_wait = wait
+                if latency > lane.max_latency:
+                    lane.max_latency = latency
+
+        # Give up the worker and requeue the rest of the backlog behind the other lanes.
+        # If the executor was shut down in the meantime, finish the backlog on this thread
+        with self._lock:
+            if not lane.tasks:
+                lane.scheduled = False
+                return True
+            if self._pool is None:
+                return False
+            self._pool.submit(self._run_lane, lane)
+            return True
+
+    def get_stats(self):
+        """
+        Gets a snapshot of the counters for every connection which has had events submitted
+
+        :return: The counters keyed by connection handle
+        :rtype: dict[int, ConnectionExecutorStats]
+        """
+        with self._lock:
+            return {conn_handle: lane.stats() for conn_handle, lane in self._lanes.items()}
+
+    def reset_stats(self):
+        """
+        Resets the counters for all connections
+        """
+        with self._lock:
+            for conn_handle, lane in list(self._lanes.items()):
+                if lane.tasks or lane.scheduled:
+                    lane.reset_stats()
+                else:
+                    del self._lanes[conn_handle]
+
+    def shutdown(self):
+        """
+        Stops the worker threads once the tasks already submitted have run. The executor can still be used
+        afterwards, a new pool is started on the next submit
+        """
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=False)
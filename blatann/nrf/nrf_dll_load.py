@@ -1 +1,27 @@
-import pc_ble_driver_py.lib.nrf_ble_driver_sd_api_v5 as driver
+"""
+Loads the driver module which implements the SoftDevice API.
+
+The backend is selected with the BLATANN_DRIVER_BACKEND environment variable, which must be set before blatann
+is imported:
+
+- ``pc_ble_driver_py`` (default): talks to nRF52 connectivity firmware over a serial port
+- ``sim``: in-process simulated adapters which connect to each other, see blatann.nrf.nrf_sim
+"""
+import os
+
+BACKEND_ENV_VAR = "BLATANN_DRIVER_BACKEND"
+
+backend = os.environ.get(BACKEND_ENV_VAR, "pc_ble_driver_py").strip().lower()
+
+if backend == "sim":
+    import blatann.nrf.nrf_sim.driver as driver
+    from blatann.nrf.nrf_sim.driver import NordicSemiException
+elif backend == "pc_ble_driver_py":
+    from pc_ble_driver_py import config
+    config.__conn_ic_id__ = "NRF52"
+
+    import pc_ble_driver_py.lib.nrf_ble_driver_sd_api_v5 as driver
+    from pc_ble_driver_py.exceptions import NordicSemiException
+else:
+    raise ImportError("Unknown driver backend {!r} set in {}, expected 'pc_ble_driver_py' or 'sim'".format(
+        backend, BACKEND_ENV_VAR))
@@ -36,16 +36,20 @@
 #
 
 import atexit
+import enum
 import functools
-import wrapt
-import queue
+import time
 import traceback
 from threading import Thread, Lock, Event
 
 from blatann.nrf.nrf_events import *
+from blatann.nrf.nrf_events import _event_classes
 from blatann.nrf.nrf_types import *
-from blatann.nrf.nrf_dll_load import driver
-from pc_ble_driver_py.exceptions import NordicSemiException
+from blatann.nrf.nrf_dll_load import driver, NordicSemiException
+from blatann.nrf.nrf_event_queue import EventQueue, EventPriority, OverflowPolicy
+from blatann.nrf.nrf_connection_executor import ConnectionExecutor
+from blatann.nrf.nrf_driver_stats import DriverStatsRecorder
+from blatann.nrf.nrf_capture import CaptureWriter
 import blatann.nrf.nrf_driver_types as util
 from blatann.nrf.nrf_types.config import BleEnableConfig, BleConnConfig
 
@@ -53,75 +57,379 @@ logger = logging.getLogger(__name__)
 
 NoneType = type(None)
 
+# Events which change the connection state or which the peer is waiting on a reply/response for.
+# These can never be made low priority, so they are never dropped and keep their order relative to other events
+CRITICAL_EVENT_TYPES = (GapEvtConnected, GapEvtDisconnected, GapEvtTimeout, GapEvtSec,
+                        GapEvtConnParamUpdateRequest, GapEvtDataLengthUpdateRequest, GapEvtPhyUpdateRequest,
+                        EvtUserMemoryRequest, GattcEvtReadResponse, GattcEvtCharValuesReadResponse,
+                        GattcEvtCharValueByUuidReadResponse, GattcEvtWriteResponse,
+                        GattcEvtPrimaryServiceDiscoveryResponse, GattcEvtCharacteristicDiscoveryResponse,
+                        GattcEvtDescriptorDiscoveryResponse, GattcEvtAttrInfoDiscoveryResponse,
+                        GattcEvtMtuExchangeResponse, GattsEvtReadWriteAuthorizeRequest, GattsEvtExchangeMtuRequest,
+                        GattsEvtHandleValueConfirm, GattsEvtNotificationTxComplete, GattcEvtWriteCmdTxComplete)
+# Events which can be dropped or coalesced when the event queue is full
+DEFAULT_LOW_PRIORITY_EVENT_TYPES = (GapEvtAdvReport,)
+
 
 # TODO: Do we really want to raise exceptions all the time?
 def NordicSemiErrorCheck(wrapped=None, expected=driver.NRF_SUCCESS):
     if wrapped is None:
         return functools.partial(NordicSemiErrorCheck, expected=expected)
 
-    @wrapt.decorator
-    def wrapper(wrapped, instance, args, kwargs):
-        logger.debug("[{}] {}{}".format(instance.serial_port, wrapped.__name__, args))
-        result = wrapped(*args, **kwargs)
-        if isinstance(result, (list, tuple)):
-            err_code = result[0]
-            result = result[1:]
-            if len(result) == 1:
-                result = result[0]
+    @functools.wraps(wrapped)
+    def wrapper(instance, *args, **kwargs):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[%s] %s%s", instance.serial_port, wrapped.__name__, args)
+        stats_recorder = instance._stats_recorder
+        capture = instance._capture
+        if stats_recorder is None and capture is None:
+            err_code, result = _split_result(wrapped(instance, *args, **kwargs))
         else:
-            err_code = result
-            result = None
+            err_code, result = _instrumented_call(wrapped.__get__(instance), args, kwargs, expected,
+                                                  stats_recorder, capture)
 
         if err_code != expected:
             try:
                 err_string = 'Error code: {}'.format(NrfError(err_code))
             except ValueError:
                 err_string = 'Error code: 0x{:04x}, {}'.format(err_code, err_code)
-            raise NordicSemiException('Failed to {}. {}'.format(wrapped.__name__, err_string))
+            exception = NordicSemiException('Failed to {}. {}'.format(wrapped.__name__, err_string))
+            # pc_ble_driver_py's exception does not carry the error code, attach it for callers which handle specific errors
+            exception.error_code = err_code
+            raise exception
         return result
 
-    return wrapper(wrapped)
+    return wrapper
+
+
+def _instrumented_call(wrapped, args, kwargs, expected, stats_recorder, capture):
+    """
+    Makes the API call, recording it to the stats recorder and/or capture which are enabled
+    """
+    start = time.perf_counter()
+    try:
+        result = wrapped(*args, **kwargs)
+    except Exception:
+        if stats_recorder is not None:
+            stats_recorder.record_call(wrapped.__name__, time.perf_counter() - start, failed=True)
+        if capture is not None:
+            capture.record_api_call(wrapped.__name__, args, kwargs, None)
+        raise
+    latency = time.perf_counter() - start
+    err_code, result = _split_result(result)
+    if stats_recorder is not None:
+        stats_recorder.record_call(wrapped.__name__, latency, err_code, err_code != expected)
+    if capture is not None:
+        capture.record_api_call(wrapped.__name__, args, kwargs, err_code)
+    return err_code, result
+
+
+def _split_result(result):
+    """
+    Splits the value returned by a driver API into its error code and the rest of the results
+    """
+    if isinstance(result, (list, tuple)):
+        err_code = result[0]
+        result = result[1:]
+        if len(result) == 1:
+            result = result[0]
+    else:
+        err_code = result
+        result = None
+    return err_code, result
+
+
+class ApiLockDomain(enum.Enum):
+    """
+    Groups of SoftDevice API calls which share a lock when fine-grained locking is enabled on the driver
+    """
+    # Calls which configure or change the state of the whole adapter. Excludes all other calls
+    adapter = "adapter"
+    gap = "gap"
+    gatts = "gatts"
+    gattc = "gattc"
+
+
+class _MultiLock(object):
+    """
+    Acquires a set of locks in a fixed order and releases them in reverse
+    """
+    def __init__(self, locks):
+        self._locks = tuple(locks)
+
+    def __enter__(self):
+        for lock in self._locks:
+            lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for lock in reversed(self._locks):
+            lock.release()
+
+
+def synchronized_api(domain):
+    """
+    Decorator which serializes the decorated driver method on the adapter's lock for the given domain.
+    Locks are per driver instance, so calls to different adapters never block each other
+
+    :param domain: The lock domain the API call belongs to
+    :type domain: ApiLockDomain
+    """
+    def decorator(wrapped):
+        @functools.wraps(wrapped)
+        def wrapper(instance, *args, **kwargs):
+            stats_recorder = instance._stats_recorder
+            if stats_recorder is None:
+                with instance._api_locks[domain]:
+                    return wrapped(instance, *args, **kwargs)
+            start = time.perf_counter()
+            with instance._api_locks[domain]:
+                stats_recorder.record_lock_wait(wrapped.__name__, time.perf_counter() - start)
+                return wrapped(instance, *args, **kwargs)
+        return wrapper
+    return decorator
 
 
 class NrfDriverObserver(object):
+    # The event types the observer needs to receive. None means every event.
+    # Events which no observer or handler needs are discarded before being decoded.
+    # Call NrfDriver.observer_update() after changing it on a registered observer
+    observed_event_types = None
+
     def on_driver_event(self, nrf_driver, event):
         pass
 
 
 class NrfDriver(object):
-    api_lock = Lock()
     default_baud_rate = 1000000
     ATT_MTU_DEFAULT = driver.BLE_GATT_ATT_MTU_DEFAULT
 
-    def __init__(self, serial_port, baud_rate=None, log_driver_comms=False):
+    def __init__(self, serial_port, baud_rate=None, log_driver_comms=False, fine_grained_locking=False):
+        """
+        :param serial_port: The serial port the connectivity device is on
+        :param baud_rate: The baud rate to communicate with the device at
+        :param log_driver_comms: Flag to log the driver's internal communication messages
+        :param fine_grained_locking: By default all API calls on this adapter are serialized on a single lock.
+                                     If True, GAP, GATTS and GATTC calls each get their own lock so calls from
+                                     different domains (e.g. a GATTC write and a GATTS notification) can be
+                                     issued concurrently. The RPC transport still serializes the packets on the wire
+        """
         if baud_rate is None:
             baud_rate = self.default_baud_rate
 
-        self._events = queue.Queue()
+        self.api_lock = Lock()
+        self._fine_grained_locking = fine_grained_locking
+        if fine_grained_locking:
+            domain_locks = [(ApiLockDomain.gap, Lock()), (ApiLockDomain.gatts, Lock()), (ApiLockDomain.gattc, Lock())]
+            self._api_locks = dict(domain_locks)
+            self._api_locks[ApiLockDomain.adapter] = _MultiLock([self.api_lock] + [lock for _, lock in domain_locks])
+        else:
+            self._api_locks = {domain: self.api_lock for domain in ApiLockDomain}
+
+        self._events = EventQueue()
+        self._event_priorities = {}
+        self._set_low_priority_event_types(DEFAULT_LOW_PRIORITY_EVENT_TYPES)
         self._event_thread = None
-        self._event_loop = False
         self._event_stopped = Event()
+        self._connection_executor = None
+        # Only set while API call stats are enabled
+        self._stats_recorder = None
+        # Only set while capturing
+        self._capture = None
+        # Used by the GAP calls when no parameters are given, so their C structs are only built once
+        self._default_adv_params = self.adv_params_setup()
+        self._default_scan_params = self.scan_params_setup()
+        self._default_conn_params = self.conn_params_setup()
         self.observers = []
         self.ble_enable_params = None
         self._event_observers = {}
         self._event_observer_lock = Lock()
+        # Immutable snapshots read by the event thread without locking. They are replaced (never modified)
+        # whenever a subscription changes, so the event thread always sees a consistent view
+        self._observers_snapshot = ()
+        self._dispatch_table = {}
+        self._wanted_event_classes = frozenset()
+        # Subscriptions routed by connection handle: {conn_handle: {event_type: [handlers]}}
+        self._connection_event_observers = {}
+        self._connection_dispatch_tables = {}
         self._log_driver_comms = log_driver_comms
         self._serial_port = serial_port
+        self.rpc_adapter = self._create_rpc_adapter(serial_port, baud_rate)
 
+    def _create_rpc_adapter(self, serial_port, baud_rate):
         phy_layer = driver.sd_rpc_physical_layer_create_uart(serial_port,
                                                              baud_rate,
                                                              driver.SD_RPC_FLOW_CONTROL_NONE,
                                                              driver.SD_RPC_PARITY_NONE)
         link_layer = driver.sd_rpc_data_link_layer_create_bt_three_wire(phy_layer, 100)
         transport_layer = driver.sd_rpc_transport_layer_create(link_layer, 100)
-        self.rpc_adapter = driver.sd_rpc_adapter_create(transport_layer)
+        return driver.sd_rpc_adapter_create(transport_layer)
 
     @property
     def serial_port(self):
         return self._serial_port
 
+    @property
+    def fine_grained_locking(self):
+        return self._fine_grained_locking
+
+    @property
+    def event_queue_stats(self):
+        """
+        Gets a snapshot of the event queue's batch size and depth counters.
+        Use this to check whether the event thread is keeping up with the events coming from the device
+
+        :rtype: blatann.nrf.nrf_event_queue.EventQueueStats
+        """
+        return self._events.get_stats()
+
+    def configure_event_queue(self, max_size=None, overflow_policy=OverflowPolicy.drop_oldest,
+                              low_priority_event_types=DEFAULT_LOW_PRIORITY_EVENT_TYPES):
+        """
+        Configures how the event queue behaves when the event thread falls behind the device.
+
+        All events other than low priority ones are handled in the order they were received.
+        Low priority events are handled after the other queued events and, once max_size events are queued,
+        dropped or coalesced according to the overflow policy. Other events are never dropped, they push out
+        queued low priority events. Connection-critical events (see CRITICAL_EVENT_TYPES) cannot be low priority.
+        The number of dropped and coalesced events is reported in event_queue_stats
+
+        :param max_size: The number of queued events at which low priority events start being dropped.
+                         None (default) to never drop events
+        :param overflow_policy: What to do with low priority events once the queue is full
+        :type overflow_policy: OverflowPolicy
+        :param low_priority_event_types: The event types which may be dropped or coalesced.
+                                         Defaults to advertising reports
+        """
+        self._events.configure(max_size, overflow_policy)
+        self._set_low_priority_event_types(low_priority_event_types)
+
+    def _set_low_priority_event_types(self, low_priority_event_types):
+        for event_type in low_priority_event_types:
+            if not issubclass(event_type, BLEEvent):
+                raise ValueError("Event type must be a valid BLEEvent class type. Got {}".format(event_type))
+            if issubclass(event_type, CRITICAL_EVENT_TYPES):
+                raise ValueError("Connection-critical events cannot be low priority. Got {}".format(event_type))
+        low_priority_event_types = tuple(low_priority_event_types)
+        priorities = {}
+        for event_cls in _event_classes:
+            if issubclass(event_cls, low_priority_event_types):
+                priorities[event_cls.evt_id] = EventPriority.low
+        # Replaced rather than modified, it is read by the driver's callback thread without locking
+        self._event_priorities = priorities
+
+    def reset_event_queue_stats(self):
+        """
+        Resets the event queue's counters, e.g. to measure a specific phase of a test
+        """
+        self._events.reset_stats()
+
+    def configure_connection_executor(self, max_workers=None):
+        """
+        Enables or disables running the handlers for connection events on a thread pool.
+
+        By default every observer and handler runs on the driver's single event thread, so a slow handler
+        for one connection delays the events of every other connection.
+        When enabled, all events which belong to a connection are handled on a pool of up to max_workers threads.
+        Events for the same connection are still handled one at a time and in order, while different connections
+        progress in parallel. Events which do not belong to a connection (e.g. advertising reports)
+        are still handled on the event thread.
+
+        Note that handlers for different connections can then run concurrently with each other
+
+        :param max_workers: The number of worker threads, or None to handle all events on the event thread (default)
+        """
+        previous_executor = self._connection_executor
+        if max_workers:
+            self._connection_executor = ConnectionExecutor(max_workers, "{}_Conn".format(self._serial_port))
+        else:
+            self._connection_executor = None
+        if previous_executor is not None:
+            previous_executor.shutdown()
+
+    @property
+    def connection_executor_stats(self):
+        """
+        Gets a snapshot of the queue depth and handler latency counters of each connection
+        handled by the connection executor. Empty if the connection executor is not enabled
+
+        :rtype: dict[int, blatann.nrf.nrf_connection_executor.ConnectionExecutorStats]
+        """
+        executor = self._connection_executor
+        if executor is None:
+            return {}
+        return executor.get_stats()
+
+    def reset_connection_executor_stats(self):
+        """
+        Resets the connection executor's counters
+        """
+        executor = self._connection_executor
+        if executor is not None:
+            executor.reset_stats()
+
+    def configure_api_call_stats(self, enabled=True):
+        """
+        Enables or disables collecting the call count, latency, error codes and API lock wait time of every API call
+        made to the device. Use this to find out whether the RPC round-trips to the device or the time spent
+        waiting on the API lock limit throughput. Disabled by default, in which case no timing is done at all.
+
+        Enabling stats when they're already enabled keeps the current counters
+
+        :param enabled: True to collect stats, False to stop collecting them and discard the counters
+        """
+        if not enabled:
+            self._stats_recorder = None
+        elif self._stats_recorder is None:
+            self._stats_recorder = DriverStatsRecorder()
+
+    @property
+    def api_call_stats(self):
+        """
+        Gets a snapshot of the counters of each API called since stats were enabled or last reset.
+        None if stats are not enabled, see configure_api_call_stats()
+
+        :rtype: blatann.nrf.nrf_driver_stats.DriverStats
+        """
+        stats_recorder = self._stats_recorder
+        if stats_recorder is None:
+            return None
+        return stats_recorder.get_stats()
+
+    def reset_api_call_stats(self):
+        """
+        Resets the API call counters
+        """
+        stats_recorder = self._stats_recorder
+        if stats_recorder is not None:
+            stats_recorder.reset()
+
+    def start_capture(self, file):
+        """
+        Starts writing every event received from the device and every API call made to it to a capture file,
+        which can be played back without a device using blatann.nrf.nrf_replay_driver.ReplayDriver.
+        Stops any capture already in progress
+
+        :param file: The path of the capture file to create, or a binary file object to write to
+        """
+        self.stop_capture()
+        self._capture = CaptureWriter(file)
+
+    def stop_capture(self):
+        """
+        Stops the capture in progress, if any, and closes its file
+        """
+        capture = self._capture
+        self._capture = None
+        if capture is not None:
+            capture.close()
+
+    @property
+    def is_capturing(self):
+        return self._capture is not None
+
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.adapter)
     def open(self):
         if self.is_open:
             logger.warning("Trying to open already opened driver")
@@ -133,21 +441,24 @@ class NrfDriver(object):
                                       self._log_message_handler)
 
         if err_code == driver.NRF_SUCCESS:
-            self._event_thread = Thread(target=self._event_handler, name="{}_Event".format(self._serial_port))
-            # Note: We create a daemon thread and then register an exit handler
-            #       to make sure this thread stops. This ensures that scripts that
-            #       stop because of ctrl-c interrupt, compile errors or other problems
-            #       do not keep hanging in the console, waiting for an infinite thread
-            #       loop.
-            atexit.register(self._event_thread_join)
-            self._event_thread.daemon = True
-            self._event_thread.start()
+            self._start_event_thread()
         return err_code
 
+    def _start_event_thread(self):
+        self._event_thread = Thread(target=self._event_handler, name="{}_Event".format(self._serial_port))
+        # Note: We create a daemon thread and then register an exit handler
+        #       to make sure this thread stops. This ensures that scripts that
+        #       stop because of ctrl-c interrupt, compile errors or other problems
+        #       do not keep hanging in the console, waiting for an infinite thread
+        #       loop.
+        atexit.register(self._event_thread_join)
+        self._event_thread.daemon = True
+        self._event_thread.start()
+
     def _event_thread_join(self):
         if self._event_thread is None:
             return
-        self._event_loop = False
+        self._events.shutdown()
         self._event_stopped.wait(1)
         self._event_thread = None
 
@@ -156,7 +467,7 @@ class NrfDriver(object):
         return self._event_thread is not None
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.adapter)
     def close(self):
         if not self.is_open:
             return driver.NRF_SUCCESS
@@ -164,6 +475,9 @@ class NrfDriver(object):
         retval = driver.sd_rpc_close(self.rpc_adapter)
         driver.sd_rpc_adapter_delete(self.rpc_adapter)
         self._event_thread_join()
+        if self._connection_executor is not None:
+            self._connection_executor.shutdown()
+        self.stop_capture()
         return retval
 
     def event_subscribe(self, handler, *event_types):
@@ -171,6 +485,7 @@ class NrfDriver(object):
             if not issubclass(event_type, BLEEvent):
                 raise ValueError("Event type must be a valid BLEEvent class type. Got {}".format(event_type))
         with self._event_observer_lock:
+            changed = False
             for event_type in event_types:
                 # If event type not already in dict, create an empty list
                 if event_type not in self._event_observers.keys():
@@ -178,6 +493,9 @@ class NrfDriver(object):
                 handlers = self._event_observers[event_type]
                 if handler not in handlers:
                     handlers.append(handler)
+                    changed = True
+            if changed:
+                self._rebuild_dispatch_table()
 
     def event_unsubscribe(self, handler, *event_types):
         if not event_types:
@@ -185,26 +503,185 @@ class NrfDriver(object):
             return
 
         with self._event_observer_lock:
+            changed = False
             for event_type in event_types:
                 handlers = self._event_observers.get(event_type, [])
                 if handler in handlers:
                     handlers.remove(handler)
+                    changed = True
+            if changed:
+                self._rebuild_dispatch_table()
 
     def event_unsubscribe_all(self, handler):
         with self._event_observer_lock:
+            changed = False
             for event_type, handlers in self._event_observers.items():
                 if handler in handlers:
                     handlers.remove(handler)
+                    changed = True
+            if changed:
+                self._rebuild_dispatch_table()
 
     def observer_register(self, observer):
         with self._event_observer_lock:
             if observer not in self.observers:
                 self.observers.append(observer)
+                self._observers_snapshot = tuple(self.observers)
+                self._rebuild_wanted_event_classes()
 
     def observer_unregister(self, observer):
         with self._event_observer_lock:
             if observer in self.observers:
                 self.observers.remove(observer)
+                self._observers_snapshot = tuple(self.observers)
+                self._rebuild_wanted_event_classes()
+
+    def observer_update(self, observer):
+        """
+        Re-reads the event types a registered observer needs, after its observed_event_types changed
+
+        :param observer: The observer which changed
+        """
+        with self._event_observer_lock:
+            if observer in self.observers:
+                self._rebuild_wanted_event_classes()
+
+    def connection_event_subscribe(self, conn_handle, handler, *event_types):
+        """
+        Subscribes a handler to driver events which are only delivered for the given connection handle.
+        Events for other connections never reach the handler, so the cost of dispatching an event
+        does not grow with the number of connected peers
+
+        :param conn_handle: The connection handle to receive events for
+        :param handler: The handler to subscribe
+        :param event_types: The event types to subscribe to
+        """
+        for event_type in event_types:
+            if not issubclass(event_type, BLEEvent):
+                raise ValueError("Event type must be a valid BLEEvent class type. Got {}".format(event_type))
+        with self._event_observer_lock:
+            event_observers = self._connection_event_observers.setdefault(conn_handle, {})
+            changed = False
+            for event_type in event_types:
+                handlers = event_observers.setdefault(event_type, [])
+                if handler not in handlers:
+                    handlers.append(handler)
+                    changed = True
+            if changed:
+                self._rebuild_connection_dispatch_table(conn_handle)
+
+    def connection_event_unsubscribe(self, conn_handle, handler, *event_types):
+        """
+        Unsubscribes a handler from events for the given connection handle.
+        If no event types are provided, the handler is unsubscribed from all events on the connection
+
+        :param conn_handle: The connection handle the handler was subscribed to
+        :param handler: The handler to unsubscribe
+        :param event_types: The event types to unsubscribe from
+        """
+        with self._event_observer_lock:
+            event_observers = self._connection_event_observers.get(conn_handle, {})
+            if not event_types:
+                event_types = list(event_observers.keys())
+            changed = False
+            for event_type in event_types:
+                handlers = event_observers.get(event_type, [])
+                if handler in handlers:
+                    handlers.remove(handler)
+                    changed = True
+            if changed:
+                self._rebuild_connection_dispatch_table(conn_handle)
+
+    def connection_event_unsubscribe_all(self, conn_handle):
+        """
+        Removes every handler subscribed to events for the given connection handle
+
+        :param conn_handle: The connection handle to clear
+        """
+        with self._event_observer_lock:
+            if self._connection_event_observers.pop(conn_handle, None) is not None:
+                self._rebuild_connection_dispatch_table(conn_handle)
+
+    @staticmethod
+    def _resolve_event_handlers(event_observers, event_cls):
+        """
+        Walks the event class's MRO to collect every handler subscribed to the class or one of its bases.
+        Must be called with the event observer lock held
+
+        :param event_observers: The event type -> handlers subscriptions to resolve against
+        :param event_cls: The concrete event class to resolve
+        :return: The handlers to invoke for events of the class
+        :rtype: tuple
+        """
+        handlers = []
+        for base in event_cls.__mro__:
+            for handler in event_observers.get(base, []):
+                handlers.append(handler)
+        return tuple(handlers)
+
+    def _rebuild_dispatch_table(self):
+        """
+        Rebuilds the concrete event class -> handlers lookup table. The new table is swapped in as a whole
+        so the event thread can keep reading the old one without locking.
+        Must be called with the event observer lock held
+        """
+        self._dispatch_table = {event_cls: self._resolve_event_handlers(self._event_observers, event_cls)
+                                for event_cls in _event_classes}
+        self._rebuild_wanted_event_classes()
+
+    def _rebuild_connection_dispatch_table(self, conn_handle):
+        """
+        Rebuilds the lookup table for a single connection handle and swaps in a new connection -> table mapping.
+        Must be called with the event observer lock held
+        """
+        dispatch_tables = self._connection_dispatch_tables.copy()
+        event_observers = self._connection_event_observers.get(conn_handle)
+        if event_observers:
+            dispatch_tables[conn_handle] = {event_cls: self._resolve_event_handlers(event_observers, event_cls)
+                                            for event_cls in _event_classes}
+        else:
+            dispatch_tables.pop(conn_handle, None)
+        self._connection_dispatch_tables = dispatch_tables
+        self._rebuild_wanted_event_classes()
+
+    def _rebuild_wanted_event_classes(self):
+        """
+        Rebuilds the set of event classes that at least one observer or handler needs. Events of any other
+        class are dropped when they are received, without being decoded.
+        Must be called with the event observer lock held
+        """
+        wanted = set()
+        for observer in self._observers_snapshot:
+            observed_types = observer.observed_event_types
+            if observed_types is None:
+                wanted.update(_event_classes)
+                break
+            wanted.update(e for e in _event_classes if issubclass(e, tuple(observed_types)))
+        dispatch_tables = [self._dispatch_table] + list(self._connection_dispatch_tables.values())
+        for dispatch_table in dispatch_tables:
+            wanted.update(event_cls for event_cls, handlers in dispatch_table.items() if handlers)
+        self._wanted_event_classes = frozenset(wanted)
+
+    def _get_event_handlers(self, event_cls):
+        handlers = self._dispatch_table.get(event_cls, None)
+        if handlers is None:
+            # Event class which wasn't known when the table was built, resolve and cache it
+            with self._event_observer_lock:
+                handlers = self._resolve_event_handlers(self._event_observers, event_cls)
+                dispatch_table = self._dispatch_table.copy()
+                dispatch_table[event_cls] = handlers
+                self._dispatch_table = dispatch_table
+        return handlers
+
+    def _get_connection_event_handlers(self, conn_handle, event_cls):
+        dispatch_table = self._connection_dispatch_tables.get(conn_handle, None)
+        if dispatch_table is None:
+            return ()
+        handlers = dispatch_table.get(event_cls, None)
+        if handlers is None:
+            with self._event_observer_lock:
+                handlers = self._resolve_event_handlers(self._connection_event_observers.get(conn_handle, {}), event_cls)
+        return handlers
 
     def ble_enable_params_setup(self):
         return BleEnableConfig()
@@ -228,7 +705,7 @@ class NrfDriver(object):
     BLE Generic methods
     """
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.adapter)
     def ble_conn_configure(self, conn_params):
         assert isinstance(conn_params, BleConnConfig)
         for tag, cfg in conn_params.get_configs():
@@ -238,7 +715,7 @@ class NrfDriver(object):
         return driver.NRF_SUCCESS
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.adapter)
     def ble_enable(self, ble_enable_params=None):
         if not ble_enable_params:
             ble_enable_params = self.ble_enable_params_setup()
@@ -252,12 +729,12 @@ class NrfDriver(object):
         return driver.sd_ble_enable(self.rpc_adapter, None)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_user_mem_reply(self, conn_handle):
         return driver.sd_ble_user_mem_reply(self.rpc_adapter, conn_handle, None)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.adapter)
     def ble_vs_uuid_add(self, uuid_base):
         assert isinstance(uuid_base, BLEUUIDBase), 'Invalid argument type'
         uuid_type = driver.new_uint8()
@@ -274,7 +751,7 @@ class NrfDriver(object):
     """
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_addr_get(self):
         addr = driver.ble_gap_addr_t()
         err_code = driver.sd_ble_gap_addr_get(self.rpc_adapter, addr)
@@ -285,22 +762,22 @@ class NrfDriver(object):
         return err_code, addr
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.adapter)
     def ble_gap_addr_set(self, address):
         assert isinstance(address, BLEGapAddr), "Invalid argument type"
         addr_c = address.to_c()
         return driver.sd_ble_gap_addr_set(self.rpc_adapter, addr_c)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_adv_start(self, adv_params=None, conn_cfg_tag=0):
         if not adv_params:
-            adv_params = self.adv_params_setup()
+            adv_params = self._default_adv_params
         assert isinstance(adv_params, BLEGapAdvParams), 'Invalid argument type'
         return driver.sd_ble_gap_adv_start(self.rpc_adapter, adv_params.to_c(), conn_cfg_tag)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_conn_param_update(self, conn_handle, conn_params):
         assert isinstance(conn_params, (BLEGapConnParams, NoneType)), 'Invalid argument type'
         if conn_params:
@@ -308,34 +785,34 @@ class NrfDriver(object):
         return driver.sd_ble_gap_conn_param_update(self.rpc_adapter, conn_handle, conn_params)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_adv_stop(self):
         return driver.sd_ble_gap_adv_stop(self.rpc_adapter)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_scan_start(self, scan_params=None):
         if not scan_params:
-            scan_params = self.scan_params_setup()
+            scan_params = self._default_scan_params
         assert isinstance(scan_params, BLEGapScanParams), 'Invalid argument type'
         return driver.sd_ble_gap_scan_start(self.rpc_adapter, scan_params.to_c())
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_scan_stop(self):
         return driver.sd_ble_gap_scan_stop(self.rpc_adapter)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_connect(self, address, scan_params=None, conn_params=None, conn_cfg_tag=0):
         assert isinstance(address, BLEGapAddr), 'Invalid argument type'
 
         if not scan_params:
-            scan_params = self.scan_params_setup()
+            scan_params = self._default_scan_params
         assert isinstance(scan_params, BLEGapScanParams), 'Invalid argument type'
 
         if not conn_params:
-            conn_params = self.conn_params_setup()
+            conn_params = self._default_conn_params
         assert isinstance(conn_params, BLEGapConnParams), 'Invalid argument type'
 
         return driver.sd_ble_gap_connect(self.rpc_adapter,
@@ -345,7 +822,7 @@ class NrfDriver(object):
                                          conn_cfg_tag)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_disconnect(self, conn_handle, hci_status_code=BLEHci.remote_user_terminated_connection):
         assert isinstance(hci_status_code, BLEHci), 'Invalid argument type'
         return driver.sd_ble_gap_disconnect(self.rpc_adapter,
@@ -353,7 +830,7 @@ class NrfDriver(object):
                                             hci_status_code.value)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_adv_data_set(self, adv_data=BLEAdvData(), scan_data=BLEAdvData()):
         assert isinstance(adv_data, BLEAdvData), 'Invalid argument type'
         assert isinstance(scan_data, BLEAdvData), 'Invalid argument type'
@@ -367,7 +844,7 @@ class NrfDriver(object):
                                               scan_data_len)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_data_length_update(self, conn_handle, params=None):
         assert isinstance(params, (BLEGapDataLengthParams, NoneType))
         if isinstance(params, BLEGapDataLengthParams):
@@ -375,7 +852,7 @@ class NrfDriver(object):
         return driver.sd_ble_gap_data_length_update(self.rpc_adapter, conn_handle, params, None)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_phy_update(self, conn_handle, tx_phy=BLEGapPhy.auto, rx_phy=BLEGapPhy.auto):
         params = BLEGapPhys(tx_phy, rx_phy)
         return driver.sd_ble_gap_phy_update(self.rpc_adapter, conn_handle, params.to_c())
@@ -385,7 +862,7 @@ class NrfDriver(object):
     """
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_authenticate(self, conn_handle, sec_params):
         assert isinstance(sec_params, (BLEGapSecParams, NoneType)), 'Invalid argument type'
         return driver.sd_ble_gap_authenticate(self.rpc_adapter,
@@ -393,7 +870,7 @@ class NrfDriver(object):
                                               sec_params.to_c() if sec_params else None)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_sec_params_reply(self, conn_handle, sec_status, sec_params, sec_keyset):
         assert isinstance(sec_status, BLEGapSecStatus), 'Invalid argument type'
         assert isinstance(sec_params, (BLEGapSecParams, NoneType)), 'Invalid argument type'
@@ -406,7 +883,7 @@ class NrfDriver(object):
                                                   sec_keyset.to_c())
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_auth_key_reply(self, conn_handle, key_type, key):
         if key is not None:
             key_buf = util.list_to_uint8_array(key).cast()
@@ -415,7 +892,7 @@ class NrfDriver(object):
         return driver.sd_ble_gap_auth_key_reply(self.rpc_adapter, conn_handle, key_type, key_buf)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_sec_info_reply(self, conn_handle, enc_info=None, irk=None, sign_info=None):
         assert isinstance(enc_info, (BLEGapEncryptInfo, NoneType)), "Invalid argument type"
         assert isinstance(irk, (BLEGapIdKey, NoneType)), "Invalid argument type"
@@ -430,7 +907,7 @@ class NrfDriver(object):
         return driver.sd_ble_gap_sec_info_reply(self.rpc_adapter, conn_handle, enc_info, irk, sign_info)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_encrypt(self, conn_handle, ediv, rand, ltk, lesc, auth):
         # TODO: Clean up
         # assert isinstance(sec_params, (BLEGapSecParams, NoneType)), 'Invalid argument type'
@@ -455,7 +932,7 @@ class NrfDriver(object):
         return driver.sd_ble_gap_encrypt(self.rpc_adapter, conn_handle, master_id, enc_info)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gap)
     def ble_gap_lesc_dhkey_reply(self, conn_handle, dh_key):
         assert isinstance(dh_key, BLEGapDhKey)
 
@@ -469,7 +946,7 @@ class NrfDriver(object):
     # sd_ble_gatts_initial_user_handle_get, sd_ble_gatts_attr_get
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.adapter)
     def ble_gatts_service_add(self, service_type, uuid, service_handle):
         handle = driver.new_uint16()
         uuid_c = uuid.to_c()
@@ -482,7 +959,7 @@ class NrfDriver(object):
         return err_code
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.adapter)
     def ble_gatts_characteristic_add(self, service_handle, char_md, attr_char_value, char_handle):
         # TODO type assertions
         handle_params = driver.ble_gatts_char_handles_t()
@@ -499,13 +976,13 @@ class NrfDriver(object):
         return err_code
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gatts)
     def ble_gatts_rw_authorize_reply(self, conn_handle, authorize_reply_params):
         assert isinstance(authorize_reply_params, BLEGattsRwAuthorizeReplyParams)
         return driver.sd_ble_gatts_rw_authorize_reply(self.rpc_adapter, conn_handle, authorize_reply_params.to_c())
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gatts)
     def ble_gatts_value_get(self, conn_handle, attribute_handle, gatts_value):
         assert isinstance(gatts_value, BLEGattsValue)
         value_params = gatts_value.to_c()
@@ -519,25 +996,25 @@ class NrfDriver(object):
         return err_code
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gatts)
     def ble_gatts_value_set(self, conn_handle, attribute_handle, gatts_value):
         assert isinstance(gatts_value, BLEGattsValue)
         value_params = gatts_value.to_c()
         return driver.sd_ble_gatts_value_set(self.rpc_adapter, conn_handle, attribute_handle, value_params)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gatts)
     def ble_gatts_hvx(self, conn_handle, hvx_params):
         assert isinstance(hvx_params, BLEGattsHvx)
         return driver.sd_ble_gatts_hvx(self.rpc_adapter, conn_handle, hvx_params.to_c())
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gatts)
     def ble_gatts_service_changed(self, conn_handle, start_handle, end_handle):
         return driver.sd_ble_gatts_service_changed(self.rpc_adapter, conn_handle, start_handle, end_handle)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gatts)
     def ble_gatts_exchange_mtu_reply(self, conn_handle, server_mtu):
         return driver.sd_ble_gatts_exchange_mtu_reply(self.rpc_adapter, conn_handle, server_mtu)
 
@@ -546,7 +1023,7 @@ class NrfDriver(object):
     """
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gattc)
     def ble_gattc_write(self, conn_handle, write_params):
         assert isinstance(write_params, BLEGattcWriteParams), 'Invalid argument type'
         return driver.sd_ble_gattc_write(self.rpc_adapter,
@@ -554,7 +1031,7 @@ class NrfDriver(object):
                                          write_params.to_c())
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gattc)
     def ble_gattc_prim_srvc_disc(self, conn_handle, srvc_uuid, start_handle):
         assert isinstance(srvc_uuid, (BLEUUID, NoneType)), 'Invalid argument type'
         return driver.sd_ble_gattc_primary_services_discover(self.rpc_adapter,
@@ -563,7 +1040,7 @@ class NrfDriver(object):
                                                              srvc_uuid.to_c() if srvc_uuid else None)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gattc)
     def ble_gattc_char_disc(self, conn_handle, start_handle, end_handle):
         handle_range = driver.ble_gattc_handle_range_t()
         handle_range.start_handle = start_handle
@@ -573,7 +1050,7 @@ class NrfDriver(object):
                                                             handle_range)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gattc)
     def ble_gattc_desc_disc(self, conn_handle, start_handle, end_handle):
         handle_range = driver.ble_gattc_handle_range_t()
         handle_range.start_handle = start_handle
@@ -583,7 +1060,7 @@ class NrfDriver(object):
                                                         handle_range)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gattc)
     def ble_gattc_attr_info_disc(self, conn_handle, start_handle, end_handle):
         handle_range = driver.ble_gattc_handle_range_t()
         handle_range.start_handle = start_handle
@@ -591,19 +1068,34 @@ class NrfDriver(object):
         return driver.sd_ble_gattc_attr_info_discover(self.rpc_adapter, conn_handle, handle_range)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gattc)
     def ble_gattc_read(self, conn_handle, read_handle, offset=0):
         return driver.sd_ble_gattc_read(self.rpc_adapter, conn_handle, read_handle, offset)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gattc)
+    def ble_gattc_char_value_by_uuid_read(self, conn_handle, uuid, start_handle, end_handle):
+        assert isinstance(uuid, BLEUUID), 'Invalid argument type'
+        handle_range = driver.ble_gattc_handle_range_t()
+        handle_range.start_handle = start_handle
+        handle_range.end_handle = end_handle
+        return driver.sd_ble_gattc_char_value_by_uuid_read(self.rpc_adapter, conn_handle, uuid.to_c(), handle_range)
+
+    @NordicSemiErrorCheck
+    @synchronized_api(ApiLockDomain.gattc)
+    def ble_gattc_char_values_read(self, conn_handle, handles):
+        handles_array = util.list_to_uint16_array(handles)
+        return driver.sd_ble_gattc_char_values_read(self.rpc_adapter, conn_handle, handles_array.cast(), len(handles))
+
+    @NordicSemiErrorCheck
+    @synchronized_api(ApiLockDomain.gattc)
     def ble_gattc_exchange_mtu_req(self, conn_handle, att_mtu_size):
         return driver.sd_ble_gattc_exchange_mtu_request(self.rpc_adapter,
                                                         conn_handle,
                                                         att_mtu_size)
 
     @NordicSemiErrorCheck
-    @wrapt.synchronized(api_lock)
+    @synchronized_api(ApiLockDomain.gattc)
     def ble_gattc_hv_confirm(self, conn_handle, attr_handle):
         return driver.sd_ble_gattc_hv_confirm(self.rpc_adapter, conn_handle, attr_handle)
 
@@ -617,51 +1109,100 @@ class NrfDriver(object):
 
     def _log_message_handler(self, adapter, severity, log_message):
         if self._log_driver_comms:
-            logger.info("LOG [{}]: {}".format(severity, log_message))
+            logger.info("LOG [%s]: %s", severity, log_message)
 
     """
     Event handling
     """
 
     def ble_evt_handler(self, adapter, ble_event):
-        self._events.put(ble_event)
+        capture = self._capture
+        if capture is not None:
+            capture.record_event(ble_event)
+        # The driver reuses the event's memory once this callback returns, so it is decoded before being queued
+        event = self._decode_ble_event(ble_event)
+        if event is not None:
+            self._queue_event(event)
+
+    def _decode_ble_event(self, ble_event):
+        """
+        Decodes an event received from the driver. Events of a class nobody is interested in
+        are dropped without decoding their payload, unless they belong to a connection
+
+        :param ble_event: The raw ble_evt_t
+        :return: The decoded event, or None if the event was dropped
+        """
+        evt_id = ble_event.header.evt_id
+        event_cls = event_class_get(evt_id)
+        if event_cls is None:
+            logger.warning('unknown ble_event %r (discarded)', evt_id)
+            return None
+        if not self._is_event_wanted(event_cls):
+            # The handlers for a new connection are subscribed while its connected event is dispatched,
+            # which can be after the events following it were received. Those are checked when dispatched instead
+            if event_cls.conn_handle_from_c(ble_event) == driver.BLE_CONN_HANDLE_INVALID:
+                return None
+        return event_cls.from_c(ble_event)
+
+    def _is_event_wanted(self, event_cls):
+        return event_cls in self._wanted_event_classes
+
+    def _queue_event(self, event):
+        priority = self._event_priorities.get(event.evt_id, EventPriority.normal)
+        coalesce_key = None
+        if priority == EventPriority.low and self._events.overflow_policy == OverflowPolicy.coalesce:
+            coalesce_key = event.coalesce_key()
+        self._events.put(event, priority, coalesce_key)
+
+    def _dispatch_event(self, observers, event):
+        # Events for a connection are not filtered when they are received, drop the ones still nobody wants
+        event_cls = type(event)
+        if not self._is_event_wanted(event_cls):
+            return
 
-    def _event_handler(self):
-        self._event_loop = True
-        self._event_stopped.clear()
-        while self._event_loop:
+        # Call all the observers
+        for obs in observers:
             try:
-                ble_event = self._events.get(timeout=0.1)
-            except queue.Empty:
-                continue
+                obs.on_driver_event(self, event)
+            except:
+                traceback.print_exc()
 
-            if len(self.observers) == 0:
-                continue
+        # Call all the handlers for the event type provided, then the ones subscribed to the event's connection
+        for handler in self._get_event_handlers(event_cls):
+            try:
+                handler(self, event)
+            except:
+                traceback.print_exc()
 
-            event = event_decode(ble_event)
-            if event is None:
-                logger.warning('unknown ble_event %r (discarded)', ble_event.header.evt_id)
-                continue
+        for handler in self._get_connection_event_handlers(event.conn_handle, event_cls):
+            try:
+                handler(self, event)
+            except:
+                traceback.print_exc()
 
-            # Get a copy of the observers and event observers in case its modified during this execution
-            with self._event_observer_lock:
-                observers = self.observers[:]
-                event_handlers = {k: v[:] for k, v in self._event_observers.items()}
-
-            # Call all the observers
-            for obs in observers:
-                try:
-                    obs.on_driver_event(self, event)
-                except:
-                    traceback.print_exc()
-
-            # Call all the handlers for the event type provided
-            for event_type, handlers in event_handlers.items():
-                if issubclass(type(event), event_type):
-                    for handler in handlers:
-                        try:
-                            handler(self, event)
-                        except:
-                            traceback.print_exc()
-
-        self._event_stopped.set()
+    def _event_handler(self):
+        self._event_stopped.clear()
+        try:
+            # Block until events are available and process everything that queued up since the last wakeup
+            while True:
+                for event in self._events.get_batch():
+                    if event is EventQueue.SHUTDOWN:
+                        return
+                    self._process_ble_event(event)
+        finally:
+            self._event_stopped.set()
+
+    def _process_ble_event(self, event):
+        observers = self._observers_snapshot
+        if observers:
+            self._route_event(observers, event)
+
+    def _route_event(self, observers, event):
+        """
+        Dispatches a decoded event on the event thread, or on its connection's lane in the connection executor
+        """
+        executor = self._connection_executor
+        if executor is not None and event.conn_handle != driver.BLE_CONN_HANDLE_INVALID:
+            executor.submit(event.conn_handle, self._dispatch_event, observers, event)
+        else:
+            self._dispatch_event(observers, event)
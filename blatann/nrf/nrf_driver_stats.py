@@ -0,0 +1,232 @@
+import bisect
+import threading
+import time
+
+
+# Upper bounds of the latency histogram buckets, in seconds. The last bucket holds everything slower
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class ApiCallStats(object):
+    """
+    Snapshot of the counters for a single driver API (e.g. ble_gattc_write).
+
+    The latency is measured around the whole call, including the time spent waiting for the API lock.
+    Subtract the lock wait to get the time spent in the RPC round-trip to the device and in the driver itself
+    """
+    def __init__(self, name, calls=0, errors=None, total_latency=0.0, min_latency=0.0, max_latency=0.0,
+                 histogram=None, total_lock_wait=0.0, max_lock_wait=0.0):
+        self.name = name
+        """The name of the API"""
+        self.calls = calls
+        """The number of times the API was called"""
+        self.errors = dict(errors or {})
+        """The number of calls which failed, keyed by the error code returned by the device.
+        Calls which raised an exception without returning an error code are keyed by None"""
+        self.min_latency = min_latency
+        """The shortest call, in seconds"""
+        self.max_latency = max_latency
+        """The longest call, in seconds"""
+        self.histogram = list(histogram or [0] * (len(LATENCY_BUCKETS) + 1))
+        """The number of calls per latency bucket. Bucket i counts the calls which took at most LATENCY_BUCKETS[i]
+        seconds (and longer than the previous bucket), the last bucket counts the calls slower than all of them"""
+        self.max_lock_wait = max_lock_wait
+        """The longest time a call waited for the API lock, in seconds"""
+        self._total_latency = total_latency
+        self._total_lock_wait = total_lock_wait
+
+    @property
+    def error_count(self):
+        """
+        The total number of calls which failed
+
+        :rtype: int
+        """
+        return sum(self.errors.values())
+
+    @property
+    def total_latency(self):
+        """
+        The time spent in all calls to the API, in seconds
+
+        :rtype: float
+        """
+        return self._total_latency
+
+    @property
+    def average_latency(self):
+        """
+        The average time a call took, in seconds
+
+        :rtype: float
+        """
+        if not self.calls:
+            return 0.0
+        return self._total_latency / self.calls
+
+    @property
+    def total_lock_wait(self):
+        """
+        The time all calls spent waiting for the API lock, in seconds
+
+        :rtype: float
+        """
+        return self._total_lock_wait
+
+    @property
+    def average_lock_wait(self):
+        """
+        The average time a call waited for the API lock, in seconds
+
+        :rtype: float
+        """
+        if not self.calls:
+            return 0.0
+        return self._total_lock_wait / self.calls
+
+    def __repr__(self):
+        return "{}(name={!r}, calls={!r}, errors={!r}, average_latency={:.6f}, min_latency={:.6f}, " \
+               "max_latency={:.6f}, average_lock_wait={:.6f}, max_lock_wait={:.6f})".format(
+                    self.__class__.__name__, self.name, self.calls, self.errors, self.average_latency,
+                    self.min_latency, self.max_latency, self.average_lock_wait, self.max_lock_wait)
+
+
+class DriverStats(object):
+    """
+    Snapshot of the API call counters of a driver
+    """
+    def __init__(self, api_calls=None, duration=0.0):
+        self.api_calls = dict(api_calls or {})
+        """The counters of each API which was called, keyed by the API name
+
+        :type: dict[str, ApiCallStats]"""
+        self.duration = duration
+        """The time the counters were collected over, in seconds"""
+
+    @property
+    def calls(self):
+        """
+        The total number of API calls
+
+        :rtype: int
+        """
+        return sum(s.calls for s in self.api_calls.values())
+
+    @property
+    def error_count(self):
+        """
+        The total number of API calls which failed
+
+        :rtype: int
+        """
+        return sum(s.error_count for s in self.api_calls.values())
+
+    @property
+    def total_latency(self):
+        """
+        The time spent in API calls, in seconds
+
+        :rtype: float
+        """
+        return sum(s.total_latency for s in self.api_calls.values())
+
+    @property
+    def total_lock_wait(self):
+        """
+        The time API calls spent waiting for the API lock, in seconds
+
+        :rtype: float
+        """
+        return sum(s.total_lock_wait for s in self.api_calls.values())
+
+    def __repr__(self):
+        return "{}(calls={!r}, errors={!r}, total_latency={:.6f}, total_lock_wait={:.6f}, duration={:.3f})".format(
+            self.__class__.__name__, self.calls, self.error_count, self.total_latency,
+            self.total_lock_wait, self.duration)
+
+
+class _ApiCounters(object):
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = {}
+        self.total_latency = 0.0
+        self.min_latency = 0.0
+        self.max_latency = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_lock_wait = 0.0
+        self.max_lock_wait = 0.0
+
+    def stats(self):
+        return ApiCallStats(self.name, self.calls, self.errors, self.total_latency, self.min_latency,
+                            self.max_latency, self.histogram, self.total_lock_wait, self.max_lock_wait)
+
+
+class DriverStatsRecorder(object):
+    """
+    Collects the counters of the driver's API calls. Only created when stats are enabled on the driver,
+    the API call decorators skip all of the bookkeeping when there is no recorder
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._apis = {}
+        self._start = time.perf_counter()
+
+    def _counters(self, name):
+        counters = self._apis.get(name)
+        if counters is None:
+            counters = self._apis[name] = _ApiCounters(name)
+        return counters
+
+    def record_call(self, name, latency, err_code=None, failed=False):
+        """
+        Records a completed API call
+
+        :param name: The API name
+        :param latency: How long the call took, in seconds
+        :param err_code: The error code the call failed with
+        :param failed: True if the call failed
+        """
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, latency)
+        with self._lock:
+            counters = self._counters(name)
+            counters.calls += 1
+            counters.total_latency += latency
+            if counters.calls == 1 or latency < counters.min_latency:
+                counters.min_latency = latency
+            if latency > counters.max_latency:
+                counters.max_latency = latency
+            counters.histogram[bucket] += 1
+            if failed:
+                counters.errors[err_code] = counters.errors.get(err_code, 0) + 1
+
+    def record_lock_wait(self, name, wait):
+        """
+        Records the time an API call waited for the API lock
+
+        :param name: The API name
+        :param wait: The time waited, in seconds
+        """
+        with self._lock:
+            counters = self._counters(name)
+            counters.total_lock_wait += wait
+            if wait > counters.max_lock_wait:
+                counters.max_lock_wait = wait
+
+    def get_stats(self):
+        """
+        Gets a snapshot of the counters
+
+        :rtype: DriverStats
+        """
+        with self._lock:
+            return DriverStats({name: counters.stats() for name, counters in self._apis.items()},
+                               time.perf_counter() - self._start)
+
+    def reset(self):
+        """
+        Resets all counters
+        """
+        with self._lock:
+            self._apis = {}
+            self._start = time.perf_counter()
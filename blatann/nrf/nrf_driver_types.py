@@ -35,7 +35,7 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
-import importlib
+import ctypes
 
 from blatann.nrf.nrf_dll_load import driver
 
@@ -70,6 +70,62 @@ def uint8_array_to_list(array_pointer, length):
     return data_list
 
 
+def uint8_array_to_bytes(array_pointer, length):
+    """
+    Convert uint8_array to python bytes.
+
+    The driver buffer is copied in a single call instead of indexing the SWIG array one element at a time.
+    Falls back to element-wise copying if the pointer cannot be converted to an address.
+    """
+    if length <= 0:
+        return b""
+    if isinstance(array_pointer, (bytes, bytearray, memoryview, list, tuple)):
+        return bytes(array_pointer[:length])
+    try:
+        return ctypes.string_at(int(array_pointer), length)
+    except TypeError:
+        return bytes(uint8_array_to_list(array_pointer, length))
+
+
+def ble_evt_to_bytes(ble_event):
+    """
+    Copies an event received from the driver, header and payload, to bytes.
+
+    The event is only valid until the driver's event callback returns. The copy can be kept and
+    turned back into an event with ble_evt_from_bytes(), e.g. to capture and replay events.
+    Backends which do not use the C structs (e.g. the simulated backend) provide their own copy functions
+    """
+    to_bytes = getattr(driver, "ble_evt_to_bytes", None)
+    if to_bytes is not None:
+        return to_bytes(ble_event)
+    # The length in the header includes the header and any variable length data following the event's struct
+    return ctypes.string_at(int(ble_event.this), ble_event.header.evt_len)
+
+
+def ble_evt_from_bytes_supported():
+    """
+    Gets if the driver backend can rebuild events with ble_evt_from_bytes()
+    """
+    return hasattr(driver, "ble_evt_from_bytes")
+
+
+def ble_evt_from_bytes(data):
+    """
+    Rebuilds an event copied with ble_evt_to_bytes(). The event can be passed to the driver's event handler
+    and decoded the same way as an event received from the device.
+
+    Only backends which provide their own copy functions can rebuild events. A ble_evt_t allocated by
+    pc_ble_driver_py only has room for the fixed size part of the event, not the variable length data
+    (e.g. of notifications and writes) which follows it
+
+    :raises: NotImplementedError if the driver backend cannot rebuild events
+    """
+    from_bytes = getattr(driver, "ble_evt_from_bytes", None)
+    if from_bytes is None:
+        raise NotImplementedError("The driver backend cannot rebuild events from bytes")
+    return from_bytes(data)
+
+
 def uint16_array_to_list(array_pointer, length):
     """Convert uint16_array to python list."""
     data_array = driver.uint16_array.frompointer(array_pointer)
@@ -108,14 +164,14 @@ def desc_array_to_list(array_pointer, length):
 def ble_gattc_attr_info16_array_to_list(array_pointer, length):
     """Convert ble_gattc_attr_info16_array to python list"""
     data_array = driver.ble_gattc_attr_info16_array.frompointer(array_pointer)
-    data_list = _populate_array(data_array, length)
+    data_list = _populate_list(data_array, length)
     return data_list
 
 
 def ble_gattc_attr_info128_array_to_list(array_pointer, length):
     """Convert ble_gattc_attr_info128_array to python list"""
     data_array = driver.ble_gattc_attr_info128_array.frompointer(array_pointer)
-    data_list = _populate_array(data_array, length)
+    data_list = _populate_list(data_array, length)
     return data_list
 
 
@@ -169,8 +225,24 @@ def list_to_char_array(data_list):
 
 
 def list_to_uint8_array(data_list):
-    """Convert python list to uint8_array."""
-    data_array = _populate_array(data_list, driver.uint8_array)
+    """
+    Convert python list, bytes or bytearray to uint8_array.
+
+    The data is copied into the driver array in a single memmove when the array's address is available,
+    otherwise each element is assigned individually.
+    """
+    try:
+        data = bytes(data_list)
+    except (TypeError, ValueError):
+        return _populate_array(data_list, driver.uint8_array)
+    length = len(data)
+    data_array = driver.uint8_array(length)
+    if length:
+        try:
+            ctypes.memmove(int(data_array.cast()), data, length)
+        except TypeError:
+            for i in range(length):
+                data_array[i] = data[i]
     return data_array
 
 
@@ -0,0 +1,249 @@
+import collections
+import enum
+import itertools
+import threading
+
+
+class EventPriority(enum.IntEnum):
+    """
+    Lanes of the event queue. Normal events are handed out in the order they were put,
+    low priority events may be overtaken by normal ones and are the only events which can be dropped
+    """
+    normal = 1
+    low = 2
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    What to do with low priority events once the event queue is full
+    """
+    drop_newest = 0
+    """Discard the incoming event"""
+    drop_oldest = 1
+    """Discard the oldest queued low priority event to make room for the incoming one"""
+    coalesce = 2
+    """Replace a queued event which has the same coalesce key (e.g. an advertising report from the same device)
+    instead of queueing another one. This is done whether or not the queue is full. If the queue is full and
+    there is nothing to replace, the oldest low priority event is discarded"""
+
+
+class EventQueueStats(object):
+    """
+    Snapshot of the event queue's counters.
+
+    A max_depth that keeps growing, or batch sizes that are consistently large, means the event thread
+    is not keeping up with the driver's callback thread
+    """
+    def __init__(self, events=0, batches=0, max_batch_size=0, depth=0, max_depth=0, dropped=0, coalesced=0):
+        self.events = events
+        """The number of events drained from the queue"""
+        self.batches = batches
+        """The number of times the event thread woke up and drained the queue"""
+        self.max_batch_size = max_batch_size
+        """The largest number of events drained in a single wakeup"""
+        self.depth = depth
+        """The number of events currently waiting in the queue"""
+        self.max_depth = max_depth
+        """The largest number of events that were waiting in the queue at once"""
+        self.dropped = dropped
+        """The number of low priority events discarded because the queue was full"""
+        self.coalesced = coalesced
+        """The number of low priority events which replaced an older queued event with the same coalesce key"""
+
+    @property
+    def average_batch_size(self):
+        """
+        The average number of events drained per wakeup
+
+        :rtype: float
+        """
+        if not self.batches:
+            return 0.0
+        return self.events / self.batches
+
+    def __repr__(self):
+        return "{}(events={!r}, batches={!r}, average_batch_size={:.2f}, max_batch_size={!r}, " \
+               "depth={!r}, max_depth={!r}, dropped={!r}, coalesced={!r})".format(
+                    self.__class__.__name__, self.events, self.batches, self.average_batch_size,
+                    self.max_batch_size, self.depth, self.max_depth, self.dropped, self.coalesced)
+
+
+class EventQueue(object):
+    """
+    Queue which hands events from the driver's callback thread to the event thread.
+
+    Unlike queue.Queue, the consumer blocks without a polling timeout and takes every pending event in a
+    single call, so an idle adapter does not wake up periodically and a burst of events costs one
+    lock acquisition instead of one per event. The consumer is stopped with shutdown(), after which
+    the next batch ends with the SHUTDOWN sentinel.
+
+    Normal events are kept in a single FIFO lane so events of a connection are never reordered
+    (e.g. a disconnect can never overtake a notification received before it). Low priority events are queued in a
+    separate lane which every batch hands out after the normal events.
+    Only low priority events are ever dropped: once the queue holds max_size events, incoming low priority events
+    are handled according to the overflow policy, while normal events are always queued,
+    pushing out the oldest low priority event if there is one
+    """
+    SHUTDOWN = object()
+
+    def __init__(self, max_size=None, overflow_policy=OverflowPolicy.drop_oldest):
+        """
+        :param max_size: The number of queued events at which low priority events start being dropped.
+                         None to never drop events
+        :param overflow_policy: What to do with low priority events once the queue is full
+        :type overflow_policy: OverflowPolicy
+        """
+        self._normal = collections.deque()
+        # Keyed by the coalesce key, or a unique number for events that are never coalesced
+        self._low = collections.OrderedDict()
+        self._low_keys = itertools.count()
+        self._size = 0
+        self._shutdown = False
+        self._not_empty = threading.Condition(threading.Lock())
+        self._max_size = None
+        self._overflow_policy = OverflowPolicy.drop_oldest
+        self._events = 0
+        self._batches = 0
+        self._max_batch_size = 0
+        self._max_depth = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self.configure(max_size, overflow_policy)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @property
+    def overflow_policy(self):
+        return self._overflow_policy
+
+    def configure(self, max_size=None, overflow_policy=OverflowPolicy.drop_oldest):
+        """
+        Changes the queue's size limit and overflow policy. Events already queued are kept
+
+        :param max_size: The number of queued events at which low priority events start being dropped.
+                         None to never drop events
+        :param overflow_policy: What to do with low priority events once the queue is full
+        :type overflow_policy: OverflowPolicy
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError("Max size must be at least 1 or None. Got {}".format(max_size))
+        if not isinstance(overflow_policy, OverflowPolicy):
+            raise ValueError("Overflow policy must be an OverflowPolicy. Got {}".format(overflow_policy))
+        with self._not_empty:
+            self._max_size = max_size
+            self._overflow_policy = overflow_policy
+
+    def put(self, item, priority=EventPriority.normal, coalesce_key=None):
+        """
+        Adds an item to the queue and wakes up the consumer
+
+        :param item: The item to add
+        :param priority: The lane to queue the item in
+        :type priority: EventPriority
+        :param coalesce_key: For low priority items when using the coalesce policy, a hashable which identifies
+                             items that supersede each other. None if the item cannot be coalesced
+        """
+        with self._not_empty:
+            if priority is EventPriority.low:
+                if not self._put_low(item, coalesce_key):
+                    return
+            else:
+                if self._low and self._is_full():
+                    self._low.popitem(last=False)
+                    self._size -= 1
+                    self._dropped += 1
+                self._normal.append(item)
+                self._size += 1
+            if self._size > self._max_depth:
+                self._max_depth = self._size
+            self._not_empty.notify()
+
+    def _is_full(self):
+        return self._max_size is not None and self._size >= self._max_size
+
+    def _put_low(self, item, coalesce_key):
+        coalesce = self._overflow_policy == OverflowPolicy.coalesce and coalesce_key is not None
+        if coalesce and coalesce_key in self._low:
+            # Keep the queued event's position so a chatty device cannot starve the others
+            self._low[coalesce_key] = item
+            self._coalesced += 1
+            return False
+        if self._is_full():
+            if self._overflow_policy == OverflowPolicy.drop_newest or not self._low:
+                self._dropped += 1
+                return False
+            self._low.popitem(last=False)
+            self._size -= 1
+            self._dropped += 1
+        key = coalesce_key if coalesce else next(self._low_keys)
+        self._low[key] = item
+        self._size += 1
+        return True
+
+    def shutdown(self):
+        """
+        Wakes up the consumer and makes the next batch end with the SHUTDOWN sentinel
+        """
+        with self._not_empty:
+            self._shutdown = True
+            self._not_empty.notify()
+
+    def get_batch(self, timeout=None):
+        """
+        Blocks until at least one item is available, then removes and returns all pending items
+
+        :param timeout: Optional time to wait for an item, in seconds. None waits forever
+        :return: The pending normal items in the order they were put, followed by the low priority items.
+                 Empty if the timeout expired
+        :rtype: collections.abc.Sequence
+        """
+        with self._not_empty:
+            if not self._size and not self._shutdown:
+                self._not_empty.wait_for(self._has_items, timeout)
+            batch_size = self._size
+            # Hand over the whole normal deque, low priority events go after it
+            batch = self._normal
+            self._normal = collections.deque()
+            if self._low:
+                batch.extend(self._low.values())
+                self._low = collections.OrderedDict()
+            if batch_size:
+                self._size = 0
+                self._events += batch_size
+                self._batches += 1
+                if batch_size > self._max_batch_size:
+                    self._max_batch_size = batch_size
+            if self._shutdown:
+                self._shutdown = False
+                batch.append(self.SHUTDOWN)
+        return batch
+
+    def _has_items(self):
+        return self._size > 0 or self._shutdown
+
+    def get_stats(self):
+        """
+        Gets a snapshot of the queue's counters
+
+        :rtype: EventQueueStats
+        """
+        with self._not_empty:
+            return EventQueueStats(self._events, self._batches, self._max_batch_size, self._size,
+                                   self._max_depth, self._dropped, self._coalesced)
+
+    def reset_stats(self):
+        """
+        Resets the queue's counters. The max depth restarts at the current depth
+        """
+        with self._not_empty:
+            self._events = 0
+            self._batches = 0
+            self._max_batch_size = 0
+            self._max_depth = self._size
+            self._dropped = 0
+            self._coalesced = 0
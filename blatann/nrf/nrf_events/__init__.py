@@ -35,16 +35,16 @@ _event_classes = [
     GattcEvtCharacteristicDiscoveryResponse,
     GattcEvtDescriptorDiscoveryResponse,
     GattcEvtReadResponse,
+    GattcEvtCharValuesReadResponse,
+    GattcEvtCharValueByUuidReadResponse,
     GattcEvtWriteResponse,
     GattcEvtHvx,
     GattcEvtAttrInfoDiscoveryResponse,
     GattcEvtMtuExchangeResponse,
     GattcEvtTimeout,
+    GattcEvtWriteCmdTxComplete,
     # TODO:
     # driver.BLE_GATTC_EVT_REL_DISC_RSP
-    # driver.BLE_GATTC_EVT_CHAR_VAL_BY_UUID_READ_RSP
-    # driver.BLE_GATTC_EVT_CHAR_VALS_READ_RSP
-    # driver.BLE_GATTC_EVT_WRITE_CMD_TX_COMPLETE
 
     # Gatts
     GattsEvtWrite,
@@ -61,6 +61,16 @@ _event_classes = [
 _events_by_id = {e.evt_id: e for e in _event_classes}
 
 
+def event_class_get(evt_id):
+    """
+    Gets the event class which decodes the given SoftDevice event id
+
+    :param evt_id: The event id from the ble_evt_t header
+    :return: The event class, or None if the event is not supported
+    """
+    return _events_by_id.get(evt_id, None)
+
+
 def event_decode(ble_event):
     event_cls = _events_by_id.get(ble_event.header.evt_id, None)
     if event_cls:
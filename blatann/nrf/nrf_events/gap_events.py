@@ -7,7 +7,9 @@ from blatann.nrf.nrf_events.generic_events import BLEEvent
 
 
 class GapEvt(BLEEvent):
-    pass
+    @classmethod
+    def conn_handle_from_c(cls, event):
+        return event.evt.gap_evt.conn_handle
 
 
 class GapEvtAdvReport(GapEvt):
@@ -29,6 +31,10 @@ class GapEvtAdvReport(GapEvt):
             dev_name_list = self.adv_data.records[BLEAdvData.Types.short_local_name]
         return "".join(map(chr, dev_name_list))
 
+    def coalesce_key(self):
+        # A newer report of the same packet type from the same device supersedes a queued one
+        return tuple(self.peer_addr.addr), self.peer_addr.addr_type, self.adv_type
+
     @classmethod
     def from_c(cls, event):
         adv_report_evt = event.evt.gap_evt.params.adv_report
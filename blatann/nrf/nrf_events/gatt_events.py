@@ -16,11 +16,15 @@ class GattEvt(BLEEvent):
 
 
 class GattcEvt(GattEvt):
-    pass
+    @classmethod
+    def conn_handle_from_c(cls, event):
+        return event.evt.gattc_evt.conn_handle
 
 
 class GattsEvt(GattEvt):
-    pass
+    @classmethod
+    def conn_handle_from_c(cls, event):
+        return event.evt.gatts_evt.conn_handle
 
 
 """
@@ -40,7 +44,7 @@ class GattcEvtReadResponse(GattcEvt):
         if status == BLEGattStatusCode.read_not_permitted:
             self.data = None
         elif isinstance(data, str):
-            self.data = list(map(ord, data))
+            self.data = bytes(map(ord, data))
         else:
             self.data = data
 
@@ -52,17 +56,65 @@ class GattcEvtReadResponse(GattcEvt):
                    error_handle=event.evt.gattc_evt.error_handle,
                    attr_handle=read_rsp.handle,
                    offset=read_rsp.offset,
-                   data=util.uint8_array_to_list(read_rsp.data, read_rsp.len))
+                   data=util.uint8_array_to_bytes(read_rsp.data, read_rsp.len))
 
     def __repr__(self):
         data = None
         if self.data is not None:
-            data = ''.join(map(chr, self.data))
+            data = bytes(self.data)
         return "{}(conn_handle={!r}, status={!r}, error_handle={!r}, attr_handle={!r}, offset={!r}, data={!r})".format(
             self.__class__.__name__, self.conn_handle,
             self.status, self.error_handle, self.attr_handle, self.offset, data)
 
 
+class GattcEvtCharValuesReadResponse(GattcEvt):
+    evt_id = driver.BLE_GATTC_EVT_CHAR_VALS_READ_RSP
+
+    def __init__(self, conn_handle, status, error_handle, data):
+        super(GattcEvtCharValuesReadResponse, self).__init__(conn_handle)
+        self.status = status
+        self.error_handle = error_handle
+        self.data = data
+
+    @classmethod
+    def from_c(cls, event):
+        char_vals_read_rsp = event.evt.gattc_evt.params.char_vals_read_rsp
+        return cls(conn_handle=event.evt.gattc_evt.conn_handle,
+                   status=BLEGattStatusCode(event.evt.gattc_evt.gatt_status),
+                   error_handle=event.evt.gattc_evt.error_handle,
+                   data=util.uint8_array_to_bytes(char_vals_read_rsp.values, char_vals_read_rsp.len))
+
+    def __repr__(self):
+        return self._repr_format(status=self.status, error_handle=self.error_handle, data=self.data)
+
+
+class GattcEvtCharValueByUuidReadResponse(GattcEvt):
+    evt_id = driver.BLE_GATTC_EVT_CHAR_VAL_BY_UUID_READ_RSP
+
+    def __init__(self, conn_handle, status, error_handle, handle_values):
+        super(GattcEvtCharValueByUuidReadResponse, self).__init__(conn_handle)
+        self.status = status
+        self.error_handle = error_handle
+        self.handle_values = handle_values
+        """The (handle, value) pairs read, in handle order"""
+
+    @classmethod
+    def from_c(cls, event):
+        read_rsp = event.evt.gattc_evt.params.char_val_by_uuid_read_rsp
+        # The pairs are packed back to back: a 2-byte handle followed by value_len bytes of the value
+        pair_len = read_rsp.value_len + 2
+        data = util.uint8_array_to_bytes(read_rsp.handle_value, read_rsp.count * pair_len)
+        handle_values = [(int.from_bytes(data[i:i + 2], "little"), data[i + 2:i + pair_len])
+                         for i in range(0, len(data), pair_len)]
+        return cls(conn_handle=event.evt.gattc_evt.conn_handle,
+                   status=BLEGattStatusCode(event.evt.gattc_evt.gatt_status),
+                   error_handle=event.evt.gattc_evt.error_handle,
+                   handle_values=handle_values)
+
+    def __repr__(self):
+        return self._repr_format(status=self.status, error_handle=self.error_handle, handle_values=self.handle_values)
+
+
 class GattcEvtHvx(GattcEvt):
     evt_id = driver.BLE_GATTC_EVT_HVX
 
@@ -73,7 +125,7 @@ class GattcEvtHvx(GattcEvt):
         self.attr_handle = attr_handle
         self.hvx_type = hvx_type
         if isinstance(data, str):
-            self.data = list(map(ord, data))
+            self.data = bytes(map(ord, data))
         else:
             self.data = data
 
@@ -85,10 +137,10 @@ class GattcEvtHvx(GattcEvt):
                    error_handle=event.evt.gattc_evt.error_handle,
                    attr_handle=hvx_evt.handle,
                    hvx_type=BLEGattHVXType(hvx_evt.type),
-                   data=util.uint8_array_to_list(hvx_evt.data, hvx_evt.len))
+                   data=util.uint8_array_to_bytes(hvx_evt.data, hvx_evt.len))
 
     def __repr__(self):
-        data = ''.join(map(chr, self.data))
+        data = bytes(self.data)
         return "{}(conn_handle={!r}, status={!r}, error_handle={!r}, attr_handle={!r}, hvx_type={!r}, data={!r})".format(
             self.__class__.__name__, self.conn_handle,
             self.status, self.error_handle, self.attr_handle, self.hvx_type, data)
@@ -105,7 +157,7 @@ class GattcEvtWriteResponse(GattcEvt):
         self.write_op = write_op
         self.offset = offset
         if isinstance(data, str):
-            self.data = list(map(ord, data))
+            self.data = bytes(map(ord, data))
         else:
             self.data = data
 
@@ -118,10 +170,10 @@ class GattcEvtWriteResponse(GattcEvt):
                    attr_handle=write_rsp_evt.handle,
                    write_op=BLEGattWriteOperation(write_rsp_evt.write_op),
                    offset=write_rsp_evt.offset,
-                   data=util.uint8_array_to_list(write_rsp_evt.data, write_rsp_evt.len))
+                   data=util.uint8_array_to_bytes(write_rsp_evt.data, write_rsp_evt.len))
 
     def __repr__(self):
-        data = ''.join(map(chr, self.data))
+        data = bytes(self.data)
         return "{}(conn_handle={!r}, status={!r}, error_handle={!r}, attr_handle={!r}, write_op={!r}, offset={!r}, data={!r})".format(
             self.__class__.__name__, self.conn_handle,
             self.status, self.error_handle, self.attr_handle, self.write_op, self.offset, data)
@@ -264,6 +316,22 @@ class GattcEvtTimeout(GattcEvt):
     def __repr__(self):
         return self._repr_format(source=self.source)
 
+
+class GattcEvtWriteCmdTxComplete(GattcEvt):
+    evt_id = driver.BLE_GATTC_EVT_WRITE_CMD_TX_COMPLETE
+
+    def __init__(self, conn_handle, tx_count):
+        super(GattcEvtWriteCmdTxComplete, self).__init__(conn_handle)
+        self.tx_count = tx_count
+
+    @classmethod
+    def from_c(cls, event):
+        conn_handle = event.evt.gattc_evt.conn_handle
+        return cls(conn_handle, event.evt.gattc_evt.params.write_cmd_tx_complete.count)
+
+    def __repr__(self):
+        return self._repr_format(tx_count=self.tx_count)
+
 """
 GATTS Events
 """
@@ -297,7 +365,7 @@ class GattsEvtWrite(GattsEvt):
         write_operand = BLEGattsWriteOperation(write_event.op)
         auth_required = bool(write_event.auth_required)
         offset = write_event.offset
-        data = util.uint8_array_to_list(write_event.data, write_event.len)
+        data = util.uint8_array_to_bytes(write_event.data, write_event.len)
 
         return cls(conn_handle, attr_handle, uuid, write_operand, auth_required, offset, data)
 
@@ -11,6 +11,25 @@ class BLEEvent(object):
     def __init__(self, conn_handle):
         self.conn_handle = conn_handle
 
+    @classmethod
+    def conn_handle_from_c(cls, event):
+        """
+        Reads only the connection handle from the raw SoftDevice event
+
+        :param event: The raw ble_evt_t
+        :return: The connection handle the event is for
+        """
+        raise NotImplementedError()
+
+    def coalesce_key(self):
+        """
+        Gets a key which identifies events that supersede each other,
+        used to coalesce low priority events when the event queue is full
+
+        :return: A hashable key, or None if events of this type cannot be coalesced
+        """
+        return None
+
     def __str__(self):
         return self.__repr__()
 
@@ -28,6 +47,10 @@ class EvtUserMemoryRequest(BLEEvent):
         super(EvtUserMemoryRequest, self).__init__(conn_handle)
         self.type = request_type
 
+    @classmethod
+    def conn_handle_from_c(cls, event):
+        return event.evt.common_evt.conn_handle
+
     @classmethod
     def from_c(cls, event):
         return cls(event.evt.common_evt.conn_handle, event.evt.common_evt.params.user_mem_request.type)
@@ -0,0 +1,294 @@
+import ctypes
+import logging
+import multiprocessing
+import pickle
+import threading
+
+from blatann.nrf.nrf_driver import NrfDriver, DEFAULT_LOW_PRIORITY_EVENT_TYPES
+from blatann.nrf.nrf_event_queue import OverflowPolicy
+from blatann.nrf.nrf_events import _event_classes
+from blatann.nrf.nrf_shared_ring import SharedRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RING_SIZE = 4 * 1024 * 1024
+# How often the parent's ring reader checks whether it should stop
+_READER_POLL_INTERVAL_S = 0.1
+_WORKER_JOIN_TIMEOUT_S = 5.0
+# Size of the table of forwarded events, indexed by event id
+_EVENT_ID_COUNT = max(c.evt_id for c in _event_classes) + 1
+
+# APIs which fill in one of their arguments (by position) with the results of the call.
+# The worker sends the argument's attributes back and they are copied onto the caller's object
+_OUTPUT_ARGUMENTS = {
+    "ble_vs_uuid_add": (0,),
+    "ble_gatts_service_add": (2,),
+    "ble_gatts_characteristic_add": (3,),
+    "ble_gatts_value_get": (2,),
+}
+
+
+class _WorkerDriver(NrfDriver):
+    """
+    The driver running in the worker process. Instead of dispatching the events to observers,
+    it decodes the events the parent needs and its event thread writes them to the shared ring.
+    Like in the parent, the events of a connection are always forwarded and the parent drops the ones
+    nobody wants when dispatching them
+    """
+    def __init__(self, ring, forwarded_events, serial_port, baud_rate, log_driver_comms, fine_grained_locking):
+        super(_WorkerDriver, self).__init__(serial_port, baud_rate, log_driver_comms, fine_grained_locking)
+        self._ring = ring
+        self._ring_stop = threading.Event()
+        self._forwarded_events = forwarded_events
+
+    @property
+    def ring_stats(self):
+        return self._ring.stats
+
+    def close(self):
+        # The parent may have stopped reading, don't let the event thread block on a full ring
+        self._ring_stop.set()
+        return super(_WorkerDriver, self).close()
+
+    def _is_event_wanted(self, event_cls):
+        return self._forwarded_events[event_cls.evt_id]
+
+    def _process_ble_event(self, event):
+        self._ring.put(pickle.dumps(event, pickle.HIGHEST_PROTOCOL), self._ring_stop)
+
+
+def _worker_main(driver_args, command_conn, ring_handle, forwarded_events):
+    """
+    Entry point of the worker process. Runs the commands received from the parent until told to stop
+    or the parent goes away
+    """
+    ring = SharedRingBuffer.attach(ring_handle)
+    nrf_driver = _WorkerDriver(ring, forwarded_events, *driver_args)
+    try:
+        while True:
+            try:
+                command = command_conn.recv()
+            except EOFError:
+                break
+            if command is None:
+                break
+            name, args, kwargs = command
+            try:
+                attr = getattr(nrf_driver, name)
+                result = attr(*args, **kwargs) if callable(attr) else attr
+                # Private attributes hold C structs cached by the argument, which cannot be pickled
+                outputs = [(i, {k: v for k, v in vars(args[i]).items() if not k.startswith("_")})
+                           for i in _OUTPUT_ARGUMENTS.get(name, ()) if i < len(args)]
+                reply = (True, result, outputs)
+            except Exception as e:
+                reply = (False, e, None)
+            try:
+                command_conn.send(reply)
+            except Exception as e:
+                # The result or the exception could not be pickled
+                command_conn.send((False, RuntimeError("Failed to return the result of {}: {!r}".format(name, e)),
+                                   None))
+    finally:
+        try:
+            nrf_driver.close()
+        except Exception:
+            logger.exception("Failed to close the driver")
+        ring.close()
+        command_conn.close()
+
+
+class ProcessDriver(NrfDriver):
+    """
+    Driver which runs the actual NrfDriver in a worker process, so that several adapters are not limited
+    by a single interpreter's GIL.
+
+    The worker receives the events from the device, decodes the ones this driver has observers or handlers
+    for, as well as all events of a connection, and writes them to a shared memory ring (see SharedRingBuffer).
+    A reader thread in this process unpickles them into the event queue, from where they are dispatched as usual,
+    including the connection executor. API calls are sent to the worker over a pipe and block until the worker
+    replies, errors are raised in this process. The worker is started by the first API call (or open())
+    and stopped by close().
+
+    API calls are serialized on the command pipe, fine_grained_locking only applies within the worker.
+    Captures (start_capture()) are written by the worker, so only file paths are supported.
+
+    The worker is started from a new interpreter which imports the main module, so scripts must
+    guard their entry point with ``if __name__ == "__main__":``
+    """
+    # Forking a process which has threads running is unsafe, the worker always starts from a new interpreter
+    _worker_context = multiprocessing.get_context("spawn")
+
+    def __init__(self, serial_port, baud_rate=None, log_driver_comms=False, fine_grained_locking=False,
+                 ring_size=DEFAULT_RING_SIZE):
+        """
+        :param serial_port: The serial port the connectivity device is on
+        :param baud_rate: The baud rate to communicate with the device at
+        :param log_driver_comms: Flag to log the driver's internal communication messages (logged by the worker)
+        :param fine_grained_locking: See NrfDriver
+        :param ring_size: Size of the shared memory ring the events are passed through, in bytes
+        """
+        super(ProcessDriver, self).__init__(serial_port, baud_rate, log_driver_comms, fine_grained_locking)
+        self._worker_args = (serial_port, baud_rate, log_driver_comms, fine_grained_locking)
+        self._ring_size = ring_size
+        self._process = None
+        self._ring = None
+        self._command_conn = None
+        self._command_lock = threading.Lock()
+        self._reader_thread = None
+        self._reader_stop = threading.Event()
+        # Which events the worker forwards, by event id. Shared with the worker and updated in place,
+        # so subscribing does not wait for a round trip to the worker
+        self._forwarded_events = multiprocessing.RawArray(ctypes.c_bool, _EVENT_ID_COUNT)
+
+    def _create_rpc_adapter(self, serial_port, baud_rate):
+        # The adapter is created by the worker
+        return None
+
+    @property
+    def worker_pid(self):
+        """
+        The process id of the worker, None if it is not running
+        """
+        process = self._process
+        return process.pid if process else None
+
+    @property
+    def event_transport_stats(self):
+        """
+        Gets the counters of the ring the events are passed through
+
+        :rtype: blatann.nrf.nrf_shared_ring.SharedRingBufferStats
+        """
+        return self._call("ring_stats")
+
+    def _start_worker(self):
+        """
+        Starts the worker process. Must be called with the command lock held
+        """
+        context = self._worker_context
+        self._ring = SharedRingBuffer.create(self._ring_size, context)
+        self._command_conn, worker_conn = context.Pipe()
+        self._process = context.Process(target=_worker_main, name="{}_Driver".format(self._serial_port),
+                                        args=(self._worker_args, worker_conn, self._ring.handle,
+                                              self._forwarded_events))
+        self._process.daemon = True
+        self._process.start()
+        worker_conn.close()
+        self._reader_stop.clear()
+        self._reader_thread = threading.Thread(target=self._read_events, name="{}_Ring".format(self._serial_port))
+        self._reader_thread.daemon = True
+        self._reader_thread.start()
+
+    def _stop_worker(self):
+        with self._command_lock:
+            process = self._process
+            if process is None:
+                return
+            try:
+                self._command_conn.send(None)
+            except OSError:
+                pass
+            process.join(_WORKER_JOIN_TIMEOUT_S)
+            if process.is_alive():
+                logger.warning("Driver worker for %s did not stop, terminating it", self._serial_port)
+                process.terminate()
+                process.join()
+            self._command_conn.close()
+            self._reader_stop.set()
+            self._reader_thread.join()
+            self._ring.close()
+            self._process = None
+            self._command_conn = None
+            self._reader_thread = None
+            self._ring = None
+
+    def _call(self, name, *args, **kwargs):
+        """
+        Calls a method (or reads a property) of the driver in the worker process
+        """
+        with self._command_lock:
+            if self._process is None:
+                self._start_worker()
+            self._command_conn.send((name, args, kwargs))
+            success, result, outputs = self._command_conn.recv()
+        if not success:
+            raise result
+        for index, attributes in outputs:
+            vars(args[index]).update(attributes)
+        return result
+
+    def _read_events(self):
+        ring = self._ring
+        while not self._reader_stop.is_set():
+            payload = ring.get(_READER_POLL_INTERVAL_S)
+            if payload is None:
+                continue
+            event = pickle.loads(payload)
+            # Events were already ordered (and dropped or coalesced) by the worker's queue, keep the ring's order
+            self._events.put(event)
+
+    def _rebuild_wanted_event_classes(self):
+        super(ProcessDriver, self)._rebuild_wanted_event_classes()
+        wanted_event_ids = set(c.evt_id for c in self._wanted_event_classes)
+        forwarded_events = self._forwarded_events
+        for evt_id in range(len(forwarded_events)):
+            forwarded_events[evt_id] = evt_id in wanted_event_ids
+
+    def open(self):
+        if self.is_open:
+            logger.warning("Trying to open already opened driver")
+            return
+        self._call("open")
+        self._start_event_thread()
+
+    def close(self):
+        if self._process is None:
+            return
+        try:
+            if self.is_open:
+                self._call("close")
+        finally:
+            self._stop_worker()
+            self._event_thread_join()
+            if self._connection_executor is not None:
+                self._connection_executor.shutdown()
+
+    def configure_event_queue(self, max_size=None, overflow_policy=OverflowPolicy.drop_oldest,
+                              low_priority_event_types=DEFAULT_LOW_PRIORITY_EVENT_TYPES):
+        # Both queues are configured, the worker's is the one which coalesces events
+        super(ProcessDriver, self).configure_event_queue(max_size, overflow_policy, low_priority_event_types)
+        self._call("configure_event_queue", max_size, overflow_policy, low_priority_event_types)
+
+    @property
+    def api_call_stats(self):
+        return self._call("api_call_stats")
+
+    @property
+    def is_capturing(self):
+        return self._call("is_capturing")
+
+    def ble_enable(self, ble_enable_params=None):
+        if not ble_enable_params:
+            ble_enable_params = self.ble_enable_params_setup()
+        self.ble_enable_params = ble_enable_params
+        return self._call("ble_enable", ble_enable_params)
+
+
+def _forwarded(name):
+    def forward(self, *args, **kwargs):
+        return self._call(name, *args, **kwargs)
+    forward.__name__ = name
+    forward.__qualname__ = "ProcessDriver.{}".format(name)
+    forward.__doc__ = getattr(NrfDriver, name).__doc__
+    return forward
+
+
+# Every SoftDevice API, and the driver configuration which only exists in the worker
+_FORWARDED_METHODS = [name for name in vars(NrfDriver)
+                      if name.startswith("ble_") and not name.endswith("_setup")
+                      and name not in ("ble_evt_handler", "ble_enable")]
+_FORWARDED_METHODS += ["configure_api_call_stats", "reset_api_call_stats", "start_capture", "stop_capture"]
+
+for _name in _FORWARDED_METHODS:
+    setattr(ProcessDriver, _name, _forwarded(_name))
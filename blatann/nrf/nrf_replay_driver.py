@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+
+from blatann.nrf.nrf_capture import CaptureRecordType, read_capture
+from blatann.nrf.nrf_driver import NrfDriver
+import blatann.nrf.nrf_driver_types as util
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayDriver(NrfDriver):
+    """
+    Driver which plays back the events of a capture file (see NrfDriver.start_capture()) instead of
+    talking to a device. The captured events are rebuilt and go through the same decoding, event queue,
+    priorities, connection executor and observer/handler dispatch as events received from a device.
+    Events which were captured already decoded (the driver backend could not rebuild them) are queued as is. Scan storms or notification floods recorded in the field can be reproduced
+    without hardware, e.g. to run performance regressions.
+
+    Only the event pipeline is played back, the driver's API calls are not simulated.
+    The API calls made during the capture can be read with blatann.nrf.nrf_capture.read_capture()
+    """
+    def __init__(self, capture_file, fine_grained_locking=False):
+        """
+        :param capture_file: The path of the capture file to play back, or a binary file object to read from
+        :param fine_grained_locking: See NrfDriver
+        """
+        super(ReplayDriver, self).__init__("REPLAY", fine_grained_locking=fine_grained_locking)
+        self._records = [r for r in read_capture(capture_file)
+                         if r.record_type in (CaptureRecordType.event, CaptureRecordType.decoded_event)]
+        # Rebuilt up front so that the time to play back only includes handling the events
+        self._ble_events = [util.ble_evt_from_bytes(r.data) if r.record_type == CaptureRecordType.event
+                            else r.decode_event() for r in self._records]
+        self._processed = 0
+        self._processed_condition = threading.Condition(threading.Lock())
+
+    @property
+    def event_count(self):
+        """
+        The number of events in the capture
+        """
+        return len(self._records)
+
+    @property
+    def duration(self):
+        """
+        The time between the first and last event of the capture, in seconds
+        """
+        if not self._records:
+            return 0.0
+        return self._records[-1].timestamp - self._records[0].timestamp
+
+    def open(self):
+        if self.is_open:
+            logger.warning("Trying to open already opened driver")
+            return
+        self._start_event_thread()
+
+    def close(self):
+        if not self.is_open:
+            return
+        self._event_thread_join()
+        if self._connection_executor is not None:
+            self._connection_executor.shutdown()
+
+    def replay(self, speed=None, timeout=None):
+        """
+        Plays back the captured events and waits until they have all been handed to the observers and handlers.
+        The driver must be open.
+
+        :param speed: How fast to play back relative to the capture, e.g. 1.0 for the recorded timing and
+                      2.0 for twice as fast. None (default) queues the events as fast as possible
+        :param timeout: How long to wait for the events to be processed, or None to wait indefinitely
+        :return: The time it took to play back and process the events, in seconds
+        :raises: TimeoutError if the events were not processed within the timeout
+        """
+        if not self.is_open:
+            raise RuntimeError("Driver must be open to replay events")
+        if speed is not None and speed <= 0:
+            raise ValueError("Speed must be greater than 0 or None. Got {}".format(speed))
+
+        with self._processed_condition:
+            self._processed = 0
+        queue_stats_before = self._events.get_stats()
+        first_timestamp = self._records[0].timestamp if self._records else 0.0
+        skipped = 0
+        start = time.perf_counter()
+        for record, ble_event in zip(self._records, self._ble_events):
+            if speed is not None:
+                delay = (record.timestamp - first_timestamp) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            if record.record_type == CaptureRecordType.decoded_event:
+                # Events nobody is interested in are dropped when dispatched
+                self._queue_event(ble_event)
+                continue
+            # Same as the driver's event handler, but counts the events nobody is interested in
+            event = self._decode_ble_event(ble_event)
+            if event is None:
+                skipped += 1
+            else:
+                self._queue_event(event)
+
+        def all_processed():
+            # Low priority events may have been dropped or coalesced by the event queue, they will never be processed
+            queue_stats = self._events.get_stats()
+            dropped = queue_stats.dropped - queue_stats_before.dropped
+            coalesced = queue_stats.coalesced - queue_stats_before.coalesced
+            return self._processed + skipped + dropped + coalesced >= len(self._records)
+
+        with self._processed_condition:
+            if not self._processed_condition.wait_for(all_processed, timeout):
+                raise TimeoutError("Timed out waiting for replayed events to be processed")
+        return time.perf_counter() - start
+
+    def _process_ble_event(self, event):
+        super(ReplayDriver, self)._process_ble_event(event)
+        with self._processed_condition:
+            self._processed += 1
+            self._processed_condition.notify_all()
@@ -0,0 +1,189 @@
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+# Header at the start of the shared memory: total bytes written, total bytes read.
+# Both only ever grow, the position in the data area is the count modulo the capacity.
+# Each is only written by one side (write count by the producer, read count by the consumer)
+_HEADER = struct.Struct("<QQ")
+_WRITE_COUNT_OFFSET = 0
+_READ_COUNT_OFFSET = 8
+_COUNT = struct.Struct("<Q")
+# Each record is its length followed by the payload. A record never wraps around the end of the data area,
+# the rest of the data area is skipped instead, marked with _WRAP if there is room for a length
+_LENGTH = struct.Struct("<I")
+_WRAP = 0xFFFFFFFF
+# How long the producer sleeps between checks for free space when the ring is full
+_FULL_POLL_INTERVAL_S = 0.0002
+
+
+class SharedRingBufferStats(object):
+    """
+    Snapshot of the producer side counters of a shared ring buffer
+    """
+    def __init__(self, records, bytes_written, full_waits):
+        self.records = records
+        """Number of records written"""
+        self.bytes_written = bytes_written
+        """Number of payload bytes written"""
+        self.full_waits = full_waits
+        """Number of writes which had to wait for the consumer to free up space"""
+
+    def __repr__(self):
+        return "{}(records={}, bytes_written={}, full_waits={})".format(
+            self.__class__.__name__, self.records, self.bytes_written, self.full_waits)
+
+
+class SharedRingBuffer(object):
+    """
+    Single producer, single consumer queue of byte strings in shared memory, used to move data between
+    processes without a pipe round-trip per record.
+
+    The consumer creates the ring and hands :attr:`handle` to the producer process, which attaches to it
+    with :meth:`attach`. A semaphore counts the records in the ring so the consumer can block until one is
+    written. Its release/acquire also orders the record's memory writes before the consumer's reads.
+    The producer waits (polling) while the ring is full, records are never dropped
+    """
+    def __init__(self, shm, items, capacity, owner):
+        self._shm = shm
+        self._buf = shm.buf
+        self._items = items
+        self._capacity = capacity
+        self._owner = owner
+        self._data_start = _HEADER.size
+        # Each count is only modified by one side, which keeps its own copy
+        self._write_count = _COUNT.unpack_from(self._buf, _WRITE_COUNT_OFFSET)[0]
+        self._read_count = _COUNT.unpack_from(self._buf, _READ_COUNT_OFFSET)[0]
+        self._records = 0
+        self._bytes_written = 0
+        self._full_waits = 0
+
+    @classmethod
+    def create(cls, capacity, context=multiprocessing):
+        """
+        Creates a new ring, owned by the caller (the consumer)
+
+        :param capacity: Size of the data area, in bytes. Bounds the largest record that can be written
+        :param context: The multiprocessing context the producer process is started from
+        :rtype: SharedRingBuffer
+        """
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + capacity)
+        _HEADER.pack_into(shm.buf, 0, 0, 0)
+        return cls(shm, context.Semaphore(0), capacity, True)
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Attaches to a ring created by another process
+
+        :param handle: The ring's :attr:`handle`
+        :rtype: SharedRingBuffer
+        """
+        name, items, capacity = handle
+        # Processes started through multiprocessing share the creator's resource tracker,
+        # so the memory is only cleaned up once the creator unlinked it (or exited)
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, items, capacity, False)
+
+    @property
+    def handle(self):
+        """
+        The information another process needs to attach to the ring. Must be passed to the process
+        when it is started, since it contains a semaphore
+        """
+        return self._shm.name, self._items, self._capacity
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def stats(self):
+        """
+        The producer side counters, only meaningful in the producer process
+
+        :rtype: SharedRingBufferStats
+        """
+        return SharedRingBufferStats(self._records, self._bytes_written, self._full_waits)
+
+    def put(self, payload, stop_event=None):
+        """
+        Writes a record, waiting for free space if the ring is full. Producer side only
+
+        :param payload: The record's bytes
+        :param stop_event: Optional threading.Event which aborts the wait for free space when set
+        :return: True if the record was written, False if the wait was aborted
+        :raises: ValueError if the record cannot fit in the ring
+        """
+        size = _LENGTH.size + len(payload)
+        if size > self._capacity:
+            raise ValueError("Record of {} bytes does not fit in a ring of {} bytes".format(len(payload),
+                                                                                           self._capacity))
+        buf = self._buf
+        write_count = self._write_count
+        offset = write_count % self._capacity
+        tail = self._capacity - offset
+        skip = tail if tail < size else 0
+
+        waited = False
+        while write_count + skip + size - _COUNT.unpack_from(buf, _READ_COUNT_OFFSET)[0] > self._capacity:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            waited = True
+            time.sleep(_FULL_POLL_INTERVAL_S)
+        if waited:
+            self._full_waits += 1
+
+        if skip:
+            if skip >= _LENGTH.size:
+                _LENGTH.pack_into(buf, self._data_start + offset, _WRAP)
+            write_count += skip
+            offset = 0
+        position = self._data_start + offset
+        _LENGTH.pack_into(buf, position, len(payload))
+        buf[position + _LENGTH.size:position + size] = payload
+        write_count += size
+
+        self._write_count = write_count
+        _COUNT.pack_into(buf, _WRITE_COUNT_OFFSET, write_count)
+        self._records += 1
+        self._bytes_written += len(payload)
+        self._items.release()
+        return True
+
+    def get(self, timeout=None):
+        """
+        Reads the next record, waiting for one to be written. Consumer side only
+
+        :param timeout: How long to wait for a record, None to wait indefinitely
+        :return: The record's bytes, or None if the wait timed out
+        """
+        if not self._items.acquire(timeout=timeout):
+            return None
+        buf = self._buf
+        read_count = self._read_count
+        offset = read_count % self._capacity
+        tail = self._capacity - offset
+        if tail < _LENGTH.size or _LENGTH.unpack_from(buf, self._data_start + offset)[0] == _WRAP:
+            read_count += tail
+            offset = 0
+        position = self._data_start + offset
+        length = _LENGTH.unpack_from(buf, position)[0]
+        payload = bytes(buf[position + _LENGTH.size:position + _LENGTH.size + length])
+
+        self._read_count = read_count + _LENGTH.size + length
+        _COUNT.pack_into(buf, _READ_COUNT_OFFSET, self._read_count)
+        return payload
+
+    def close(self):
+        """
+        Detaches from the ring. The owner also frees the shared memory
+        """
+        if self._shm is None:
+            return
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
@@ -0,0 +1,33 @@
+"""
+Simulated connectivity backend. Selected by setting the BLATANN_DRIVER_BACKEND environment variable
+to ``sim`` before blatann is imported, see blatann.nrf.nrf_dll_load
+"""
+from blatann.nrf.nrf_sim.air import LinkConfig
+
+
+def configure_link(interval_ms=None, packets_per_event=6, latency_ms=0.0):
+    """
+    Configures the timing of all simulated links, existing and future
+
+    :param interval_ms: The connection interval to simulate, in milliseconds. None (default) uses the interval
+                        the central connected with or last updated to. 0 sends every queued packet immediately
+    :param packets_per_event: The number of link layer packets each side can send per connection event
+    :param latency_ms: Additional time it takes a packet to reach the peer after it was sent, in milliseconds
+    :return: The new link configuration
+    :rtype: LinkConfig
+    """
+    from blatann.nrf.nrf_sim.driver import air
+    config = LinkConfig(interval_ms, packets_per_event, latency_ms)
+    with air.lock:
+        air.link_config = config
+    return config
+
+
+def get_link_config():
+    """
+    Gets the current timing of the simulated links
+
+    :rtype: LinkConfig
+    """
+    from blatann.nrf.nrf_sim.driver import air
+    return air.link_config
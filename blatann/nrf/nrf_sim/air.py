@@ -0,0 +1,233 @@
+import collections
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# L2CAP basic header which precedes every ATT PDU
+L2CAP_HEADER_SIZE = 4
+
+
+class LinkConfig(object):
+    """
+    Timing of the simulated links between adapters
+    """
+    def __init__(self, interval_ms=None, packets_per_event=6, latency_ms=0.0):
+        """
+        :param interval_ms: The connection interval to simulate, in milliseconds. None (default) uses the interval
+                            the central connected with or last updated to. 0 sends every queued packet immediately
+        :param packets_per_event: The number of link layer packets each side can send per connection event
+        :param latency_ms: Additional time it takes a packet to reach the peer after it was sent, in milliseconds
+        """
+        if interval_ms is not None and interval_ms < 0:
+            raise ValueError("Connection interval cannot be negative. Got {}".format(interval_ms))
+        if packets_per_event < 1:
+            raise ValueError("At least one packet per connection event must be allowed. Got {}".format(
+                packets_per_event))
+        if latency_ms < 0:
+            raise ValueError("Latency cannot be negative. Got {}".format(latency_ms))
+        self.interval_ms = interval_ms
+        self.packets_per_event = packets_per_event
+        self.latency_ms = latency_ms
+
+    def __repr__(self):
+        return "{}(interval_ms={!r}, packets_per_event={!r}, latency_ms={!r})".format(
+            self.__class__.__name__, self.interval_ms, self.packets_per_event, self.latency_ms)
+
+
+class Timer(object):
+    """
+    An action scheduled on the air's clock
+    """
+    __slots__ = ("when", "seq", "callback", "args", "cancelled")
+
+    def __init__(self, when, seq, callback, args):
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __lt__(self, other):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+
+class Air(object):
+    """
+    The medium shared by all simulated adapters of the process.
+
+    A single thread runs the timed actions (advertising events, connection events, packet deliveries) under one lock,
+    which the sd_* calls also take, so the state of all adapters changes atomically.
+    Events are handed to the adapters' event handlers outside of the lock, in the order they were generated
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._wakeup = threading.Condition(self.lock)
+        self._timers = []
+        self._seq = itertools.count()
+        self._pending_events = []
+        self._thread = None
+        self.adapters = []
+        self.link_config = LinkConfig()
+
+    @staticmethod
+    def now():
+        return time.perf_counter()
+
+    def schedule(self, delay, callback, *args):
+        """
+        Runs the callback on the air's thread after the delay. Must be called with the lock held
+
+        :param delay: The delay, in seconds
+        :rtype: Timer
+        """
+        timer = Timer(self.now() + max(delay, 0.0), next(self._seq), callback, args)
+        heapq.heappush(self._timers, timer)
+        if self._timers[0] is timer:
+            self._wakeup.notify()
+        return timer
+
+    def emit(self, adapter, event):
+        """
+        Queues an event to be handed to the adapter's event handler. Must be called with the lock held
+        """
+        self._pending_events.append((adapter, event))
+        self._wakeup.notify()
+
+    def attach(self, adapter):
+        with self.lock:
+            if adapter not in self.adapters:
+                self.adapters.append(adapter)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="SimAir")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def detach(self, adapter):
+        with self.lock:
+            if adapter in self.adapters:
+                self.adapters.remove(adapter)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not self._pending_events:
+                    if not self._timers:
+                        self._wakeup.wait()
+                        continue
+                    timer = self._timers[0]
+                    delay = timer.when - self.now()
+                    if delay > 0:
+                        self._wakeup.wait(delay)
+                        continue
+                    heapq.heappop(self._timers)
+                    if timer.cancelled:
+                        continue
+                    try:
+                        timer.callback(*timer.args)
+                    except Exception:
+                        logger.exception("Error in simulated air action %r", timer.callback)
+                events, self._pending_events = self._pending_events, []
+
+            for adapter, event in events:
+                adapter.deliver_event(event)
+
+
+class Link(object):
+    """
+    The link layer of a connection. ATT PDUs queued by either side are split into link layer packets
+    and sent in connection events, each side sending up to LinkConfig.packets_per_event packets per event.
+    Packets are delivered to the peer LinkConfig.latency_ms after the event they were sent in
+    """
+    def __init__(self, air, interval_s):
+        self.air = air
+        self.interval_s = interval_s
+        """The connection interval agreed between the central and peripheral, in seconds"""
+        self.data_length = 27
+        """The maximum link layer payload, in octets"""
+        self.connected = True
+        self._anchor = air.now()
+        self._queues = {}
+        self._event_timer = None
+
+    def _interval(self):
+        interval_ms = self.air.link_config.interval_ms
+        if interval_ms is None:
+            return self.interval_s
+        return interval_ms / 1000.0
+
+    def send(self, sender, pdu_size, on_delivered, on_sent=None):
+        """
+        Queues an ATT PDU. Must be called with the air lock held
+
+        :param sender: The endpoint sending the PDU
+        :param pdu_size: The size of the ATT PDU, in bytes
+        :param on_delivered: Called once the PDU reached the peer
+        :param on_sent: Called at the end of the connection event the last packet of the PDU was sent in
+        """
+        if not self.connected:
+            return
+        packets = max(1, int(math.ceil((pdu_size + L2CAP_HEADER_SIZE) / float(self.data_length))))
+        self._queues.setdefault(sender, collections.deque()).append([packets, on_delivered, on_sent])
+        self._schedule_event()
+
+    def set_interval(self, interval_s):
+        self.interval_s = interval_s
+        self._anchor = self.air.now()
+
+    def close(self):
+        self.connected = False
+        self._queues.clear()
+        if self._event_timer:
+            self._event_timer.cancel()
+            self._event_timer = None
+
+    def _schedule_event(self):
+        if self._event_timer or not self.connected:
+            return
+        interval = self._interval()
+        delay = 0.0
+        if interval > 0:
+            elapsed = self.air.now() - self._anchor
+            # PDUs queued during a connection event go out in the next one
+            delay = (math.floor(elapsed / interval) + 1) * interval - elapsed
+        self._event_timer = self.air.schedule(delay, self._connection_event)
+
+    def _connection_event(self):
+        self._event_timer = None
+        if not self.connected:
+            return
+        config = self.air.link_config
+        unlimited = self._interval() == 0
+        sent = []
+        for queue in self._queues.values():
+            budget = config.packets_per_event
+            while queue and (unlimited or budget > 0):
+                pdu = queue[0]
+                count = pdu[0] if unlimited else min(pdu[0], budget)
+                pdu[0] -= count
+                budget -= count
+                if pdu[0] == 0:
+                    sent.append(queue.popleft())
+        latency = config.latency_ms / 1000.0
+        for _, on_delivered, on_sent in sent:
+            if on_sent:
+                on_sent()
+            if latency > 0:
+                self.air.schedule(latency, self._deliver, on_delivered)
+            else:
+                on_delivered()
+        if any(self._queues.values()):
+            self._schedule_event()
+
+    def _deliver(self, on_delivered):
+        if self.connected:
+            on_delivered()
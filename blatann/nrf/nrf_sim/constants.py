@@ -0,0 +1,381 @@
+"""
+SoftDevice s132 v5 constant values used by the simulated backend.
+
+Only the constants blatann and the simulation rely on are defined here, the driver module hands out
+unique values (which cannot collide with these) for any other constant that is looked up
+"""
+
+NRF_SUCCESS = 0
+NRF_ERROR_SVC_HANDLER_MISSING = 1
+NRF_ERROR_SOFTDEVICE_NOT_ENABLED = 2
+NRF_ERROR_INTERNAL = 3
+NRF_ERROR_NO_MEM = 4
+NRF_ERROR_NOT_FOUND = 5
+NRF_ERROR_NOT_SUPPORTED = 6
+NRF_ERROR_INVALID_PARAM = 7
+NRF_ERROR_INVALID_STATE = 8
+NRF_ERROR_INVALID_LENGTH = 9
+NRF_ERROR_INVALID_FLAGS = 10
+NRF_ERROR_INVALID_DATA = 11
+NRF_ERROR_DATA_SIZE = 12
+NRF_ERROR_TIMEOUT = 13
+NRF_ERROR_NULL = 14
+NRF_ERROR_FORBIDDEN = 15
+NRF_ERROR_INVALID_ADDR = 16
+NRF_ERROR_BUSY = 17
+NRF_ERROR_CONN_COUNT = 18
+NRF_ERROR_RESOURCES = 19
+
+NRF_ERROR_SDM_LFCLK_SOURCE_UNKNOWN = 0x1000
+NRF_ERROR_SDM_INCORRECT_INTERUUPT_CONFIGURATION = 0x1001
+NRF_ERROR_SDM_INCORRECT_CLENR0 = 0x1002
+
+NRF_ERROR_SOC_MUTEX_ALREADY_TAKEN = 0x2000
+NRF_ERROR_SOC_NVIC_INTERRUPT_NOT_AVAILABLE = 0x2001
+NRF_ERROR_SOC_NVIC_INTERRUPT_PRIORITY_NOT_ALLOWED = 0x2002
+NRF_ERROR_SOC_NVIC_SHOULD_NOT_RETURN = 0x2003
+NRF_ERROR_SOC_POWER_MODE_UNKNOWN = 0x2004
+NRF_ERROR_SOC_POWER_POF_THRESHOLD_UNKNOWN = 0x2005
+NRF_ERROR_SOC_POWER_OFF_SHOULD_NOT_RETURN = 0x2006
+NRF_ERROR_SOC_RAND_NOT_ENOUGH_VALUES = 0x2007
+NRF_ERROR_SOC_PPI_INVALID_CHANNEL = 0x2008
+NRF_ERROR_SOC_PPI_INVALID_GROUP = 0x2009
+
+BLE_ERROR_NOT_ENABLED = 0x3001
+BLE_ERROR_INVALID_CONN_HANDLE = 0x3002
+BLE_ERROR_INVALID_ATTR_HANDLE = 0x3003
+BLE_ERROR_INVALID_ADV_HANDLE = 0x3004
+BLE_ERROR_INVALID_ROLE = 0x3005
+BLE_ERROR_BLOCKED_BY_OTHER_LINKS = 0x3006
+BLE_ERROR_GAP_UUID_LIST_MISMATCH = 0x3200
+BLE_ERROR_GAP_DISCOVERABLE_WITH_WHITELIST = 0x3201
+BLE_ERROR_GAP_INVALID_BLE_ADDR = 0x3202
+BLE_ERROR_GAP_WHITELIST_IN_USE = 0x3203
+BLE_ERROR_GAP_DEVICE_IDENTITIES_IN_USE = 0x3204
+BLE_ERROR_GAP_DEVICE_IDENTITIES_DUPLICATE = 0x3205
+BLE_ERROR_GATTC_PROC_NOT_PERMITTED = 0x3300
+BLE_ERROR_GATTS_INVALID_ATTR_TYPE = 0x3400
+BLE_ERROR_GATTS_SYS_ATTR_MISSING = 0x3401
+
+# Serialization transport
+SD_RPC_FLOW_CONTROL_NONE = 0
+SD_RPC_FLOW_CONTROL_HARDWARE = 1
+SD_RPC_PARITY_NONE = 0
+SD_RPC_PARITY_EVEN = 1
+
+# Event IDs
+BLE_EVT_USER_MEM_REQUEST = 0x01
+BLE_EVT_USER_MEM_RELEASE = 0x02
+
+BLE_GAP_EVT_CONNECTED = 0x10
+BLE_GAP_EVT_DISCONNECTED = 0x11
+BLE_GAP_EVT_CONN_PARAM_UPDATE = 0x12
+BLE_GAP_EVT_SEC_PARAMS_REQUEST = 0x13
+BLE_GAP_EVT_SEC_INFO_REQUEST = 0x14
+BLE_GAP_EVT_PASSKEY_DISPLAY = 0x15
+BLE_GAP_EVT_KEY_PRESSED = 0x16
+BLE_GAP_EVT_AUTH_KEY_REQUEST = 0x17
+BLE_GAP_EVT_LESC_DHKEY_REQUEST = 0x18
+BLE_GAP_EVT_AUTH_STATUS = 0x19
+BLE_GAP_EVT_CONN_SEC_UPDATE = 0x1A
+BLE_GAP_EVT_TIMEOUT = 0x1B
+BLE_GAP_EVT_RSSI_CHANGED = 0x1C
+BLE_GAP_EVT_ADV_REPORT = 0x1D
+BLE_GAP_EVT_SEC_REQUEST = 0x1E
+BLE_GAP_EVT_CONN_PARAM_UPDATE_REQUEST = 0x1F
+BLE_GAP_EVT_SCAN_REQ_REPORT = 0x20
+BLE_GAP_EVT_PHY_UPDATE_REQUEST = 0x21
+BLE_GAP_EVT_PHY_UPDATE = 0x22
+BLE_GAP_EVT_DATA_LENGTH_UPDATE_REQUEST = 0x23
+BLE_GAP_EVT_DATA_LENGTH_UPDATE = 0x24
+
+BLE_GATTC_EVT_PRIM_SRVC_DISC_RSP = 0x30
+BLE_GATTC_EVT_REL_DISC_RSP = 0x31
+BLE_GATTC_EVT_CHAR_DISC_RSP = 0x32
+BLE_GATTC_EVT_DESC_DISC_RSP = 0x33
+BLE_GATTC_EVT_ATTR_INFO_DISC_RSP = 0x34
+BLE_GATTC_EVT_CHAR_VAL_BY_UUID_READ_RSP = 0x35
+BLE_GATTC_EVT_READ_RSP = 0x36
+BLE_GATTC_EVT_CHAR_VALS_READ_RSP = 0x37
+BLE_GATTC_EVT_WRITE_RSP = 0x38
+BLE_GATTC_EVT_HVX = 0x39
+BLE_GATTC_EVT_EXCHANGE_MTU_RSP = 0x3A
+BLE_GATTC_EVT_TIMEOUT = 0x3B
+BLE_GATTC_EVT_WRITE_CMD_TX_COMPLETE = 0x3C
+
+BLE_GATTS_EVT_WRITE = 0x50
+BLE_GATTS_EVT_RW_AUTHORIZE_REQUEST = 0x51
+BLE_GATTS_EVT_SYS_ATTR_MISSING = 0x52
+BLE_GATTS_EVT_HVC = 0x53
+BLE_GATTS_EVT_SC_CONFIRM = 0x54
+BLE_GATTS_EVT_EXCHANGE_MTU_REQUEST = 0x55
+BLE_GATTS_EVT_TIMEOUT = 0x56
+BLE_GATTS_EVT_HVN_TX_COMPLETE = 0x57
+
+# Configuration and option IDs
+BLE_COMMON_CFG_VS_UUID = 0x01
+BLE_CONN_CFG_GAP = 0x20
+BLE_CONN_CFG_GATTC = 0x21
+BLE_CONN_CFG_GATTS = 0x22
+BLE_CONN_CFG_GATT = 0x23
+BLE_CONN_CFG_L2CAP = 0x24
+BLE_GAP_CFG_ROLE_COUNT = 0x40
+BLE_GAP_CFG_DEVICE_NAME = 0x41
+BLE_GAP_CFG_PPCP_INCL_CONFIG = 0x42
+BLE_GAP_CFG_CAR_INCL_CONFIG = 0x43
+BLE_GATTS_CFG_SERVICE_CHANGED = 0xA0
+BLE_GATTS_CFG_ATTR_TAB_SIZE = 0xA1
+
+BLE_COMMON_OPT_PA_LNA = 0x01
+BLE_COMMON_OPT_CONN_EVT_EXT = 0x02
+BLE_GAP_OPT_CH_MAP = 0x20
+BLE_GAP_OPT_LOCAL_CONN_LATENCY = 0x21
+BLE_GAP_OPT_PASSKEY = 0x22
+BLE_GAP_OPT_SCAN_REQ_REPORT = 0x23
+BLE_GAP_OPT_COMPAT_MODE_1 = 0x24
+BLE_GAP_OPT_AUTH_PAYLOAD_TIMEOUT = 0x25
+BLE_GAP_OPT_SLAVE_LATENCY_DISABLE = 0x26
+
+BLE_CONN_CFG_TAG_DEFAULT = 0
+BLE_GAP_CONN_COUNT_DEFAULT = 1
+BLE_GAP_EVENT_LENGTH_DEFAULT = 3
+BLE_GAP_ROLE_COUNT_PERIPH_DEFAULT = 1
+BLE_GAP_ROLE_COUNT_CENTRAL_DEFAULT = 3
+BLE_GAP_ROLE_COUNT_CENTRAL_SEC_DEFAULT = 1
+BLE_GATTS_ATTR_TAB_SIZE_DEFAULT = 1408
+BLE_GATTS_SERVICE_CHANGED_DEFAULT = 1
+BLE_GATTC_WRITE_CMD_TX_QUEUE_SIZE_DEFAULT = 1
+BLE_GATTS_HVN_TX_QUEUE_SIZE_DEFAULT = 1
+BLE_UUID_VS_COUNT_DEFAULT = 10
+BLE_GAP_DEVNAME_DEFAULT = b"nRF5x"
+BLE_GAP_DEVNAME_MAX_LEN = 248
+
+# Handles
+BLE_CONN_HANDLE_INVALID = 0xFFFF
+BLE_CONN_HANDLE_ALL = 0xFFFE
+BLE_GATT_HANDLE_INVALID = 0x0000
+BLE_GATT_HANDLE_START = 0x0001
+BLE_GATT_HANDLE_END = 0xFFFF
+
+# GAP
+BLE_GAP_ADDR_LEN = 6
+BLE_GAP_ADDR_TYPE_PUBLIC = 0x00
+BLE_GAP_ADDR_TYPE_RANDOM_STATIC = 0x01
+BLE_GAP_ADDR_TYPE_RANDOM_PRIVATE_RESOLVABLE = 0x02
+BLE_GAP_ADDR_TYPE_RANDOM_PRIVATE_NON_RESOLVABLE = 0x03
+BLE_GAP_SEC_KEY_LEN = 16
+BLE_GAP_SEC_RAND_LEN = 8
+BLE_GAP_LESC_P256_PK_LEN = 64
+BLE_GAP_LESC_DHKEY_LEN = 32
+BLE_GAP_PASSKEY_LEN = 6
+
+BLE_GAP_ROLE_INVALID = 0x0
+BLE_GAP_ROLE_PERIPH = 0x1
+BLE_GAP_ROLE_CENTRAL = 0x2
+
+BLE_GAP_TIMEOUT_SRC_ADVERTISING = 0x00
+BLE_GAP_TIMEOUT_SRC_SCAN = 0x01
+BLE_GAP_TIMEOUT_SRC_CONN = 0x02
+BLE_GAP_TIMEOUT_SRC_AUTH_PAYLOAD = 0x03
+
+BLE_GAP_ADV_TYPE_ADV_IND = 0x00
+BLE_GAP_ADV_TYPE_ADV_DIRECT_IND = 0x01
+BLE_GAP_ADV_TYPE_ADV_SCAN_IND = 0x02
+BLE_GAP_ADV_TYPE_ADV_NONCONN_IND = 0x03
+BLE_GAP_ADV_FP_ANY = 0x00
+BLE_GAP_ADV_FP_FILTER_SCANREQ = 0x01
+BLE_GAP_ADV_FP_FILTER_CONNREQ = 0x02
+BLE_GAP_ADV_FP_FILTER_BOTH = 0x03
+BLE_GAP_ADV_INTERVAL_MIN = 0x0020
+BLE_GAP_ADV_INTERVAL_MAX = 0x4000
+BLE_GAP_ADV_SET_DATA_SIZE_MAX = 31
+
+BLE_GAP_SCAN_INTERVAL_MIN = 0x0004
+BLE_GAP_SCAN_INTERVAL_MAX = 0x4000
+BLE_GAP_SCAN_WINDOW_MIN = 0x0004
+BLE_GAP_SCAN_WINDOW_MAX = 0x4000
+BLE_GAP_SCAN_TIMEOUT_MIN = 0x0001
+BLE_GAP_SCAN_TIMEOUT_MAX = 0xFFFF
+
+BLE_GAP_CP_MIN_CONN_INTVL_MIN = 0x0006
+BLE_GAP_CP_MIN_CONN_INTVL_MAX = 0x0C80
+BLE_GAP_CP_MAX_CONN_INTVL_MIN = 0x0006
+BLE_GAP_CP_MAX_CONN_INTVL_MAX = 0x0C80
+BLE_GAP_CP_SLAVE_LATENCY_MAX = 0x01F3
+BLE_GAP_CP_CONN_SUP_TIMEOUT_MIN = 0x000A
+BLE_GAP_CP_CONN_SUP_TIMEOUT_MAX = 0x0C80
+
+BLE_GAP_AD_TYPE_FLAGS = 0x01
+BLE_GAP_AD_TYPE_16BIT_SERVICE_UUID_MORE_AVAILABLE = 0x02
+BLE_GAP_AD_TYPE_16BIT_SERVICE_UUID_COMPLETE = 0x03
+BLE_GAP_AD_TYPE_32BIT_SERVICE_UUID_MORE_AVAILABLE = 0x04
+BLE_GAP_AD_TYPE_32BIT_SERVICE_UUID_COMPLETE = 0x05
+BLE_GAP_AD_TYPE_128BIT_SERVICE_UUID_MORE_AVAILABLE = 0x06
+BLE_GAP_AD_TYPE_128BIT_SERVICE_UUID_COMPLETE = 0x07
+BLE_GAP_AD_TYPE_SHORT_LOCAL_NAME = 0x08
+BLE_GAP_AD_TYPE_COMPLETE_LOCAL_NAME = 0x09
+BLE_GAP_AD_TYPE_TX_POWER_LEVEL = 0x0A
+BLE_GAP_AD_TYPE_CLASS_OF_DEVICE = 0x0D
+BLE_GAP_AD_TYPE_SIMPLE_PAIRING_HASH_C = 0x0E
+BLE_GAP_AD_TYPE_SIMPLE_PAIRING_RANDOMIZER_R = 0x0F
+BLE_GAP_AD_TYPE_SECURITY_MANAGER_TK_VALUE = 0x10
+BLE_GAP_AD_TYPE_SECURITY_MANAGER_OOB_FLAGS = 0x11
+BLE_GAP_AD_TYPE_SLAVE_CONNECTION_INTERVAL_RANGE = 0x12
+BLE_GAP_AD_TYPE_SOLICITED_SERVICE_UUIDS_16BIT = 0x14
+BLE_GAP_AD_TYPE_SOLICITED_SERVICE_UUIDS_128BIT = 0x15
+BLE_GAP_AD_TYPE_SERVICE_DATA = 0x16
+BLE_GAP_AD_TYPE_PUBLIC_TARGET_ADDRESS = 0x17
+BLE_GAP_AD_TYPE_RANDOM_TARGET_ADDRESS = 0x18
+BLE_GAP_AD_TYPE_APPEARANCE = 0x19
+BLE_GAP_AD_TYPE_ADVERTISING_INTERVAL = 0x1A
+BLE_GAP_AD_TYPE_LE_BLUETOOTH_DEVICE_ADDRESS = 0x1B
+BLE_GAP_AD_TYPE_LE_ROLE = 0x1C
+BLE_GAP_AD_TYPE_SIMPLE_PAIRING_HASH_C256 = 0x1D
+BLE_GAP_AD_TYPE_SIMPLE_PAIRING_RANDOMIZER_R256 = 0x1E
+BLE_GAP_AD_TYPE_SERVICE_DATA_32BIT_UUID = 0x20
+BLE_GAP_AD_TYPE_SERVICE_DATA_128BIT_UUID = 0x21
+BLE_GAP_AD_TYPE_URI = 0x24
+BLE_GAP_AD_TYPE_3D_INFORMATION_DATA = 0x3D
+BLE_GAP_AD_TYPE_MANUFACTURER_SPECIFIC_DATA = 0xFF
+
+BLE_GAP_PHY_AUTO = 0x00
+BLE_GAP_PHY_1MBPS = 0x01
+BLE_GAP_PHY_2MBPS = 0x02
+BLE_GAP_PHY_CODED = 0x04
+BLE_GAP_DATA_LENGTH_AUTO = 0
+BLE_GAP_DATA_LENGTH_DEFAULT = 27
+BLE_GAP_DATA_LENGTH_MAX = 251
+
+BLE_GAP_IO_CAPS_DISPLAY_ONLY = 0x00
+BLE_GAP_IO_CAPS_DISPLAY_YESNO = 0x01
+BLE_GAP_IO_CAPS_KEYBOARD_ONLY = 0x02
+BLE_GAP_IO_CAPS_NONE = 0x03
+BLE_GAP_IO_CAPS_KEYBOARD_DISPLAY = 0x04
+BLE_GAP_AUTH_KEY_TYPE_NONE = 0x00
+BLE_GAP_AUTH_KEY_TYPE_PASSKEY = 0x01
+BLE_GAP_AUTH_KEY_TYPE_OOB = 0x02
+BLE_GAP_AUTH_PAYLOAD_TIMEOUT_MAX = 48000
+BLE_GAP_AUTH_PAYLOAD_TIMEOUT_MIN = 1
+
+BLE_GAP_SEC_STATUS_SUCCESS = 0x00
+BLE_GAP_SEC_STATUS_TIMEOUT = 0x01
+BLE_GAP_SEC_STATUS_PDU_INVALID = 0x02
+BLE_GAP_SEC_STATUS_PASSKEY_ENTRY_FAILED = 0x81
+BLE_GAP_SEC_STATUS_OOB_NOT_AVAILABLE = 0x82
+BLE_GAP_SEC_STATUS_AUTH_REQ = 0x83
+BLE_GAP_SEC_STATUS_CONFIRM_VALUE = 0x84
+BLE_GAP_SEC_STATUS_PAIRING_NOT_SUPP = 0x85
+BLE_GAP_SEC_STATUS_ENC_KEY_SIZE = 0x86
+BLE_GAP_SEC_STATUS_SMP_CMD_UNSUPPORTED = 0x87
+BLE_GAP_SEC_STATUS_UNSPECIFIED = 0x88
+BLE_GAP_SEC_STATUS_REPEATED_ATTEMPTS = 0x89
+BLE_GAP_SEC_STATUS_INVALID_PARAMS = 0x8A
+BLE_GAP_SEC_STATUS_DHKEY_FAILURE = 0x8B
+BLE_GAP_SEC_STATUS_NUM_COMP_FAILURE = 0x8C
+BLE_GAP_SEC_STATUS_BR_EDR_IN_PROG = 0x8D
+BLE_GAP_SEC_STATUS_X_TRANS_KEY_DISALLOWED = 0x8E
+
+# HCI status codes
+BLE_HCI_STATUS_CODE_SUCCESS = 0x00
+BLE_HCI_STATUS_CODE_UNKNOWN_BTLE_COMMAND = 0x01
+BLE_HCI_STATUS_CODE_UNKNOWN_CONNECTION_IDENTIFIER = 0x02
+BLE_HCI_AUTHENTICATION_FAILURE = 0x05
+BLE_HCI_STATUS_CODE_PIN_OR_KEY_MISSING = 0x06
+BLE_HCI_MEMORY_CAPACITY_EXCEEDED = 0x07
+BLE_HCI_CONNECTION_TIMEOUT = 0x08
+BLE_HCI_STATUS_CODE_COMMAND_DISALLOWED = 0x0C
+BLE_HCI_STATUS_CODE_INVALID_BTLE_COMMAND_PARAMETERS = 0x12
+BLE_HCI_REMOTE_USER_TERMINATED_CONNECTION = 0x13
+BLE_HCI_REMOTE_DEV_TERMINATION_DUE_TO_LOW_RESOURCES = 0x14
+BLE_HCI_REMOTE_DEV_TERMINATION_DUE_TO_POWER_OFF = 0x15
+BLE_HCI_LOCAL_HOST_TERMINATED_CONNECTION = 0x16
+BLE_HCI_UNSUPPORTED_REMOTE_FEATURE = 0x1A
+BLE_HCI_STATUS_CODE_INVALID_LMP_PARAMETERS = 0x1E
+BLE_HCI_STATUS_CODE_UNSPECIFIED_ERROR = 0x1F
+BLE_HCI_STATUS_CODE_LMP_RESPONSE_TIMEOUT = 0x22
+BLE_HCI_STATUS_CODE_LMP_ERROR_TRANSACTION_COLLISION = 0x23
+BLE_HCI_STATUS_CODE_LMP_PDU_NOT_ALLOWED = 0x24
+BLE_HCI_INSTANT_PASSED = 0x28
+BLE_HCI_PAIRING_WITH_UNIT_KEY_UNSUPPORTED = 0x29
+BLE_HCI_DIFFERENT_TRANSACTION_COLLISION = 0x2A
+BLE_HCI_PARAMETER_OUT_OF_MANDATORY_RANGE = 0x30
+BLE_HCI_CONTROLLER_BUSY = 0x3A
+BLE_HCI_CONN_INTERVAL_UNACCEPTABLE = 0x3B
+BLE_HCI_DIRECTED_ADVERTISER_TIMEOUT = 0x3C
+BLE_HCI_CONN_TERMINATED_DUE_TO_MIC_FAILURE = 0x3D
+BLE_HCI_CONN_FAILED_TO_BE_ESTABLISHED = 0x3E
+
+# GATT
+BLE_GATT_ATT_MTU_DEFAULT = 23
+BLE_GATT_TIMEOUT_SRC_PROTOCOL = 0x00
+
+BLE_GATT_OP_INVALID = 0x00
+BLE_GATT_OP_WRITE_REQ = 0x01
+BLE_GATT_OP_WRITE_CMD = 0x02
+BLE_GATT_OP_SIGN_WRITE_CMD = 0x03
+BLE_GATT_OP_PREP_WRITE_REQ = 0x04
+BLE_GATT_OP_EXEC_WRITE_REQ = 0x05
+BLE_GATT_EXEC_WRITE_FLAG_PREPARED_CANCEL = 0x00
+BLE_GATT_EXEC_WRITE_FLAG_PREPARED_WRITE = 0x01
+
+BLE_GATT_HVX_INVALID = 0x00
+BLE_GATT_HVX_NOTIFICATION = 0x01
+BLE_GATT_HVX_INDICATION = 0x02
+
+BLE_GATT_STATUS_SUCCESS = 0x0000
+BLE_GATT_STATUS_UNKNOWN = 0x0001
+BLE_GATT_STATUS_ATTERR_INVALID = 0x0100
+BLE_GATT_STATUS_ATTERR_INVALID_HANDLE = 0x0101
+BLE_GATT_STATUS_ATTERR_READ_NOT_PERMITTED = 0x0102
+BLE_GATT_STATUS_ATTERR_WRITE_NOT_PERMITTED = 0x0103
+BLE_GATT_STATUS_ATTERR_INVALID_PDU = 0x0104
+BLE_GATT_STATUS_ATTERR_INSUF_AUTHENTICATION = 0x0105
+BLE_GATT_STATUS_ATTERR_REQUEST_NOT_SUPPORTED = 0x0106
+BLE_GATT_STATUS_ATTERR_INVALID_OFFSET = 0x0107
+BLE_GATT_STATUS_ATTERR_INSUF_AUTHORIZATION = 0x0108
+BLE_GATT_STATUS_ATTERR_PREPARE_QUEUE_FULL = 0x0109
+BLE_GATT_STATUS_ATTERR_ATTRIBUTE_NOT_FOUND = 0x010A
+BLE_GATT_STATUS_ATTERR_ATTRIBUTE_NOT_LONG = 0x010B
+BLE_GATT_STATUS_ATTERR_INSUF_ENC_KEY_SIZE = 0x010C
+BLE_GATT_STATUS_ATTERR_INVALID_ATT_VAL_LENGTH = 0x010D
+BLE_GATT_STATUS_ATTERR_UNLIKELY_ERROR = 0x010E
+BLE_GATT_STATUS_ATTERR_INSUF_ENCRYPTION = 0x010F
+BLE_GATT_STATUS_ATTERR_UNSUPPORTED_GROUP_TYPE = 0x0110
+BLE_GATT_STATUS_ATTERR_INSUF_RESOURCES = 0x0111
+BLE_GATT_STATUS_ATTERR_RFU_RANGE1_BEGIN = 0x0112
+BLE_GATT_STATUS_ATTERR_RFU_RANGE1_END = 0x017F
+BLE_GATT_STATUS_ATTERR_APP_BEGIN = 0x0180
+BLE_GATT_STATUS_ATTERR_APP_END = 0x019F
+BLE_GATT_STATUS_ATTERR_RFU_RANGE2_BEGIN = 0x01A0
+BLE_GATT_STATUS_ATTERR_RFU_RANGE2_END = 0x01DF
+BLE_GATT_STATUS_ATTERR_RFU_RANGE3_BEGIN = 0x01E0
+BLE_GATT_STATUS_ATTERR_RFU_RANGE3_END = 0x01FC
+BLE_GATT_STATUS_ATTERR_CPS_CCCD_CONFIG_ERROR = 0x01FD
+BLE_GATT_STATUS_ATTERR_CPS_PROC_ALR_IN_PROG = 0x01FE
+BLE_GATT_STATUS_ATTERR_CPS_OUT_OF_RANGE = 0x01FF
+
+BLE_GATTC_ATTR_INFO_FORMAT_16BIT = 1
+BLE_GATTC_ATTR_INFO_FORMAT_128BIT = 2
+
+BLE_GATTS_OP_INVALID = 0x00
+BLE_GATTS_OP_WRITE_REQ = 0x01
+BLE_GATTS_OP_WRITE_CMD = 0x02
+BLE_GATTS_OP_SIGN_WRITE_CMD = 0x03
+BLE_GATTS_OP_PREP_WRITE_REQ = 0x04
+BLE_GATTS_OP_EXEC_WRITE_REQ_CANCEL = 0x05
+BLE_GATTS_OP_EXEC_WRITE_REQ_NOW = 0x06
+BLE_GATTS_AUTHORIZE_TYPE_INVALID = 0x00
+BLE_GATTS_AUTHORIZE_TYPE_READ = 0x01
+BLE_GATTS_AUTHORIZE_TYPE_WRITE = 0x02
+BLE_GATTS_VLOC_INVALID = 0x00
+BLE_GATTS_VLOC_STACK = 0x01
+BLE_GATTS_VLOC_USER = 0x02
+BLE_GATTS_SRVC_TYPE_INVALID = 0x00
+BLE_GATTS_SRVC_TYPE_PRIMARY = 0x01
+BLE_GATTS_SRVC_TYPE_SECONDARY = 0x02
+BLE_GATTS_VAR_ATTR_LEN_MAX = 512
+BLE_GATTS_FIX_ATTR_LEN_MAX = 510
+
+BLE_UUID_TYPE_UNKNOWN = 0x00
+BLE_UUID_TYPE_BLE = 0x01
+BLE_UUID_TYPE_VENDOR_BEGIN = 0x02
@@ -0,0 +1,318 @@
+"""
+Drop-in replacement for pc_ble_driver_py's nrf_ble_driver_sd_api_v5 module which runs the SoftDevice API
+against simulated adapters instead of connectivity firmware over a serial port.
+
+Every adapter created in the process shares the same air, so BleDevices opened with this backend
+can advertise to, scan for and connect to each other. The port name given to the device only identifies
+the adapter (and seeds its address), it does not need to exist
+"""
+import logging
+
+from blatann.nrf.nrf_sim.air import Air
+from blatann.nrf.nrf_sim.constants import *
+from blatann.nrf.nrf_sim.softdevice import SimAdapter
+from blatann.nrf.nrf_sim.structs import (Array, Struct, field, new_value, read_bytes, struct_from_bytes,
+                                         struct_to_bytes, uint8_array, value_assign, value_get)
+
+logger = logging.getLogger(__name__)
+
+
+air = Air()
+"""The air shared by all adapters of the process"""
+
+
+class NordicSemiException(Exception):
+    """
+    Stands in for pc_ble_driver_py.exceptions.NordicSemiException
+    """
+    def __init__(self, message, error_code=None):
+        super(NordicSemiException, self).__init__(message)
+        self.error_code = error_code
+
+
+new_uint8 = new_uint16 = new_value
+uint8_value = uint16_value = value_get
+uint8_assign = uint16_assign = value_assign
+char_array = uint8_array
+
+
+def ble_evt_to_bytes(ble_event):
+    """
+    Copies an event handed to the event handler to bytes, see blatann.nrf.nrf_driver_types.ble_evt_to_bytes()
+    """
+    return struct_to_bytes(ble_event)
+
+
+def ble_evt_from_bytes(data):
+    """
+    Rebuilds an event copied with ble_evt_to_bytes()
+    """
+    return struct_from_bytes(data)
+
+
+def _struct_type(name):
+    return type(name, (Struct,), {})
+
+
+def _array_type(name):
+    return type(name, (Array,), {})
+
+
+def __getattr__(name):
+    """
+    Creates the struct (``*_t``) and carray (``*_array``) types on first use, blatann only ever uses them
+    as attribute containers. SoftDevice calls which are not simulated return NRF_ERROR_NOT_SUPPORTED
+    """
+    if name.startswith("__"):
+        raise AttributeError(name)
+    if name.endswith("_t"):
+        value = _struct_type(name)
+    elif name.endswith("_array"):
+        value = _array_type(name)
+    elif name.startswith("sd_"):
+        def value(*args, **kwargs):
+            logger.debug("%s is not supported by the simulated backend", name)
+            return NRF_ERROR_NOT_SUPPORTED
+        value.__name__ = name
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def _call(method, *args):
+    """
+    Runs an adapter method under the air lock
+    """
+    with air.lock:
+        return method(*args)
+
+
+def _call_out(method, out, *args):
+    """
+    Runs an adapter method which returns a value through an out-parameter box (new_uint8()/new_uint16())
+    """
+    with air.lock:
+        result = method(*args)
+    if isinstance(result, tuple):
+        result, value = result
+        value_assign(out, value)
+    return result
+
+
+"""
+RPC transport and adapter lifecycle
+"""
+
+
+def sd_rpc_physical_layer_create_uart(port_name, baud_rate, flow_control, parity):
+    phy_layer = Struct()
+    phy_layer.port = port_name
+    return phy_layer
+
+
+def sd_rpc_data_link_layer_create_bt_three_wire(physical_layer, retransmission_interval):
+    return physical_layer
+
+
+def sd_rpc_transport_layer_create(data_link_layer, response_timeout):
+    return data_link_layer
+
+
+def sd_rpc_adapter_create(transport_layer):
+    return SimAdapter(air, transport_layer.port)
+
+
+def sd_rpc_adapter_delete(adapter):
+    pass
+
+
+def sd_rpc_open(adapter, status_handler, evt_handler, log_handler):
+    return _call(adapter.open, evt_handler)
+
+
+def sd_rpc_close(adapter):
+    return adapter.close()
+
+
+def sd_rpc_conn_reset(adapter, reset_mode):
+    return NRF_SUCCESS
+
+
+"""
+BLE stack configuration
+"""
+
+
+def sd_ble_cfg_set(adapter, cfg_id, cfg, app_ram_base):
+    return _call(adapter.cfg_set, cfg_id, cfg)
+
+
+def sd_ble_enable(adapter, app_ram_base):
+    return _call(adapter.enable)
+
+
+def sd_ble_opt_set(adapter, opt_id, opt):
+    return NRF_SUCCESS
+
+
+def sd_ble_uuid_vs_add(adapter, uuid128, uuid_type):
+    return _call_out(adapter.vs_uuid_add, uuid_type, uuid128)
+
+
+def sd_ble_user_mem_reply(adapter, conn_handle, block):
+    return _call(adapter.user_mem_reply, conn_handle)
+
+
+"""
+GAP
+"""
+
+
+def sd_ble_gap_addr_get(adapter, addr):
+    with air.lock:
+        addr.addr_type = adapter.address_type
+        addr.addr = list(adapter.address)
+    return NRF_SUCCESS
+
+
+def sd_ble_gap_addr_set(adapter, addr):
+    return _call(adapter.addr_set, addr)
+
+
+def sd_ble_gap_adv_data_set(adapter, p_data, dlen, p_sr_data, srdlen):
+    return _call(adapter.adv_data_set, p_data, dlen, p_sr_data, srdlen)
+
+
+def sd_ble_gap_adv_start(adapter, adv_params, conn_cfg_tag):
+    return _call(adapter.adv_start, adv_params, conn_cfg_tag)
+
+
+def sd_ble_gap_adv_stop(adapter):
+    return _call(adapter.adv_stop)
+
+
+def sd_ble_gap_scan_start(adapter, scan_params):
+    return _call(adapter.scan_start, scan_params)
+
+
+def sd_ble_gap_scan_stop(adapter):
+    return _call(adapter.scan_stop)
+
+
+def sd_ble_gap_connect(adapter, peer_addr, scan_params, conn_params, conn_cfg_tag):
+    return _call(adapter.connect, peer_addr, scan_params, conn_params, conn_cfg_tag)
+
+
+def sd_ble_gap_disconnect(adapter, conn_handle, hci_status_code):
+    return _call(adapter.disconnect, conn_handle, hci_status_code)
+
+
+def sd_ble_gap_conn_param_update(adapter, conn_handle, conn_params):
+    return _call(adapter.conn_param_update, conn_handle, conn_params)
+
+
+def sd_ble_gap_data_length_update(adapter, conn_handle, dl_params, dl_limitation):
+    return _call(adapter.data_length_update, conn_handle, dl_params)
+
+
+def sd_ble_gap_phy_update(adapter, conn_handle, gap_phys):
+    return _call(adapter.phy_update, conn_handle, gap_phys)
+
+
+"""
+GATT server
+"""
+
+
+def sd_ble_gatts_service_add(adapter, service_type, uuid, handle):
+    return _call_out(adapter.service_add, handle, service_type, uuid)
+
+
+def sd_ble_gatts_characteristic_add(adapter, service_handle, char_md, attr_char_value, handles):
+    with air.lock:
+        result = adapter.characteristic_add(service_handle, char_md, attr_char_value)
+    if isinstance(result, tuple):
+        result, char = result
+        handles.value_handle = char.value_handle
+        handles.user_desc_handle = 0
+        handles.cccd_handle = char.cccd_handle
+        handles.sccd_handle = 0
+    return result
+
+
+def sd_ble_gatts_value_get(adapter, conn_handle, handle, value):
+    with air.lock:
+        result = adapter.value_get(conn_handle, handle, field(value, "offset"))
+    if isinstance(result, tuple):
+        result, data = result
+        # Like the SoftDevice, the full length is reported even if the buffer is too small to hold the value
+        value.p_value = data[:field(value, "len")]
+        value.len = len(data)
+    return result
+
+
+def sd_ble_gatts_value_set(adapter, conn_handle, handle, value):
+    data = read_bytes(field(value, "p_value", None), field(value, "len"))
+    return _call(adapter.value_set, conn_handle, handle, field(value, "offset"), data)
+
+
+def sd_ble_gatts_hvx(adapter, conn_handle, hvx_params):
+    return _call(adapter.hvx, conn_handle, hvx_params)
+
+
+def sd_ble_gatts_rw_authorize_reply(adapter, conn_handle, rw_authorize_reply_params):
+    return _call(adapter.rw_authorize_reply, conn_handle, rw_authorize_reply_params)
+
+
+def sd_ble_gatts_exchange_mtu_reply(adapter, conn_handle, server_rx_mtu):
+    return _call(adapter.exchange_mtu_reply, conn_handle, server_rx_mtu)
+
+
+def sd_ble_gatts_service_changed(adapter, conn_handle, start_handle, end_handle):
+    return NRF_ERROR_NOT_SUPPORTED
+
+
+"""
+GATT client
+"""
+
+
+def sd_ble_gattc_primary_services_discover(adapter, conn_handle, start_handle, srvc_uuid):
+    return _call(adapter.primary_services_discover, conn_handle, start_handle, srvc_uuid)
+
+
+def sd_ble_gattc_characteristics_discover(adapter, conn_handle, handle_range):
+    return _call(adapter.characteristics_discover, conn_handle, handle_range)
+
+
+def sd_ble_gattc_descriptors_discover(adapter, conn_handle, handle_range):
+    return _call(adapter.descriptors_discover, conn_handle, handle_range)
+
+
+def sd_ble_gattc_attr_info_discover(adapter, conn_handle, handle_range):
+    return _call(adapter.attr_info_discover, conn_handle, handle_range)
+
+
+def sd_ble_gattc_read(adapter, conn_handle, handle, offset):
+    return _call(adapter.read, conn_handle, handle, offset)
+
+
+def sd_ble_gattc_char_value_by_uuid_read(adapter, conn_handle, p_uuid, p_handle_range):
+    return _call(adapter.char_value_by_uuid_read, conn_handle, p_uuid, p_handle_range)
+
+
+def sd_ble_gattc_char_values_read(adapter, conn_handle, p_handles, handle_count):
+    return _call(adapter.char_values_read, conn_handle, list(p_handles[:handle_count]))
+
+
+def sd_ble_gattc_write(adapter, conn_handle, write_params):
+    return _call(adapter.write, conn_handle, write_params)
+
+
+def sd_ble_gattc_hv_confirm(adapter, conn_handle, handle):
+    return _call(adapter.hv_confirm, conn_handle, handle)
+
+
+def sd_ble_gattc_exchange_mtu_request(adapter, conn_handle, client_rx_mtu):
+    return _call(adapter.exchange_mtu_request, conn_handle, client_rx_mtu)
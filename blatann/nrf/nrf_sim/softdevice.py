@@ -0,0 +1,1616 @@
+"""
+Model of the SoftDevice behind each simulated adapter: configuration, the GATT server's attribute table,
+GAP roles and the ATT procedures between connected adapters. All methods are called with the air lock held
+"""
+import hashlib
+import logging
+
+from blatann.nrf.nrf_sim import constants as c
+from blatann.nrf.nrf_sim.air import Link
+from blatann.nrf.nrf_sim.structs import Struct, field, read_bytes
+
+logger = logging.getLogger(__name__)
+
+
+_UUID_PRIMARY_SERVICE = 0x2800
+_UUID_SECONDARY_SERVICE = 0x2801
+_UUID_CHARACTERISTIC = 0x2803
+_UUID_CCCD = 0x2902
+_UUID_GAP_SERVICE = 0x1800
+_UUID_GATT_SERVICE = 0x1801
+_UUID_DEVICE_NAME = 0x2A00
+_UUID_APPEARANCE = 0x2A01
+_UUID_SERVICE_CHANGED = 0x2A05
+
+# Security modes as (sm, lv). Links are never encrypted, so anything above mode 1 level 1 is refused
+_SEC_NO_ACCESS = (0, 0)
+_SEC_OPEN = (1, 1)
+
+# Bit of each characteristic property in the characteristic declaration
+_CHAR_PROPS = (("broadcast", 0x01), ("read", 0x02), ("write_wo_resp", 0x04), ("write", 0x08),
+               ("notify", 0x10), ("indicate", 0x20), ("auth_signed_wr", 0x40))
+_CCCD_NOTIFY = 0x01
+_CCCD_INDICATE = 0x02
+
+_RSSI = -50
+# Time it takes to tear down a link after the local side disconnects
+_DISCONNECT_DELAY_S = 0.001
+# Number of connection events until a connection parameter update takes effect
+_CONN_UPDATE_INSTANT = 6
+
+# ATT PDU sizes (opcode and fixed parameters), used to work out how many link layer packets a PDU takes
+_ATT_HANDLE_PDU = 3
+_ATT_FIND_PDU = 5
+_ATT_READ_BY_TYPE_PDU = 7
+_ATT_WRITE_PDU = 3
+_ATT_PREPARE_WRITE_PDU = 5
+_ATT_ERROR_PDU = 5
+
+
+class _Uuid(object):
+    """
+    A UUID as stored in the attribute table: a 16-bit value and, for vendor specific UUIDs,
+    the 128-bit base it belongs to (LSB first, bytes 12-13 zeroed)
+    """
+    __slots__ = ("value", "base")
+
+    def __init__(self, value, base=None):
+        self.value = value
+        self.base = base
+
+    @property
+    def size(self):
+        return 2 if self.base is None else 16
+
+    def to_bytes(self):
+        """
+        The UUID the way it is sent over the air, LSB first
+        """
+        if self.base is None:
+            return self.value.to_bytes(2, "little")
+        uuid = bytearray(self.base)
+        uuid[12] = self.value & 0xFF
+        uuid[13] = (self.value >> 8) & 0xFF
+        return bytes(uuid)
+
+    def __eq__(self, other):
+        return isinstance(other, _Uuid) and self.value == other.value and self.base == other.base
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.value, self.base))
+
+
+class _Attribute(object):
+    def __init__(self, handle, uuid, value=b"", max_len=None, vlen=False, read_perm=_SEC_OPEN,
+                 write_perm=_SEC_NO_ACCESS, read_auth=False, write_auth=False, is_cccd=False):
+        self.handle = handle
+        self.uuid = uuid
+        self.value = bytes(value)
+        self.max_len = len(self.value) if max_len is None else max_len
+        self.vlen = vlen
+        self.read_perm = read_perm
+        self.write_perm = write_perm
+        self.read_auth = read_auth
+        self.write_auth = write_auth
+        self.is_cccd = is_cccd
+
+
+class _Service(object):
+    def __init__(self, handle, uuid, primary):
+        self.handle = handle
+        self.uuid = uuid
+        self.primary = primary
+
+
+class _Characteristic(object):
+    def __init__(self, decl_handle, value_handle, cccd_handle, uuid, props):
+        self.decl_handle = decl_handle
+        self.value_handle = value_handle
+        self.cccd_handle = cccd_handle
+        self.uuid = uuid
+        self.props = props
+
+
+class _AttributeTable(object):
+    """
+    The GATT server's attribute table. Handles are allocated sequentially from 1
+    """
+    def __init__(self):
+        self.attributes = []
+        self.services = []
+        self.characteristics = []
+        self._characteristics_by_value = {}
+
+    def get(self, handle):
+        if 1 <= handle <= len(self.attributes):
+            return self.attributes[handle - 1]
+        return None
+
+    def characteristic(self, value_handle):
+        return self._characteristics_by_value.get(value_handle)
+
+    def _add(self, uuid, **kwargs):
+        attr = _Attribute(len(self.attributes) + 1, uuid, **kwargs)
+        self.attributes.append(attr)
+        return attr
+
+    def add_service(self, uuid, primary=True):
+        decl_uuid = _Uuid(_UUID_PRIMARY_SERVICE if primary else _UUID_SECONDARY_SERVICE)
+        attr = self._add(decl_uuid, value=uuid.to_bytes())
+        service = _Service(attr.handle, uuid, primary)
+        self.services.append(service)
+        return service
+
+    def add_characteristic(self, uuid, props, value_kwargs, cccd_kwargs=None):
+        decl = self._add(_Uuid(_UUID_CHARACTERISTIC))
+        value = self._add(uuid, **value_kwargs)
+        decl.value = bytes([props]) + value.handle.to_bytes(2, "little") + uuid.to_bytes()
+        decl.max_len = len(decl.value)
+        cccd_handle = 0
+        if cccd_kwargs is not None:
+            cccd_handle = self._add(_Uuid(_UUID_CCCD), value=b"\x00\x00", is_cccd=True, **cccd_kwargs).handle
+        char = _Characteristic(decl.handle, value.handle, cccd_handle, uuid, props)
+        self.characteristics.append(char)
+        self._characteristics_by_value[value.handle] = char
+        return char
+
+    def service_end_handle(self, index):
+        """
+        The end handle of a service as reported to clients, the last service extends to 0xFFFF
+        """
+        if index + 1 < len(self.services):
+            return self.services[index + 1].handle - 1
+        return c.BLE_GATT_HANDLE_END
+
+
+class _ConnConfig(object):
+    def __init__(self):
+        self.att_mtu = c.BLE_GATT_ATT_MTU_DEFAULT
+        self.conn_count = c.BLE_GAP_CONN_COUNT_DEFAULT
+        self.hvn_tx_queue_size = c.BLE_GATTS_HVN_TX_QUEUE_SIZE_DEFAULT
+        self.write_cmd_tx_queue_size = c.BLE_GATTC_WRITE_CMD_TX_QUEUE_SIZE_DEFAULT
+
+
+def _access_status(perm):
+    if perm == _SEC_NO_ACCESS:
+        return None
+    if perm[0] == 1 and perm[1] <= 1:
+        return c.BLE_GATT_STATUS_SUCCESS
+    return c.BLE_GATT_STATUS_ATTERR_INSUF_AUTHENTICATION
+
+
+def _sec_mode(struct):
+    return field(struct, "sm"), field(struct, "lv")
+
+
+def _new_event(evt_id):
+    event = Struct()
+    event.header.evt_id = evt_id
+    event.header.evt_len = 0
+    return event
+
+
+def _gap_event(evt_id, conn_handle):
+    event = _new_event(evt_id)
+    event.evt.gap_evt.conn_handle = conn_handle
+    return event, event.evt.gap_evt.params
+
+
+def _gattc_event(evt_id, conn_handle, status=c.BLE_GATT_STATUS_SUCCESS, error_handle=0):
+    event = _new_event(evt_id)
+    gattc_evt = event.evt.gattc_evt
+    gattc_evt.conn_handle = conn_handle
+    gattc_evt.gatt_status = status
+    gattc_evt.error_handle = error_handle
+    return event, gattc_evt.params
+
+
+def _gatts_event(evt_id, conn_handle):
+    event = _new_event(evt_id)
+    event.evt.gatts_evt.conn_handle = conn_handle
+    return event, event.evt.gatts_evt.params
+
+
+def _conn_params_struct(conn_params):
+    params = Struct()
+    params.min_conn_interval, params.max_conn_interval, params.slave_latency, params.conn_sup_timeout = conn_params
+    return params
+
+
+def _data_length_struct(tx_octets, rx_octets):
+    params = Struct()
+    params.max_tx_octets = tx_octets
+    params.max_rx_octets = rx_octets
+    params.max_tx_time_us = (tx_octets + 14) * 8
+    params.max_rx_time_us = (rx_octets + 14) * 8
+    return params
+
+
+def _address_from_name(name):
+    """
+    Derives a stable random static address (LSB first) from the adapter's port name
+    """
+    address = bytearray(hashlib.sha1(str(name).encode("utf-8")).digest()[:c.BLE_GAP_ADDR_LEN])
+    address[-1] |= 0xC0
+    return bytes(address)
+
+
+class _Endpoint(object):
+    """
+    One side of a simulated connection
+    """
+    def __init__(self, adapter, conn_handle, role, link, conn_config, conn_params):
+        self.adapter = adapter
+        self.conn_handle = conn_handle
+        self.role = role
+        self.link = link
+        self.conn_params = conn_params
+        self.peer = None
+        self.connected = True
+        self.att_mtu = c.BLE_GATT_ATT_MTU_DEFAULT
+        self.max_att_mtu = conn_config.att_mtu
+        self.requested_att_mtu = c.BLE_GATT_ATT_MTU_DEFAULT
+        self.hvn_tx_queue_size = conn_config.hvn_tx_queue_size
+        self.write_cmd_tx_queue_size = conn_config.write_cmd_tx_queue_size
+        self.hvn_in_flight = 0
+        self.write_cmds_in_flight = 0
+        # GATT client state
+        self.request_pending = False
+        self.indication_to_confirm = None
+        # GATT server state
+        self.indication_pending = False
+        self.cccd_values = {}
+        self.pending_authorize = None
+        self.pending_mtu_request = 0
+        self.prepared_write_active = False
+        self.user_mem_requested = False
+        self.held_prepare_writes = []
+        # Link layer procedures the peer started and is waiting on a reply for
+        self.pending_data_length_request = False
+        self.peer_data_length = None
+        self.pending_phy_request = False
+        self.pending_conn_param_request = False
+
+    def send(self, pdu_size, on_delivered, on_sent=None):
+        self.link.send(self, pdu_size, on_delivered, on_sent)
+
+    def emit(self, event):
+        self.adapter.emit(event)
+
+
+class SimAdapter(object):
+    """
+    The simulated connectivity device behind an sd_rpc_adapter_create() handle
+    """
+    def __init__(self, air, port):
+        self.air = air
+        self.port = port
+        self.address = _address_from_name(port)
+        self.address_type = c.BLE_GAP_ADDR_TYPE_RANDOM_STATIC
+        self.is_open = False
+        self.enabled = False
+        self._evt_handler = None
+        # Configuration, applied through sd_ble_cfg_set() before sd_ble_enable()
+        self._conn_configs = {}
+        self._vs_uuid_count = c.BLE_UUID_VS_COUNT_DEFAULT
+        self._periph_role_count = c.BLE_GAP_ROLE_COUNT_PERIPH_DEFAULT
+        self._central_role_count = c.BLE_GAP_ROLE_COUNT_CENTRAL_DEFAULT
+        self._device_name = c.BLE_GAP_DEVNAME_DEFAULT
+        self._service_changed = False
+        self.vs_bases = []
+        self.table = _AttributeTable()
+        self.connections = {}
+        # GAP state
+        self._adv_data = b""
+        self._scan_rsp_data = b""
+        self._advertising = None
+        self._scanning = None
+        self._connecting = None
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, self.port)
+
+    """
+    Lifecycle and event delivery
+    """
+
+    def open(self, evt_handler):
+        if self.is_open:
+            return c.NRF_ERROR_INVALID_STATE
+        self._evt_handler = evt_handler
+        self.is_open = True
+        self.air.attach(self)
+        return c.NRF_SUCCESS
+
+    def close(self):
+        with self.air.lock:
+            if not self.is_open:
+                return c.NRF_ERROR_INVALID_STATE
+            self._stop_advertising()
+            self._stop_scanning()
+            self._stop_connecting()
+            for ep in list(self.connections.values()):
+                # The peer only notices the device is gone once the supervision timeout expires
+                self._drop_connection(ep, None)
+                timeout_s = ep.conn_params[3] * 0.01
+                self.air.schedule(timeout_s, self._drop_connection, ep.peer, c.BLE_HCI_CONNECTION_TIMEOUT)
+            self.is_open = False
+            self.enabled = False
+        self.air.detach(self)
+        return c.NRF_SUCCESS
+
+    def emit(self, event):
+        if self.is_open:
+            self.air.emit(self, event)
+
+    def deliver_event(self, event):
+        handler = self._evt_handler
+        if self.is_open and handler is not None:
+            handler(self, event)
+
+    def conn_config(self, tag):
+        return self._conn_configs.get(tag) or _ConnConfig()
+
+    """
+    Configuration and UUIDs
+    """
+
+    def cfg_set(self, cfg_id, cfg):
+        if self.enabled:
+            return c.NRF_ERROR_INVALID_STATE
+        if cfg_id in (c.BLE_CONN_CFG_GAP, c.BLE_CONN_CFG_GATT, c.BLE_CONN_CFG_GATTC, c.BLE_CONN_CFG_GATTS):
+            conn_cfg = cfg.conn_cfg
+            conn_config = self._conn_configs.setdefault(field(conn_cfg, "conn_cfg_tag"), _ConnConfig())
+            params = conn_cfg.params
+            if cfg_id == c.BLE_CONN_CFG_GAP:
+                conn_config.conn_count = field(params.gap_conn_cfg, "conn_count", conn_config.conn_count)
+            elif cfg_id == c.BLE_CONN_CFG_GATT:
+                att_mtu = field(params.gatt_conn_cfg, "att_mtu", conn_config.att_mtu)
+                if att_mtu < c.BLE_GATT_ATT_MTU_DEFAULT:
+                    return c.NRF_ERROR_INVALID_PARAM
+                conn_config.att_mtu = att_mtu
+            elif cfg_id == c.BLE_CONN_CFG_GATTC:
+                conn_config.write_cmd_tx_queue_size = field(params.gattc_conn_cfg, "write_cmd_tx_queue_size",
+                                                            conn_config.write_cmd_tx_queue_size)
+            else:
+                conn_config.hvn_tx_queue_size = field(params.gatts_conn_cfg, "hvn_tx_queue_size",
+                                                      conn_config.hvn_tx_queue_size)
+        elif cfg_id == c.BLE_COMMON_CFG_VS_UUID:
+            self._vs_uuid_count = field(cfg.common_cfg.vs_uuid_cfg, "vs_uuid_count", self._vs_uuid_count)
+        elif cfg_id == c.BLE_GAP_CFG_ROLE_COUNT:
+            role_count = cfg.gap_cfg.role_count_cfg
+            self._periph_role_count = field(role_count, "periph_role_count", self._periph_role_count)
+            self._central_role_count = field(role_count, "central_role_count", self._central_role_count)
+        elif cfg_id == c.BLE_GAP_CFG_DEVICE_NAME:
+            name_cfg = cfg.gap_cfg.device_name_cfg
+            self._device_name = read_bytes(field(name_cfg, "p_value", None), field(name_cfg, "current_len"))
+        elif cfg_id == c.BLE_GATTS_CFG_SERVICE_CHANGED:
+            self._service_changed = bool(field(cfg.gatts_cfg.service_changed, "service_changed"))
+        elif cfg_id == c.BLE_GATTS_CFG_ATTR_TAB_SIZE:
+            pass
+        else:
+            return c.NRF_ERROR_INVALID_PARAM
+        return c.NRF_SUCCESS
+
+    def enable(self):
+        if self.enabled:
+            return c.NRF_ERROR_INVALID_STATE
+        self.enabled = True
+        # The SoftDevice populates the GAP and GATT services itself
+        self.table.add_service(_Uuid(_UUID_GAP_SERVICE))
+        read_only = dict(vlen=True, read_perm=_SEC_OPEN)
+        self.table.add_characteristic(_Uuid(_UUID_DEVICE_NAME), 0x02,
+                                      dict(value=self._device_name, max_len=c.BLE_GAP_DEVNAME_MAX_LEN, **read_only))
+        self.table.add_characteristic(_Uuid(_UUID_APPEARANCE), 0x02, dict(value=b"\x00\x00", read_perm=_SEC_OPEN))
+        self.table.add_service(_Uuid(_UUID_GATT_SERVICE))
+        if self._service_changed:
+            self.table.add_characteristic(_Uuid(_UUID_SERVICE_CHANGED), 0x20,
+                                          dict(value=b"\x00" * 4, read_perm=_SEC_NO_ACCESS),
+                                          dict(read_perm=_SEC_OPEN, write_perm=_SEC_OPEN))
+        return c.NRF_SUCCESS
+
+    def vs_uuid_add(self, uuid128):
+        base = bytearray(read_bytes(field(uuid128, "uuid128", None), 16))
+        if len(base) != 16:
+            return c.NRF_ERROR_INVALID_PARAM
+        base[12] = base[13] = 0
+        base = bytes(base)
+        if base in self.vs_bases:
+            return c.NRF_SUCCESS, c.BLE_UUID_TYPE_VENDOR_BEGIN + self.vs_bases.index(base)
+        if len(self.vs_bases) >= self._vs_uuid_count:
+            return c.NRF_ERROR_NO_MEM
+        self.vs_bases.append(base)
+        return c.NRF_SUCCESS, c.BLE_UUID_TYPE_VENDOR_BEGIN + len(self.vs_bases) - 1
+
+    def uuid_from_c(self, uuid):
+        """
+        Converts a ble_uuid_t passed in by the application, None if the UUID type is not registered
+        """
+        uuid_type = field(uuid, "type")
+        if uuid_type == c.BLE_UUID_TYPE_BLE:
+            return _Uuid(field(uuid, "uuid"))
+        index = uuid_type - c.BLE_UUID_TYPE_VENDOR_BEGIN
+        if 0 <= index < len(self.vs_bases):
+            return _Uuid(field(uuid, "uuid"), self.vs_bases[index])
+        return None
+
+    def uuid_to_c(self, uuid):
+        """
+        Converts a UUID received from a peer into a ble_uuid_t, using this adapter's vendor specific UUID bases
+        """
+        uuid_struct = Struct()
+        uuid_struct.uuid = uuid.value
+        if uuid.base is None:
+            uuid_struct.type = c.BLE_UUID_TYPE_BLE
+        elif uuid.base in self.vs_bases:
+            uuid_struct.type = c.BLE_UUID_TYPE_VENDOR_BEGIN + self.vs_bases.index(uuid.base)
+        else:
+            uuid_struct.type = c.BLE_UUID_TYPE_UNKNOWN
+        return uuid_struct
+
+    def addr_struct(self):
+        addr = Struct()
+        addr.addr_type = self.address_type
+        addr.addr = list(self.address)
+        addr.addr_id_peer = 0
+        return addr
+
+    def _endpoint(self, conn_handle):
+        if not self.enabled:
+            return None, c.BLE_ERROR_NOT_ENABLED
+        ep = self.connections.get(conn_handle)
+        if ep is None or not ep.connected:
+            return None, c.BLE_ERROR_INVALID_CONN_HANDLE
+        return ep, c.NRF_SUCCESS
+
+    def _free_conn_handle(self):
+        handle = 0
+        while handle in self.connections:
+            handle += 1
+        return handle
+
+    def _role_count(self, role):
+        return sum(1 for ep in self.connections.values() if ep.role == role)
+
+    """
+    GAP: advertising, scanning and connection establishment
+    """
+
+    def addr_set(self, addr):
+        if self._advertising or self._scanning or self._connecting:
+            return c.NRF_ERROR_INVALID_STATE
+        self.address_type = field(addr, "addr_type")
+        self.address = read_bytes(field(addr, "addr", None), c.BLE_GAP_ADDR_LEN)
+        return c.NRF_SUCCESS
+
+    def adv_data_set(self, adv_data, adv_len, scan_data, scan_len):
+        if adv_len > c.BLE_GAP_ADV_SET_DATA_SIZE_MAX or scan_len > c.BLE_GAP_ADV_SET_DATA_SIZE_MAX:
+            return c.NRF_ERROR_INVALID_LENGTH
+        self._adv_data = read_bytes(adv_data, adv_len)
+        self._scan_rsp_data = read_bytes(scan_data, scan_len)
+        return c.NRF_SUCCESS
+
+    def adv_start(self, params, conn_cfg_tag):
+        if not self.enabled:
+            return c.BLE_ERROR_NOT_ENABLED
+        if self._advertising:
+            return c.NRF_ERROR_INVALID_STATE
+        adv_type = field(params, "type")
+        connectable = adv_type in (c.BLE_GAP_ADV_TYPE_ADV_IND, c.BLE_GAP_ADV_TYPE_ADV_DIRECT_IND)
+        if connectable and self._role_count(c.BLE_GAP_ROLE_PERIPH) >= self._periph_role_count:
+            return c.NRF_ERROR_CONN_COUNT
+        interval_units = field(params, "interval")
+        if not c.BLE_GAP_ADV_INTERVAL_MIN <= interval_units <= c.BLE_GAP_ADV_INTERVAL_MAX:
+            return c.NRF_ERROR_INVALID_PARAM
+        advertising = Struct()
+        advertising.type = adv_type
+        advertising.connectable = connectable
+        advertising.interval_s = interval_units * 0.000625
+        advertising.conn_cfg_tag = conn_cfg_tag
+        advertising.timer = self.air.schedule(0, self._adv_event)
+        advertising.timeout_timer = None
+        timeout_s = field(params, "timeout")
+        if timeout_s:
+            advertising.timeout_timer = self.air.schedule(timeout_s, self._adv_timeout)
+        self._advertising = advertising
+        return c.NRF_SUCCESS
+
+    def adv_stop(self):
+        if not self._advertising:
+            return c.NRF_ERROR_INVALID_STATE
+        self._stop_advertising()
+        return c.NRF_SUCCESS
+
+    def _stop_advertising(self):
+        if self._advertising:
+            self._advertising.timer.cancel()
+            if self._advertising.timeout_timer:
+                self._advertising.timeout_timer.cancel()
+            self._advertising = None
+
+    def _adv_timeout(self):
+        self._stop_advertising()
+        event, params = _gap_event(c.BLE_GAP_EVT_TIMEOUT, c.BLE_CONN_HANDLE_INVALID)
+        params.timeout.src = c.BLE_GAP_TIMEOUT_SRC_ADVERTISING
+        self.emit(event)
+
+    def _adv_event(self):
+        advertising = self._advertising
+        if not advertising:
+            return
+        for adapter in list(self.air.adapters):
+            if adapter is self:
+                continue
+            if advertising.connectable and adapter._connecting and adapter._connecting.address == self.address:
+                adapter._establish_connection(self)
+                return
+            if adapter._scanning:
+                adapter._report_advertiser(self, advertising.type)
+        advertising.timer = self.air.schedule(advertising.interval_s, self._adv_event)
+
+    def _report_advertiser(self, advertiser, adv_type):
+        self._emit_adv_report(advertiser, adv_type, False, advertiser._adv_data)
+        scannable = adv_type in (c.BLE_GAP_ADV_TYPE_ADV_IND, c.BLE_GAP_ADV_TYPE_ADV_SCAN_IND)
+        if self._scanning.active and scannable:
+            self._emit_adv_report(advertiser, adv_type, True, advertiser._scan_rsp_data)
+
+    def _emit_adv_report(self, advertiser, adv_type, scan_rsp, data):
+        event, params = _gap_event(c.BLE_GAP_EVT_ADV_REPORT, c.BLE_CONN_HANDLE_INVALID)
+        report = params.adv_report
+        report.peer_addr = advertiser.addr_struct()
+        report.rssi = _RSSI
+        report.type = adv_type
+        report.scan_rsp = int(scan_rsp)
+        report.data = data
+        report.dlen = len(data)
+        self.emit(event)
+
+    def scan_start(self, params):
+        if not self.enabled:
+            return c.BLE_ERROR_NOT_ENABLED
+        if self._scanning or self._connecting:
+            return c.NRF_ERROR_INVALID_STATE
+        scanning = Struct()
+        scanning.active = bool(field(params, "active"))
+        scanning.timeout_timer = None
+        timeout_s = field(params, "timeout")
+        if timeout_s:
+            scanning.timeout_timer = self.air.schedule(timeout_s, self._scan_timeout)
+        self._scanning = scanning
+        return c.NRF_SUCCESS
+
+    def scan_stop(self):
+        if not self._scanning:
+            return c.NRF_ERROR_INVALID_STATE
+        self._stop_scanning()
+        return c.NRF_SUCCESS
+
+    def _stop_scanning(self):
+        if self._scanning:
+            if self._scanning.timeout_timer:
+                self._scanning.timeout_timer.cancel()
+            self._scanning = None
+
+    def _scan_timeout(self):
+        self._stop_scanning()
+        event, params = _gap_event(c.BLE_GAP_EVT_TIMEOUT, c.BLE_CONN_HANDLE_INVALID)
+        params.timeout.src = c.BLE_GAP_TIMEOUT_SRC_SCAN
+        self.emit(event)
+
+    def connect(self, addr, scan_params, conn_params, conn_cfg_tag):
+        if not self.enabled:
+            return c.BLE_ERROR_NOT_ENABLED
+        if self._connecting or self._scanning:
+            return c.NRF_ERROR_INVALID_STATE
+        if self._role_count(c.BLE_GAP_ROLE_CENTRAL) >= self._central_role_count:
+            return c.NRF_ERROR_CONN_COUNT
+        min_interval = field(conn_params, "min_conn_interval")
+        max_interval = field(conn_params, "max_conn_interval")
+        if not c.BLE_GAP_CP_MIN_CONN_INTVL_MIN <= min_interval <= max_interval <= c.BLE_GAP_CP_MAX_CONN_INTVL_MAX:
+            return c.NRF_ERROR_INVALID_PARAM
+        connecting = Struct()
+        connecting.address = read_bytes(field(addr, "addr", None), c.BLE_GAP_ADDR_LEN)
+        connecting.conn_params = (min_interval, min_interval, field(conn_params, "slave_latency"),
+                                  field(conn_params, "conn_sup_timeout"))
+        connecting.conn_cfg_tag = conn_cfg_tag
+        connecting.timeout_timer = None
+        timeout_s = field(scan_params, "timeout")
+        if timeout_s:
+            connecting.timeout_timer = self.air.schedule(timeout_s, self._connect_timeout)
+        self._connecting = connecting
+        return c.NRF_SUCCESS
+
+    def _stop_connecting(self):
+        if self._connecting:
+            if self._connecting.timeout_timer:
+                self._connecting.timeout_timer.cancel()
+            self._connecting = None
+
+    def _connect_timeout(self):
+        self._stop_connecting()
+        event, params = _gap_event(c.BLE_GAP_EVT_TIMEOUT, c.BLE_CONN_HANDLE_INVALID)
+        params.timeout.src = c.BLE_GAP_TIMEOUT_SRC_CONN
+        self.emit(event)
+
+    def _establish_connection(self, peripheral):
+        """
+        Called on the central when the peripheral it is connecting to advertises
+        """
+        connecting = self._connecting
+        advertising = peripheral._advertising
+        self._stop_connecting()
+        peripheral._stop_advertising()
+
+        conn_params = connecting.conn_params
+        link = Link(self.air, conn_params[0] * 0.00125)
+        central = _Endpoint(self, self._free_conn_handle(), c.BLE_GAP_ROLE_CENTRAL, link,
+                            self.conn_config(connecting.conn_cfg_tag), conn_params)
+        periph = _Endpoint(peripheral, peripheral._free_conn_handle(), c.BLE_GAP_ROLE_PERIPH, link,
+                           peripheral.conn_config(advertising.conn_cfg_tag), conn_params)
+        central.peer = periph
+        periph.peer = central
+        self.connections[central.conn_handle] = central
+        peripheral.connections[periph.conn_handle] = periph
+
+        for ep in (periph, central):
+            event, params = _gap_event(c.BLE_GAP_EVT_CONNECTED, ep.conn_handle)
+            params.connected.peer_addr = ep.peer.adapter.addr_struct()
+            params.connected.role = ep.role
+            params.connected.conn_params = _conn_params_struct(conn_params)
+            ep.emit(event)
+
+    def disconnect(self, conn_handle, hci_status):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        ep.connected = False
+        self.air.schedule(_DISCONNECT_DELAY_S, self._disconnected, ep, hci_status)
+        return c.NRF_SUCCESS
+
+    def _disconnected(self, ep, hci_status):
+        self._drop_connection(ep, c.BLE_HCI_LOCAL_HOST_TERMINATED_CONNECTION)
+        self._drop_connection(ep.peer, hci_status)
+
+    @staticmethod
+    def _drop_connection(ep, reason):
+        """
+        Removes one side of a connection, emitting the disconnected event unless the reason is None
+        """
+        ep.connected = False
+        ep.link.close()
+        adapter = ep.adapter
+        if adapter.connections.get(ep.conn_handle) is not ep:
+            return
+        del adapter.connections[ep.conn_handle]
+        if reason is not None:
+            event, params = _gap_event(c.BLE_GAP_EVT_DISCONNECTED, ep.conn_handle)
+            params.disconnected.reason = reason
+            ep.emit(event)
+
+    """
+    GAP: link updates
+    """
+
+    def conn_param_update(self, conn_handle, conn_params):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        if conn_params is not None:
+            min_interval = field(conn_params, "min_conn_interval")
+            requested = (min_interval, field(conn_params, "max_conn_interval"),
+                         field(conn_params, "slave_latency"), field(conn_params, "conn_sup_timeout"))
+        else:
+            requested = ep.conn_params
+        if ep.role == c.BLE_GAP_ROLE_PERIPH:
+            def on_request():
+                ep.peer.pending_conn_param_request = True
+                event, params = _gap_event(c.BLE_GAP_EVT_CONN_PARAM_UPDATE_REQUEST, ep.peer.conn_handle)
+                params.conn_param_update_request.conn_params = _conn_params_struct(requested)
+                ep.peer.emit(event)
+            ep.send(16, on_request)
+            return c.NRF_SUCCESS
+
+        ep.pending_conn_param_request = False
+        chosen = (requested[0], requested[0], requested[2], requested[3])
+        instant_s = _CONN_UPDATE_INSTANT * ep.link.interval_s
+        self.air.schedule(instant_s, self._conn_params_updated, ep, chosen)
+        return c.NRF_SUCCESS
+
+    @staticmethod
+    def _conn_params_updated(central, conn_params):
+        if not central.connected:
+            return
+        central.link.set_interval(conn_params[0] * 0.00125)
+        for ep in (central, central.peer):
+            ep.conn_params = conn_params
+            event, params = _gap_event(c.BLE_GAP_EVT_CONN_PARAM_UPDATE, ep.conn_handle)
+            params.conn_param_update.conn_params = _conn_params_struct(conn_params)
+            ep.emit(event)
+
+    def data_length_update(self, conn_handle, dl_params):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        tx_octets = field(dl_params, "max_tx_octets", c.BLE_GAP_DATA_LENGTH_AUTO) or c.BLE_GAP_DATA_LENGTH_MAX
+        rx_octets = field(dl_params, "max_rx_octets", c.BLE_GAP_DATA_LENGTH_AUTO) or c.BLE_GAP_DATA_LENGTH_MAX
+        if not (c.BLE_GAP_DATA_LENGTH_DEFAULT <= tx_octets <= c.BLE_GAP_DATA_LENGTH_MAX and
+                c.BLE_GAP_DATA_LENGTH_DEFAULT <= rx_octets <= c.BLE_GAP_DATA_LENGTH_MAX):
+            return c.NRF_ERROR_INVALID_PARAM
+        if ep.pending_data_length_request:
+            # Replying to the peer's request, the procedure completes on both sides
+            ep.pending_data_length_request = False
+            requested = ep.peer_data_length
+            ep.send(14, lambda: self._data_length_updated(ep, tx_octets, rx_octets, requested))
+            return c.NRF_SUCCESS
+
+        def on_request():
+            peer = ep.peer
+            peer.pending_data_length_request = True
+            peer.peer_data_length = (tx_octets, rx_octets)
+            event, params = _gap_event(c.BLE_GAP_EVT_DATA_LENGTH_UPDATE_REQUEST, peer.conn_handle)
+            params.data_length_update_request.peer_params = _data_length_struct(tx_octets, rx_octets)
+            peer.emit(event)
+        ep.send(14, on_request)
+        return c.NRF_SUCCESS
+
+    @staticmethod
+    def _data_length_updated(ep, tx_octets, rx_octets, requested):
+        # The effective length in each direction is what one side can send and the other receive
+        ep_tx = min(tx_octets, requested[1])
+        ep_rx = min(rx_octets, requested[0])
+        ep.link.data_length = min(ep_tx, ep_rx)
+        for side, tx, rx in ((ep, ep_tx, ep_rx), (ep.peer, ep_rx, ep_tx)):
+            event, params = _gap_event(c.BLE_GAP_EVT_DATA_LENGTH_UPDATE, side.conn_handle)
+            params.data_length_update.effective_params = _data_length_struct(tx, rx)
+            side.emit(event)
+
+    def phy_update(self, conn_handle, phys):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        tx_phys = field(phys, "tx_phys")
+        rx_phys = field(phys, "rx_phys")
+        if ep.pending_phy_request:
+            ep.pending_phy_request = False
+            ep.send(5, lambda: self._phy_updated(ep, tx_phys, rx_phys))
+            return c.NRF_SUCCESS
+
+        def on_request():
+            peer = ep.peer
+            peer.pending_phy_request = True
+            event, params = _gap_event(c.BLE_GAP_EVT_PHY_UPDATE_REQUEST, peer.conn_handle)
+            params.phy_update_request.peer_preferred_phys.tx_phys = tx_phys
+            params.phy_update_request.peer_preferred_phys.rx_phys = rx_phys
+            peer.emit(event)
+        ep.send(5, on_request)
+        return c.NRF_SUCCESS
+
+    @staticmethod
+    def _phy_updated(ep, tx_phys, rx_phys):
+        def pick(phys):
+            if phys == c.BLE_GAP_PHY_AUTO or phys & c.BLE_GAP_PHY_2MBPS:
+                return c.BLE_GAP_PHY_2MBPS
+            if phys & c.BLE_GAP_PHY_1MBPS:
+                return c.BLE_GAP_PHY_1MBPS
+            return c.BLE_GAP_PHY_CODED
+        tx_phy = pick(tx_phys)
+        rx_phy = pick(rx_phys)
+        for side, tx, rx in ((ep, tx_phy, rx_phy), (ep.peer, rx_phy, tx_phy)):
+            event, params = _gap_event(c.BLE_GAP_EVT_PHY_UPDATE, side.conn_handle)
+            params.phy_update.status = c.BLE_HCI_STATUS_CODE_SUCCESS
+            params.phy_update.tx_phy = tx
+            params.phy_update.rx_phy = rx
+            side.emit(event)
+
+    """
+    GATTS: attribute table
+    """
+
+    def service_add(self, service_type, uuid):
+        if not self.enabled:
+            return c.BLE_ERROR_NOT_ENABLED
+        if service_type not in (c.BLE_GATTS_SRVC_TYPE_PRIMARY, c.BLE_GATTS_SRVC_TYPE_SECONDARY):
+            return c.NRF_ERROR_INVALID_PARAM
+        service_uuid = self.uuid_from_c(uuid)
+        if service_uuid is None:
+            return c.NRF_ERROR_NOT_FOUND
+        service = self.table.add_service(service_uuid, service_type == c.BLE_GATTS_SRVC_TYPE_PRIMARY)
+        return c.NRF_SUCCESS, service.handle
+
+    def characteristic_add(self, service_handle, char_md, attr_char_value):
+        if not self.enabled:
+            return c.BLE_ERROR_NOT_ENABLED
+        if not self.table.services or self.table.services[-1].handle != service_handle:
+            # Characteristics can only be added to the last service
+            return c.NRF_ERROR_INVALID_STATE
+        uuid = self.uuid_from_c(field(attr_char_value, "p_uuid", None))
+        if uuid is None:
+            return c.NRF_ERROR_NOT_FOUND
+        char_props = field(char_md, "char_props", None)
+        props = 0
+        for name, bit in _CHAR_PROPS:
+            if field(char_props, name):
+                props |= bit
+        attr_md = field(attr_char_value, "p_attr_md", None)
+        if attr_md is None:
+            return c.NRF_ERROR_INVALID_PARAM
+        max_len = field(attr_char_value, "max_len")
+        vlen = bool(field(attr_md, "vlen"))
+        if max_len > (c.BLE_GATTS_VAR_ATTR_LEN_MAX if vlen else c.BLE_GATTS_FIX_ATTR_LEN_MAX):
+            return c.NRF_ERROR_INVALID_PARAM
+        init_len = field(attr_char_value, "init_len")
+        if init_len > max_len:
+            return c.NRF_ERROR_INVALID_PARAM
+        value = read_bytes(field(attr_char_value, "p_value", None), init_len)
+        if not vlen:
+            value = value.ljust(max_len, b"\x00")
+        value_kwargs = dict(value=value, max_len=max_len, vlen=vlen,
+                            read_perm=_sec_mode(attr_md.read_perm), write_perm=_sec_mode(attr_md.write_perm),
+                            read_auth=bool(field(attr_md, "rd_auth")), write_auth=bool(field(attr_md, "wr_auth")))
+        cccd_kwargs = None
+        if props & 0x30:
+            # Characteristics which notify or indicate get a CCCD
+            cccd_md = field(char_md, "p_cccd_md", None)
+            cccd_kwargs = dict(read_perm=_SEC_OPEN, write_perm=_SEC_OPEN)
+            if cccd_md is not None:
+                cccd_kwargs = dict(read_perm=_sec_mode(cccd_md.read_perm), write_perm=_sec_mode(cccd_md.write_perm))
+        char = self.table.add_characteristic(uuid, props, value_kwargs, cccd_kwargs)
+        return c.NRF_SUCCESS, char
+
+    def _value_attribute(self, conn_handle, handle):
+        """
+        Looks up an attribute for value get/set, along with the connection for CCCDs
+        """
+        if not self.enabled:
+            return None, None, c.BLE_ERROR_NOT_ENABLED
+        attr = self.table.get(handle)
+        if attr is None:
+            return None, None, c.BLE_ERROR_INVALID_ATTR_HANDLE
+        ep = None
+        if attr.is_cccd:
+            ep = self.connections.get(conn_handle)
+            if ep is None:
+                return None, None, c.BLE_ERROR_INVALID_CONN_HANDLE
+        return attr, ep, c.NRF_SUCCESS
+
+    def value_get(self, conn_handle, handle, offset):
+        attr, ep, err = self._value_attribute(conn_handle, handle)
+        if attr is None:
+            return err
+        value = ep.cccd_values.get(handle, attr.value) if ep else attr.value
+        if offset > len(value):
+            return c.NRF_ERROR_INVALID_PARAM
+        return c.NRF_SUCCESS, value[offset:]
+
+    def value_set(self, conn_handle, handle, offset, data):
+        attr, ep, err = self._value_attribute(conn_handle, handle)
+        if attr is None:
+            return err
+        if offset + len(data) > attr.max_len:
+            return c.NRF_ERROR_INVALID_PARAM
+        if ep:
+            ep.cccd_values[handle] = data[:2].ljust(2, b"\x00")
+        else:
+            attr.value = self._updated_value(attr, offset, data)
+        return c.NRF_SUCCESS
+
+    @staticmethod
+    def _updated_value(attr, offset, data):
+        value = attr.value[:offset].ljust(offset, b"\x00") + data
+        if not attr.vlen:
+            value += attr.value[len(value):]
+        return value
+
+    """
+    GATTS: notifications, indications and MTU exchange
+    """
+
+    def hvx(self, conn_handle, hvx_params):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        handle = field(hvx_params, "handle")
+        hvx_type = field(hvx_params, "type")
+        char = self.table.characteristic(handle)
+        if char is None or not char.cccd_handle:
+            return c.BLE_ERROR_INVALID_ATTR_HANDLE
+        if hvx_type not in (c.BLE_GATT_HVX_NOTIFICATION, c.BLE_GATT_HVX_INDICATION):
+            return c.NRF_ERROR_INVALID_PARAM
+        cccd = ep.cccd_values.get(char.cccd_handle, b"\x00\x00")
+        if not cccd[0] & (_CCCD_NOTIFY if hvx_type == c.BLE_GATT_HVX_NOTIFICATION else _CCCD_INDICATE):
+            return c.NRF_ERROR_INVALID_STATE
+
+        p_len = field(hvx_params, "p_len", None)
+        length = p_len[0] if p_len else 0
+        attr = self.table.get(handle)
+        data = read_bytes(field(hvx_params, "p_data", None), length)
+        if data:
+            attr.value = self._updated_value(attr, field(hvx_params, "offset"), data[:attr.max_len])
+        # The value is sent truncated to fit the MTU
+        data = attr.value[:ep.att_mtu - 3]
+        if p_len:
+            p_len[0] = len(data)
+
+        if hvx_type == c.BLE_GATT_HVX_NOTIFICATION:
+            if ep.hvn_in_flight >= ep.hvn_tx_queue_size:
+                return c.NRF_ERROR_RESOURCES
+            ep.hvn_in_flight += 1
+            ep.send(_ATT_HANDLE_PDU + len(data), lambda: self._hvx_received(ep.peer, handle, hvx_type, data),
+                    lambda: self._hvn_sent(ep))
+        else:
+            if ep.indication_pending:
+                return c.NRF_ERROR_BUSY
+            ep.indication_pending = True
+            ep.send(_ATT_HANDLE_PDU + len(data), lambda: self._hvx_received(ep.peer, handle, hvx_type, data))
+        return c.NRF_SUCCESS
+
+    @staticmethod
+    def _hvn_sent(ep):
+        ep.hvn_in_flight -= 1
+        event, params = _gatts_event(c.BLE_GATTS_EVT_HVN_TX_COMPLETE, ep.conn_handle)
+        params.hvn_tx_complete.count = 1
+        ep.emit(event)
+
+    @staticmethod
+    def _hvx_received(client, handle, hvx_type, data):
+        if hvx_type == c.BLE_GATT_HVX_INDICATION:
+            client.indication_to_confirm = handle
+        event, params = _gattc_event(c.BLE_GATTC_EVT_HVX, client.conn_handle)
+        params.hvx.handle = handle
+        params.hvx.type = hvx_type
+        params.hvx.data = data
+        params.hvx.len = len(data)
+        client.emit(event)
+
+    def hv_confirm(self, conn_handle, handle):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        if ep.indication_to_confirm != handle:
+            return c.NRF_ERROR_INVALID_STATE
+        ep.indication_to_confirm = None
+
+        def on_confirm():
+            server = ep.peer
+            server.indication_pending = False
+            event, params = _gatts_event(c.BLE_GATTS_EVT_HVC, server.conn_handle)
+            params.hvc.handle = handle
+            server.emit(event)
+        ep.send(1, on_confirm)
+        return c.NRF_SUCCESS
+
+    def exchange_mtu_request(self, conn_handle, client_mtu):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        if not c.BLE_GATT_ATT_MTU_DEFAULT <= client_mtu <= ep.max_att_mtu:
+            return c.NRF_ERROR_INVALID_PARAM
+        ep.requested_att_mtu = client_mtu
+
+        def on_request(server):
+            server.pending_mtu_request = client_mtu
+            event, params = _gatts_event(c.BLE_GATTS_EVT_EXCHANGE_MTU_REQUEST, server.conn_handle)
+            params.exchange_mtu_request.client_rx_mtu = client_mtu
+            server.emit(event)
+        return self._request(ep, 3, on_request)
+
+    def exchange_mtu_reply(self, conn_handle, server_mtu):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        if not ep.pending_mtu_request:
+            return c.NRF_ERROR_INVALID_STATE
+        if not c.BLE_GATT_ATT_MTU_DEFAULT <= server_mtu <= ep.max_att_mtu:
+            return c.NRF_ERROR_INVALID_PARAM
+        ep.att_mtu = min(ep.pending_mtu_request, server_mtu)
+        ep.pending_mtu_request = 0
+
+        def on_response(client):
+            client.att_mtu = min(client.requested_att_mtu, server_mtu)
+            event, params = _gattc_event(c.BLE_GATTC_EVT_EXCHANGE_MTU_RSP, client.conn_handle)
+            params.exchange_mtu_rsp.server_rx_mtu = server_mtu
+            return event
+        self._respond(ep, 3, on_response)
+        return c.NRF_SUCCESS
+
+    """
+    GATTS: read/write authorization and long writes
+    """
+
+    def rw_authorize_reply(self, conn_handle, reply_params):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        pending = ep.pending_authorize
+        reply_type = field(reply_params, "type")
+        if pending is None or pending[0] != reply_type:
+            return c.NRF_ERROR_INVALID_STATE
+        if reply_type == c.BLE_GATTS_AUTHORIZE_TYPE_READ:
+            params = reply_params.params.read
+        else:
+            params = reply_params.params.write
+        status = field(params, "gatt_status")
+        update = bool(field(params, "update"))
+        data = read_bytes(field(params, "p_data", None), field(params, "len"))
+        ep.pending_authorize = None
+        pending[1](status, update, field(params, "offset"), data)
+        return c.NRF_SUCCESS
+
+    def user_mem_reply(self, conn_handle):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        if not ep.user_mem_requested:
+            return c.NRF_ERROR_INVALID_STATE
+        # Without a memory block every queued write is handed to the application as an authorization request
+        ep.user_mem_requested = False
+        held, ep.held_prepare_writes = ep.held_prepare_writes, []
+        for handle_write in held:
+            handle_write()
+        return c.NRF_SUCCESS
+
+    """
+    GATTC: ATT requests and responses
+    """
+
+    def _request(self, ep, pdu_size, on_request):
+        """
+        Sends an ATT request to the peer's server. Only one request can be outstanding per connection
+        """
+        if ep.request_pending:
+            return c.NRF_ERROR_BUSY
+        ep.request_pending = True
+        ep.send(pdu_size, lambda: on_request(ep.peer))
+        return c.NRF_SUCCESS
+
+    @staticmethod
+    def _respond(server, pdu_size, build_event):
+        """
+        Sends an ATT response to the peer's client, build_event creates the client's event once it arrives
+        """
+        def on_response():
+            client = server.peer
+            client.request_pending = False
+            client.emit(build_event(client))
+        server.send(pdu_size, on_response)
+
+    @classmethod
+    def _respond_error(cls, server, evt_id, status, error_handle, write_op=c.BLE_GATT_OP_INVALID):
+        def build_event(client):
+            event, params = _gattc_event(evt_id, client.conn_handle, status, error_handle)
+            # The parameters of a failed procedure are zero-filled
+            if evt_id == c.BLE_GATTC_EVT_PRIM_SRVC_DISC_RSP:
+                params.prim_srvc_disc_rsp.services = []
+                params.prim_srvc_disc_rsp.count = 0
+            elif evt_id == c.BLE_GATTC_EVT_CHAR_DISC_RSP:
+                params.char_disc_rsp.chars = []
+                params.char_disc_rsp.count = 0
+            elif evt_id == c.BLE_GATTC_EVT_DESC_DISC_RSP:
+                params.desc_disc_rsp.descs = []
+                params.desc_disc_rsp.count = 0
+            elif evt_id == c.BLE_GATTC_EVT_ATTR_INFO_DISC_RSP:
+                params.attr_info_disc_rsp.format = c.BLE_GATTC_ATTR_INFO_FORMAT_16BIT
+                params.attr_info_disc_rsp.info.attr_info16 = []
+                params.attr_info_disc_rsp.count = 0
+            elif evt_id == c.BLE_GATTC_EVT_CHAR_VAL_BY_UUID_READ_RSP:
+                params.char_val_by_uuid_read_rsp.count = 0
+                params.char_val_by_uuid_read_rsp.value_len = 0
+                params.char_val_by_uuid_read_rsp.handle_value = b""
+            elif evt_id == c.BLE_GATTC_EVT_CHAR_VALS_READ_RSP:
+                params.char_vals_read_rsp.values = b""
+                params.char_vals_read_rsp.len = 0
+            elif evt_id in (c.BLE_GATTC_EVT_READ_RSP, c.BLE_GATTC_EVT_WRITE_RSP):
+                rsp = params.read_rsp if evt_id == c.BLE_GATTC_EVT_READ_RSP else params.write_rsp
+                rsp.handle = error_handle
+                rsp.write_op = write_op
+                rsp.offset = 0
+                rsp.data = b""
+                rsp.len = 0
+            return event
+        cls._respond(server, _ATT_ERROR_PDU, build_event)
+
+    def primary_services_discover(self, conn_handle, start_handle, srvc_uuid):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        uuid_filter = None
+        if srvc_uuid is not None:
+            uuid_filter = self.uuid_from_c(srvc_uuid)
+            if uuid_filter is None:
+                return c.NRF_ERROR_INVALID_PARAM
+        if start_handle == 0:
+            return c.NRF_ERROR_INVALID_PARAM
+
+        def on_request(server):
+            table = server.adapter.table
+            found = [(i, s) for i, s in enumerate(table.services)
+                     if s.primary and s.handle >= start_handle and (uuid_filter is None or s.uuid == uuid_filter)]
+            if not found:
+                self._respond_error(server, c.BLE_GATTC_EVT_PRIM_SRVC_DISC_RSP,
+                                    c.BLE_GATT_STATUS_ATTERR_ATTRIBUTE_NOT_FOUND, start_handle)
+                return
+            # All entries in a response have the same size
+            entry_size = 4 + (0 if uuid_filter else found[0][1].uuid.size)
+            results = []
+            for index, service in found[:(server.att_mtu - 2) // entry_size]:
+                if service.uuid.size != found[0][1].uuid.size:
+                    break
+                results.append((service.uuid, service.handle, table.service_end_handle(index)))
+
+            def build_event(client):
+                event, params = _gattc_event(c.BLE_GATTC_EVT_PRIM_SRVC_DISC_RSP, client.conn_handle)
+                services = []
+                for uuid, start, end in results:
+                    service = Struct()
+                    service.uuid = client.adapter.uuid_to_c(uuid)
+                    service.handle_range.start_handle = start
+                    service.handle_range.end_handle = end
+                    services.append(service)
+                params.prim_srvc_disc_rsp.services = services
+                params.prim_srvc_disc_rsp.count = len(services)
+                return event
+            self._respond(server, 2 + entry_size * len(results), build_event)
+        return self._request(ep, _ATT_READ_BY_TYPE_PDU, on_request)
+
+    def characteristics_discover(self, conn_handle, handle_range):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        start = field(handle_range, "start_handle")
+        end = field(handle_range, "end_handle")
+        if start == 0 or start > end:
+            return c.NRF_ERROR_INVALID_PARAM
+
+        def on_request(server):
+            found = [ch for ch in server.adapter.table.characteristics if start <= ch.decl_handle <= end]
+            if not found:
+                self._respond_error(server, c.BLE_GATTC_EVT_CHAR_DISC_RSP,
+                                    c.BLE_GATT_STATUS_ATTERR_ATTRIBUTE_NOT_FOUND, start)
+                return
+            entry_size = 5 + found[0].uuid.size
+            results = []
+            for ch in found[:(server.att_mtu - 2) // entry_size]:
+                if ch.uuid.size != found[0].uuid.size:
+                    break
+                results.append(ch)
+
+            def build_event(client):
+                event, params = _gattc_event(c.BLE_GATTC_EVT_CHAR_DISC_RSP, client.conn_handle)
+                chars = []
+                for ch in results:
+                    char = Struct()
+                    char.uuid = client.adapter.uuid_to_c(ch.uuid)
+                    char.handle_decl = ch.decl_handle
+                    char.handle_value = ch.value_handle
+                    for name, bit in _CHAR_PROPS:
+                        setattr(char.char_props, name, int(bool(ch.props & bit)))
+                    char.char_ext_props = 0
+                    chars.append(char)
+                params.char_disc_rsp.chars = chars
+                params.char_disc_rsp.count = len(chars)
+                return event
+            self._respond(server, 2 + entry_size * len(results), build_event)
+        return self._request(ep, _ATT_READ_BY_TYPE_PDU, on_request)
+
+    def _find_information(self, ep, handle_range, evt_id, build_params):
+        """
+        Runs an ATT Find Information procedure, used by both descriptor and attribute info discovery
+        """
+        start = field(handle_range, "start_handle")
+        end = field(handle_range, "end_handle")
+        if start == 0 or start > end:
+            return c.NRF_ERROR_INVALID_PARAM
+
+        def on_request(server):
+            table = server.adapter.table
+            found = table.attributes[start - 1:end]
+            if not found:
+                self._respond_error(server, evt_id, c.BLE_GATT_STATUS_ATTERR_ATTRIBUTE_NOT_FOUND, start)
+                return
+            entry_size = 2 + found[0].uuid.size
+            results = []
+            for attr in found[:(server.att_mtu - 2) // entry_size]:
+                if attr.uuid.size != found[0].uuid.size:
+                    break
+                results.append((attr.handle, attr.uuid))
+
+            def build_event(client):
+                event, params = _gattc_event(evt_id, client.conn_handle)
+                build_params(client, params, results)
+                return event
+            self._respond(server, 2 + entry_size * len(results), build_event)
+        return self._request(ep, _ATT_FIND_PDU, on_request)
+
+    def descriptors_discover(self, conn_handle, handle_range):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+
+        def build_params(client, params, results):
+            descs = []
+            for handle, uuid in results:
+                desc = Struct()
+                desc.handle = handle
+                desc.uuid = client.adapter.uuid_to_c(uuid)
+                descs.append(desc)
+            params.desc_disc_rsp.descs = descs
+            params.desc_disc_rsp.count = len(descs)
+        return self._find_information(ep, handle_range, c.BLE_GATTC_EVT_DESC_DISC_RSP, build_params)
+
+    def attr_info_discover(self, conn_handle, handle_range):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+
+        def build_params(client, params, results):
+            rsp = params.attr_info_disc_rsp
+            infos = []
+            for handle, uuid in results:
+                info = Struct()
+                info.handle = handle
+                if uuid.base is None:
+                    info.uuid.uuid = uuid.value
+                    info.uuid.type = c.BLE_UUID_TYPE_BLE
+                else:
+                    info.uuid.uuid = list(uuid.to_bytes())
+                infos.append(info)
+            if results and results[0][1].base is not None:
+                rsp.format = c.BLE_GATTC_ATTR_INFO_FORMAT_128BIT
+                rsp.info.attr_info128 = infos
+            else:
+                rsp.format = c.BLE_GATTC_ATTR_INFO_FORMAT_16BIT
+                rsp.info.attr_info16 = infos
+            rsp.count = len(infos)
+        return self._find_information(ep, handle_range, c.BLE_GATTC_EVT_ATTR_INFO_DISC_RSP, build_params)
+
+    def read(self, conn_handle, handle, offset):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+
+        def on_request(server):
+            attr = server.adapter.table.get(handle)
+            if attr is None:
+                self._respond_error(server, c.BLE_GATTC_EVT_READ_RSP, c.BLE_GATT_STATUS_ATTERR_INVALID_HANDLE, handle)
+                return
+            status = _access_status(attr.read_perm)
+            if status is None:
+                status = c.BLE_GATT_STATUS_ATTERR_READ_NOT_PERMITTED
+            if status != c.BLE_GATT_STATUS_SUCCESS:
+                self._respond_error(server, c.BLE_GATTC_EVT_READ_RSP, status, handle)
+                return
+
+            def read_response(status=c.BLE_GATT_STATUS_SUCCESS, update=False, reply_offset=0, data=b""):
+                if status != c.BLE_GATT_STATUS_SUCCESS:
+                    self._respond_error(server, c.BLE_GATTC_EVT_READ_RSP, status, handle)
+                    return
+                if update:
+                    attr.value = self._updated_value(attr, reply_offset, data[:attr.max_len - reply_offset])
+                value = server.cccd_values.get(handle, b"\x00\x00") if attr.is_cccd else attr.value
+                if offset > len(value):
+                    self._respond_error(server, c.BLE_GATTC_EVT_READ_RSP, c.BLE_GATT_STATUS_ATTERR_INVALID_OFFSET,
+                                        handle)
+                    return
+                data = value[offset:offset + server.att_mtu - 1]
+
+                def build_event(client):
+                    event, params = _gattc_event(c.BLE_GATTC_EVT_READ_RSP, client.conn_handle)
+                    params.read_rsp.handle = handle
+                    params.read_rsp.offset = offset
+                    params.read_rsp.data = data
+                    params.read_rsp.len = len(data)
+                    return event
+                self._respond(server, 1 + len(data), build_event)
+
+            if attr.read_auth:
+                self._authorize(server, c.BLE_GATTS_AUTHORIZE_TYPE_READ, attr, read_response, offset=offset)
+            else:
+                read_response()
+        return self._request(ep, _ATT_HANDLE_PDU + (2 if offset else 0), on_request)
+
+    def char_value_by_uuid_read(self, conn_handle, uuid, handle_range):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        uuid = self.uuid_from_c(uuid)
+        start = field(handle_range, "start_handle")
+        end = field(handle_range, "end_handle")
+        if uuid is None or start == 0 or start > end:
+            return c.NRF_ERROR_INVALID_PARAM
+
+        def on_request(server):
+            found = [a for a in server.adapter.table.attributes[start - 1:end] if a.uuid == uuid]
+            if not found:
+                self._respond_error(server, c.BLE_GATTC_EVT_CHAR_VAL_BY_UUID_READ_RSP,
+                                    c.BLE_GATT_STATUS_ATTERR_ATTRIBUTE_NOT_FOUND, start)
+                return
+            first = found[0]
+            status = _access_status(first.read_perm)
+            if status is None:
+                status = c.BLE_GATT_STATUS_ATTERR_READ_NOT_PERMITTED
+            if status != c.BLE_GATT_STATUS_SUCCESS:
+                self._respond_error(server, c.BLE_GATTC_EVT_CHAR_VAL_BY_UUID_READ_RSP, status, first.handle)
+                return
+            # Each value is truncated to what fits in the response, and all values in a response have the same length
+            max_value_len = min(server.att_mtu - 4, 253)
+
+            def value_of(attr):
+                value = server.cccd_values.get(attr.handle, b"\x00\x00") if attr.is_cccd else attr.value
+                return value[:max_value_len]
+
+            def respond(handle_values):
+                value_len = len(handle_values[0][1])
+                data = b"".join(h.to_bytes(2, "little") + v for h, v in handle_values)
+
+                def build_event(client):
+                    event, params = _gattc_event(c.BLE_GATTC_EVT_CHAR_VAL_BY_UUID_READ_RSP, client.conn_handle)
+                    params.char_val_by_uuid_read_rsp.count = len(handle_values)
+                    params.char_val_by_uuid_read_rsp.value_len = value_len
+                    params.char_val_by_uuid_read_rsp.handle_value = data
+                    return event
+                self._respond(server, 2 + len(data), build_event)
+
+            def read_response(status=c.BLE_GATT_STATUS_SUCCESS, update=False, reply_offset=0, data=b""):
+                if status != c.BLE_GATT_STATUS_SUCCESS:
+                    self._respond_error(server, c.BLE_GATTC_EVT_CHAR_VAL_BY_UUID_READ_RSP, status, first.handle)
+                    return
+                if update:
+                    first.value = self._updated_value(first, reply_offset, data[:first.max_len - reply_offset])
+                respond([(first.handle, value_of(first))])
+
+            if first.read_auth:
+                # Attributes which have to be authorized are only returned on their own
+                self._authorize(server, c.BLE_GATTS_AUTHORIZE_TYPE_READ, first, read_response)
+                return
+            handle_values = [(first.handle, value_of(first))]
+            value_len = len(handle_values[0][1])
+            max_count = (server.att_mtu - 2) // (2 + value_len)
+            for attr in found[1:]:
+                if len(handle_values) >= max_count or attr.read_auth or \
+                        _access_status(attr.read_perm) != c.BLE_GATT_STATUS_SUCCESS:
+                    break
+                value = value_of(attr)
+                if len(value) != value_len:
+                    break
+                handle_values.append((attr.handle, value))
+            respond(handle_values)
+        return self._request(ep, _ATT_READ_BY_TYPE_PDU + uuid.size - 2, on_request)
+
+    def char_values_read(self, conn_handle, handles):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        if len(handles) < 2 or 1 + 2 * len(handles) > ep.att_mtu:
+            return c.NRF_ERROR_INVALID_PARAM
+
+        def on_request(server):
+            values = []
+
+            def read_next():
+                # The values are read in order, stopping at the first attribute which has to be authorized
+                while len(values) < len(handles):
+                    handle = handles[len(values)]
+                    attr = server.adapter.table.get(handle)
+                    if attr is None:
+                        self._respond_error(server, c.BLE_GATTC_EVT_CHAR_VALS_READ_RSP,
+                                            c.BLE_GATT_STATUS_ATTERR_INVALID_HANDLE, handle)
+                        return
+                    status = _access_status(attr.read_perm)
+                    if status is None:
+                        status = c.BLE_GATT_STATUS_ATTERR_READ_NOT_PERMITTED
+                    if status != c.BLE_GATT_STATUS_SUCCESS:
+                        self._respond_error(server, c.BLE_GATTC_EVT_CHAR_VALS_READ_RSP, status, handle)
+                        return
+                    if attr.read_auth:
+                        self._authorize(server, c.BLE_GATTS_AUTHORIZE_TYPE_READ, attr, read_response)
+                        return
+                    values.append(server.cccd_values.get(handle, b"\x00\x00") if attr.is_cccd else attr.value)
+                data = b"".join(values)[:server.att_mtu - 1]
+
+                def build_event(client):
+                    event, params = _gattc_event(c.BLE_GATTC_EVT_CHAR_VALS_READ_RSP, client.conn_handle)
+                    params.char_vals_read_rsp.values = data
+                    params.char_vals_read_rsp.len = len(data)
+                    return event
+                self._respond(server, 1 + len(data), build_event)
+
+            def read_response(status=c.BLE_GATT_STATUS_SUCCESS, update=False, reply_offset=0, data=b""):
+                handle = handles[len(values)]
+                attr = server.adapter.table.get(handle)
+                if status != c.BLE_GATT_STATUS_SUCCESS:
+                    self._respond_error(server, c.BLE_GATTC_EVT_CHAR_VALS_READ_RSP, status, handle)
+                    return
+                if update:
+                    attr.value = self._updated_value(attr, reply_offset, data[:attr.max_len - reply_offset])
+                values.append(attr.value)
+                read_next()
+
+            read_next()
+        return self._request(ep, 1 + 2 * len(handles), on_request)
+
+    @staticmethod
+    def _authorize(server, auth_type, attr, on_reply, op=None, offset=0, data=b""):
+        """
+        Hands a read or write to the server application and waits for sd_ble_gatts_rw_authorize_reply()
+        """
+        server.pending_authorize = (auth_type, on_reply)
+        event, params = _gatts_event(c.BLE_GATTS_EVT_RW_AUTHORIZE_REQUEST, server.conn_handle)
+        request = params.authorize_request
+        request.type = auth_type
+        uuid = server.adapter.uuid_to_c(attr.uuid) if attr else Struct()
+        if not attr:
+            uuid.uuid = 0
+            uuid.type = c.BLE_UUID_TYPE_UNKNOWN
+        if auth_type == c.BLE_GATTS_AUTHORIZE_TYPE_READ:
+            request.request.read.handle = attr.handle
+            request.request.read.uuid = uuid
+            request.request.read.offset = offset
+        else:
+            write = request.request.write
+            write.handle = attr.handle if attr else 0
+            write.uuid = uuid
+            write.op = op
+            write.auth_required = 0
+            write.offset = offset
+            write.data = data
+            write.len = len(data)
+        server.emit(event)
+
+    def write(self, conn_handle, write_params):
+        ep, err = self._endpoint(conn_handle)
+        if ep is None:
+            return err
+        write_op = field(write_params, "write_op")
+        handle = field(write_params, "handle")
+        offset = field(write_params, "offset")
+        flags = field(write_params, "flags")
+        data = read_bytes(field(write_params, "p_value", None), field(write_params, "len"))
+
+        if write_op == c.BLE_GATT_OP_WRITE_CMD:
+            if len(data) > ep.att_mtu - 3:
+                return c.NRF_ERROR_DATA_SIZE
+            if ep.write_cmds_in_flight >= ep.write_cmd_tx_queue_size:
+                return c.NRF_ERROR_RESOURCES
+            ep.write_cmds_in_flight += 1
+            ep.send(_ATT_WRITE_PDU + len(data), lambda: self._write_command_received(ep.peer, handle, data),
+                    lambda: self._write_command_sent(ep))
+            return c.NRF_SUCCESS
+        if write_op == c.BLE_GATT_OP_WRITE_REQ:
+            if len(data) > ep.att_mtu - 3:
+                return c.NRF_ERROR_DATA_SIZE
+            return self._request(ep, _ATT_WRITE_PDU + len(data),
+                                 lambda server: self._write_request_received(server, handle, data))
+        if write_op == c.BLE_GATT_OP_PREP_WRITE_REQ:
+            if len(data) > ep.att_mtu - 5:
+                return c.NRF_ERROR_DATA_SIZE
+            return self._request(ep, _ATT_PREPARE_WRITE_PDU + len(data),
+                                 lambda server: self._prepare_write_received(server, handle, offset, data))
+        if write_op == c.BLE_GATT_OP_EXEC_WRITE_REQ:
+            return self._request(ep, 2, lambda server: self._execute_write_received(server, flags))
+        return c.NRF_ERROR_INVALID_PARAM
+
+    @staticmethod
+    def _write_command_sent(ep):
+        ep.write_cmds_in_flight -= 1
+        event, params = _gattc_event(c.BLE_GATTC_EVT_WRITE_CMD_TX_COMPLETE, ep.conn_handle)
+        params.write_cmd_tx_complete.count = 1
+        ep.emit(event)
+
+    def _check_write(self, server, handle, offset, data):
+        attr = server.adapter.table.get(handle)
+        if attr is None:
+            return None, c.BLE_GATT_STATUS_ATTERR_INVALID_HANDLE
+        status = _access_status(attr.write_perm)
+        if status is None:
+            status = c.BLE_GATT_STATUS_ATTERR_WRITE_NOT_PERMITTED
+        if status == c.BLE_GATT_STATUS_SUCCESS and offset + len(data) > attr.max_len:
+            status = c.BLE_GATT_STATUS_ATTERR_INVALID_ATT_VAL_LENGTH
+        return attr, status
+
+    def _store_write(self, server, attr, op, offset, data, emit_event):
+        if attr.is_cccd:
+            server.cccd_values[attr.handle] = data[:2].ljust(2, b"\x00")
+        else:
+            attr.value = self._updated_value(attr, offset, data)
+        if emit_event:
+            event, params = _gatts_event(c.BLE_GATTS_EVT_WRITE, server.conn_handle)
+            write = params.write
+            write.handle = attr.handle
+            write.uuid = server.adapter.uuid_to_c(attr.uuid)
+            write.op = op
+            write.auth_required = 0
+            write.offset = offset
+            write.data = data
+            write.len = len(data)
+            server.emit(event)
+
+    def _write_command_received(self, server, handle, data):
+        attr, status = self._check_write(server, handle, 0, data)
+        if status != c.BLE_GATT_STATUS_SUCCESS:
+            return
+        if attr.write_auth:
+            def on_reply(status, update, reply_offset, reply_data):
+                if status == c.BLE_GATT_STATUS_SUCCESS and update:
+                    self._store_write(server, attr, c.BLE_GATTS_OP_WRITE_CMD, reply_offset, reply_data, False)
+            self._authorize(server, c.BLE_GATTS_AUTHORIZE_TYPE_WRITE, attr, on_reply, c.BLE_GATTS_OP_WRITE_CMD,
+                            data=data)
+        else:
+            self._store_write(server, attr, c.BLE_GATTS_OP_WRITE_CMD, 0, data, True)
+
+    def _write_response(self, server, handle, write_op, offset=0, data=b""):
+        def build_event(client):
+            event, params = _gattc_event(c.BLE_GATTC_EVT_WRITE_RSP, client.conn_handle)
+            rsp = params.write_rsp
+            rsp.handle = handle
+            rsp.write_op = write_op
+            rsp.offset = offset
+            rsp.data = data
+            rsp.len = len(data)
+            return event
+        self._respond(server, 1 + (4 + len(data) if write_op == c.BLE_GATT_OP_PREP_WRITE_REQ else 0), build_event)
+
+    def _write_request_received(self, server, handle, data):
+        attr, status = self._check_write(server, handle, 0, data)
+        if status != c.BLE_GATT_STATUS_SUCCESS:
+            self._respond_error(server, c.BLE_GATTC_EVT_WRITE_RSP, status, handle, c.BLE_GATT_OP_WRITE_REQ)
+            return
+        if attr.write_auth:
+            def on_reply(status, update, reply_offset, reply_data):
+                if status != c.BLE_GATT_STATUS_SUCCESS:
+                    self._respond_error(server, c.BLE_GATTC_EVT_WRITE_RSP, status, handle, c.BLE_GATT_OP_WRITE_REQ)
+                    return
+                if update:
+                    self._store_write(server, attr, c.BLE_GATTS_OP_WRITE_REQ, reply_offset, reply_data, False)
+                self._write_response(server, handle, c.BLE_GATT_OP_WRITE_REQ)
+            self._authorize(server, c.BLE_GATTS_AUTHORIZE_TYPE_WRITE, attr, on_reply, c.BLE_GATTS_OP_WRITE_REQ,
+                            data=data)
+        else:
+            self._store_write(server, attr, c.BLE_GATTS_OP_WRITE_REQ, 0, data, True)
+            self._write_response(server, handle, c.BLE_GATT_OP_WRITE_REQ)
+
+    def _prepare_write_received(self, server, handle, offset, data):
+        attr, status = self._check_write(server, handle, offset, data)
+        if status != c.BLE_GATT_STATUS_SUCCESS:
+            self._respond_error(server, c.BLE_GATTC_EVT_WRITE_RSP, status, handle, c.BLE_GATT_OP_PREP_WRITE_REQ)
+            return
+
+        def on_reply(status, update, reply_offset, reply_data):
+            if status != c.BLE_GATT_STATUS_SUCCESS:
+                self._respond_error(server, c.BLE_GATTC_EVT_WRITE_RSP, status, handle, c.BLE_GATT_OP_PREP_WRITE_REQ)
+                return
+            self._write_response(server, handle, c.BLE_GATT_OP_PREP_WRITE_REQ, offset, data)
+
+        def handle_write():
+            self._authorize(server, c.BLE_GATTS_AUTHORIZE_TYPE_WRITE, attr, on_reply, c.BLE_GATTS_OP_PREP_WRITE_REQ,
+                            offset, data)
+
+        if server.user_mem_requested or server.held_prepare_writes:
+            server.held_prepare_writes.append(handle_write)
+            return
+        if not server.prepared_write_active:
+            # The first write of a queue asks the application for memory to hold the queued writes
+            server.prepared_write_active = True
+            server.user_mem_requested = True
+            server.held_prepare_writes.append(handle_write)
+            event = _new_event(c.BLE_EVT_USER_MEM_REQUEST)
+            event.evt.common_evt.conn_handle = server.conn_handle
+            event.evt.common_evt.params.user_mem_request.type = 0
+            server.emit(event)
+            return
+        handle_write()
+
+    def _execute_write_received(self, server, flags):
+        server.prepared_write_active = False
+        op = c.BLE_GATTS_OP_EXEC_WRITE_REQ_NOW
+        if flags == c.BLE_GATT_EXEC_WRITE_FLAG_PREPARED_CANCEL:
+            op = c.BLE_GATTS_OP_EXEC_WRITE_REQ_CANCEL
+
+        def on_reply(status, update, reply_offset, reply_data):
+            if status != c.BLE_GATT_STATUS_SUCCESS:
+                self._respond_error(server, c.BLE_GATTC_EVT_WRITE_RSP, status, 0, c.BLE_GATT_OP_EXEC_WRITE_REQ)
+                return
+            self._write_response(server, 0, c.BLE_GATT_OP_EXEC_WRITE_REQ)
+        self._authorize(server, c.BLE_GATTS_AUTHORIZE_TYPE_WRITE, None, on_reply, op)
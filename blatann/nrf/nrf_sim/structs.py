@@ -0,0 +1,225 @@
+"""
+Python stand-ins for the SWIG proxy types of pc-ble-driver-py: structs, carrays and the
+pointer helpers used for out-parameters (new_uint16(), uint16_value(), etc.)
+"""
+import ctypes
+import struct as _struct
+
+
+class Struct(object):
+    """
+    Attribute bag standing in for a SWIG struct proxy. Nested structs are created on first access,
+    the same way the fields of a zero-initialized C struct can be filled in one level at a time
+    """
+    def __getattr__(self, item):
+        if item.startswith("__"):
+            raise AttributeError(item)
+        value = Struct()
+        setattr(self, item, value)
+        return value
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__,
+                               ", ".join("{}={!r}".format(k, v) for k, v in self.__dict__.items()))
+
+
+def field(struct, name, default=0):
+    """
+    Reads a field which the caller may not have set.
+    Fields which were never assigned read as the default, like a zero-initialized C struct
+
+    :param struct: The struct to read from
+    :param name: The field name
+    :param default: The value of an unset field
+    """
+    if struct is None:
+        return default
+    value = struct.__dict__.get(name, default) if isinstance(struct, Struct) else getattr(struct, name, default)
+    if isinstance(value, Struct) and not value.__dict__:
+        return default
+    return value
+
+
+class Array(list):
+    """
+    List standing in for a SWIG carrays class (ble_gattc_service_array, uint16_array, etc.)
+    """
+    def __init__(self, size=0):
+        super(Array, self).__init__([0] * size)
+
+    def cast(self):
+        return self
+
+    @staticmethod
+    def frompointer(pointer):
+        return pointer
+
+
+class uint8_array(object):
+    """
+    Byte buffer standing in for the SWIG uint8_array. It is backed by real memory so that blatann can
+    copy data in and out of it with a single memmove, the same way it does with the driver's arrays
+    """
+    def __init__(self, size=0):
+        self._buffer = (ctypes.c_uint8 * size)()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        return self._buffer[index]
+
+    def __setitem__(self, index, value):
+        self._buffer[index] = value
+
+    def __int__(self):
+        return ctypes.addressof(self._buffer)
+
+    def cast(self):
+        return self
+
+    @staticmethod
+    def frompointer(pointer):
+        return pointer
+
+
+def read_bytes(pointer, length):
+    """
+    Copies the data out of a buffer passed into an sd_* call
+
+    :param pointer: A uint8_array, bytes, list or None
+    :param length: The number of bytes to read
+    :rtype: bytes
+    """
+    if pointer is None or length <= 0:
+        return b""
+    if isinstance(pointer, uint8_array):
+        return ctypes.string_at(int(pointer), min(length, len(pointer)))
+    return bytes(pointer[:length])
+
+
+def new_value():
+    """
+    Stands in for the new_uint8()/new_uint16() pointer constructors
+    """
+    return [0]
+
+
+def value_get(pointer):
+    return pointer[0]
+
+
+def value_assign(pointer, value):
+    pointer[0] = value
+
+
+# Type tags of the values in a serialized struct
+_TAG_INT = 0
+_TAG_BYTES = 1
+_TAG_STR = 2
+_TAG_LIST = 3
+_TAG_STRUCT = 4
+_TAG_NONE = 5
+_INT = _struct.Struct("<q")
+_LENGTH = _struct.Struct("<I")
+_FIELD_COUNT = _struct.Struct("<H")
+
+
+def struct_to_bytes(value):
+    """
+    Serializes a struct and everything it contains, the simulated backend's equivalent of copying a C struct's
+    memory. Fields hold ints, bytes, strings, lists or carrays, and nested structs
+
+    :param value: The struct to serialize, a Struct or any other attribute bag
+    :rtype: bytes
+    """
+    out = bytearray()
+    _encode(out, value)
+    return bytes(out)
+
+
+def struct_from_bytes(data, struct_type=Struct):
+    """
+    Rebuilds a struct serialized with struct_to_bytes(). Lists and carrays are rebuilt as lists,
+    uint8_arrays as bytes
+
+    :param data: The serialized struct
+    :param struct_type: The class to rebuild the structs with
+    :raises: ValueError if the data is not a valid serialized struct
+    """
+    try:
+        value, offset = _decode(data, 0, struct_type)
+    except (IndexError, _struct.error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid serialized struct: {}".format(e))
+    if offset != len(data):
+        raise ValueError("Invalid serialized struct: {} trailing bytes".format(len(data) - offset))
+    return value
+
+
+def _encode(out, value):
+    if value is None:
+        out.append(_TAG_NONE)
+    elif isinstance(value, int):
+        out.append(_TAG_INT)
+        out += _INT.pack(value)
+    elif isinstance(value, (bytes, bytearray, uint8_array)):
+        data = read_bytes(value, len(value)) if isinstance(value, uint8_array) else value
+        out.append(_TAG_BYTES)
+        out += _LENGTH.pack(len(data))
+        out += data
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out.append(_TAG_STR)
+        out += _LENGTH.pack(len(data))
+        out += data
+    elif isinstance(value, (list, tuple)):
+        out.append(_TAG_LIST)
+        out += _LENGTH.pack(len(value))
+        for item in value:
+            _encode(out, item)
+    elif hasattr(value, "__dict__"):
+        fields = value.__dict__
+        out.append(_TAG_STRUCT)
+        out += _FIELD_COUNT.pack(len(fields))
+        for name, item in fields.items():
+            name = name.encode("ascii")
+            out.append(len(name))
+            out += name
+            _encode(out, item)
+    else:
+        raise TypeError("Cannot serialize struct field of type {}".format(type(value).__name__))
+
+
+def _decode(data, offset, struct_type):
+    tag = data[offset]
+    offset += 1
+    if tag == _TAG_NONE:
+        return None, offset
+    if tag == _TAG_INT:
+        return _INT.unpack_from(data, offset)[0], offset + _INT.size
+    if tag in (_TAG_BYTES, _TAG_STR):
+        length = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        value = bytes(data[offset:offset + length])
+        if len(value) != length:
+            raise IndexError("value truncated")
+        return (value if tag == _TAG_BYTES else value.decode("utf-8")), offset + length
+    if tag == _TAG_LIST:
+        count = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        items = []
+        for _ in range(count):
+            item, offset = _decode(data, offset, struct_type)
+            items.append(item)
+        return items, offset
+    if tag == _TAG_STRUCT:
+        count = _FIELD_COUNT.unpack_from(data, offset)[0]
+        offset += _FIELD_COUNT.size
+        value = struct_type()
+        for _ in range(count):
+            name_length = data[offset]
+            name = bytes(data[offset + 1:offset + 1 + name_length]).decode("ascii")
+            item, offset = _decode(data, offset + 1 + name_length, struct_type)
+            setattr(value, name, item)
+        return value, offset
+    raise ValueError("Unknown struct field tag {}".format(tag))
@@ -1,7 +1,6 @@
 from enum import Enum
 import logging
 
-from pc_ble_driver_py.lib import nrf_ble_driver_sd_api_v5
 
 from blatann.nrf import nrf_driver_types as util
 from blatann.nrf.nrf_dll_load import driver
@@ -108,7 +107,7 @@ class BleOptGapChannelMap(BleOption):
         opt.conn_handle = self.conn_handle
         for i in self.channel_map:
             if i >= 37:
-                logger.warning("Cannot set channel {} in the channel map".format(i))
+                logger.warning("Cannot set channel %s in the channel map", i)
                 continue
             byte = i // 8
             bit = 1 << (i % 8)
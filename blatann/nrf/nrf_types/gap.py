@@ -1,7 +1,7 @@
 from enum import Enum, IntEnum
+import functools
 import logging
-from pc_ble_driver_py.exceptions import NordicSemiException
-from blatann.nrf.nrf_dll_load import driver
+from blatann.nrf.nrf_dll_load import driver, NordicSemiException
 import blatann.nrf.nrf_driver_types as util
 from blatann.nrf.nrf_types.enums import *
 
@@ -57,13 +57,41 @@ conn_timeout_range = TimeRange("Connection Timeout",
                                driver.BLE_GAP_CP_CONN_SUP_TIMEOUT_MIN, driver.BLE_GAP_CP_CONN_SUP_TIMEOUT_MAX, util.UNIT_10_MS)
 
 
-class BLEGapAdvParams(object):
+class _CachedCStruct(object):
+    """
+    Base for parameter types whose C struct only depends on their attributes.
+    to_c() builds the struct once and returns the same struct until an attribute is changed,
+    so callers must not modify the struct returned
+    """
+    def __setattr__(self, name, value):
+        changed = name not in self.__dict__ or self.__dict__[name] != value
+        object.__setattr__(self, name, value)
+        if changed:
+            self.__dict__["_c_struct"] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_c_struct"] = None
+        return state
+
+    def to_c(self):
+        c_struct = self.__dict__.get("_c_struct")
+        if c_struct is None:
+            c_struct = self._build_c_struct()
+            self.__dict__["_c_struct"] = c_struct
+        return c_struct
+
+    def _build_c_struct(self):
+        raise NotImplementedError()
+
+
+class BLEGapAdvParams(_CachedCStruct):
     def __init__(self, interval_ms, timeout_s, advertising_type=BLEGapAdvType.connectable_undirected):
         self.interval_ms = interval_ms
         self.timeout_s = timeout_s
         self.advertising_type = advertising_type
 
-    def to_c(self):
+    def _build_c_struct(self):
         adv_params = driver.ble_gap_adv_params_t()
         adv_params.type = self.advertising_type.value
         adv_params.p_peer_addr = None  # Undirected advertisement.
@@ -82,14 +110,14 @@ class BLEGapAdvParams(object):
                                                                            self.timeout_s)
 
 
-class BLEGapScanParams(object):
+class BLEGapScanParams(_CachedCStruct):
     def __init__(self, interval_ms, window_ms, timeout_s, active=True):
         self.interval_ms = interval_ms
         self.window_ms = window_ms
         self.timeout_s = timeout_s
         self.active = active
 
-    def to_c(self):
+    def _build_c_struct(self):
         scan_params = driver.ble_gap_scan_params_t()
         scan_params.active = self.active
         scan_params.use_whitelist = False
@@ -102,7 +130,7 @@ class BLEGapScanParams(object):
         return scan_params
 
 
-class BLEGapConnParams(object):
+class BLEGapConnParams(_CachedCStruct):
     def __init__(self, min_conn_interval_ms, max_conn_interval_ms, conn_sup_timeout_ms, slave_latency):
         self.min_conn_interval_ms = min_conn_interval_ms
         self.max_conn_interval_ms = max_conn_interval_ms
@@ -119,7 +147,7 @@ class BLEGapConnParams(object):
                                                           util.UNIT_10_MS),
                    slave_latency=conn_params.slave_latency)
 
-    def to_c(self):
+    def _build_c_struct(self):
         conn_params = driver.ble_gap_conn_params_t()
         conn_params.min_conn_interval = util.msec_to_units(self.min_conn_interval_ms,
                                                            util.UNIT_1_25_MS)
@@ -275,11 +303,11 @@ class BLEAdvData(object):
             if isinstance(self.records[k], str):
                 data_list.extend([ord(c) for c in self.records[k]])
 
-            elif isinstance(self.records[k], list):
+            elif isinstance(self.records[k], (list, bytes, bytearray)):
                 data_list.extend(self.records[k])
 
             else:
-                raise NordicSemiException('Unsupported value type: 0x{:02X}'.format(type(self.records[k])))
+                raise NordicSemiException('Unsupported value type: {}'.format(type(self.records[k])))
         self.raw_bytes = bytes(data_list)
         return data_list
 
@@ -289,14 +317,14 @@ class BLEAdvData(object):
         if data_len == 0:
             return data_len, None
         else:
-            self.__data_array = util.list_to_uint8_array(data_list)
+            self.__data_array = _adv_data_array(self.raw_bytes)
             return data_len, self.__data_array.cast()
 
     @classmethod
     def from_c(cls, adv_report_evt):
-        ad_list = util.uint8_array_to_list(adv_report_evt.data, adv_report_evt.dlen)
+        ad_list = util.uint8_array_to_bytes(adv_report_evt.data, adv_report_evt.dlen)
         ble_adv_data = cls()
-        ble_adv_data.raw_bytes = bytes(ad_list)
+        ble_adv_data.raw_bytes = ad_list
         index = 0
         while index < len(ad_list):
             ad_len = ad_list[index]
@@ -306,10 +334,10 @@ class BLEAdvData(object):
                 key = BLEAdvData.Types(ad_type)
                 ble_adv_data.records[key] = ad_list[offset: offset + ad_len - 1]
             except ValueError:
-                logger.error('Invalid advertising data type: 0x{:02X}'.format(ad_type))
+                logger.error('Invalid advertising data type: 0x%02X', ad_type)
                 pass
             except IndexError:
-                logger.error('Invalid advertising data: {}'.format(ad_list))
+                logger.error('Invalid advertising data: %s', ad_list)
                 return ble_adv_data
             index += (ad_len + 1)
 
@@ -319,6 +347,16 @@ class BLEAdvData(object):
         return str(self.records)
 
 
+@functools.lru_cache(maxsize=32)
+def _adv_data_array(raw_bytes):
+    """
+    Gets the driver array holding the encoded advertising data. Arrays are shared by all BLEAdvData objects
+    which encode to the same bytes, so rotating through a set of advertising payloads does not rebuild them.
+    The SoftDevice copies the data when it is set, the arrays are never written to
+    """
+    return util.list_to_uint8_array(raw_bytes)
+
+
 class BLEGapDataLengthParams(object):
     def __init__(self, max_tx_octets=0, max_rx_octets=0, max_tx_time_us=0, max_rx_time_us=0):
         self.max_tx_octets = max_tx_octets
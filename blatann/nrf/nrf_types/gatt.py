@@ -140,8 +140,8 @@ class BLEGattcWriteParams(object):
         return cls(write_op=BLEGattWriteOperation(gattc_write_params.write_op),
                    flags=gattc_write_params.flags,
                    handle=gattc_write_params.handle,
-                   data=util.uint8_array_to_list(gattc_write_params.p_value,
-                                                 gattc_write_params.len))
+                   data=util.uint8_array_to_bytes(gattc_write_params.p_value,
+                                                  gattc_write_params.len))
 
     def to_c(self):
         self.__data_array = util.list_to_uint8_array(self.data)
@@ -384,7 +384,7 @@ class BLEGattsValue(object):
     @classmethod
     def from_c(cls, params):
         offset = params.offset
-        value = bytearray(util.uint8_array_to_list(params.p_value, params.len))
+        value = bytearray(util.uint8_array_to_bytes(params.p_value, params.len))
         return cls(value, offset)
 
 
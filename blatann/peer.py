@@ -9,6 +9,7 @@ from blatann.gatt import gattc, service_discovery, MTU_SIZE_DEFAULT, MTU_SIZE_MI
 from blatann.nrf import nrf_events
 from blatann.nrf.nrf_types.enums import BLE_CONN_HANDLE_INVALID
 from blatann.nrf.nrf_types import conn_interval_range, conn_timeout_range
+from blatann.uuid import Uuid
 from blatann.waitables.waitable import EmptyWaitable
 from blatann.waitables.connection_waitable import DisconnectionWaitable
 from blatann.waitables.event_waitable import EventWaitable
@@ -339,6 +340,26 @@ class Peer(object):
         self._discoverer.start()
         return EventWaitable(self._discoverer.on_discovery_complete)
 
+    def read_by_uuid(self, uuid: Uuid, handle_range=(0x0001, 0xFFFF)
+                     ) -> EventWaitable[Peripheral, ReadByUuidCompleteEventArgs]:
+        """
+        Reads the values of the peer's characteristics with the given UUID without discovering its database.
+        Useful for short-lived connections which only need a value or two, such as the battery level.
+        The characteristics read are added to the database.
+        See :meth:`GattcDatabase.read_by_uuid() <blatann.gatt.gattc.GattcDatabase.read_by_uuid>`
+
+        :Example:
+
+        >>> _, event_args = peer.read_by_uuid(Uuid16(0x2A19)).wait(10)
+        >>> battery_level = event_args.characteristics[0].value[0]
+
+        :param uuid: The UUID of the characteristics to read
+        :param handle_range: The (first, last) handles of the range to search, e.g. a service's handle range
+        :return: a Waitable that will fire when the read is complete
+        """
+        start_handle, end_handle = handle_range
+        return self._db.read_by_uuid(uuid, start_handle, end_handle)
+
     """
     Internal Library Methods
     """
@@ -355,6 +376,10 @@ class Peer(object):
         self.connection_state = PeerState.CONNECTED
         self._current_connection_params = ActiveConnectionParameters(connection_params)
 
+        with self._connection_handler_lock:
+            for handler, event_types in self._connection_based_driver_event_handlers.items():
+                self._ble_device.ble_driver.connection_event_subscribe(conn_handle, handler, *event_types)
+
         self._ble_device.ble_driver.event_subscribe(self._on_disconnect_event, nrf_events.GapEvtDisconnected)
         self.driver_event_subscribe(self._on_connection_param_update, nrf_events.GapEvtConnParamUpdate, nrf_events.GapEvtConnParamUpdateRequest)
         self.driver_event_subscribe(self._on_mtu_exchange_request, nrf_events.GattsEvtExchangeMtuRequest)
@@ -363,17 +388,6 @@ class Peer(object):
         self.driver_event_subscribe(self._on_phy_update_request, nrf_events.GapEvtPhyUpdateRequest)
         self._on_connect.notify(self)
 
-    def _check_driver_event_connection_handle_wrapper(self, func):
-        def wrapper(driver, event):
-            """
-            :param driver:
-            :type event: blatann.nrf.nrf_events.BLEEvent
-            """
-            if self.connected and self.conn_handle == event.conn_handle:
-                logger.debug("Got event: {} for peer {}".format(event, self.conn_handle))
-                func(driver, event)
-        return wrapper
-
     def driver_event_subscribe(self, handler, *event_types):
         """
         Internal method that subscribes handlers to NRF Driver events directed at this peer.
@@ -382,11 +396,14 @@ class Peer(object):
         :param handler: The handler to subscribe
         :param event_types: The NRF Driver event types to subscribe to
         """
-        wrapped_handler = self._check_driver_event_connection_handle_wrapper(handler)
         with self._connection_handler_lock:
-            if handler not in self._connection_based_driver_event_handlers:
-                self._connection_based_driver_event_handlers[handler] = wrapped_handler
-                self._ble_device.ble_driver.event_subscribe(wrapped_handler, *event_types)
+            subscribed_types = self._connection_based_driver_event_handlers.setdefault(handler, [])
+            for event_type in event_types:
+                if event_type not in subscribed_types:
+                    subscribed_types.append(event_type)
+            # Handlers subscribed before the connection is established are routed once the connection handle is known
+            if self.connected:
+                self._ble_device.ble_driver.connection_event_subscribe(self.conn_handle, handler, *event_types)
 
     def driver_event_unsubscribe(self, handler, *event_types):
         """
@@ -396,11 +413,19 @@ class Peer(object):
         :param event_types: The event types to unsubscribe from
         """
         with self._connection_handler_lock:
-            wrapped_handler = self._connection_based_driver_event_handlers.get(handler, None)
-            logger.debug("Unsubscribing {} ({})".format(handler, wrapped_handler))
-            if wrapped_handler:
-                self._ble_device.ble_driver.event_unsubscribe(wrapped_handler, *event_types)
+            subscribed_types = self._connection_based_driver_event_handlers.get(handler, None)
+            if subscribed_types is None:
+                return
+            if event_types:
+                for event_type in event_types:
+                    if event_type in subscribed_types:
+                        subscribed_types.remove(event_type)
+            else:
+                subscribed_types.clear()
+            if not subscribed_types:
                 del self._connection_based_driver_event_handlers[handler]
+            if self.connected:
+                self._ble_device.ble_driver.connection_event_unsubscribe(self.conn_handle, handler, *event_types)
 
     """
     Private Methods
@@ -418,23 +443,19 @@ class Peer(object):
         self._on_disconnect.notify(self, DisconnectionEventArgs(event.reason))
 
         with self._connection_handler_lock:
-            for handler in self._connection_based_driver_event_handlers.values():
-                self._ble_device.ble_driver.event_unsubscribe_all(handler)
+            self._ble_device.ble_driver.connection_event_unsubscribe_all(event.conn_handle)
             self._connection_based_driver_event_handlers = {}
         self._ble_device.ble_driver.event_unsubscribe(self._on_disconnect_event)
-        self._ble_device.ble_driver.event_unsubscribe(self._on_connection_param_update)
 
     def _on_connection_param_update(self, driver, event):
         """
         :type event: nrf_events.GapEvtConnParamUpdate
         """
-        if not self.connected or self.conn_handle != event.conn_handle:
-            return
         if isinstance(event, nrf_events.GapEvtConnParamUpdateRequest):
-            logger.debug("[{}] Conn Params updating to {}".format(self.conn_handle, self._preferred_connection_params))
+            logger.debug("[%s] Conn Params updating to %s", self.conn_handle, self._preferred_connection_params)
             self._ble_device.ble_driver.ble_gap_conn_param_update(self.conn_handle, self._preferred_connection_params)
         else:
-            logger.debug("[{}] Updated to {}".format(self.conn_handle, event.conn_params))
+            logger.debug("[%s] Updated to %s", self.conn_handle, event.conn_params)
             self._current_connection_params = ActiveConnectionParameters(event.conn_params)
 
     def _validate_mtu_size(self, mtu_size):
@@ -448,8 +469,8 @@ class Peer(object):
     def _resolve_mtu_exchange(self, our_mtu, peer_mtu):
         previous_mtu_size = self._mtu_size
         self._mtu_size = max(min(our_mtu, peer_mtu), MTU_SIZE_MINIMUM)
-        logger.debug("[{}] MTU Exchange - Ours: {}, Peers: {}, Effective: {}".format(self.conn_handle,
-                                                                                     our_mtu, peer_mtu, self._mtu_size))
+        logger.debug("[%s] MTU Exchange - Ours: %s, Peers: %s, Effective: %s",
+                     self.conn_handle, our_mtu, peer_mtu, self._mtu_size)
         self._on_mtu_size_updated.notify(self, MtuSizeUpdatedEventArgs(previous_mtu_size, self._mtu_size))
 
         return previous_mtu_size, self._mtu_size
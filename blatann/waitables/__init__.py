@@ -1,2 +1,3 @@
 from blatann.waitables.waitable import Waitable, GenericWaitable
-from blatann.waitables.event_waitable import EventWaitable
\ No newline at end of file
+from blatann.waitables.event_waitable import EventWaitable
+from blatann.waitables.waitable_set import wait_all, wait_any, as_completed
\ No newline at end of file
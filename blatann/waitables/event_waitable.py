@@ -7,6 +7,8 @@ class EventWaitable(Waitable, Generic[TSender, TEvent]):
     """
     Waitable implementation which waits on an :class:`~blatann.event_type.Event`.
     """
+    __slots__ = ("_event",)
+
     def __init__(self, event: Event[TSender, TEvent]):
         super(EventWaitable, self).__init__(n_args=2)
         self._event = event
@@ -26,7 +28,7 @@ class EventWaitable(Waitable, Generic[TSender, TEvent]):
         return res
 
     def then(self, callback: Callable[[TSender, TEvent], None]):
-        super(EventWaitable, self).then(callback)
+        return super(EventWaitable, self).then(callback)
 
 
 class IdBasedEventWaitable(EventWaitable):
@@ -34,10 +36,18 @@ class IdBasedEventWaitable(EventWaitable):
     Extension of :class:`EventWaitable` for high-churn events which require IDs,
     such as characteristic read, write and notify operations
     """
+    __slots__ = ("id",)
+
     def __init__(self, event, event_id):
-        super(IdBasedEventWaitable, self).__init__(event)
+        # Skips EventWaitable's registration, the event calls the waitable only for its own ID
+        super(EventWaitable, self).__init__(n_args=2)
+        self._event = event
         self.id = event_id
+        self._event.register_id_handler(event_id, self._on_id_event)
+
+    def _on_id_event(self, sender, event_args):
+        # The event removes the handler once it's called
+        self._notify(sender, event_args)
 
-    def _on_event(self, sender, event_args):
-        if event_args.id == self.id:
-            super(IdBasedEventWaitable, self)._on_event(sender, event_args)
+    def _on_timeout(self):
+        self._event.deregister_id_handler(self.id, self._on_id_event)
@@ -1,20 +1,39 @@
 from typing import Callable
-import queue
+import logging
+import threading
 from blatann.exceptions import TimeoutError
 
+logger = logging.getLogger(__name__)
+
 
 class Waitable(object):
     """
     Base class for an object which can be waited on for an operation to complete.
     This is a similar concept to :class:`python:concurrent.futures.Future` where asynchronous
     operations can block the current thread, or register a handler to be called when it completes.
+
+    A waitable completes once, the first results it is notified with are kept and later notifications are ignored.
+    It can be converted to a :class:`python:concurrent.futures.Future` with :meth:`to_future`
+    and awaited from asyncio code, e.g. ``peer = await ble_device.connect(peer_address)``
     """
+    # Created in large numbers (one per GATT operation), so the state is kept minimal:
+    # one lock guarding it, plus one lock per thread blocked in wait()
+    __slots__ = ("_lock", "_results", "_callbacks", "_waiters", "_n_args")
+
     def __init__(self, n_args=1):
-        self._queue = queue.Queue()
-        self._callback = None
-        self._n_args = n_args
         if n_args < 1:
             raise ValueError()
+        self._lock = threading.Lock()
+        self._results = None
+        self._callbacks = None
+        self._waiters = None
+        self._n_args = n_args
+
+    def done(self) -> bool:
+        """
+        Gets if the asynchronous operation has completed
+        """
+        return self._results is not None
 
     def wait(self, timeout: float = None, exception_on_timeout=True):
         """
@@ -29,41 +48,122 @@ class Waitable(object):
         :return: The result of the asynchronous operation
         :raises: TimeoutError
         """
-        try:
-            results = self._queue.get(timeout=timeout)
+        results = self._results
+        if results is None:
+            results = self._wait_results(timeout)
+        if results is not None:
             if len(results) == 1:
                 return results[0]
             return results
-        except queue.Empty:
-            self._on_timeout()
-            if exception_on_timeout:
-                raise TimeoutError("Timed out waiting for event to occur. "
-                                   "Waitable type: {}".format(self.__class__.__name__))
+        self._on_timeout()
+        if exception_on_timeout:
+            raise TimeoutError("Timed out waiting for event to occur. "
+                               "Waitable type: {}".format(self.__class__.__name__))
         if self._n_args == 1:
             return None
         return [None] * self._n_args
 
+    def _wait_results(self, timeout):
+        if timeout is not None and timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+        with self._lock:
+            if self._results is not None:
+                return self._results
+            waiter = threading.Lock()
+            waiter.acquire()
+            if self._waiters is None:
+                self._waiters = [waiter]
+            else:
+                self._waiters.append(waiter)
+        if waiter.acquire(timeout=-1 if timeout is None else timeout):
+            return self._results
+        with self._lock:
+            # Completed between the wait timing out and taking the lock
+            if self._results is not None:
+                return self._results
+            self._waiters.remove(waiter)
+        return None
+
     def then(self, callback: Callable):
         """
-        Registers a function callback that will be called when the asynchronous operation completes
+        Registers a function callback that will be called when the asynchronous operation completes.
+        Any number of callbacks can be registered, they are called in the order they were registered
 
-        .. note:: Only a single callback is supported-- subsequent calls to this method will overwrite previous callbacks
+        If the operation has already completed, the callback is called immediately with the results
 
         :param callback: The function to call when the async operation completes
         :return: This waitable object
         """
         if callback and not callable(callback):
             raise ValueError(f"Callback provided is not callable (got {callback}).")
-        self._callback = callback
+        if not callback:
+            return self
+        with self._lock:
+            results = self._results
+            if results is None:
+                if self._callbacks is None:
+                    self._callbacks = [callback]
+                else:
+                    self._callbacks.append(callback)
+                return self
+        callback(*results)
         return self
 
+    def _remove_callback(self, callback):
+        # For callbacks which are no longer needed before the operation completes, e.g. the ones wait_any() registered
+        with self._lock:
+            if self._callbacks is not None and callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def to_future(self):
+        """
+        Gets a :class:`python:concurrent.futures.Future` which completes with the waitable's result,
+        the same as :meth:`wait` returns. Cancelling the future cleans up the waitable as if it timed out.
+
+        Use :func:`python:asyncio.wrap_future` to get an :class:`python:asyncio.Future`
+
+        :rtype: concurrent.futures.Future
+        """
+        # Not imported at module level, most applications never use it
+        import concurrent.futures
+        future = concurrent.futures.Future()
+
+        def on_complete(*results):
+            if not future.done():
+                future.set_result(results[0] if len(results) == 1 else results)
+
+        def on_future_done(f):
+            if f.cancelled():
+                self._on_timeout()
+
+        future.add_done_callback(on_future_done)
+        self.then(on_complete)
+        return future
+
+    def __await__(self):
+        # The only way a waitable is awaited, blatann.aio builds on it
+        import asyncio
+        return asyncio.wrap_future(self.to_future()).__await__()
+
     def _on_timeout(self):
         pass
 
     def _notify(self, *results):
-        self._queue.put(results)
-        if self._callback:
-            self._callback(*results)
+        with self._lock:
+            if self._results is not None:
+                return
+            self._results = results
+            waiters, self._waiters = self._waiters, None
+            callbacks, self._callbacks = self._callbacks, None
+        if waiters:
+            for waiter in waiters:
+                waiter.release()
+        if callbacks:
+            for callback in callbacks:
+                try:
+                    callback(*results)
+                except Exception:
+                    logger.exception("Exception in %s callback", self.__class__.__name__)
 
 
 class GenericWaitable(Waitable):
@@ -83,6 +183,7 @@ class EmptyWaitable(Waitable):
     def __init__(self, *args):
         super(EmptyWaitable, self).__init__(len(args))
         self._args = args
+        self._results = args
 
     def wait(self, timeout=None, exception_on_timeout=True):
         return self._args
@@ -0,0 +1,189 @@
+from typing import Iterable, Iterator, List
+import functools
+import threading
+import time
+from blatann.exceptions import TimeoutError
+from blatann.waitables.waitable import Waitable
+
+
+class _CompletionTracker(object):
+    """
+    Tracks the completion of a set of waitables, in any order, with a single condition. Each completion appends the waitable
+    to the completed list and only wakes the waiting thread once the count it waits for is reached,
+    so a completion costs O(1) regardless of the number of waitables.
+    The callbacks it registers must be removed with detach() once the waitables are no longer waited on
+    """
+    __slots__ = ("_lock", "_condition", "completed", "_target", "_registered")
+
+    def __init__(self, waitables):
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self.completed = []
+        """The waitables which completed, in completion order"""
+        self._target = len(waitables) + 1
+        self._registered = []
+        completed = self.completed
+        # Not locked, no other thread knows about the tracker yet.
+        # A waitable which completes after its done() check calls back immediately from then()
+        for waitable in waitables:
+            if waitable.done():
+                completed.append(waitable)
+            else:
+                callback = functools.partial(self._on_complete, waitable)
+                self._registered.append((waitable, callback))
+                waitable.then(callback)
+
+    def _on_complete(self, waitable, *results):
+        with self._lock:
+            self.completed.append(waitable)
+            if len(self.completed) >= self._target:
+                self._condition.notify()
+
+    def detach(self):
+        """
+        Removes the callbacks from the waitables which did not complete, so they don't keep the tracker alive
+        """
+        registered, self._registered = self._registered, []
+        for waitable, callback in registered:
+            waitable._remove_callback(callback)
+
+    def wait_for(self, count, deadline):
+        """
+        Waits until at least count waitables completed
+
+        :param count: The number of completions to wait for
+        :param deadline: The time.monotonic() time to give up at, None to wait indefinitely
+        :return: True if the count was reached, False if the deadline passed first
+        """
+        with self._condition:
+            self._target = count
+            while len(self.completed) < count:
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            return True
+
+
+def _deadline(timeout):
+    if timeout is None:
+        return None
+    if timeout < 0:
+        raise ValueError("'timeout' must be a non-negative number")
+    return time.monotonic() + timeout
+
+
+def _on_timeout(waitables, exception_on_timeout):
+    # Same clean up as a timed out Waitable.wait(), for the waitables which did not complete
+    for waitable in waitables:
+        if not waitable.done():
+            waitable._on_timeout()
+    if exception_on_timeout:
+        raise TimeoutError("Timed out waiting for {} waitables to complete".format(
+            sum(1 for w in waitables if not w.done())))
+
+
+def wait_all(waitables: Iterable[Waitable], timeout: float = None, exception_on_timeout=True) -> list:
+    """
+    Waits for all of the waitables to complete, with a single timeout for the whole set.
+
+    .. warning::
+       If this call times out, the waitables which did not complete are cleaned up the same way
+       a timed out :meth:`Waitable.wait() <blatann.waitables.waitable.Waitable.wait>` cleans them up
+
+    :Example:
+
+    >>> waitables = [peer.database.find_characteristic(uuid).read() for uuid in uuids]
+    >>> results = wait_all(waitables, timeout=10)
+
+    :param waitables: The waitables to wait for
+    :param timeout: How long to wait for all of them, or ``None`` to wait indefinitely
+    :param exception_on_timeout: Flag to either throw an exception on timeout, or instead return the results
+                                 with ``None`` object(s) for the waitables which did not complete
+    :return: The result of each waitable, in the order they were given, as :meth:`Waitable.wait` returns them
+    :raises: TimeoutError
+    """
+    waitables = list(waitables)
+    deadline = _deadline(timeout)
+    # Every waitable has to complete, so rather than tracking the completions this blocks on each one in turn
+    # for the time left. Each completion wakes this thread at most once and no callbacks are registered
+    for waitable in waitables:
+        if waitable.done():
+            continue
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        if waitable._wait_results(remaining) is None:
+            _on_timeout(waitables, exception_on_timeout)
+            break
+    return [w.wait(0, exception_on_timeout=False) for w in waitables]
+
+
+def wait_any(waitables: Iterable[Waitable], timeout: float = None, exception_on_timeout=True) -> Waitable:
+    """
+    Waits for any of the waitables to complete. The ones which did not complete yet are left as they are
+
+    .. warning::
+       If this call times out (none of them completed), the waitables are cleaned up the same way
+       a timed out :meth:`Waitable.wait() <blatann.waitables.waitable.Waitable.wait>` cleans them up
+
+    :param waitables: The waitables to wait for
+    :param timeout: How long to wait, or ``None`` to wait indefinitely
+    :param exception_on_timeout: Flag to either throw an exception on timeout, or instead return ``None``
+    :return: The first waitable to complete. Its result is available from ``wait()`` without blocking
+    :raises: TimeoutError
+    """
+    waitables = list(waitables)
+    if not waitables:
+        raise ValueError("No waitables to wait for")
+    deadline = _deadline(timeout)
+    tracker = _CompletionTracker(waitables)
+    try:
+        completed = tracker.wait_for(1, deadline)
+    finally:
+        tracker.detach()
+    if not completed:
+        _on_timeout(waitables, exception_on_timeout)
+        return None
+    return tracker.completed[0]
+
+
+def as_completed(waitables: Iterable[Waitable], timeout: float = None) -> Iterator[Waitable]:
+    """
+    Iterates over the waitables as they complete, with a single timeout for the whole set.
+    The waitables which already completed are yielded first.
+
+    .. warning::
+       If the iteration times out, the waitables which did not complete are cleaned up the same way
+       a timed out :meth:`Waitable.wait() <blatann.waitables.waitable.Waitable.wait>` cleans them up
+
+    :Example:
+
+    >>> for waitable in as_completed(char.read() for char in characteristics):
+    >>>     characteristic, event_args = waitable.wait()
+
+    :param waitables: The waitables to wait for
+    :param timeout: How long to wait for all of them, or ``None`` to wait indefinitely.
+                    The time spent by the caller between iterations counts against it
+    :return: An iterator of the waitables, in completion order. If the iteration is stopped early,
+             close the iterator to stop tracking the waitables which did not complete
+    :raises: TimeoutError
+    """
+    waitables = list(waitables)
+    # Not a generator itself, so the timeout starts (and the waitables are tracked) as soon as this is called
+    deadline = _deadline(timeout)
+    tracker = _CompletionTracker(waitables)
+    return _iter_completed(waitables, tracker, deadline)
+
+
+def _iter_completed(waitables, tracker, deadline):
+    completed: List[Waitable] = tracker.completed
+    try:
+        for i in range(len(waitables)):
+            # The list only grows, waitables which already completed are yielded without taking the lock
+            if len(completed) <= i and not tracker.wait_for(i + 1, deadline):
+                _on_timeout(waitables, True)
+            yield completed[i]
+    finally:
+        tracker.detach()
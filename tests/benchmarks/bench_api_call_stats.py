@@ -0,0 +1,98 @@
+"""
+API call stats overhead benchmark.
+
+Issues ble_gatts_hvx() calls against the stub driver with API call stats disabled and enabled.
+The sd_* call returns immediately, so the numbers are the Python overhead of the decorators alone.
+It then runs a GATTC writer and a GATTS notifier thread against a driver whose sd_* calls sleep
+to stand in for the UART RPC round-trip and prints the collected stats, which split the call latency into
+the time spent waiting for the API lock and the rest of the call.
+
+Run with: python -m tests.benchmarks.bench_api_call_stats
+"""
+import threading
+import time
+
+from tests.benchmarks import stub_driver
+stub_driver.install()
+
+from blatann.nrf.nrf_dll_load import driver
+from blatann.nrf.nrf_driver import NrfDriver
+from blatann.nrf.nrf_types import (BLEGattcWriteParams, BLEGattsHvx, BLEGattWriteOperation,
+                                   BLEGattExecWriteFlag, BLEGattHVXType)
+
+
+CALLS = 50000
+RPC_ROUND_TRIP_S = 0.0005
+THREADED_CALLS = 200
+
+
+def _calls_per_second(nrf_driver, hvx_params):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        nrf_driver.ble_gatts_hvx(0, hvx_params)
+    return CALLS / (time.perf_counter() - start)
+
+
+def run_overhead():
+    hvx_params = BLEGattsHvx(0x20, BLEGattHVXType.notification, b"\x00" * 20)
+    # Build the C struct once so only the decorators are measured
+    c_params = hvx_params.to_c()
+    hvx_params.to_c = lambda: c_params
+
+    nrf_driver = NrfDriver("BENCH")
+    disabled = _calls_per_second(nrf_driver, hvx_params)
+    nrf_driver.configure_api_call_stats(True)
+    enabled = _calls_per_second(nrf_driver, hvx_params)
+    return disabled, enabled
+
+
+def _simulated_rpc(*args, **kwargs):
+    time.sleep(RPC_ROUND_TRIP_S)
+    return driver.NRF_SUCCESS
+
+
+def run_threaded():
+    driver.sd_ble_gattc_write = _simulated_rpc
+    driver.sd_ble_gatts_hvx = _simulated_rpc
+    nrf_driver = NrfDriver("BENCH")
+    nrf_driver.configure_api_call_stats(True)
+    write_params = BLEGattcWriteParams(BLEGattWriteOperation.write_cmd, BLEGattExecWriteFlag.unused,
+                                       0x10, b"\x00" * 20, 0)
+    hvx_params = BLEGattsHvx(0x20, BLEGattHVXType.notification, b"\x00" * 20)
+
+    def writer():
+        for _ in range(THREADED_CALLS):
+            nrf_driver.ble_gattc_write(0, write_params)
+
+    def notifier():
+        for _ in range(THREADED_CALLS):
+            nrf_driver.ble_gatts_hvx(0, hvx_params)
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=notifier)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return nrf_driver.api_call_stats
+
+
+def main():
+    disabled, enabled = run_overhead()
+    print("ble_gatts_hvx() with an instant RPC, {} calls".format(CALLS))
+    print("{:>12} {:>16} {:>14}".format("stats", "calls/s", "us/call"))
+    print("{:>12} {:>16,.0f} {:>14.2f}".format("disabled", disabled, 1e6 / disabled))
+    print("{:>12} {:>16,.0f} {:>14.2f}".format("enabled", enabled, 1e6 / enabled))
+
+    print()
+    print("GATTC writer + GATTS notifier on one adapter lock, simulated RPC round-trip: {:.1f} ms".format(
+        RPC_ROUND_TRIP_S * 1000))
+    stats = run_threaded()
+    print("{:>18} {:>7} {:>14} {:>14} {:>18}".format("api", "calls", "avg (ms)", "max (ms)", "avg lock wait (ms)"))
+    for name, api in sorted(stats.api_calls.items()):
+        print("{:>18} {:>7} {:>14.3f} {:>14.3f} {:>18.3f}".format(
+            name, api.calls, api.average_latency * 1000, api.max_latency * 1000, api.average_lock_wait * 1000))
+    print(stats)
+
+
+if __name__ == '__main__':
+    main()
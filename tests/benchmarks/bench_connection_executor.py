@@ -0,0 +1,91 @@
+"""
+Per-connection executor benchmark.
+
+Feeds notifications for several connections through NrfDriver's event thread, where the handler for one
+connection is slow (e.g. writing to a file or a UI). Measures how long the other connections take to get
+all of their notifications handled, with every handler on the event thread versus the connection executor.
+
+Run with: python -m tests.benchmarks.bench_connection_executor
+"""
+import threading
+import time
+
+from tests.benchmarks import stub_driver
+stub_driver.install()
+
+from blatann.nrf.nrf_dll_load import driver
+from blatann.nrf.nrf_driver import NrfDriver, NrfDriverObserver
+from blatann.nrf import nrf_events
+
+
+CONNECTION_COUNT = 8
+NOTIFICATIONS_PER_CONNECTION = 50
+SLOW_CONN_HANDLE = 0
+SLOW_HANDLER_TIME_S = 0.005
+
+
+def _make_hvx(conn_handle, attr_handle):
+    ble_event = stub_driver._Struct()
+    ble_event.header.evt_id = driver.BLE_GATTC_EVT_HVX
+    gattc_evt = ble_event.evt.gattc_evt
+    gattc_evt.conn_handle = conn_handle
+    gattc_evt.gatt_status = driver.BLE_GATT_STATUS_SUCCESS
+    gattc_evt.error_handle = 0
+    gattc_evt.params.hvx.handle = attr_handle
+    gattc_evt.params.hvx.type = driver.BLE_GATT_HVX_NOTIFICATION
+    gattc_evt.params.hvx.data = b"\x00" * 20
+    gattc_evt.params.hvx.len = 20
+    return ble_event
+
+
+def run(max_workers):
+    """
+    Returns the time until all fast connections are done and the time until everything is done
+    """
+    nrf_driver = NrfDriver("BENCH")
+    nrf_driver.observer_register(NrfDriverObserver())
+    nrf_driver.configure_connection_executor(max_workers)
+
+    remaining = {c: NOTIFICATIONS_PER_CONNECTION for c in range(CONNECTION_COUNT)}
+    done_times = {}
+    lock = threading.Lock()
+    all_done = threading.Event()
+
+    def on_notification(d, event):
+        if event.conn_handle == SLOW_CONN_HANDLE:
+            time.sleep(SLOW_HANDLER_TIME_S)
+        with lock:
+            remaining[event.conn_handle] -= 1
+            if not remaining[event.conn_handle]:
+                done_times[event.conn_handle] = time.perf_counter()
+                if len(done_times) == CONNECTION_COUNT:
+                    all_done.set()
+
+    nrf_driver.event_subscribe(on_notification, nrf_events.GattcEvtHvx)
+    nrf_driver.open()
+    start = time.perf_counter()
+    for i in range(NOTIFICATIONS_PER_CONNECTION):
+        for conn_handle in range(CONNECTION_COUNT):
+            nrf_driver.ble_evt_handler(None, _make_hvx(conn_handle, i))
+    all_done.wait(30)
+    nrf_driver.close()
+
+    fast_done = max(t for c, t in done_times.items() if c != SLOW_CONN_HANDLE)
+    return fast_done - start, max(done_times.values()) - start, nrf_driver
+
+
+def main():
+    print("{} connections x {} notifications, connection {} handler takes {:.0f} ms".format(
+        CONNECTION_COUNT, NOTIFICATIONS_PER_CONNECTION, SLOW_CONN_HANDLE, SLOW_HANDLER_TIME_S * 1000))
+    print("{:>22} {:>22} {:>16}".format("mode", "fast connections (ms)", "all (ms)"))
+    fast, total, _ = run(None)
+    print("{:>22} {:>22.1f} {:>16.1f}".format("event thread", fast * 1000, total * 1000))
+    fast, total, nrf_driver = run(4)
+    print("{:>22} {:>22.1f} {:>16.1f}".format("executor, 4 workers", fast * 1000, total * 1000))
+    print()
+    for stats in nrf_driver.connection_executor_stats.values():
+        print(stats)
+
+
+if __name__ == '__main__':
+    main()
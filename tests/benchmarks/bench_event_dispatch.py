@@ -0,0 +1,92 @@
+"""
+Micro-benchmark for NrfDriver event dispatch.
+
+Compares the previous dispatch strategy (copy all subscriptions under the lock, then issubclass()
+against every subscribed type) with the type-indexed dispatch table, for 1, 10 and 100 subscribers.
+
+Run with: python -m tests.benchmarks.bench_event_dispatch
+"""
+import time
+import traceback
+
+from tests.benchmarks import stub_driver
+stub_driver.install()
+
+from blatann.nrf import nrf_events
+from blatann.nrf.nrf_driver import NrfDriver, NrfDriverObserver
+
+
+SUBSCRIBER_COUNTS = [1, 10, 100]
+EVENT_COUNT = 100000
+
+# Each subscriber mimics a peer's GATT client/server subscriptions
+SUBSCRIBED_TYPES = [nrf_events.GattcEvtHvx, nrf_events.GattcEvtReadResponse, nrf_events.GattcEvtWriteResponse,
+                    nrf_events.GattsEvtWrite, nrf_events.GapEvtDisconnected, nrf_events.GapEvtConnParamUpdate]
+
+
+def legacy_dispatch(nrf_driver, observers, event):
+    """
+    The dispatch loop as it was before the dispatch table was introduced
+    """
+    with nrf_driver._event_observer_lock:
+        observers = nrf_driver.observers[:]
+        event_handlers = {k: v[:] for k, v in nrf_driver._event_observers.items()}
+
+    for obs in observers:
+        try:
+            obs.on_driver_event(nrf_driver, event)
+        except:
+            traceback.print_exc()
+
+    for event_type, handlers in event_handlers.items():
+        if issubclass(type(event), event_type):
+            for handler in handlers:
+                try:
+                    handler(nrf_driver, event)
+                except:
+                    traceback.print_exc()
+
+
+def table_dispatch(nrf_driver, observers, event):
+    nrf_driver._dispatch_event(observers, event)
+
+
+def _make_handler():
+    def handler(driver, event):
+        pass
+    return handler
+
+
+def setup_driver(subscriber_count):
+    nrf_driver = NrfDriver("BENCH")
+    nrf_driver.observer_register(NrfDriverObserver())
+    for _ in range(subscriber_count):
+        for event_type in SUBSCRIBED_TYPES:
+            nrf_driver.event_subscribe(_make_handler(), event_type)
+    return nrf_driver
+
+
+def run(dispatch_func, subscriber_count, event_count=EVENT_COUNT):
+    nrf_driver = setup_driver(subscriber_count)
+    event = nrf_events.GattcEvtHvx(conn_handle=0, status=0, error_handle=0,
+                                   attr_handle=0x10, hvx_type=None, data=[1, 2, 3, 4])
+    observers = nrf_driver._observers_snapshot
+    start = time.perf_counter()
+    for _ in range(event_count):
+        dispatch_func(nrf_driver, observers, event)
+    elapsed = time.perf_counter() - start
+    return event_count / elapsed
+
+
+def main():
+    print("{:>12} {:>16} {:>16} {:>8}".format("subscribers", "before (evt/s)", "after (evt/s)", "speedup"))
+    for count in SUBSCRIBER_COUNTS:
+        # Scale down the iterations for the larger subscriber counts to keep the runtime reasonable
+        event_count = max(EVENT_COUNT // count, 2000)
+        before = run(legacy_dispatch, count, event_count)
+        after = run(table_dispatch, count, event_count)
+        print("{:>12} {:>16,.0f} {:>16,.0f} {:>7.2f}x".format(count, before, after, after / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Event queue hand-off benchmark.
+
+A producer thread stands in for the driver's callback thread and puts events in bursts, a consumer thread
+stands in for the event thread. "Before" is queue.Queue polled with get(timeout=0.1) one event at a time,
+"after" is the batched EventQueue. Also reports how often each consumer wakes up while the adapter is idle.
+
+The backlog scenario queues a dense scan's worth of advertising reports in front of a disconnect event and
+measures how long a slow consumer takes to get to the disconnect, with a single unbounded lane versus
+prioritized lanes with a bounded, coalescing low priority lane.
+
+Run with: python -m tests.benchmarks.bench_event_queue
+"""
+import queue
+import threading
+import time
+
+from tests.benchmarks import stub_driver
+stub_driver.install()
+
+from blatann.nrf.nrf_event_queue import EventQueue, EventPriority, OverflowPolicy
+
+
+EVENT_COUNT = 200000
+BURST_SIZES = [1, 10, 100]
+IDLE_TIME_S = 1.0
+BACKLOG_REPORTS = 20000
+BACKLOG_DEVICES = 50
+BACKLOG_MAX_SIZE = 1000
+HANDLER_TIME_S = 0.00002
+_STOP = object()
+
+
+def _polling_consumer(q, counter):
+    while True:
+        try:
+            item = q.get(timeout=0.1)
+        except queue.Empty:
+            counter[0] += 1
+            continue
+        counter[0] += 1
+        if item is _STOP:
+            return
+
+
+def _batch_consumer(q, counter):
+    while True:
+        batch = q.get_batch()
+        counter[0] += 1
+        for item in batch:
+            if item is EventQueue.SHUTDOWN:
+                return
+
+
+def _produce(put, burst_size):
+    event = object()
+    for _ in range(EVENT_COUNT // burst_size):
+        for _ in range(burst_size):
+            put(event)
+        # Give the consumer a chance to run between bursts, like the UART does between packets
+        time.sleep(0)
+
+
+def run_polling(burst_size):
+    q = queue.Queue()
+    consumer = threading.Thread(target=_polling_consumer, args=(q, [0]))
+    consumer.start()
+    start = time.perf_counter()
+    _produce(q.put, burst_size)
+    q.put(_STOP)
+    consumer.join()
+    return EVENT_COUNT / (time.perf_counter() - start)
+
+
+def run_batched(burst_size):
+    q = EventQueue()
+    consumer = threading.Thread(target=_batch_consumer, args=(q, [0]))
+    consumer.start()
+    start = time.perf_counter()
+    _produce(q.put, burst_size)
+    q.shutdown()
+    consumer.join()
+    elapsed = time.perf_counter() - start
+    return EVENT_COUNT / elapsed, q.get_stats()
+
+
+def idle_wakeups(consumer_func, q, stop):
+    counter = [0]
+    consumer = threading.Thread(target=consumer_func, args=(q, counter))
+    consumer.start()
+    time.sleep(IDLE_TIME_S)
+    stop()
+    consumer.join()
+    # Don't count the wakeup caused by the stop request
+    return (counter[0] - 1) / IDLE_TIME_S
+
+
+def _busy_wait(duration):
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+def run_backlog(q, prioritized):
+    """
+    Returns how long it takes until the disconnect is handled and how many events were handled before it
+    """
+    low = EventPriority.low if prioritized else EventPriority.normal
+    for i in range(BACKLOG_REPORTS):
+        q.put(("adv", i), low, i % BACKLOG_DEVICES)
+    start = time.perf_counter()
+    q.put(("disconnect", 0), EventPriority.normal)
+    handled = 0
+    while True:
+        for kind, _ in q.get_batch():
+            if kind == "disconnect":
+                return time.perf_counter() - start, handled
+            _busy_wait(HANDLER_TIME_S)
+            handled += 1
+
+
+def main():
+    print("{:>6} {:>18} {:>18} {:>8} {:>10} {:>10}".format("burst", "polling (evt/s)", "batched (evt/s)",
+                                                          "speedup", "avg batch", "max depth"))
+    for burst_size in BURST_SIZES:
+        before = run_polling(burst_size)
+        after, stats = run_batched(burst_size)
+        print("{:>6} {:>18,.0f} {:>18,.0f} {:>7.2f}x {:>10.1f} {:>10}".format(
+            burst_size, before, after, after / before, stats.average_batch_size, stats.max_depth))
+
+    polling_queue = queue.Queue()
+    batch_queue = EventQueue()
+    print()
+    print("Idle wakeups per second: polling {:.1f}, batched {:.1f}".format(
+        idle_wakeups(_polling_consumer, polling_queue, lambda: polling_queue.put(_STOP)),
+        idle_wakeups(_batch_consumer, batch_queue, batch_queue.shutdown)))
+
+    print()
+    print("{} queued advertising reports from {} devices, then a disconnect".format(BACKLOG_REPORTS, BACKLOG_DEVICES))
+    print("{:>40} {:>14} {:>16}".format("queue", "latency (ms)", "handled before"))
+    scenarios = [("single unbounded lane", EventQueue(), False),
+                 ("prioritized, max {}, drop oldest".format(BACKLOG_MAX_SIZE),
+                  EventQueue(BACKLOG_MAX_SIZE, OverflowPolicy.drop_oldest), True),
+                 ("prioritized, max {}, coalesce".format(BACKLOG_MAX_SIZE),
+                  EventQueue(BACKLOG_MAX_SIZE, OverflowPolicy.coalesce), True)]
+    for name, q, prioritized in scenarios:
+        latency, handled = run_backlog(q, prioritized)
+        stats = q.get_stats()
+        print("{:>40} {:>14.2f} {:>16} (dropped {}, coalesced {})".format(name, latency * 1000, handled,
+                                                                         stats.dropped, stats.coalesced))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Import time benchmark.
+
+Measures the cumulative import time of the blatann package and of blatann.device with ``python -X importtime``,
+each in a fresh interpreter, and compares them against their budgets. The simulated driver backend is used
+so only blatann's own modules are measured, not pc-ble-driver-py.
+
+Run with: python -m tests.benchmarks.bench_import_time [--budget-scale SCALE]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Not imported from blatann.nrf.nrf_dll_load, which loads the driver
+BACKEND_ENV_VAR = "BLATANN_DRIVER_BACKEND"
+RUNS = 5
+
+# Import statement, module measured, cumulative import time budget in milliseconds
+IMPORTS = [
+    ("import blatann", "blatann", 25),
+    ("import blatann.device", "blatann.device", 150),
+]
+
+
+def import_time_ms(statement, module):
+    """
+    Runs the import statement in a new interpreter
+
+    :return: The cumulative import time of the module, in milliseconds
+    """
+    env = dict(os.environ)
+    env[BACKEND_ENV_VAR] = "sim"
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, env=env,
+                             stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if fields[0].strip().isdigit() and fields[2].strip() == module:
+            return int(fields[1]) / 1000.0
+    raise ValueError("{} was not imported".format(module))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures blatann's import time")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Scales the budgets, e.g. 2.0 doubles them on a slow machine")
+    args = parser.parse_args()
+
+    over_budget = False
+    print("{:>16} {:>10} {:>10}".format("module", "ms", "budget"))
+    for statement, module, budget_ms in IMPORTS:
+        # The fastest of a few runs, the others mostly measure the disk cache and other load on the machine
+        elapsed_ms = min(import_time_ms(statement, module) for _ in range(RUNS))
+        budget_ms *= args.budget_scale
+        over = elapsed_ms > budget_ms
+        over_budget |= over
+        print("{:>16} {:>10.1f} {:>10.1f}{}".format(module, elapsed_ms, budget_ms, "  OVER BUDGET" if over else ""))
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
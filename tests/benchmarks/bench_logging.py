@@ -0,0 +1,93 @@
+"""
+Logging overhead benchmark.
+
+Feeds notifications through NrfDriver with the device's event logger registered and a handler which issues a
+driver call for every notification (like a peer streaming data back), with logging at WARNING.
+"Eager" reproduces the former behaviour, where the event logger formatted every event and the driver call
+decorator formatted its debug message before the logger checked the level.
+
+Run with: python -m tests.benchmarks.bench_logging
+"""
+import logging
+import threading
+import time
+
+from tests.benchmarks import stub_driver
+stub_driver.install()
+
+from blatann.device import _EventLogger
+from blatann.nrf.nrf_dll_load import driver
+from blatann.nrf.nrf_driver import NrfDriver, NrfDriverObserver
+from blatann.nrf.nrf_types import BLEGattsHvx, BLEGattHVXType
+from blatann.nrf import nrf_events
+
+
+EVENT_COUNT = 50000
+PAYLOAD_SIZE = 244
+
+logger = logging.getLogger("blatann.device")
+driver_logger = logging.getLogger("blatann.nrf.nrf_driver")
+
+
+class _EagerEventLogger(NrfDriverObserver):
+    """
+    The device's event logger as it was before logging was deferred
+    """
+    def __init__(self, ble_driver):
+        ble_driver.observer_register(self)
+        self._suppressed_events = []
+        self._lock = threading.Lock()
+
+    def on_driver_event(self, nrf_driver, event):
+        with self._lock:
+            if type(event) not in self._suppressed_events:
+                logger.debug("Got NRF Driver event: {}".format(event))
+
+
+def _make_hvx():
+    ble_event = stub_driver._Struct()
+    ble_event.header.evt_id = driver.BLE_GATTC_EVT_HVX
+    gattc_evt = ble_event.evt.gattc_evt
+    gattc_evt.conn_handle = 0
+    gattc_evt.gatt_status = driver.BLE_GATT_STATUS_SUCCESS
+    gattc_evt.error_handle = 0
+    gattc_evt.params.hvx.handle = 0x10
+    gattc_evt.params.hvx.type = driver.BLE_GATT_HVX_NOTIFICATION
+    gattc_evt.params.hvx.data = bytes(range(256))[:PAYLOAD_SIZE]
+    gattc_evt.params.hvx.len = PAYLOAD_SIZE
+    return ble_event
+
+
+def run(eager):
+    nrf_driver = NrfDriver("BENCH")
+    if eager:
+        _EagerEventLogger(nrf_driver)
+    else:
+        _EventLogger(nrf_driver)
+    hvx_params = BLEGattsHvx(0x20, BLEGattHVXType.notification, b"\x00" * 20)
+
+    def on_notification(d, event):
+        if eager:
+            driver_logger.debug("[{}] {}{}".format(d.serial_port, "ble_gatts_hvx", (0, hvx_params)))
+        d.ble_gatts_hvx(0, hvx_params)
+
+    nrf_driver.event_subscribe(on_notification, nrf_events.GattcEvtHvx)
+    ble_event = _make_hvx()
+    start = time.perf_counter()
+    for _ in range(EVENT_COUNT):
+        nrf_driver._process_ble_event(nrf_driver._decode_ble_event(ble_event))
+    return EVENT_COUNT / (time.perf_counter() - start)
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    print("{} notifications of {} bytes, logging at WARNING".format(EVENT_COUNT, PAYLOAD_SIZE))
+    eager = run(eager=True)
+    deferred = run(eager=False)
+    print("{:>10} {:>16} {:>8}".format("logging", "events/s", "speedup"))
+    print("{:>10} {:>16,.0f}".format("eager", eager))
+    print("{:>10} {:>16,.0f} {:>7.2f}x".format("deferred", deferred, deferred / eager))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Multi-adapter API throughput benchmark.
+
+Each adapter gets its own thread issuing ble_gattc_write() calls against the stub driver, whose sd_* calls
+sleep for a fixed time to stand in for the UART RPC round-trip (like the real driver, the sleep releases the GIL).
+"Before" puts every adapter on one shared lock to reproduce the former class-wide NrfDriver.api_lock.
+
+A second scenario runs a GATTC writer and a GATTS notifier against the same adapter to compare the default
+per-adapter lock with fine-grained locking.
+
+Run with: python -m tests.benchmarks.bench_multi_adapter
+"""
+import threading
+import time
+
+from tests.benchmarks import stub_driver
+stub_driver.install()
+
+from blatann.nrf.nrf_dll_load import driver
+from blatann.nrf.nrf_driver import NrfDriver, ApiLockDomain
+from blatann.nrf.nrf_types import (BLEGattcWriteParams, BLEGattsHvx, BLEGattWriteOperation,
+                                   BLEGattExecWriteFlag, BLEGattHVXType)
+
+
+RPC_ROUND_TRIP_S = 0.0005
+CALLS_PER_THREAD = 400
+ADAPTER_COUNTS = [1, 2, 4, 8]
+
+
+def _simulated_rpc(*args, **kwargs):
+    time.sleep(RPC_ROUND_TRIP_S)
+    return driver.NRF_SUCCESS
+
+
+driver.sd_ble_gattc_write = _simulated_rpc
+driver.sd_ble_gatts_hvx = _simulated_rpc
+
+
+def _share_lock(drivers):
+    shared_lock = threading.Lock()
+    for d in drivers:
+        d._api_locks = {domain: shared_lock for domain in ApiLockDomain}
+
+
+def _writer(nrf_driver, count):
+    params = BLEGattcWriteParams(BLEGattWriteOperation.write_cmd, BLEGattExecWriteFlag.unused, 0x10, b"\x00" * 20, 0)
+    for _ in range(count):
+        nrf_driver.ble_gattc_write(0, params)
+
+
+def _notifier(nrf_driver, count):
+    params = BLEGattsHvx(0x20, BLEGattHVXType.notification, b"\x00" * 20)
+    for _ in range(count):
+        nrf_driver.ble_gatts_hvx(0, params)
+
+
+def _run_threads(targets):
+    threads = [threading.Thread(target=func, args=args) for func, args in targets]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def run_multi_adapter(adapter_count, shared_lock):
+    drivers = [NrfDriver("BENCH{}".format(i)) for i in range(adapter_count)]
+    if shared_lock:
+        _share_lock(drivers)
+    elapsed = _run_threads([(_writer, (d, CALLS_PER_THREAD)) for d in drivers])
+    return adapter_count * CALLS_PER_THREAD / elapsed
+
+
+def run_mixed_domains(fine_grained):
+    nrf_driver = NrfDriver("BENCH", fine_grained_locking=fine_grained)
+    elapsed = _run_threads([(_writer, (nrf_driver, CALLS_PER_THREAD)),
+                            (_notifier, (nrf_driver, CALLS_PER_THREAD))])
+    return 2 * CALLS_PER_THREAD / elapsed
+
+
+def main():
+    print("Simulated RPC round-trip: {:.1f} ms".format(RPC_ROUND_TRIP_S * 1000))
+    print("{:>9} {:>20} {:>20} {:>8}".format("adapters", "shared lock (call/s)", "per-adapter (call/s)", "speedup"))
+    for count in ADAPTER_COUNTS:
+        before = run_multi_adapter(count, shared_lock=True)
+        after = run_multi_adapter(count, shared_lock=False)
+        print("{:>9} {:>20,.0f} {:>20,.0f} {:>7.2f}x".format(count, before, after, after / before))
+
+    print()
+    print("Single adapter, one GATTC writer + one GATTS notifier thread")
+    before = run_mixed_domains(fine_grained=False)
+    after = run_mixed_domains(fine_grained=True)
+    print("{:>20} {:>20} {:>8}".format("adapter lock (call/s)", "fine-grained (call/s)", "speedup"))
+    print("{:>21,.0f} {:>21,.0f} {:>7.2f}x".format(before, after, after / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Capture and replay benchmark.
+
+Captures a synthetic scan storm (advertising reports from many devices) interleaved with a notification flood
+from a NrfDriver, then plays the capture back through a ReplayDriver at full speed with a handler subscribed
+to each event type, as a regression test for the event pipeline would on a machine without a device.
+
+Run with: python -m tests.benchmarks.bench_replay
+"""
+import io
+import time
+
+from tests.benchmarks import stub_driver
+stub_driver.install()
+
+from blatann.nrf.nrf_dll_load import driver
+from blatann.nrf.nrf_driver import NrfDriver, NrfDriverObserver
+from blatann.nrf.nrf_replay_driver import ReplayDriver
+from blatann.nrf.nrf_capture import read_capture
+from blatann.nrf import nrf_events
+
+
+ADV_REPORTS = 20000
+NOTIFICATIONS = 20000
+DEVICES = 200
+
+
+def _make_adv_report(device):
+    ble_event = stub_driver._Struct()
+    ble_event.header.evt_id = driver.BLE_GAP_EVT_ADV_REPORT
+    gap_evt = ble_event.evt.gap_evt
+    gap_evt.conn_handle = driver.BLE_CONN_HANDLE_INVALID
+    adv_report = gap_evt.params.adv_report
+    adv_report.peer_addr.addr = [device & 0xFF, device >> 8, 0, 0, 0, 0xC0]
+    adv_report.peer_addr.addr_type = driver.BLE_GAP_ADDR_TYPE_RANDOM_STATIC
+    adv_report.rssi = -60
+    adv_report.type = driver.BLE_GAP_ADV_TYPE_ADV_IND
+    adv_report.scan_rsp = 0
+    name = "dev{:02d}".format(device % 100).encode("ascii")
+    data = bytes([2, driver.BLE_GAP_AD_TYPE_FLAGS, 0x06, len(name) + 1, driver.BLE_GAP_AD_TYPE_COMPLETE_LOCAL_NAME]) + name
+    adv_report.data = data
+    adv_report.dlen = len(data)
+    return ble_event
+
+
+def _make_hvx(i):
+    ble_event = stub_driver._Struct()
+    ble_event.header.evt_id = driver.BLE_GATTC_EVT_HVX
+    gattc_evt = ble_event.evt.gattc_evt
+    gattc_evt.conn_handle = 0
+    gattc_evt.gatt_status = driver.BLE_GATT_STATUS_SUCCESS
+    gattc_evt.error_handle = 0
+    gattc_evt.params.hvx.handle = 0x10
+    gattc_evt.params.hvx.type = driver.BLE_GATT_HVX_NOTIFICATION
+    gattc_evt.params.hvx.data = i.to_bytes(4, "little") * 5
+    gattc_evt.params.hvx.len = 20
+    return ble_event
+
+
+def capture():
+    f = io.BytesIO()
+    nrf_driver = NrfDriver("BENCH")
+    nrf_driver.start_capture(f)
+    adv_reports = [_make_adv_report(d) for d in range(DEVICES)]
+    start = time.perf_counter()
+    for i in range(max(ADV_REPORTS, NOTIFICATIONS)):
+        if i < ADV_REPORTS:
+            nrf_driver.ble_evt_handler(None, adv_reports[i % DEVICES])
+        if i < NOTIFICATIONS:
+            nrf_driver.ble_evt_handler(None, _make_hvx(i))
+    elapsed = time.perf_counter() - start
+    nrf_driver.stop_capture()
+    return f.getvalue(), elapsed
+
+
+def replay(capture_bytes):
+    replay_driver = ReplayDriver(io.BytesIO(capture_bytes))
+    counts = {nrf_events.GapEvtAdvReport: 0, nrf_events.GattcEvtHvx: 0}
+
+    def on_event(d, event):
+        counts[type(event)] += 1
+
+    replay_driver.observer_register(NrfDriverObserver())
+    replay_driver.event_subscribe(on_event, nrf_events.GapEvtAdvReport, nrf_events.GattcEvtHvx)
+    replay_driver.open()
+    elapsed = replay_driver.replay(timeout=60)
+    replay_driver.close()
+    return replay_driver.event_count, elapsed, counts
+
+
+def main():
+    capture_bytes, capture_time = capture()
+    records = list(read_capture(io.BytesIO(capture_bytes)))
+    print("Captured {:,} events in {:.2f} s, {:,} bytes ({:.1f} bytes/event)".format(
+        len(records), capture_time, len(capture_bytes), len(capture_bytes) / len(records)))
+    event_count, elapsed, counts = replay(capture_bytes)
+    print("Replayed {:,} events at full speed in {:.2f} s: {:,.0f} events/s".format(
+        event_count, elapsed, event_count / elapsed))
+    for event_type, count in counts.items():
+        print("{:>20}: {:,} handled".format(event_type.__name__, count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+GATT throughput over the simulated backend.
+
+Two BleDevices are opened in this process with BLATANN_DRIVER_BACKEND=sim and connected to each other.
+The peripheral notifies the central and the central writes to the peripheral (write requests, and write commands
+with up to WRITE_CMD_TX_QUEUE_SIZE packets in flight) while the simulated link is run at several connection intervals and packets per connection event, with and without Data Length Extension.
+No hardware is needed, so the numbers cover blatann's full stack (driver, event queue, GATT layers)
+on top of the simulated link timing.
+
+Run with: python -m tests.benchmarks.bench_sim_throughput
+"""
+import os
+os.environ["BLATANN_DRIVER_BACKEND"] = "sim"
+
+import threading
+import time
+
+from blatann import BleDevice
+from blatann.gap import advertising
+from blatann.gatt import gatts
+from blatann.nrf import nrf_sim
+from blatann.nrf.nrf_events import GapEvtDataLengthUpdate
+from blatann.nrf.nrf_types import BLEGapDataLengthParams
+from blatann.uuid import Uuid128
+
+
+SERVICE_UUID = Uuid128("8e6d0000-3e4b-4f83-9c4a-0b6f1d6c0a77")
+CHAR_UUID = SERVICE_UUID.new_uuid_from_base(0x0001)
+MTU_SIZE = 247
+NOTIFICATION_COUNT = 100
+WRITE_COUNT = 30
+WRITE_CMD_TX_QUEUE_SIZE = 16
+# (connection interval ms, packets per event, latency ms)
+LINK_CONFIGS = [
+    (7.5, 6, 0.0),
+    (15, 6, 0.0),
+    (30, 6, 0.0),
+    (30, 2, 0.0),
+    (15, 6, 5.0),
+]
+
+
+def _open_devices():
+    periph = BleDevice("SIM-PERIPH")
+    periph.configure(att_mtu_max_size=MTU_SIZE)
+    periph.open()
+    central = BleDevice("SIM-CENTRAL")
+    central.configure(att_mtu_max_size=MTU_SIZE, write_cmd_tx_queue_size=WRITE_CMD_TX_QUEUE_SIZE)
+    central.open()
+
+    service = periph.database.add_service(SERVICE_UUID)
+    props = gatts.GattsCharacteristicProperties(read=True, write=True, notify=True, write_no_response=True,
+                                                max_length=MTU_SIZE - 3, variable_length=True)
+    char = service.add_characteristic(CHAR_UUID, props, b"\x00")
+    periph.client.preferred_mtu_size = MTU_SIZE
+    periph.advertiser.set_advertise_data(advertising.AdvertisingData(local_name="SimBench", flags=0x06))
+    periph.advertiser.start(adv_interval_ms=20, timeout_sec=0)
+
+    peer = central.connect(periph.address).wait(10)
+    peer.exchange_mtu(MTU_SIZE).wait(10)
+    peer.discover_services().wait(10)
+    return periph, central, char, peer
+
+
+def _set_data_length(central, peer, enabled):
+    octets = 251 if enabled else 27
+    done = threading.Event()
+
+    def on_update(driver, event):
+        done.set()
+
+    central.ble_driver.event_subscribe(on_update, GapEvtDataLengthUpdate)
+    central.ble_driver.ble_gap_data_length_update(peer.conn_handle, BLEGapDataLengthParams(octets, octets))
+    done.wait(10)
+    central.ble_driver.event_unsubscribe(on_update, GapEvtDataLengthUpdate)
+
+
+def run_notifications(char, remote_char, payload_size):
+    received = []
+    done = threading.Event()
+
+    def on_notification(characteristic, event_args):
+        received.append(len(event_args.value))
+        if len(received) == NOTIFICATION_COUNT:
+            done.set()
+
+    remote_char.subscribe(on_notification).wait(10)
+    payload = b"\xAA" * payload_size
+    start = time.perf_counter()
+    for _ in range(NOTIFICATION_COUNT):
+        char.notify(payload)
+    done.wait(60)
+    elapsed = time.perf_counter() - start
+    remote_char.unsubscribe().wait(10)
+    return sum(received) / elapsed
+
+
+def run_writes(remote_char, payload_size):
+    payload = b"\x55" * payload_size
+    start = time.perf_counter()
+    for _ in range(WRITE_COUNT):
+        remote_char.write(payload).wait(10)
+    elapsed = time.perf_counter() - start
+    return WRITE_COUNT * payload_size / elapsed
+
+
+def run_write_commands(remote_char, payload_size):
+    # The same amount of data as run_writes(), as a single buffer split into packets by the GATT client
+    data = b"\x55" * (payload_size * WRITE_COUNT)
+    start = time.perf_counter()
+    remote_char.write_without_response(data).wait(10)
+    elapsed = time.perf_counter() - start
+    return len(data) / elapsed
+
+
+def main():
+    periph, central, char, peer = _open_devices()
+    remote_char = peer.database.find_characteristic(CHAR_UUID)
+    payload_size = peer.mtu_size - 3
+    print("ATT MTU {}, {} notifications and {} write requests/commands of {} bytes per run".format(
+        peer.mtu_size, NOTIFICATION_COUNT, WRITE_COUNT, payload_size))
+    print("{:>12} {:>8} {:>8} {:>5} {:>16} {:>16} {:>16}".format("interval ms", "pkts/evt", "lat. ms", "DLE",
+                                                                  "notify (kB/s)", "write req (kB/s)",
+                                                                  "write cmd (kB/s)"))
+    try:
+        for dle in (False, True):
+            _set_data_length(central, peer, dle)
+            for interval_ms, packets_per_event, latency_ms in LINK_CONFIGS:
+                nrf_sim.configure_link(interval_ms, packets_per_event, latency_ms)
+                notify_rate = run_notifications(char, remote_char, payload_size)
+                write_rate = run_writes(remote_char, payload_size)
+                write_cmd_rate = run_write_commands(remote_char, payload_size)
+                print("{:>12} {:>8} {:>8} {:>5} {:>16,.1f} {:>16,.1f} {:>16,.1f}".format(
+                    interval_ms, packets_per_event, latency_ms, "on" if dle else "off",
+                    notify_rate / 1000, write_rate / 1000, write_cmd_rate / 1000))
+    finally:
+        nrf_sim.configure_link()
+        peer.disconnect().wait(10)
+        central.close()
+        periph.close()
+
+
+if __name__ == '__main__':
+    main()
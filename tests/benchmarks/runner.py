@@ -0,0 +1,341 @@
+"""
+Minimal benchmark runner used by tests.benchmarks.suite.
+
+Benchmarks are registered with the @benchmark decorator. The decorated function does the setup and returns
+the operation to time, a callable which takes no arguments. It can also return ``(operation, round_setup)``,
+in which case round_setup is called before each timed round, outside of the timing.
+Benchmarks registered with ``allocations=True`` also count the memory blocks allocated by one operation which are
+still referenced by its return value, e.g. the objects it creates.
+
+Each benchmark is calibrated so that one round takes at least min_time, then timed for a number of rounds.
+Results are stored as JSON, one file per commit, so that runs on different commits can be compared
+"""
+import argparse
+import datetime
+import fnmatch
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_ROUNDS = 5
+DEFAULT_MIN_TIME_S = 0.1
+DEFAULT_THRESHOLD = 0.10
+
+
+class Benchmark(object):
+    def __init__(self, name, setup, rounds=None, iterations=None, allocations=False):
+        self.name = name
+        self.setup = setup
+        self.rounds = rounds
+        """Number of timed rounds, None to use the runner's default"""
+        self.iterations = iterations
+        """Number of operations per round, None to calibrate against the minimum round time"""
+        self.allocations = allocations
+        """Flag to also measure the allocations of an operation"""
+
+
+class BenchmarkResult(object):
+    def __init__(self, name, times, iterations, allocated_blocks=None, allocated_bytes=None):
+        """
+        :param name: The benchmark name
+        :param times: The duration of each round, in seconds
+        :param iterations: The number of operations per round
+        :param allocated_blocks: The number of memory blocks allocated by an operation, None if not measured
+        :param allocated_bytes: The size of those blocks, None if not measured
+        """
+        self.name = name
+        self.iterations = iterations
+        self.per_op = [t / iterations for t in times]
+        self.allocated_blocks = allocated_blocks
+        self.allocated_bytes = allocated_bytes
+
+    @property
+    def min(self):
+        return min(self.per_op)
+
+    @property
+    def median(self):
+        return statistics.median(self.per_op)
+
+    @property
+    def stddev(self):
+        return statistics.stdev(self.per_op) if len(self.per_op) > 1 else 0.0
+
+    def to_dict(self):
+        result = {"min": self.min, "median": self.median, "mean": statistics.mean(self.per_op),
+                  "stddev": self.stddev, "rounds": len(self.per_op), "iterations": self.iterations}
+        if self.allocated_blocks is not None:
+            result["allocated_blocks"] = self.allocated_blocks
+            result["allocated_bytes"] = self.allocated_bytes
+        return result
+
+
+_registry = []
+
+
+def benchmark(name, rounds=None, iterations=None, allocations=False):
+    """
+    Registers a benchmark
+
+    :param name: Unique, dotted name of the benchmark, e.g. ``event_decode.gattc_hvx``
+    :param rounds: Number of timed rounds, None to use the runner's default
+    :param iterations: Number of operations per round, None to calibrate against the minimum round time
+    :param allocations: Flag to also count the memory blocks allocated by an operation
+                        which are still referenced by its return value
+    """
+    def decorator(func):
+        _registry.append(Benchmark(name, func, rounds, iterations, allocations))
+        return func
+    return decorator
+
+
+def registered_benchmarks():
+    return list(_registry)
+
+
+def _time_round(operation, iterations):
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        return time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _measure_allocations(operation):
+    """
+    Runs the operation once with tracing enabled
+
+    :return: The number of memory blocks allocated by the operation which its return value still references,
+             and their total size in bytes
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        result = operation()
+        # Only allocations made since tracing started are in the snapshot, anything already freed is not
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        if gc_enabled:
+            gc.enable()
+    del result
+    stats = snapshot.statistics("filename")
+    return sum(s.count for s in stats), sum(s.size for s in stats)
+
+
+def _calibrate(operation, min_time):
+    iterations = 1
+    while True:
+        elapsed = _time_round(operation, iterations)
+        if elapsed >= min_time or iterations >= 1000000:
+            return iterations
+        # Aim a bit past the minimum so the timed rounds do not fall just short of it
+        scale = min_time * 1.2 / elapsed if elapsed > 0 else 10
+        iterations = max(iterations + 1, int(iterations * min(scale, 10)))
+
+
+def run_benchmark(bench, rounds=DEFAULT_ROUNDS, min_time=DEFAULT_MIN_TIME_S):
+    """
+    Sets up, calibrates and times a benchmark
+
+    :rtype: BenchmarkResult
+    """
+    setup_result = bench.setup()
+    if isinstance(setup_result, tuple):
+        operation, round_setup = setup_result
+    else:
+        operation, round_setup = setup_result, None
+    rounds = bench.rounds or rounds
+
+    if round_setup:
+        round_setup()
+    iterations = bench.iterations or _calibrate(operation, min_time)
+    times = []
+    for _ in range(rounds):
+        if round_setup:
+            round_setup()
+        times.append(_time_round(operation, iterations))
+    allocated_blocks = allocated_bytes = None
+    if bench.allocations:
+        if round_setup:
+            round_setup()
+        allocated_blocks, allocated_bytes = _measure_allocations(operation)
+    return BenchmarkResult(bench.name, times, iterations, allocated_blocks, allocated_bytes)
+
+
+def _git(*args):
+    try:
+        return subprocess.check_output(("git",) + args, stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def current_commit_label():
+    """
+    Gets the label results are stored under by default: the short commit hash, suffixed with -dirty
+    if the working tree has uncommitted changes
+    """
+    commit = _git("rev-parse", "--short", "HEAD")
+    if commit is None:
+        return "unknown"
+    if _git("status", "--porcelain", "--untracked-files=no"):
+        commit += "-dirty"
+    return commit
+
+
+def results_path(label_or_path):
+    if os.path.isfile(label_or_path):
+        return label_or_path
+    return os.path.join(RESULTS_DIR, "{}.json".format(label_or_path))
+
+
+def save_results(results, label):
+    """
+    Writes the results to the results directory
+
+    :return: The path of the results file
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    data = {
+        "label": label,
+        "commit": _git("rev-parse", "HEAD"),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {r.name: r.to_dict() for r in results},
+    }
+    path = results_path(label)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_results(label_or_path):
+    """
+    Loads stored results
+
+    :param label_or_path: A label (commit) in the results directory, or the path of a results file
+    :return: Dictionary of benchmark name to its stats
+    """
+    with open(results_path(label_or_path)) as f:
+        return json.load(f)["benchmarks"]
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "{:.3f} {}".format(seconds / scale, unit)
+    return "{:.1f} ns".format(seconds / 1e-9)
+
+
+def _format_allocations(blocks):
+    return "{} blocks".format(blocks)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Prints the fastest round of each benchmark next to the baseline's. The minimum is the least affected by
+    other load on the machine, so it is what the comparison is based on
+
+    :param results: The results of this run
+    :type results: list of BenchmarkResult
+    :param baseline: The stored results to compare against, see load_results()
+    :param threshold: Relative slowdown above which a benchmark counts as a regression
+    :return: The names of the benchmarks which regressed
+    """
+    regressions = []
+    print("{:<55} {:>14} {:>14} {:>9}".format("benchmark", "baseline", "current", "change"))
+    for r in results:
+        base = baseline.get(r.name)
+        if base is None:
+            print("{:<55} {:>14} {:>14} {:>9}".format(r.name, "-", _format_time(r.min), "new"))
+            continue
+        change = r.min / base["min"] - 1.0
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(r.name)
+        print("{:<55} {:>14} {:>14} {:>+8.1%}{}".format(r.name, _format_time(base["min"]),
+                                                         _format_time(r.min), change, marker))
+        if r.allocated_blocks is not None and "allocated_blocks" in base:
+            print("{:<55} {:>14} {:>14}".format("", _format_allocations(base["allocated_blocks"]),
+                                                 _format_allocations(r.allocated_blocks)))
+    return regressions
+
+
+def main(argv=None, teardown=None):
+    """
+    Command line entry point: runs the registered benchmarks, stores and optionally compares the results
+
+    :param argv: The command line arguments, defaults to sys.argv
+    :param teardown: Called once all benchmarks ran, e.g. to close devices opened during setup
+    :return: The process exit code
+    """
+    parser = argparse.ArgumentParser(description="Runs the blatann benchmark suite")
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="Only run benchmarks whose name matches this glob pattern (can be repeated)")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Timed rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME_S,
+                        help="Minimum duration of a round, in seconds")
+    parser.add_argument("--label", default=None,
+                        help="Label to store the results under (default: the current commit)")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results")
+    parser.add_argument("--compare", metavar="LABEL", default=None,
+                        help="Compare against stored results, given as a label (commit) or a file path")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown counted as a regression when comparing (default: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any benchmark regressed against the comparison")
+    args = parser.parse_args(argv)
+
+    benchmarks = registered_benchmarks()
+    if args.filter:
+        benchmarks = [b for b in benchmarks if any(fnmatch.fnmatch(b.name, p) for p in args.filter)]
+    if args.list:
+        for b in benchmarks:
+            print(b.name)
+        return 0
+
+    baseline = load_results(args.compare) if args.compare else None
+    results = []
+    try:
+        for bench in benchmarks:
+            result = run_benchmark(bench, args.rounds, args.min_time)
+            results.append(result)
+            print("{:<55} {:>14} (min {}, +/- {}, {} x {})".format(
+                bench.name, _format_time(result.median), _format_time(result.min), _format_time(result.stddev),
+                len(result.per_op), result.iterations))
+            if result.allocated_blocks is not None:
+                print("{:<55} {:>14} ({} bytes)".format("", _format_allocations(result.allocated_blocks),
+                                                       result.allocated_bytes))
+            sys.stdout.flush()
+    finally:
+        if teardown:
+            teardown()
+
+    if not args.no_save:
+        path = save_results(results, args.label or current_commit_label())
+        print("\nResults stored in {}".format(path))
+
+    if baseline is not None:
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
@@ -0,0 +1,215 @@
+"""
+Stand-in for the pc-ble-driver-py package so that blatann can be imported and benchmarked
+on machines which do not have the Nordic driver or a connectivity dongle.
+
+Call install() before importing anything from blatann. Struct types are plain attribute bags,
+arrays are Python lists, constants that carry meaning (lengths, limits, invalid handles) use the
+SoftDevice values and every other constant gets a unique integer so that the enums and
+event id lookups built from them stay consistent.
+"""
+import itertools
+import sys
+import types
+
+
+_CONSTANTS = {
+    "NRF_SUCCESS": 0,
+    "BLE_CONN_HANDLE_INVALID": 0xFFFF,
+    "BLE_GATT_HANDLE_INVALID": 0x0000,
+    "BLE_GATT_ATT_MTU_DEFAULT": 23,
+    "BLE_GATT_STATUS_SUCCESS": 0x0000,
+    "BLE_GATT_HVX_INVALID": 0x00,
+    "BLE_GATT_HVX_NOTIFICATION": 0x01,
+    "BLE_GATT_HVX_INDICATION": 0x02,
+    "BLE_HCI_STATUS_CODE_SUCCESS": 0x00,
+    "BLE_UUID_TYPE_UNKNOWN": 0x00,
+    "BLE_UUID_TYPE_BLE": 0x01,
+    "BLE_UUID_TYPE_VENDOR_BEGIN": 0x02,
+    "BLE_GAP_ADDR_LEN": 6,
+    "BLE_GAP_SEC_KEY_LEN": 16,
+    "BLE_GAP_SEC_RAND_LEN": 8,
+    "BLE_GAP_LESC_P256_PK_LEN": 64,
+    "BLE_GAP_LESC_DHKEY_LEN": 32,
+    "BLE_GAP_PASSKEY_LEN": 6,
+    "BLE_GAP_ADV_INTERVAL_MIN": 0x0020,
+    "BLE_GAP_ADV_INTERVAL_MAX": 0x4000,
+    "BLE_GAP_SCAN_INTERVAL_MIN": 0x0004,
+    "BLE_GAP_SCAN_INTERVAL_MAX": 0x4000,
+    "BLE_GAP_SCAN_WINDOW_MIN": 0x0004,
+    "BLE_GAP_SCAN_WINDOW_MAX": 0x4000,
+    "BLE_GAP_SCAN_TIMEOUT_MIN": 0x0001,
+    "BLE_GAP_SCAN_TIMEOUT_MAX": 0xFFFF,
+    "BLE_GAP_CP_MIN_CONN_INTVL_MIN": 0x0006,
+    "BLE_GAP_CP_MAX_CONN_INTVL_MAX": 0x0C80,
+    "BLE_GAP_CP_CONN_SUP_TIMEOUT_MIN": 0x000A,
+    "BLE_GAP_CP_CONN_SUP_TIMEOUT_MAX": 0x0C80,
+    "BLE_GAP_ADV_TYPE_ADV_IND": 0x00,
+    "BLE_GAP_ADV_TYPE_ADV_DIRECT_IND": 0x01,
+    "BLE_GAP_ADV_TYPE_ADV_SCAN_IND": 0x02,
+    "BLE_GAP_ADV_TYPE_ADV_NONCONN_IND": 0x03,
+    "BLE_GAP_AD_TYPE_FLAGS": 0x01,
+    "BLE_GAP_AD_TYPE_16BIT_SERVICE_UUID_MORE_AVAILABLE": 0x02,
+    "BLE_GAP_AD_TYPE_16BIT_SERVICE_UUID_COMPLETE": 0x03,
+    "BLE_GAP_AD_TYPE_32BIT_SERVICE_UUID_MORE_AVAILABLE": 0x04,
+    "BLE_GAP_AD_TYPE_32BIT_SERVICE_UUID_COMPLETE": 0x05,
+    "BLE_GAP_AD_TYPE_128BIT_SERVICE_UUID_MORE_AVAILABLE": 0x06,
+    "BLE_GAP_AD_TYPE_128BIT_SERVICE_UUID_COMPLETE": 0x07,
+    "BLE_GAP_AD_TYPE_SHORT_LOCAL_NAME": 0x08,
+    "BLE_GAP_AD_TYPE_COMPLETE_LOCAL_NAME": 0x09,
+    "BLE_GAP_AD_TYPE_TX_POWER_LEVEL": 0x0A,
+    "BLE_GAP_AD_TYPE_CLASS_OF_DEVICE": 0x0D,
+    "BLE_GAP_AD_TYPE_SIMPLE_PAIRING_HASH_C": 0x0E,
+    "BLE_GAP_AD_TYPE_SIMPLE_PAIRING_RANDOMIZER_R": 0x0F,
+    "BLE_GAP_AD_TYPE_SECURITY_MANAGER_TK_VALUE": 0x10,
+    "BLE_GAP_AD_TYPE_SECURITY_MANAGER_OOB_FLAGS": 0x11,
+    "BLE_GAP_AD_TYPE_SLAVE_CONNECTION_INTERVAL_RANGE": 0x12,
+    "BLE_GAP_AD_TYPE_SOLICITED_SERVICE_UUIDS_16BIT": 0x14,
+    "BLE_GAP_AD_TYPE_SOLICITED_SERVICE_UUIDS_128BIT": 0x15,
+    "BLE_GAP_AD_TYPE_SERVICE_DATA": 0x16,
+    "BLE_GAP_AD_TYPE_PUBLIC_TARGET_ADDRESS": 0x17,
+    "BLE_GAP_AD_TYPE_RANDOM_TARGET_ADDRESS": 0x18,
+    "BLE_GAP_AD_TYPE_APPEARANCE": 0x19,
+    "BLE_GAP_AD_TYPE_ADVERTISING_INTERVAL": 0x1A,
+    "BLE_GAP_AD_TYPE_LE_BLUETOOTH_DEVICE_ADDRESS": 0x1B,
+    "BLE_GAP_AD_TYPE_LE_ROLE": 0x1C,
+    "BLE_GAP_AD_TYPE_SIMPLE_PAIRING_HASH_C256": 0x1D,
+    "BLE_GAP_AD_TYPE_SIMPLE_PAIRING_RANDOMIZER_R256": 0x1E,
+    "BLE_GAP_AD_TYPE_SERVICE_DATA_32BIT_UUID": 0x20,
+    "BLE_GAP_AD_TYPE_SERVICE_DATA_128BIT_UUID": 0x21,
+    "BLE_GAP_AD_TYPE_URI": 0x24,
+    "BLE_GAP_AD_TYPE_3D_INFORMATION_DATA": 0x3D,
+    "BLE_GAP_AD_TYPE_MANUFACTURER_SPECIFIC_DATA": 0xFF,
+    "BLE_GAP_PHY_AUTO": 0x00,
+    "BLE_GAP_PHY_1MBPS": 0x01,
+    "BLE_GAP_PHY_2MBPS": 0x02,
+    "BLE_GAP_PHY_CODED": 0x04,
+    "BLE_GATTC_WRITE_CMD_TX_QUEUE_SIZE_DEFAULT": 1,
+    "BLE_GATTS_HVN_TX_QUEUE_SIZE_DEFAULT": 1,
+}
+
+_auto_values = itertools.count(0x1000)
+
+
+class _Struct(object):
+    """
+    Attribute bag standing in for a SWIG struct proxy. Nested structs are created on first access
+    """
+    def __getattr__(self, item):
+        if item.startswith("__"):
+            raise AttributeError(item)
+        value = _Struct()
+        setattr(self, item, value)
+        return value
+
+
+class _Array(list):
+    """
+    List standing in for a SWIG carrays class (uint8_array, ble_gattc_service_array, etc.)
+    """
+    def __init__(self, size=0):
+        super(_Array, self).__init__([0] * size)
+
+    def cast(self):
+        return self
+
+    @staticmethod
+    def frompointer(pointer):
+        return pointer
+
+
+def _sd_call(*args, **kwargs):
+    return _CONSTANTS["NRF_SUCCESS"]
+
+
+def _new_value():
+    return [0]
+
+
+def _value_get(box):
+    return box[0]
+
+
+def _value_assign(box, value):
+    box[0] = value
+
+
+def _ble_evt_to_bytes(ble_event):
+    # Imported on use, the stub has to be installed before anything from blatann is imported
+    from blatann.nrf.nrf_sim.structs import struct_to_bytes
+    return struct_to_bytes(ble_event)
+
+
+def _ble_evt_from_bytes(data):
+    from blatann.nrf.nrf_sim.structs import struct_from_bytes
+    return struct_from_bytes(data, _Struct)
+
+
+def _build_driver_module(name):
+    module = types.ModuleType(name)
+    # The stub's events are attribute bags rather than C structs, they are copied the way the simulated backend does
+    module.ble_evt_to_bytes = _ble_evt_to_bytes
+    module.ble_evt_from_bytes = _ble_evt_from_bytes
+    struct_types = {}
+    array_types = {}
+
+    def __getattr__(attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        if attr.isupper():
+            value = _CONSTANTS.get(attr)
+            if value is None:
+                value = next(_auto_values)
+            setattr(module, attr, value)
+            return value
+        if attr.endswith("_array"):
+            return array_types.setdefault(attr, type(attr, (_Array,), {}))
+        if attr.endswith("_t"):
+            return struct_types.setdefault(attr, type(attr, (_Struct,), {}))
+        if attr.startswith("sd_"):
+            return _sd_call
+        if attr.startswith("new_"):
+            return _new_value
+        if attr.endswith("_value"):
+            return _value_get
+        if attr.endswith("_assign"):
+            return _value_assign
+        raise AttributeError(attr)
+
+    module.__getattr__ = __getattr__
+    return module
+
+
+class NordicSemiException(Exception):
+    pass
+
+
+def install():
+    """
+    Installs the stub pc_ble_driver_py package into sys.modules.
+    Does nothing if pc_ble_driver_py is already imported
+    """
+    if "pc_ble_driver_py" in sys.modules:
+        return
+
+    package = types.ModuleType("pc_ble_driver_py")
+    package.__path__ = []
+    config = types.ModuleType("pc_ble_driver_py.config")
+    config.__conn_ic_id__ = None
+    exceptions = types.ModuleType("pc_ble_driver_py.exceptions")
+    exceptions.NordicSemiException = NordicSemiException
+    lib = types.ModuleType("pc_ble_driver_py.lib")
+    lib.__path__ = []
+    driver = _build_driver_module("pc_ble_driver_py.lib.nrf_ble_driver_sd_api_v5")
+
+    package.config = config
+    package.exceptions = exceptions
+    package.lib = lib
+    lib.nrf_ble_driver_sd_api_v5 = driver
+
+    sys.modules.update({
+        "pc_ble_driver_py": package,
+        "pc_ble_driver_py.config": config,
+        "pc_ble_driver_py.exceptions": exceptions,
+        "pc_ble_driver_py.lib": lib,
+        "pc_ble_driver_py.lib.nrf_ble_driver_sd_api_v5": driver,
+    })
@@ -0,0 +1,605 @@
+"""
+Benchmark suite covering blatann's stack from event decoding up to GATT procedures.
+
+* event_decode.*: event_decode() of one raw event per event type
+* driver.*: NrfDriver._decode_ble_event() and _process_ble_event(), i.e. decode and dispatch to an observer
+  and subscribed handlers
+* event_source.*: EventSource.notify() to 1 and 50 handlers, and registering/deregistering a handler
+* waitables.*: the waitable of a single operation from creation to wait(), and completing 1,000 outstanding
+  IdBasedEventWaitables as when queueing notifications. These also count the memory blocks the waitables allocate.
+  The wait_* ones wait for 200 waitables completed by another thread: one by one, with wait_all() or as_completed()
+* adv_data.*: BLEAdvData.from_c()/to_c() and AdvertisingData.from_ble_adv_records()
+* gap_params.*: to_c() of the connection and advertising parameters passed on each connect/advertise
+* scan_reports.*: ScanReportCollection.update() with 10,000 advertising reports
+* data_stream.*: BleDataStream codecs, from single integers up to glucose measurements
+* gatt.*: read/write/notify round-trips, reading 10 characteristics one by one and with read_multiple(),
+  and discovery of a 50 service database
+
+The driver is the simulated backend (BLATANN_DRIVER_BACKEND=sim), no hardware is needed. The raw events are
+captured from a scripted session between two simulated devices, the GATT benchmarks run between the same
+two devices with the link timing disabled so only blatann's own overhead is measured.
+
+Results are stored in tests/benchmarks/results/<commit>.json, compare against an earlier commit with --compare.
+
+Run with: python -m tests.benchmarks.suite [-k PATTERN] [--compare COMMIT]
+"""
+import os
+os.environ["BLATANN_DRIVER_BACKEND"] = "sim"
+
+import datetime
+import queue
+import sys
+import threading
+from types import SimpleNamespace
+
+from blatann import BleDevice
+from blatann.event_type import EventSource
+from blatann.gap.advertise_data import AdvertisingData, ScanReportCollection
+from blatann.gatt import gatts
+from blatann.nrf import nrf_events, nrf_sim
+from blatann.nrf.nrf_driver import NrfDriver, NrfDriverObserver
+from blatann.nrf.nrf_events import event_decode
+from blatann.nrf.nrf_types import (BLEAdvData, BLEGapAddr, BLEGapAddrTypes, BLEGapAdvParams, BLEGapAdvType,
+                                  BLEGapConnParams, BLEGapDataLengthParams)
+from blatann.services import ble_data_types
+from blatann.services.glucose import data_types as glucose
+from blatann.uuid import Uuid16, Uuid128
+from blatann.waitables import wait_all, as_completed
+from blatann.waitables.event_waitable import EventWaitable, IdBasedEventWaitable
+from blatann.waitables.waitable import GenericWaitable
+
+from tests.benchmarks.runner import benchmark, main
+
+
+SERVICE_BASE_UUID = Uuid128("6b1e0000-52a4-4c1d-9d3b-7e0c4f9a2d15")
+DATABASE_SERVICE_COUNT = 50
+MTU_SIZE = 247
+SCAN_REPORT_COUNT = 10000
+SCAN_PEER_COUNT = 200
+
+DECODED_EVENT_TYPES = [
+    nrf_events.GapEvtAdvReport,
+    nrf_events.GapEvtConnected,
+    nrf_events.GapEvtDisconnected,
+    nrf_events.GapEvtConnParamUpdate,
+    nrf_events.GapEvtDataLengthUpdate,
+    nrf_events.GattcEvtPrimaryServiceDiscoveryResponse,
+    nrf_events.GattcEvtCharacteristicDiscoveryResponse,
+    nrf_events.GattcEvtDescriptorDiscoveryResponse,
+    nrf_events.GattcEvtMtuExchangeResponse,
+    nrf_events.GattcEvtReadResponse,
+    nrf_events.GattcEvtWriteResponse,
+    nrf_events.GattcEvtHvx,
+    nrf_events.GattsEvtWrite,
+    nrf_events.GattsEvtHandleValueConfirm,
+    nrf_events.GattsEvtNotificationTxComplete,
+    nrf_events.GattsEvtExchangeMtuRequest,
+]
+
+
+class _SimSession(object):
+    """
+    Two simulated devices, the peripheral hosting a database of DATABASE_SERVICE_COUNT services.
+    Every raw event either device receives is kept (the latest one per event type) for the decode benchmarks
+    """
+    def __init__(self):
+        self.raw_events = {}
+        self.periph = BleDevice("BENCH-PERIPH")
+        self.central = BleDevice("BENCH-CENTRAL")
+        for device in (self.periph, self.central):
+            device.configure(att_mtu_max_size=MTU_SIZE)
+            self._record_raw_events(device.ble_driver)
+            device.open()
+        self.periph.client.preferred_mtu_size = MTU_SIZE
+
+        self.chars = []
+        self.read_only_chars = []
+        for i in range(DATABASE_SERVICE_COUNT):
+            service = self.periph.database.add_service(SERVICE_BASE_UUID.new_uuid_from_base(0x100 * (i + 1)))
+            props = gatts.GattsCharacteristicProperties(read=True, write=True, notify=True, indicate=True,
+                                                        max_length=MTU_SIZE - 3, variable_length=True)
+            self.chars.append(service.add_characteristic(service.uuid.new_uuid_from_base(0x100 * (i + 1) + 1),
+                                                         props, b"\x00" * 20))
+            props = gatts.GattsCharacteristicProperties(read=True, max_length=20)
+            self.read_only_chars.append(service.add_characteristic(service.uuid.new_uuid_from_base(0x100 * (i + 1) + 2),
+                                                                   props, b"\x01" * 20))
+
+        self.periph.advertiser.set_advertise_data(AdvertisingData(local_name="BenchPeriph", flags=0x06,
+                                                                  manufacturer_data=b"\x59\x00\x01\x02\x03"))
+        self.periph.advertiser.start(adv_interval_ms=20, timeout_sec=0, auto_restart=True)
+        self.peer = None
+        self.discovered = False
+
+    def _record_raw_events(self, nrf_driver):
+        # The driver passes its handler to the adapter on open, so it has to be wrapped beforehand
+        handler = nrf_driver.ble_evt_handler
+
+        def record(adapter, ble_event):
+            event_cls = nrf_events.event_class_get(ble_event.header.evt_id)
+            if event_cls is not None:
+                self.raw_events[event_cls] = ble_event
+            handler(adapter, ble_event)
+        nrf_driver.ble_evt_handler = record
+
+    def connect(self):
+        """
+        Creates a new connection between the two devices, dropping the current one
+        """
+        if self.peer is not None and self.peer.connected:
+            self.peer.disconnect().wait(10)
+        self.peer = self.central.connect(self.periph.address).wait(10)
+        self.peer.exchange_mtu(MTU_SIZE).wait(10)
+        self.discovered = False
+        return self.peer
+
+    def discovered_peer(self):
+        if self.peer is None or not self.peer.connected or not self.discovered:
+            self.connect()
+            self.peer.discover_services().wait(30)
+            self.discovered = True
+        return self.peer
+
+    def remote_char(self, index):
+        return self.discovered_peer().database.find_characteristic(self.chars[index].uuid)
+
+    def remote_read_only_chars(self, count):
+        database = self.discovered_peer().database
+        return [database.find_characteristic(c.uuid) for c in self.read_only_chars[:count]]
+
+    def subscribe(self, index, on_notification, prefer_indications=False):
+        """
+        Subscribes to a characteristic and waits until the peripheral has processed the CCCD write
+        """
+        subscribed = threading.Event()
+        char = self.chars[index]
+        on_change = lambda characteristic, event_args: subscribed.set()
+        char.on_subscription_change.register(on_change)
+        self.remote_char(index).subscribe(on_notification, prefer_indications=prefer_indications).wait(10)
+        subscribed.wait(10)
+        char.on_subscription_change.deregister(on_change)
+        return self.remote_char(index)
+
+    def run_scripted_session(self):
+        """
+        Runs the procedures which generate each of DECODED_EVENT_TYPES
+        """
+        self.central.scanner.set_default_scan_params(timeout_seconds=0.2)
+        self.central.scanner.start_scan().wait(10)
+
+        peer = self.discovered_peer()
+        remote_char = self.remote_char(0)
+        remote_char.read().wait(10)
+        remote_char.write(b"\x01\x02\x03\x04").wait(10)
+        for prefer_indications in (False, True):
+            received = threading.Event()
+            self.subscribe(0, lambda char, event_args: received.set(), prefer_indications)
+            self.chars[0].notify(b"\x05\x06\x07\x08").wait(10)
+            received.wait(10)
+            remote_char.unsubscribe().wait(10)
+
+        updated = threading.Event()
+        self.central.ble_driver.event_subscribe(lambda driver, event: updated.set(), nrf_events.GapEvtDataLengthUpdate)
+        self.central.ble_driver.ble_gap_data_length_update(peer.conn_handle, BLEGapDataLengthParams(251, 251))
+        updated.wait(10)
+
+        updated = threading.Event()
+        peer.driver_event_subscribe(lambda driver, event: updated.set(), nrf_events.GapEvtConnParamUpdate)
+        peer.set_connection_parameters(15, 30, 4000)
+        peer.update_connection_parameters()
+        updated.wait(10)
+
+        self.connect()
+        missing = [e.__name__ for e in DECODED_EVENT_TYPES if e not in self.raw_events]
+        if missing:
+            raise RuntimeError("The scripted session did not generate {}".format(", ".join(missing)))
+
+    def close(self):
+        if self.peer is not None and self.peer.connected:
+            self.peer.disconnect().wait(10)
+        self.central.close()
+        self.periph.close()
+
+
+_session = None
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        nrf_sim.configure_link(interval_ms=0)
+        _session = _SimSession()
+        _session.run_scripted_session()
+    return _session
+
+
+def _close_session():
+    if _session is not None:
+        _session.close()
+    nrf_sim.configure_link()
+
+
+"""
+Event decoding
+"""
+
+
+def _register_event_decode(event_cls):
+    @benchmark("event_decode.{}".format(event_cls.__name__))
+    def decode():
+        raw_event = _get_session().raw_events[event_cls]
+        return lambda: event_decode(raw_event)
+
+
+for _event_cls in DECODED_EVENT_TYPES:
+    _register_event_decode(_event_cls)
+
+
+"""
+Driver dispatch
+"""
+
+
+class _HvxObserver(NrfDriverObserver):
+    observed_event_types = (nrf_events.GattcEvtHvx,)
+
+
+def _dispatching_driver(event_type, handler_count, payload_attr):
+    """
+    Creates a driver with an observer interested in notifications only and handler_count handlers
+    subscribed to event_type, each of which reads payload_attr so the event payload gets decoded
+    """
+    nrf_driver = NrfDriver("BENCH-DISPATCH")
+    nrf_driver.observer_register(_HvxObserver())
+    for _ in range(handler_count):
+        nrf_driver.event_subscribe(lambda driver, event: getattr(event, payload_attr), event_type)
+    return nrf_driver
+
+
+def _process_raw_event(nrf_driver, raw_event):
+    # What the driver's event handler and event thread do for a single event, without the queue in between
+    event = nrf_driver._decode_ble_event(raw_event)
+    if event is not None:
+        nrf_driver._process_ble_event(event)
+
+
+@benchmark("driver.process_event.hvx_10_handlers")
+def process_hvx_event():
+    raw_event = _get_session().raw_events[nrf_events.GattcEvtHvx]
+    nrf_driver = _dispatching_driver(nrf_events.GattcEvtHvx, 10, "data")
+    return lambda: _process_raw_event(nrf_driver, raw_event)
+
+
+@benchmark("driver.process_event.adv_report_1_handler")
+def process_adv_report_event():
+    raw_event = _get_session().raw_events[nrf_events.GapEvtAdvReport]
+    nrf_driver = _dispatching_driver(nrf_events.GapEvtAdvReport, 1, "adv_data")
+    return lambda: _process_raw_event(nrf_driver, raw_event)
+
+
+@benchmark("driver.process_event.unwanted")
+def process_unwanted_event():
+    # Nothing is subscribed to advertising reports, they are dropped before being decoded
+    raw_event = _get_session().raw_events[nrf_events.GapEvtAdvReport]
+    nrf_driver = _dispatching_driver(nrf_events.GattcEvtHvx, 1, "data")
+    return lambda: _process_raw_event(nrf_driver, raw_event)
+
+
+"""
+Event sources
+"""
+
+
+def _event_source(handler_count):
+    event = EventSource("Benchmark")
+    for _ in range(handler_count):
+        # Distinct handlers, registering the same function twice is a no-op
+        event.register(lambda sender, event_args: None)
+    return event
+
+
+@benchmark("event_source.notify_1_handler")
+def event_source_notify_1_handler():
+    event = _event_source(1)
+    return lambda: event.notify(None, None)
+
+
+@benchmark("event_source.notify_50_handlers")
+def event_source_notify_50_handlers():
+    event = _event_source(50)
+    return lambda: event.notify(None, None)
+
+
+@benchmark("event_source.register_deregister_50_handlers")
+def event_source_register_deregister():
+    event = _event_source(50)
+
+    def handler(sender, event_args):
+        pass
+
+    def register_deregister():
+        event.register(handler)
+        event.deregister(handler)
+    return register_deregister
+
+
+@benchmark("waitables.event_waitable_cycle", allocations=True)
+def event_waitable_cycle():
+    # e.g. the waitable returned by Peer.exchange_mtu()
+    event = EventSource("Benchmark")
+
+    def create_complete_wait():
+        waitable = EventWaitable(event)
+        event.notify(None, None)
+        waitable.wait(0)
+        return waitable
+    return create_complete_wait
+
+
+@benchmark("waitables.id_based_cycle", allocations=True)
+def id_based_waitable_cycle():
+    # The waitable of a single read, write or notification
+    event = EventSource("Benchmark")
+    completion = SimpleNamespace(id=1)
+
+    def create_complete_wait():
+        waitable = IdBasedEventWaitable(event, completion.id)
+        event.notify(None, completion)
+        waitable.wait(0)
+        return waitable
+    return create_complete_wait
+
+
+@benchmark("waitables.id_based_1000_outstanding", allocations=True)
+def id_based_waitables():
+    # The waitables returned by e.g. GattsCharacteristic.notify(), all created before the first one completes
+    event = EventSource("Benchmark")
+    completions = [SimpleNamespace(id=i) for i in range(1000)]
+
+    def create_and_complete():
+        waitables = [IdBasedEventWaitable(event, c.id) for c in completions]
+        for c in completions:
+            event.notify(None, c)
+        return waitables
+    return create_and_complete
+
+
+def _waitable_batches(wait):
+    # The batches are completed by a thread standing in for the driver's event thread
+    batches = queue.Queue()
+
+    def complete_batches():
+        while True:
+            for i, waitable in enumerate(batches.get()):
+                waitable.notify(i)
+
+    threading.Thread(target=complete_batches, daemon=True).start()
+
+    def create_and_wait():
+        waitables = [GenericWaitable() for _ in range(200)]
+        batches.put(waitables)
+        return wait(waitables)
+    return create_and_wait
+
+
+@benchmark("waitables.wait_each_200")
+def wait_each():
+    return _waitable_batches(lambda waitables: [w.wait(5) for w in waitables])
+
+
+@benchmark("waitables.wait_all_200")
+def wait_all_200():
+    return _waitable_batches(lambda waitables: wait_all(waitables, 5))
+
+
+@benchmark("waitables.wait_as_completed_200")
+def wait_as_completed_200():
+    return _waitable_batches(lambda waitables: [w.wait(0) for w in as_completed(waitables, 5)])
+
+
+"""
+Advertising data
+"""
+
+
+@benchmark("adv_data.ble_adv_data_from_c")
+def ble_adv_data_from_c():
+    adv_report = _get_session().raw_events[nrf_events.GapEvtAdvReport].evt.gap_evt.params.adv_report
+    return lambda: BLEAdvData.from_c(adv_report)
+
+
+@benchmark("adv_data.advertising_data_from_records")
+def advertising_data_from_records():
+    records = event_decode(_get_session().raw_events[nrf_events.GapEvtAdvReport]).adv_data.records
+    # from_ble_adv_records() consumes the records it converts
+    return lambda: AdvertisingData.from_ble_adv_records(records.copy())
+
+
+@benchmark("adv_data.ble_adv_data_to_c")
+def ble_adv_data_to_c():
+    # The advertiser builds a new BLEAdvData each time the advertising data is set
+    adv_data = AdvertisingData(local_name="Benchmark", flags=0x06, service_uuid16s=[Uuid16(0x180D), Uuid16(0x180F)])
+    return lambda: adv_data.to_ble_adv_data().to_c()
+
+
+"""
+GAP parameters
+"""
+
+
+@benchmark("gap_params.adv_params_to_c")
+def adv_params_to_c():
+    params = BLEGapAdvParams(interval_ms=100, timeout_s=0)
+    return params.to_c
+
+
+@benchmark("gap_params.conn_params_to_c")
+def conn_params_to_c():
+    params = BLEGapConnParams(min_conn_interval_ms=15, max_conn_interval_ms=30, conn_sup_timeout_ms=4000,
+                              slave_latency=0)
+    return params.to_c
+
+
+"""
+Scan reports
+"""
+
+
+def _adv_reports(count, peer_count):
+    """
+    Creates advertising reports from peer_count peers which repeat the same advertising data, like beacons
+    """
+    reports = []
+    for i in range(count):
+        peer = i % peer_count
+        addr = BLEGapAddr(BLEGapAddrTypes.random_static, [0xC0, 0x00, 0x00, 0x00, peer >> 8, peer & 0xFF])
+        name = "Sensor {}".format(peer)
+        adv_data = BLEAdvData(flags=[0x06], complete_local_name=[ord(c) for c in name],
+                              manufacturer_specific_data=[0x59, 0x00, peer & 0xFF])
+        reports.append(nrf_events.GapEvtAdvReport(conn_handle=0xFFFF, peer_addr=addr, rssi=-40 - peer % 50,
+                                                  adv_type=BLEGapAdvType.connectable_undirected,
+                                                  adv_data=adv_data))
+    return reports
+
+
+@benchmark("scan_reports.update_10k_reports", rounds=3, iterations=1)
+def scan_report_collection_update():
+    reports = _adv_reports(SCAN_REPORT_COUNT, SCAN_PEER_COUNT)
+
+    def update_all():
+        collection = ScanReportCollection()
+        for report in reports:
+            collection.update(report)
+    return update_all
+
+
+"""
+BleDataStream codecs
+"""
+
+
+def _encode_decode(ble_type, value):
+    def encode_decode():
+        stream = ble_data_types.BleDataStream()
+        stream.encode(ble_type, value)
+        stream.decode(ble_type)
+    return encode_decode
+
+
+@benchmark("data_stream.uint16")
+def data_stream_uint16():
+    return _encode_decode(ble_data_types.Uint16, 0x1234)
+
+
+@benchmark("data_stream.uint32")
+def data_stream_uint32():
+    return _encode_decode(ble_data_types.Uint32, 0x12345678)
+
+
+@benchmark("data_stream.sfloat")
+def data_stream_sfloat():
+    return _encode_decode(ble_data_types.SFloat, 98.6)
+
+
+@benchmark("data_stream.date_time")
+def data_stream_date_time():
+    value = datetime.datetime(2020, 2, 29, 13, 37, 42)
+
+    def encode_decode():
+        stream = ble_data_types.BleDataStream()
+        stream.encode(ble_data_types.DateTime(value))
+        stream.decode(ble_data_types.DateTime)
+    return encode_decode
+
+
+def _glucose_measurement():
+    sample = glucose.GlucoseSample(glucose.GlucoseType.capillary_plasma, glucose.SampleLocation.finger, 0.0065)
+    return glucose.GlucoseMeasurement(42, datetime.datetime(2020, 2, 29, 13, 37, 42), 30, sample,
+                                      glucose.SensorStatus(glucose.SensorStatusType.battery_low))
+
+
+@benchmark("data_stream.glucose_measurement_encode")
+def glucose_measurement_encode():
+    return _glucose_measurement().encode
+
+
+@benchmark("data_stream.glucose_measurement_decode")
+def glucose_measurement_decode():
+    encoded = _glucose_measurement().encode().value
+    return lambda: glucose.GlucoseMeasurement.decode(ble_data_types.BleDataStream(encoded))
+
+
+@benchmark("data_stream.glucose_context_round_trip")
+def glucose_context_round_trip():
+    context = glucose.GlucoseContext(42, glucose.CarbsInfo(50, glucose.CarbohydrateType.lunch),
+                                     glucose.MealType.postprandial, glucose.TesterType.self,
+                                     glucose.HealthStatus.normal, glucose.ExerciseInfo(1800, 70),
+                                     glucose.MedicationInfo(glucose.MedicationType.rapid_acting_insulin, 10),
+                                     6.5)
+    return lambda: glucose.GlucoseContext.decode(context.encode())
+
+
+"""
+GATT procedures between the two simulated devices
+"""
+
+
+@benchmark("gatt.read")
+def gatt_read():
+    remote_char = _get_session().remote_char(0)
+    return lambda: remote_char.read().wait(10)
+
+
+@benchmark("gatt.read_10_sequential")
+def gatt_read_sequential():
+    remote_chars = _get_session().remote_read_only_chars(10)
+
+    def read_all():
+        for remote_char in remote_chars:
+            remote_char.read().wait(10)
+    return read_all
+
+
+@benchmark("gatt.read_multiple_10")
+def gatt_read_multiple():
+    session = _get_session()
+    remote_chars = session.remote_read_only_chars(10)
+    database = session.discovered_peer().database
+    # The first read learns the value lengths, the reads after that are batched into one request
+    wait_all(database.read_multiple(remote_chars, fixed_length=True), 10)
+    return lambda: wait_all(database.read_multiple(remote_chars, fixed_length=True), 10)
+
+
+@benchmark("gatt.write")
+def gatt_write():
+    remote_char = _get_session().remote_char(0)
+    payload = b"\x55" * 20
+    return lambda: remote_char.write(payload).wait(10)
+
+
+@benchmark("gatt.notify")
+def gatt_notify():
+    session = _get_session()
+    char = session.chars[1]
+    received = threading.Semaphore(0)
+    session.subscribe(1, lambda characteristic, event_args: received.release())
+    payload = b"\xAA" * 20
+
+    def notify():
+        char.notify(payload)
+        received.acquire(timeout=10)
+    return notify
+
+
+@benchmark("gatt.discover_50_services", iterations=1)
+def gatt_discover_services():
+    session = _get_session()
+
+    # Discovery on an already discovered peer adds to its database, so each round gets a new connection
+    def discover():
+        session.discovered = True
+        session.peer.discover_services().wait(60)
+    return discover, session.connect
+
+
+if __name__ == '__main__':
+    sys.exit(main(teardown=_close_session))
@@ -0,0 +1,19 @@
+"""
+Tests which run BleDevices against the simulated backend (see blatann.nrf.nrf_sim).
+
+The backend is selected when blatann's driver is first imported, so importing this package selects it for the
+whole process. The tests can run alongside the unit tests, which never load the driver, but not in the same
+process as tests against real hardware. They are skipped if the driver was already loaded, run them on their own
+with make run-sim-tests or python -m pytest tests/sim
+"""
+import os
+import sys
+import unittest
+
+# Can't import the variable's name from nrf_dll_load, that would load the default backend
+os.environ["BLATANN_DRIVER_BACKEND"] = "sim"
+
+_dll_load = sys.modules.get("blatann.nrf.nrf_dll_load")
+if _dll_load is not None and _dll_load.backend != "sim":
+    raise unittest.SkipTest("The driver was already loaded with the {!r} backend, run the simulated backend tests "
+                            "in their own process (make run-sim-tests)".format(_dll_load.backend))
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import time
+import unittest
+
+from blatann import BleDevice
+from blatann.gap import advertising
+from blatann.gap.default_bond_db import DefaultBondDatabaseLoader
+from blatann.nrf import nrf_sim
+from blatann.uuid import Uuid128
+
+SERVICE_UUID = Uuid128("8e6d0000-3e4b-4f83-9c4a-0b6f1d6c0a77")
+TIMEOUT = 10
+
+
+def wait_for(condition, timeout=TIMEOUT):
+    """
+    Polls the condition until it is true, e.g. for the events of the other device to be handled
+
+    :return: True if the condition became true before the timeout
+    """
+    end = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > end:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class SimDeviceTestCase(unittest.TestCase):
+    """
+    Base for tests which open devices on the simulated backend. The devices are closed after the test
+    """
+    # The connection interval to simulate, see nrf_sim.configure_link(). 0 sends packets without waiting
+    link_interval_ms = None
+
+    def setUp(self):
+        nrf_sim.configure_link(self.link_interval_ms)
+        bond_db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(bond_db_dir.cleanup)
+        self._bond_db_dir = bond_db_dir.name
+
+    def open_device(self, name, config=None, **device_kwargs):
+        """
+        Creates and opens a device with its own bond database
+
+        :param name: The device's name, unique to the test so each test's devices get their own addresses
+        :param config: The keyword arguments to configure the device with before opening it
+        :param device_kwargs: Additional arguments to create the BleDevice with
+        :rtype: BleDevice
+        """
+        device = BleDevice(name, **device_kwargs)
+        device.bond_db_loader = DefaultBondDatabaseLoader(os.path.join(self._bond_db_dir, "{}.pkl".format(id(device))))
+        if config:
+            device.configure(**config)
+        device.open()
+        self.addCleanup(device.close)
+        return device
+
+
+class SimTestCase(SimDeviceTestCase):
+    """
+    Opens a peripheral and a central on the simulated backend for every test.
+    The test sets up the peripheral's database, then connects the central to it with connect()
+    """
+    periph_config = {}
+    central_config = {}
+    # Additional arguments to create the peripheral's BleDevice with
+    periph_device_kwargs = {}
+    # Which MTU to exchange after connecting, None to keep the default
+    mtu_size = None
+
+    def setUp(self):
+        super(SimTestCase, self).setUp()
+        self.periph = self.open_device("PERIPH " + self.id(), self.periph_config, **self.periph_device_kwargs)
+        self.central = self.open_device("CENTRAL " + self.id(), self.central_config)
+        self.peer = None
+
+    def tearDown(self):
+        if self.peer is not None and self.peer.connected:
+            self.peer.disconnect().wait(TIMEOUT)
+
+    def add_service(self):
+        return self.periph.database.add_service(SERVICE_UUID)
+
+    def connect(self, discover=False):
+        """
+        Connects the central to the peripheral, exchanges the MTU and optionally discovers the peripheral's database
+
+        :return: The peripheral, as seen by the central
+        :rtype: blatann.peer.Peripheral
+        """
+        if self.mtu_size is not None:
+            self.periph.client.preferred_mtu_size = self.mtu_size
+        self.periph.advertiser.set_advertise_data(advertising.AdvertisingData(local_name="PERIPH", flags=0x06))
+        self.periph.advertiser.start(adv_interval_ms=20, timeout_sec=0)
+        self.peer = self.central.connect(self.periph.address).wait(TIMEOUT)
+        if self.mtu_size is not None:
+            self.peer.exchange_mtu(self.mtu_size).wait(TIMEOUT)
+        if discover:
+            self.peer.discover_services().wait(TIMEOUT)
+        return self.peer
@@ -0,0 +1,130 @@
+"""
+Tests of capturing a device's events and API calls, and playing the events back with the replay driver
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from blatann.gatt import gatts, GattStatusCode
+from blatann.nrf import nrf_events
+from blatann.nrf.nrf_capture import CaptureRecordType, read_capture
+from blatann.nrf.nrf_driver import NrfDriverObserver
+from blatann.nrf.nrf_replay_driver import ReplayDriver
+import blatann.nrf.nrf_driver_types as util
+
+from tests.sim.base import SimTestCase, SERVICE_UUID, TIMEOUT
+
+
+class TestCapture(SimTestCase):
+    def setUp(self):
+        super(TestCapture, self).setUp()
+        props = gatts.GattsCharacteristicProperties(read=True, max_length=20)
+        self.char = self.add_service().add_characteristic(SERVICE_UUID.new_uuid_from_base(1), props, b"captured")
+        self.capture_file = io.BytesIO()
+        self._start_capture()
+        peer = self.connect(discover=True)
+        _, event_args = peer.database.find_characteristic(self.char.uuid).read().wait(TIMEOUT)
+        self.assertEqual(GattStatusCode.success, event_args.status)
+        peer.disconnect().wait(TIMEOUT)
+        self.central.ble_driver.stop_capture()
+        self.records = list(read_capture(io.BytesIO(self.capture_file.getvalue())))
+
+    def _start_capture(self):
+        self.central.ble_driver.start_capture(self.capture_file)
+
+    def _events(self):
+        return [r.decode_event() for r in self.records if r.record_type == CaptureRecordType.event]
+
+    def test_events_stored_as_copied_from_driver(self):
+        event_records = [r for r in self.records if r.record_type == CaptureRecordType.event]
+        self.assertTrue(event_records)
+        for record in event_records:
+            self.assertIsInstance(record.data, bytes)
+
+    def test_events_decoded_from_capture(self):
+        events = self._events()
+        self.assertIsInstance(events[0], nrf_events.GapEvtConnected)
+        self.assertIsInstance(events[-1], nrf_events.GapEvtDisconnected)
+        reads = [e for e in events if isinstance(e, nrf_events.GattcEvtReadResponse)]
+        self.assertEqual([b"captured"], [e.data for e in reads if e.attr_handle == self.char.value_handle])
+
+    def test_api_calls_stored(self):
+        api_calls = [r.data for r in self.records if r.record_type == CaptureRecordType.api_call]
+        # Handles are stored as is, parameter objects as their repr()
+        reads = [c for c in api_calls if c.name == "ble_gattc_read" and self.char.value_handle in c.args]
+        self.assertEqual(1, len(reads))
+        self.assertEqual(0, reads[0].err_code)
+
+    def test_replayed_events_decoded_and_dispatched(self):
+        replay_driver = ReplayDriver(io.BytesIO(self.capture_file.getvalue()))
+        received = []
+        replay_driver.observer_register(NrfDriverObserver())
+        replay_driver.event_subscribe(lambda d, e: received.append(e), nrf_events.GattcEvtReadResponse)
+        replay_driver.open()
+        self.addCleanup(replay_driver.close)
+        replay_driver.replay(timeout=TIMEOUT)
+        self.assertEqual([b"captured"], [e.data for e in received if e.attr_handle == self.char.value_handle])
+
+
+class TestCaptureDecodedEvents(TestCapture):
+    """
+    Captures with a driver backend which cannot rebuild events from their bytes, e.g. pc_ble_driver_py
+    """
+    def _start_capture(self):
+        with mock.patch.object(util, "ble_evt_from_bytes_supported", return_value=False):
+            super(TestCaptureDecodedEvents, self)._start_capture()
+
+    def _events(self):
+        return [r.decode_event() for r in self.records if r.record_type == CaptureRecordType.decoded_event]
+
+    def test_events_stored_as_copied_from_driver(self):
+        self.assertFalse([r for r in self.records if r.record_type == CaptureRecordType.event])
+
+    def test_replayed_events_not_rebuilt(self):
+        with mock.patch.object(util, "ble_evt_from_bytes", side_effect=NotImplementedError):
+            replay_driver = ReplayDriver(io.BytesIO(self.capture_file.getvalue()))
+        received = []
+        replay_driver.observer_register(NrfDriverObserver())
+        replay_driver.event_subscribe(lambda d, e: received.append(e), nrf_events.GapEvtConnected,
+                                      nrf_events.GapEvtDisconnected)
+        replay_driver.open()
+        self.addCleanup(replay_driver.close)
+        replay_driver.replay(timeout=TIMEOUT)
+        self.assertEqual([nrf_events.GapEvtConnected, nrf_events.GapEvtDisconnected], [type(e) for e in received])
+
+
+class TestCaptureFileRoundTrip(SimTestCase):
+    mtu_size = 100
+    periph_config = central_config = dict(att_mtu_max_size=100)
+    def setUp(self):
+        super(TestCaptureFileRoundTrip, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.capture_path = os.path.join(self.temp_dir, "central.cap")
+
+    def test_connection_replayed_from_capture_file(self):
+        self.central.ble_driver.start_capture(self.capture_path)
+        peer = self.connect(discover=True)
+        peer.disconnect().wait(TIMEOUT)
+        self.central.ble_driver.stop_capture()
+        captured = [r.decode_event() for r in read_capture(self.capture_path)
+                    if r.record_type == CaptureRecordType.event]
+
+        replay_driver = ReplayDriver(self.capture_path)
+        self.assertEqual(len(captured), replay_driver.event_count)
+        received = []
+        replay_driver.observer_register(NrfDriverObserver())
+        replay_driver.event_subscribe(lambda d, e: received.append(e), *{type(e) for e in captured})
+        replay_driver.open()
+        self.addCleanup(replay_driver.close)
+        replay_driver.replay(timeout=TIMEOUT)
+        self.assertEqual([(type(e), e.conn_handle) for e in captured], [(type(e), e.conn_handle) for e in received])
+        mtu_responses = [e for e in received if isinstance(e, nrf_events.GattcEvtMtuExchangeResponse)]
+        self.assertEqual([self.mtu_size], [e.server_mtu for e in mtu_responses])
+
+
+if __name__ == '__main__':
+    unittest.main()
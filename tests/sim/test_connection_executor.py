@@ -0,0 +1,38 @@
+"""
+Tests of a BleDevice whose connection event handlers run on the connection executor
+"""
+import threading
+import time
+import unittest
+
+from tests.sim.base import SimTestCase, TIMEOUT
+
+
+class TestConnectionExecutor(SimTestCase):
+    periph_config = central_config = dict(att_mtu_max_size=100)
+    mtu_size = 100
+
+    def setUp(self):
+        super(TestConnectionExecutor, self).setUp()
+        self.periph.ble_driver.configure_connection_executor(4)
+        self.central.ble_driver.configure_connection_executor(4)
+
+    def test_exchange_mtu_right_after_connecting(self):
+        # Holds up the lane of the peripheral's first connection, so the MTU request is received
+        # before the connected event was dispatched and the peer subscribed its handlers
+        self.periph.ble_driver._connection_executor.submit(0, time.sleep, 0.2)
+        peer = self.connect()
+        self.assertEqual(100, peer.mtu_size)
+        self.assertEqual(100, self.periph.client.mtu_size)
+
+    def test_connection_events_handled_on_executor(self):
+        peer = self.connect()
+        threads = []
+        peer.on_disconnect.register(lambda p, e: threads.append(threading.current_thread().name))
+        peer.disconnect().wait(TIMEOUT)
+        self.assertEqual(1, len(threads))
+        self.assertIn("_Conn", threads[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Tests that driver events nobody listens for are discarded before being decoded
+"""
+import logging
+import unittest
+
+from blatann.device import logger as device_logger
+from blatann.nrf import nrf_events
+from blatann.nrf.nrf_driver import NrfDriverObserver
+from blatann.nrf.nrf_sim import constants
+from blatann.nrf.nrf_sim.softdevice import _gattc_event
+
+from tests.sim.base import SimDeviceTestCase
+
+
+class _RecordingObserver(NrfDriverObserver):
+    # Records every decoded event. Only needs GATTC timeouts itself, which nothing else on the device listens for
+    observed_event_types = (nrf_events.GattcEvtTimeout,)
+
+    def __init__(self):
+        self.events = []
+
+    def on_driver_event(self, nrf_driver, event):
+        self.events.append(event)
+
+
+class TestEventFilter(SimDeviceTestCase):
+    def setUp(self):
+        super(TestEventFilter, self).setUp()
+        previous_level = device_logger.level
+        self.addCleanup(device_logger.setLevel, previous_level)
+        device_logger.setLevel(logging.INFO)
+        self.device = self.open_device("DEVICE " + self.id())
+        self.observer = _RecordingObserver()
+        self.device.ble_driver.observer_register(self.observer)
+
+    def _process_event(self, ble_event):
+        # Handled synchronously instead of through the driver's event thread so nothing is in flight once it returns
+        event = self.device.ble_driver._decode_ble_event(ble_event)
+        if event is not None:
+            self.device.ble_driver._process_ble_event(event)
+
+    def _process_timeout(self):
+        ble_event, params = _gattc_event(constants.BLE_GATTC_EVT_TIMEOUT, 0)
+        params.timeout.src = constants.BLE_GATT_TIMEOUT_SRC_PROTOCOL
+        self._process_event(ble_event)
+
+    def _process_hvx(self):
+        ble_event, params = _gattc_event(constants.BLE_GATTC_EVT_HVX, 0)
+        params.hvx.handle = 0x10
+        params.hvx.type = constants.BLE_GATT_HVX_NOTIFICATION
+        params.hvx.data = b"\x01"
+        params.hvx.len = 1
+        self._process_event(ble_event)
+
+    def _decoded_hvx_count(self):
+        return len([e for e in self.observer.events if isinstance(e, nrf_events.GattcEvtHvx)])
+
+    def test_default_device_skips_unsubscribed_event(self):
+        self._process_hvx()
+        self.assertEqual(0, self._decoded_hvx_count())
+
+    def test_subscribed_event_decoded(self):
+        self.device.ble_driver.event_subscribe(lambda d, e: None, nrf_events.GattcEvtHvx)
+        self._process_hvx()
+        self.assertEqual(1, self._decoded_hvx_count())
+
+    def test_all_events_decoded_once_debug_logging_enabled(self):
+        device_logger.setLevel(logging.DEBUG)
+        # The event logger picks up the new level with the next event that is decoded
+        self._process_timeout()
+        self._process_hvx()
+        self.assertEqual(1, self._decoded_hvx_count())
+
+    def test_unsubscribed_events_skipped_again_once_debug_logging_disabled(self):
+        device_logger.setLevel(logging.DEBUG)
+        self._process_timeout()
+        device_logger.setLevel(logging.INFO)
+        self._process_timeout()
+        self._process_hvx()
+        self.assertEqual(0, self._decoded_hvx_count())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests of a BleDevice whose driver runs in a worker process
+"""
+import multiprocessing.dummy
+import os
+import time
+import unittest
+from unittest import mock
+
+from blatann.gatt import gatts
+from blatann.nrf import nrf_process_driver
+
+from tests.sim.base import SimDeviceTestCase, SimTestCase, SERVICE_UUID
+
+
+class TestProcessDriver(SimDeviceTestCase):
+    def setUp(self):
+        super(TestProcessDriver, self).setUp()
+        self.device = self.open_device("PROC " + self.id(), process_isolated=True)
+
+    def test_driver_runs_in_worker_process(self):
+        self.assertNotIn(self.device.ble_driver.worker_pid, (None, os.getpid()))
+
+    def test_worker_stopped_on_close(self):
+        self.device.close()
+        self.assertIsNone(self.device.ble_driver.worker_pid)
+
+    def test_api_output_arguments_copied_back(self):
+        # Adding a service and characteristic fills in the handles of the structs given to the driver
+        service = self.device.database.add_service(SERVICE_UUID)
+        props = gatts.GattsCharacteristicProperties(read=True, notify=True)
+        char = service.add_characteristic(SERVICE_UUID.new_uuid_from_base(1), props, b"value")
+        self.assertGreater(char.value_handle, service.start_handle)
+
+    def test_events_forwarded_from_worker(self):
+        timed_out = []
+        self.device.scanner.on_scan_timeout.register(lambda d, r: timed_out.append(r))
+        self.device.scanner.set_default_scan_params(timeout_seconds=1)
+        self.device.scanner.start_scan().wait(5)
+        self.assertEqual(1, len(timed_out))
+
+
+class TestProcessDriverConnection(SimTestCase):
+    periph_device_kwargs = dict(process_isolated=True)
+    periph_config = central_config = dict(att_mtu_max_size=100)
+    mtu_size = 100
+
+    def setUp(self):
+        # Runs the worker on a thread instead, so its simulated adapter shares the air with the central.
+        # Everything else, including the ring and the forwarded events table, is the same as with a worker process
+        patcher = mock.patch.object(nrf_process_driver.ProcessDriver, "_worker_context", multiprocessing.dummy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super(TestProcessDriverConnection, self).setUp()
+
+    def test_connect_and_exchange_mtu(self):
+        # Holds up the lane of the peripheral's first connection, so the worker receives the MTU request
+        # before the connected event was dispatched and the peer subscribed its handlers
+        self.periph.ble_driver.configure_connection_executor(2)
+        self.periph.ble_driver._connection_executor.submit(0, time.sleep, 0.2)
+        peer = self.connect()
+        self.assertEqual(100, peer.mtu_size)
+        self.assertEqual(100, self.periph.client.mtu_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests of the GATT client's read by UUID over the simulated link
+"""
+import unittest
+
+from blatann.gatt import gatts, GattStatusCode
+from blatann.services.battery import add_battery_service
+from blatann.uuid import Uuid16
+
+from tests.sim.base import SimTestCase, SERVICE_UUID, TIMEOUT
+
+
+class TestReadByUuid(SimTestCase):
+    def setUp(self):
+        super(TestReadByUuid, self).setUp()
+        add_battery_service(self.periph.database).set_battery_level(77)
+        service = self.add_service()
+        self.uuid = SERVICE_UUID.new_uuid_from_base(1)
+        props = gatts.GattsCharacteristicProperties(read=True, max_length=40)
+        # Values of the same length come back in a single response
+        self.chars = [service.add_characteristic(self.uuid, props, bytes([i]) * 3) for i in range(3)]
+        self.chars.append(service.add_characteristic(self.uuid, props, b"longer value"))
+        self.long_uuid = SERVICE_UUID.new_uuid_from_base(2)
+        self.long_char = service.add_characteristic(self.long_uuid, props, bytes(range(30)))
+        self.connect()
+
+    def read_by_uuid(self, uuid, *args):
+        sender, event_args = self.peer.read_by_uuid(uuid, *args).wait(TIMEOUT)
+        self.assertIs(self.peer, sender)
+        return event_args
+
+    def test_read_found(self):
+        event_args = self.read_by_uuid(Uuid16(0x2A19))
+        self.assertEqual(GattStatusCode.success, event_args.status)
+        self.assertEqual([bytes([77])], [c.value for c in event_args.characteristics])
+
+    def test_read_multiple_found(self):
+        event_args = self.read_by_uuid(self.uuid)
+        self.assertEqual(GattStatusCode.success, event_args.status)
+        self.assertEqual([c.value for c in self.chars], [c.value for c in event_args.characteristics])
+        self.assertEqual([c.value_handle for c in self.chars], [c.value_handle for c in event_args.characteristics])
+
+    def test_read_handle_range(self):
+        event_args = self.read_by_uuid(self.uuid, (self.chars[1].value_handle, self.chars[2].value_handle))
+        self.assertEqual(GattStatusCode.success, event_args.status)
+        self.assertEqual([c.value for c in self.chars[1:3]], [c.value for c in event_args.characteristics])
+
+    def test_read_not_found(self):
+        event_args = self.read_by_uuid(Uuid16(0x2A29))
+        self.assertEqual(GattStatusCode.attribute_not_found, event_args.status)
+        self.assertEqual([], event_args.characteristics)
+
+    def test_read_back_partial_characteristic(self):
+        event_args = self.read_by_uuid(self.uuid)
+        remote_char = self.peer.database.find_characteristic(self.uuid)
+        self.assertIs(event_args.characteristics[0], remote_char)
+        self.chars[0].set_value(b"new")
+        _, read_args = remote_char.read().wait(TIMEOUT)
+        self.assertEqual(b"new", read_args.value)
+        self.assertEqual(b"new", remote_char.value)
+
+    def test_partial_characteristics_replaced_by_discovered(self):
+        self.read_by_uuid(self.uuid)
+        partial_char = self.peer.database.find_characteristic(self.uuid)
+        partial_reads = []
+        partial_char.on_read_complete.register(lambda c, e: partial_reads.append(e))
+
+        self.peer.discover_services().wait(TIMEOUT)
+        remote_chars = [c for c in self.peer.database.iter_characteristics() if c.uuid == self.uuid]
+        self.assertEqual(4, len(remote_chars))
+        self.assertIsNot(partial_char, remote_chars[0])
+        # The replaced characteristic no longer follows the peer's value
+        self.assertNotIn(partial_char._on_indication_notification,
+                         self.peer._connection_based_driver_event_handlers)
+        remote_chars[0].read().wait(TIMEOUT)
+        self.assertEqual([], partial_reads)
+
+    def test_truncated_value_not_cached(self):
+        # Values are truncated to MTU - 4 bytes
+        truncated_value = self.long_char.value[:self.peer.mtu_size - 4]
+        event_args = self.read_by_uuid(self.long_uuid)
+        self.assertEqual([truncated_value], [c.value for c in event_args.characteristics])
+
+        self.peer.discover_services().wait(TIMEOUT)
+        remote_char = self.peer.database.find_characteristic(self.long_uuid)
+        remote_char.read().wait(TIMEOUT)
+        self.assertEqual(self.long_char.value, remote_char.value)
+        event_args = self.read_by_uuid(self.long_uuid)
+        self.assertEqual([remote_char], event_args.characteristics)
+        self.assertEqual(self.long_char.value, remote_char.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Tests of the GATT client's batched reads (Read Multiple) over the simulated link
+"""
+import unittest
+
+from blatann.gatt import gatts, GattStatusCode
+from blatann.nrf import nrf_events
+from blatann.waitables import wait_all
+
+from tests.sim.base import SimTestCase, SERVICE_UUID, TIMEOUT
+
+
+class _ReadMultipleTestCase(SimTestCase):
+    link_interval_ms = 0
+    value_length = 4
+    char_count = 20
+
+    def setUp(self):
+        super(_ReadMultipleTestCase, self).setUp()
+        service = self.add_service()
+        props = gatts.GattsCharacteristicProperties(read=True, max_length=20, variable_length=True)
+        self.chars = [service.add_characteristic(SERVICE_UUID.new_uuid_from_base(i + 1), props,
+                                                 bytes([i]) * self.value_length)
+                      for i in range(self.char_count)]
+        self.batches = []
+        self.central.ble_driver.event_subscribe(lambda d, e: self.batches.append(e),
+                                                nrf_events.GattcEvtCharValuesReadResponse)
+        peer = self.connect(discover=True)
+        self.remote_chars = [peer.database.find_characteristic(c.uuid) for c in self.chars]
+
+    def read_all(self, fixed_length=True):
+        results = wait_all(self.peer.database.read_multiple(self.remote_chars, fixed_length), TIMEOUT)
+        for (remote_char, event_args), char in zip(results, self.chars):
+            self.assertEqual(GattStatusCode.success, event_args.status)
+            self.assertEqual(char.value, event_args.value)
+            self.assertEqual(char.value, remote_char.value)
+
+
+class TestReadMultiple(_ReadMultipleTestCase):
+    periph_config = central_config = dict(att_mtu_max_size=50)
+    mtu_size = 50
+
+    def test_read_individually_until_lengths_known(self):
+        self.read_all()
+        self.assertEqual([], self.batches)
+
+    def test_fixed_length_values_batched(self):
+        self.read_all()
+        self.read_all()
+        # 20 values of 4 bytes, in responses shorter than the 49 bytes the MTU allows
+        self.assertEqual([48, 32], [len(e.data) for e in self.batches])
+
+    def test_variable_length_values_read_individually(self):
+        self.read_all(fixed_length=False)
+        self.read_all(fixed_length=False)
+        self.assertEqual([], self.batches)
+
+    def test_batch_read_individually_when_value_changes_length(self):
+        self.read_all()
+        self.chars[3].set_value(b"\x33" * 7)
+        self.read_all()
+        # The first batch does not match the expected lengths and is read again one by one
+        self.assertEqual(2, len(self.batches))
+        self.assertEqual(b"\x33" * 7, self.remote_chars[3].value)
+
+
+class TestReadMultipleTruncated(_ReadMultipleTestCase):
+    # Two 10 byte values fit into a response of at most 22 bytes at the default MTU
+    value_length = 10
+    char_count = 2
+
+    def test_value_grown_to_truncated_response_length(self):
+        self.read_all()
+        self.read_all()
+        self.assertEqual(1, len(self.batches))
+        # The response is cut off at 22 bytes, which no longer matches the expected 20 bytes
+        self.chars[0].set_value(b"\xaa" * 12)
+        self.read_all()
+        self.assertEqual(22, len(self.batches[1].data))
+        self.assertEqual([b"\xaa" * 12, b"\x01" * 10], [c.value for c in self.remote_chars])
+
+
+if __name__ == '__main__':
+    unittest.main()
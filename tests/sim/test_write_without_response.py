@@ -0,0 +1,79 @@
+"""
+Tests of the GATT client's write without response over the simulated link
+"""
+import unittest
+
+from blatann.event_args import GattOperationCompleteReason
+from blatann.gatt import gatts, GattStatusCode
+from blatann.nrf import nrf_sim, nrf_types
+
+from tests.sim.base import SimTestCase, SERVICE_UUID, TIMEOUT, wait_for
+
+TX_QUEUE_SIZE = 4
+DATA = bytes(range(256)) * 10
+
+
+class TestWriteWithoutResponse(SimTestCase):
+    periph_config = central_config = dict(att_mtu_max_size=247, write_cmd_tx_queue_size=TX_QUEUE_SIZE)
+    mtu_size = 247
+
+    def setUp(self):
+        super(TestWriteWithoutResponse, self).setUp()
+        props = gatts.GattsCharacteristicProperties(read=True, write=True, write_no_response=True, max_length=244)
+        self.char = self.add_service().add_characteristic(SERVICE_UUID.new_uuid_from_base(1), props, b"\x00")
+        self.received = []
+        self.char.on_write.register(lambda c, e: self.received.append(bytes(e.value)))
+        self.central.configure_stats(api_call_stats=True)
+        self.remote_char = self.connect(discover=True).database.find_characteristic(self.char.uuid)
+
+    def _write_errors(self):
+        api_calls = self.central.stats.api_calls.api_calls
+        return api_calls["ble_gattc_write"].errors
+
+    def test_characteristic_writable_without_response(self):
+        self.assertTrue(self.remote_char.writable_without_response)
+
+    def test_data_split_into_mtu_sized_packets(self):
+        _, event_args = self.remote_char.write_without_response(DATA).wait(TIMEOUT)
+        self.assertEqual(GattStatusCode.success, event_args.status)
+        self.assertTrue(wait_for(lambda: len(self.received) == 11))
+        self.assertEqual([244] * 10 + [120], [len(r) for r in self.received])
+        self.assertEqual(DATA, b"".join(self.received))
+
+    def test_tx_queue_refilled_as_packets_are_sent(self):
+        # 33 packets through a TX queue of 4, without ever overfilling the SoftDevice's queue
+        waitables = [self.remote_char.write_without_response(DATA) for _ in range(3)]
+        for waitable in waitables:
+            _, event_args = waitable.wait(TIMEOUT)
+            self.assertEqual(GattStatusCode.success, event_args.status)
+        self.assertTrue(wait_for(lambda: len(self.received) == 33))
+        self.assertEqual(DATA * 3, b"".join(self.received))
+        self.assertEqual({}, self._write_errors())
+
+    def test_backs_off_when_softdevice_queue_full(self):
+        # Slow the link down so the packets sent outside of the manager are still queued in the SoftDevice
+        nrf_sim.configure_link(interval_ms=50, packets_per_event=1)
+        for _ in range(2):
+            self.central.ble_driver.ble_gattc_write(self.peer.conn_handle, self._write_cmd_params(b"\xff"))
+        _, event_args = self.remote_char.write_without_response(DATA).wait(TIMEOUT)
+        self.assertEqual(GattStatusCode.success, event_args.status)
+        self.assertIn(nrf_types.NrfError.resources.value, self._write_errors())
+        self.assertTrue(wait_for(lambda: len(self.received) == 13))
+        self.assertEqual(b"\xff\xff" + DATA, b"".join(self.received))
+
+    def test_queued_writes_cleared_on_disconnect(self):
+        nrf_sim.configure_link(interval_ms=50, packets_per_event=1)
+        waitable = self.remote_char.write_without_response(DATA)
+        self.peer.disconnect().wait(TIMEOUT)
+        _, event_args = waitable.wait(TIMEOUT)
+        self.assertEqual(GattOperationCompleteReason.SERVER_DISCONNECTED, event_args.reason)
+        self.assertLess(len(self.received), 11)
+
+    def _write_cmd_params(self, data):
+        return nrf_types.BLEGattcWriteParams(nrf_types.BLEGattWriteOperation.write_cmd,
+                                             nrf_types.BLEGattExecWriteFlag.unused,
+                                             self.remote_char.value_handle, data, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Tests of the BleDevicePool's load balancing, scan merging and metrics.
+
+The pool only uses the devices' public API, so the devices here are stubs which track connections and
+emit scan events without a driver
+"""
+import unittest
+from types import SimpleNamespace
+
+from blatann import exceptions
+from blatann.device_pool import BleDevicePool
+from blatann.event_type import EventSource
+
+
+class _StubScanner(object):
+    def __init__(self, device):
+        self.device = device
+        self.on_scan_received = EventSource("On Scan Received")
+        self.on_scan_timeout = EventSource("On Scan Timeout")
+        self.scan_report = SimpleNamespace(advertising_peers_found=[])
+        self.is_scanning = False
+
+    def start_scan(self, scan_parameters=None, clear_scan_reports=True):
+        if clear_scan_reports:
+            self.scan_report.advertising_peers_found = []
+        self.is_scanning = True
+
+    def stop(self):
+        self.is_scanning = False
+
+    def receive(self, peer_address, raw_bytes, rssi=-60):
+        report = SimpleNamespace(peer_address=peer_address, packet_type=0, raw_bytes=raw_bytes, rssi=rssi)
+        self.scan_report.advertising_peers_found.append(report)
+        self.on_scan_received.notify(self.device, report)
+
+    def time_out(self):
+        self.is_scanning = False
+        self.on_scan_timeout.notify(self.device, self.scan_report)
+
+
+class _StubDevice(object):
+    def __init__(self, name, max_connected_peripherals):
+        self.ble_driver = SimpleNamespace(serial_port=name, is_open=True)
+        self.max_connected_peripherals = max_connected_peripherals
+        self.connected_peripherals = {}
+        self.connecting_peripheral = None
+        self.scanner = _StubScanner(self)
+
+    def connect(self, peer_address, connection_params=None):
+        self.connecting_peripheral = SimpleNamespace(peer_address=peer_address)
+        return self.connecting_peripheral
+
+    def complete_connection(self):
+        self.connected_peripherals[self.connecting_peripheral.peer_address] = self.connecting_peripheral
+        self.connecting_peripheral = None
+
+    def disconnect(self, peer_address):
+        del self.connected_peripherals[peer_address]
+
+
+class TestDevicePoolConnections(unittest.TestCase):
+    def setUp(self):
+        self.dev1 = _StubDevice("DEV1", 2)
+        self.dev2 = _StubDevice("DEV2", 4)
+        self.pool = BleDevicePool([self.dev1, self.dev2])
+
+    def _connect(self, peer_address):
+        self.pool.connect(peer_address)
+        device = self.pool.device_for_peer(peer_address)
+        device.complete_connection()
+        return device
+
+    def test_connections_spread_by_relative_load(self):
+        devices = [self._connect("peer{}".format(i)) for i in range(6)]
+        # The lowest relative load wins, equal loads go to the adapter with fewer links
+        self.assertEqual([self.dev1, self.dev2, self.dev2, self.dev1, self.dev2, self.dev2], devices)
+
+    def test_adapter_busy_connecting_is_skipped(self):
+        self.pool.connect("peer0")
+        self.pool.connect("peer1")
+        self.assertIsNot(self.pool.device_for_peer("peer0"), self.pool.device_for_peer("peer1"))
+        with self.assertRaises(exceptions.InvalidStateException):
+            self.pool.connect("peer2")
+
+    def test_full_pool_rejects_connections(self):
+        for i in range(6):
+            self._connect("peer{}".format(i))
+        with self.assertRaises(exceptions.InvalidStateException):
+            self.pool.connect("peer6")
+        self.assertEqual(1, self.pool.stats.connections_rejected)
+
+    def test_disconnect_frees_capacity(self):
+        for i in range(6):
+            self._connect("peer{}".format(i))
+        self.dev1.disconnect("peer0")
+        self.assertIs(self.dev1, self._connect("peer6"))
+
+    def test_already_connected_peer_is_rejected(self):
+        self._connect("peer0")
+        with self.assertRaises(exceptions.InvalidStateException):
+            self.pool.connect("peer0")
+
+    def test_capacity_override(self):
+        dev3 = _StubDevice("DEV3", 8)
+        self.pool.add_device(dev3, capacity=0)
+        for i in range(6):
+            self.assertIsNot(dev3, self._connect("peer{}".format(i)))
+
+    def test_stats(self):
+        for i in range(3):
+            self._connect("peer{}".format(i))
+        stats = self.pool.stats
+        self.assertEqual(3, stats.links)
+        self.assertEqual(6, stats.capacity)
+        self.assertEqual(0.5, stats.utilization)
+        self.assertEqual(3, stats.connections_initiated)
+        self.assertEqual([1, 2], [a.links for a in stats.adapters])
+
+
+class TestDevicePoolScanning(unittest.TestCase):
+    def setUp(self):
+        self.dev1 = _StubDevice("DEV1", 1)
+        self.dev2 = _StubDevice("DEV2", 1)
+        self.pool = BleDevicePool([self.dev1, self.dev2])
+        self.received = []
+        self.pool.on_scan_received.register(lambda pool, report: self.received.append(report))
+
+    def test_scan_starts_on_all_adapters(self):
+        self.pool.start_scan()
+        self.assertTrue(self.dev1.scanner.is_scanning and self.dev2.scanner.is_scanning)
+        self.pool.stop_scan()
+        self.assertFalse(self.dev1.scanner.is_scanning or self.dev2.scanner.is_scanning)
+        self.assertFalse(self.pool.is_scanning)
+
+    def test_reports_are_deduplicated_across_adapters(self):
+        self.pool.start_scan()
+        self.dev1.scanner.receive("peer0", b"\x01")
+        self.dev2.scanner.receive("peer0", b"\x01")
+        self.dev2.scanner.receive("peer0", b"\x02")
+        self.dev2.scanner.receive("peer1", b"\x01")
+        self.assertEqual([("peer0", b"\x01"), ("peer0", b"\x02"), ("peer1", b"\x01")],
+                         [(r.peer_address, r.raw_bytes) for r in self.received])
+        stats = self.pool.stats
+        self.assertEqual(4, stats.scan_reports_received)
+        self.assertEqual(3, stats.scan_reports_forwarded)
+
+    def test_new_scan_resets_deduplication(self):
+        self.pool.start_scan()
+        self.dev1.scanner.receive("peer0", b"\x01")
+        self.pool.start_scan()
+        self.dev2.scanner.receive("peer0", b"\x01")
+        self.assertEqual(2, len(self.received))
+
+    def test_scan_finishes_when_all_adapters_time_out(self):
+        waitable = self.pool.start_scan()
+        self.dev1.scanner.receive("peer0", b"\x01", rssi=-80)
+        self.dev2.scanner.receive("peer0", b"\x01", rssi=-40)
+        self.dev1.scanner.time_out()
+        self.assertTrue(self.pool.is_scanning)
+        self.dev2.scanner.time_out()
+        self.assertFalse(self.pool.is_scanning)
+        peers = waitable.wait(0)
+        self.assertEqual(1, len(peers))
+        self.assertEqual(-40, peers[0].rssi)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Tests of the ordering and overflow handling of the driver's event queue
+"""
+import unittest
+
+from blatann.nrf.nrf_event_queue import EventQueue, EventPriority, OverflowPolicy
+
+
+class TestEventQueueOrdering(unittest.TestCase):
+    def test_normal_events_keep_their_order(self):
+        q = EventQueue()
+        events = ["hvx", "write", "authorize", "disconnect"]
+        for e in events:
+            q.put(e)
+        self.assertEqual(events, list(q.get_batch()))
+
+    def test_normal_events_overtake_low_priority_events(self):
+        q = EventQueue()
+        q.put("adv 1", EventPriority.low)
+        q.put("hvx", EventPriority.normal)
+        q.put("adv 2", EventPriority.low)
+        q.put("disconnect", EventPriority.normal)
+        self.assertEqual(["hvx", "disconnect", "adv 1", "adv 2"], list(q.get_batch()))
+
+
+class TestEventQueueOverflow(unittest.TestCase):
+    def test_normal_events_are_never_dropped(self):
+        q = EventQueue(max_size=2)
+        for i in range(5):
+            q.put(i)
+        self.assertEqual(list(range(5)), list(q.get_batch()))
+        self.assertEqual(0, q.get_stats().dropped)
+
+    def test_normal_event_pushes_out_oldest_low_priority_event(self):
+        q = EventQueue(max_size=2)
+        q.put("adv 1", EventPriority.low)
+        q.put("adv 2", EventPriority.low)
+        q.put("hvx")
+        self.assertEqual(["hvx", "adv 2"], list(q.get_batch()))
+        self.assertEqual(1, q.get_stats().dropped)
+
+    def test_coalesce_replaces_queued_event_with_same_key(self):
+        q = EventQueue(overflow_policy=OverflowPolicy.coalesce)
+        q.put("device a 1", EventPriority.low, "a")
+        q.put("device b 1", EventPriority.low, "b")
+        q.put("device a 2", EventPriority.low, "a")
+        self.assertEqual(["device a 2", "device b 1"], list(q.get_batch()))
+        self.assertEqual(1, q.get_stats().coalesced)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Checks that importing the blatann package does not load the heavy modules, each import runs in a fresh interpreter.
+
+The import times themselves depend on the machine, they are measured by the benchmark
+tests/benchmarks/bench_import_time.py instead
+"""
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Not imported from blatann.nrf.nrf_dll_load, which loads the driver
+BACKEND_ENV_VAR = "BLATANN_DRIVER_BACKEND"
+
+
+def _import(statement, backend="sim"):
+    """
+    Runs the import statement in a new interpreter
+
+    :param backend: The driver backend to select, None for the default (pc-ble-driver-py)
+    :return: The names of all the modules loaded
+    """
+    code = "{}\nimport sys\nprint('\\n'.join(sys.modules))".format(statement)
+    env = dict(os.environ)
+    env.pop(BACKEND_ENV_VAR, None)
+    if backend is not None:
+        env[BACKEND_ENV_VAR] = backend
+    process = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                             stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return set(process.stdout.split())
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_package_import_is_lazy(self):
+        # With the default backend, the driver must not be loaded until a device is created
+        modules = _import("import blatann", backend=None)
+        for module in ["blatann.device", "blatann.nrf", "blatann.gap.smp_crypto", "cryptography",
+                       "pc_ble_driver_py"]:
+            self.assertFalse(module in modules, "{} was imported".format(module))
+
+    def test_package_attributes_load_on_access(self):
+        modules = _import("import blatann\nblatann.BleDevice\nblatann.utils.setup_logger")
+        for module in ["blatann.device", "blatann.utils"]:
+            self.assertTrue(module in modules, "{} was not imported".format(module))
+
+    def test_device_import_does_not_load_crypto(self):
+        # Only needed once pairing starts or a bonded peer's private address has to be resolved
+        modules = _import("from blatann import BleDevice")
+        for module in ["blatann.gap.smp_crypto", "cryptography"]:
+            self.assertFalse(module in modules, "{} was imported".format(module))
+
+
+if __name__ == '__main__':
+    unittest.main()
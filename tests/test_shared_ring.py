@@ -0,0 +1,81 @@
+"""
+Tests of the shared memory ring buffer the process-isolated driver passes its events through
+"""
+import multiprocessing
+import random
+import threading
+import unittest
+
+from blatann.nrf.nrf_shared_ring import SharedRingBuffer
+
+
+def _random_records(count, max_size, seed):
+    rng = random.Random(seed)
+    return [bytes(rng.getrandbits(8) for _ in range(rng.randint(0, max_size))) for _ in range(count)]
+
+
+def _produce(ring_handle, count, max_size, seed):
+    ring = SharedRingBuffer.attach(ring_handle)
+    for record in _random_records(count, max_size, seed):
+        ring.put(record)
+    ring.close()
+
+
+class TestSharedRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.context = multiprocessing.get_context("spawn")
+        self.ring = SharedRingBuffer.create(1000, self.context)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_records_wrap_around_in_order(self):
+        producer = SharedRingBuffer.attach(self.ring.handle)
+        # Sizes which don't divide the capacity, so records regularly hit the end of the data area
+        records = [bytes([i % 256]) * (i % 37) for i in range(500)]
+        received = []
+        for record in records:
+            producer.put(record)
+            received.append(self.ring.get(1))
+        producer.close()
+        self.assertEqual(records, received)
+
+    def test_get_times_out_when_empty(self):
+        self.assertIsNone(self.ring.get(0.01))
+
+    def test_full_ring_waits_for_consumer(self):
+        producer = SharedRingBuffer.attach(self.ring.handle)
+        records = _random_records(200, 300, seed=1)
+        thread = threading.Thread(target=lambda: [producer.put(r) for r in records])
+        thread.start()
+        received = [self.ring.get(5) for _ in records]
+        thread.join()
+        self.assertEqual(records, received)
+        self.assertGreater(producer.stats.full_waits, 0)
+        self.assertEqual(len(records), producer.stats.records)
+        producer.close()
+
+    def test_put_aborts_when_stopped(self):
+        producer = SharedRingBuffer.attach(self.ring.handle)
+        stop = threading.Event()
+        self.assertTrue(producer.put(b"\x00" * 900, stop))
+        stop.set()
+        self.assertFalse(producer.put(b"\x00" * 900, stop))
+        producer.close()
+
+    def test_record_larger_than_ring(self):
+        with self.assertRaises(ValueError):
+            self.ring.put(b"\x00" * 1000)
+
+    def test_records_from_another_process(self):
+        count, max_size, seed = 2000, 200, 2
+        process = self.context.Process(target=_produce, args=(self.ring.handle, count, max_size, seed))
+        process.start()
+        received = [self.ring.get(10) for _ in range(count)]
+        process.join(10)
+        self.assertEqual(0, process.exitcode)
+        self.assertEqual(_random_records(count, max_size, seed), received)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+"""
+Tests of the Waitable core: waiting, callbacks and the conversions to concurrent.futures and asyncio futures
+"""
+import asyncio
+import concurrent.futures
+import threading
+import unittest
+from types import SimpleNamespace
+
+from blatann import aio
+from blatann.event_type import EventSource
+from blatann.exceptions import TimeoutError
+from blatann.waitables.event_waitable import EventWaitable, IdBasedEventWaitable
+from blatann.waitables.waitable import GenericWaitable, EmptyWaitable
+
+
+class _TrackedWaitable(GenericWaitable):
+    def __init__(self, n_args=1):
+        super(_TrackedWaitable, self).__init__(n_args)
+        self.timed_out = False
+
+    def _on_timeout(self):
+        self.timed_out = True
+
+
+class TestWaitable(unittest.TestCase):
+    def test_wait_returns_results(self):
+        waitable = GenericWaitable(n_args=2)
+        self.assertFalse(waitable.done())
+        waitable.notify("sender", "args")
+        self.assertTrue(waitable.done())
+        self.assertEqual(("sender", "args"), waitable.wait(0))
+        # The results are kept, waiting again returns them again
+        self.assertEqual(("sender", "args"), waitable.wait(0))
+
+    def test_single_result_is_unwrapped(self):
+        waitable = GenericWaitable()
+        waitable.notify(5)
+        self.assertEqual(5, waitable.wait())
+
+    def test_first_notification_wins(self):
+        waitable = GenericWaitable()
+        waitable.notify(1)
+        waitable.notify(2)
+        self.assertEqual(1, waitable.wait(0))
+
+    def test_wait_from_another_thread(self):
+        waitable = GenericWaitable()
+        timer = threading.Timer(0.05, waitable.notify, args=(3,))
+        timer.start()
+        self.assertEqual(3, waitable.wait(5))
+        timer.join()
+
+    def test_several_threads_waiting(self):
+        waitable = GenericWaitable()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(waitable.wait(5))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        waitable.notify(7)
+        for t in threads:
+            t.join()
+        self.assertEqual([7] * 4, results)
+
+    def test_timeout(self):
+        waitable = _TrackedWaitable(n_args=2)
+        with self.assertRaises(TimeoutError):
+            waitable.wait(0.01)
+        self.assertTrue(waitable.timed_out)
+        self.assertEqual([None, None], waitable.wait(0, exception_on_timeout=False))
+
+    def test_callbacks_called_in_order(self):
+        waitable = GenericWaitable(n_args=2)
+        calls = []
+        waitable.then(lambda s, e: calls.append(("first", s, e))).then(lambda s, e: calls.append(("second", s, e)))
+        waitable.notify("sender", "args")
+        self.assertEqual([("first", "sender", "args"), ("second", "sender", "args")], calls)
+
+    def test_callback_after_completion_called_immediately(self):
+        waitable = GenericWaitable()
+        waitable.notify(1)
+        calls = []
+        waitable.then(calls.append)
+        self.assertEqual([1], calls)
+
+    def test_failing_callback_does_not_stop_others(self):
+        waitable = GenericWaitable()
+        calls = []
+
+        def fail(result):
+            raise RuntimeError("Callback failure")
+
+        waitable.then(fail).then(calls.append)
+        with self.assertLogs("blatann.waitables.waitable", "ERROR"):
+            waitable.notify(1)
+        self.assertEqual([1], calls)
+
+    def test_non_callable_callback(self):
+        with self.assertRaises(ValueError):
+            GenericWaitable().then(5)
+
+    def test_empty_waitable(self):
+        waitable = EmptyWaitable("sender", "args")
+        self.assertTrue(waitable.done())
+        self.assertEqual(("sender", "args"), waitable.wait())
+
+
+class TestWaitableFutures(unittest.TestCase):
+    def test_to_future(self):
+        waitable = GenericWaitable(n_args=2)
+        future = waitable.to_future()
+        self.assertFalse(future.done())
+        waitable.notify("sender", "args")
+        self.assertEqual(("sender", "args"), future.result(0))
+
+    def test_cancelled_future_cleans_up(self):
+        waitable = _TrackedWaitable()
+        future = waitable.to_future()
+        future.cancel()
+        self.assertTrue(waitable.timed_out)
+        waitable.notify(1)
+        with self.assertRaises(concurrent.futures.CancelledError):
+            future.result(0)
+
+    def test_await(self):
+        waitable = GenericWaitable()
+
+        async def wait():
+            asyncio.get_running_loop().call_later(0.01, threading.Thread(target=waitable.notify, args=(4,)).start)
+            return await waitable
+
+        self.assertEqual(4, asyncio.run(wait()))
+
+    def test_await_timeout_cleans_up(self):
+        waitable = _TrackedWaitable()
+
+        async def wait():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(waitable, 0.01)
+
+        asyncio.run(wait())
+
+    def test_aio_wait(self):
+        waitable = GenericWaitable(n_args=2)
+
+        async def wait():
+            asyncio.get_running_loop().call_later(0.01, threading.Thread(target=waitable.notify,
+                                                                         args=("sender", "args")).start)
+            return await aio.wait(waitable, 5)
+
+        self.assertEqual(("sender", "args"), asyncio.run(wait()))
+
+    def test_aio_wait_timeout_cleans_up(self):
+        waitable = _TrackedWaitable()
+
+        async def wait():
+            with self.assertRaises(TimeoutError):
+                await aio.wait(waitable, 0.01)
+
+        asyncio.run(wait())
+        self.assertTrue(waitable.timed_out)
+
+    def test_aio_wait_cancelled_cleans_up(self):
+        waitable = _TrackedWaitable()
+
+        async def wait():
+            task = asyncio.ensure_future(aio.wait(waitable))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(wait())
+        self.assertTrue(waitable.timed_out)
+        self.assertTrue(waitable.timed_out)
+
+
+class TestEventWaitables(unittest.TestCase):
+    def test_event_waitable(self):
+        event = EventSource("Test")
+        waitable = EventWaitable(event)
+        event.notify("sender", "args")
+        event.notify("sender", "ignored")
+        self.assertEqual(("sender", "args"), waitable.wait(0))
+
+    def test_id_based_waitables_complete_by_id(self):
+        event = EventSource("Test")
+        completions = [SimpleNamespace(id=i) for i in range(3)]
+        waitables = [IdBasedEventWaitable(event, c.id) for c in completions]
+        event.notify("sender", completions[1])
+        self.assertEqual([False, True, False], [w.done() for w in waitables])
+        self.assertIs(completions[1], waitables[1].wait(0)[1])
+
+    def test_id_based_waitable_timeout_deregisters(self):
+        event = EventSource("Test")
+        waitable = IdBasedEventWaitable(event, 1)
+        waitable.wait(0, exception_on_timeout=False)
+        self.assertEqual({}, event._id_handlers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests of wait_all, wait_any and as_completed
+"""
+import threading
+import unittest
+
+from blatann.exceptions import TimeoutError
+from blatann.waitables import wait_all, wait_any, as_completed
+from blatann.waitables.waitable import GenericWaitable, EmptyWaitable
+
+
+class _TrackedWaitable(GenericWaitable):
+    def __init__(self, n_args=1):
+        super(_TrackedWaitable, self).__init__(n_args)
+        self.timed_out = False
+
+    def _on_timeout(self):
+        self.timed_out = True
+
+
+def _notify_later(waitable, result, delay=0.01):
+    timer = threading.Timer(delay, waitable.notify, args=(result,))
+    timer.start()
+    return timer
+
+
+class TestWaitAll(unittest.TestCase):
+    def test_results_in_given_order(self):
+        waitables = [GenericWaitable() for _ in range(50)]
+        notifier = threading.Thread(target=lambda: [w.notify(i) for i, w in reversed(list(enumerate(waitables)))])
+        notifier.start()
+        self.assertEqual(list(range(50)), wait_all(waitables, timeout=5))
+        notifier.join()
+
+    def test_already_completed(self):
+        waitable = GenericWaitable()
+        waitable.notify(1)
+        self.assertEqual([1, ("sender", "args")], wait_all([waitable, EmptyWaitable("sender", "args")], 0))
+
+    def test_empty(self):
+        self.assertEqual([], wait_all([], 0))
+
+    def test_timeout_cleans_up_pending(self):
+        done, pending = _TrackedWaitable(), _TrackedWaitable(n_args=2)
+        done.notify(1)
+        with self.assertRaises(TimeoutError):
+            wait_all([done, pending], timeout=0.01)
+        self.assertFalse(done.timed_out)
+        self.assertTrue(pending.timed_out)
+
+    def test_timeout_without_exception(self):
+        done, pending = GenericWaitable(), GenericWaitable(n_args=2)
+        done.notify(1)
+        self.assertEqual([1, [None, None]], wait_all([done, pending], 0.01, exception_on_timeout=False))
+
+
+class TestWaitAny(unittest.TestCase):
+    def test_first_completed(self):
+        waitables = [_TrackedWaitable() for _ in range(3)]
+        timer = _notify_later(waitables[2], "result")
+        self.assertIs(waitables[2], wait_any(waitables, timeout=5))
+        self.assertEqual("result", waitables[2].wait(0))
+        self.assertFalse(any(w.timed_out for w in waitables))
+        timer.join()
+
+    def test_callbacks_removed_from_pending(self):
+        waitables = [GenericWaitable() for _ in range(3)]
+        callback = lambda result: None
+        waitables[0].then(callback)
+        timer = _notify_later(waitables[2], "result")
+        self.assertIs(waitables[2], wait_any(waitables, timeout=5))
+        timer.join()
+        self.assertEqual([callback], waitables[0]._callbacks)
+        self.assertFalse(waitables[1]._callbacks)
+
+    def test_timeout(self):
+        waitables = [_TrackedWaitable() for _ in range(3)]
+        self.assertIsNone(wait_any(waitables, 0.01, exception_on_timeout=False))
+        self.assertTrue(all(w.timed_out for w in waitables))
+        with self.assertRaises(TimeoutError):
+            wait_any(waitables, 0)
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            wait_any([])
+
+
+class TestAsCompleted(unittest.TestCase):
+    def test_completion_order(self):
+        waitables = [GenericWaitable() for _ in range(4)]
+        waitables[3].notify(3)
+        iterator = as_completed(waitables, timeout=5)
+        self.assertIs(waitables[3], next(iterator))
+        timers = [_notify_later(waitables[i], i, delay) for i, delay in ((1, 0.01), (0, 0.05), (2, 0.1))]
+        self.assertEqual([waitables[1], waitables[0], waitables[2]], list(iterator))
+        for t in timers:
+            t.join()
+
+    def test_timeout(self):
+        waitables = [_TrackedWaitable() for _ in range(2)]
+        waitables[0].notify(0)
+        iterator = as_completed(waitables, timeout=0.01)
+        self.assertIs(waitables[0], next(iterator))
+        with self.assertRaises(TimeoutError):
+            next(iterator)
+        self.assertTrue(waitables[1].timed_out)
+
+    def test_close_removes_callbacks_from_pending(self):
+        waitables = [GenericWaitable() for _ in range(3)]
+        waitables[0].notify(0)
+        iterator = as_completed(waitables, timeout=5)
+        self.assertIs(waitables[0], next(iterator))
+        iterator.close()
+        self.assertFalse(waitables[1]._callbacks)
+        self.assertFalse(waitables[2]._callbacks)
+
+
+if __name__ == '__main__':
+    unittest.main()